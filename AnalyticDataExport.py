@@ -23,20 +23,20 @@ import wx
 import os
 import Dialogs
 import Library
-import Document
-import Episode
-import Collection
-import Quote
-import Clip
 import DBInterface
 import FilterDialog
+import KeywordMatrix
 import TransanaConstants
-import TransanaExceptions
 import TransanaGlobal
 import Misc
 # import Python's codecs module to make reading and writing UTF-8 text files 
 import codecs
 
+# The Export Formats, in the order they appear in the Export Format choice box
+FORMAT_TSV = 0
+FORMAT_LONG = 1
+FORMAT_BINARY = 2
+
 
 class AnalyticDataExport(Dialogs.GenForm):
     """ This class creates the tab-delimited text file that is the Analytic Data Export. """
@@ -102,6 +102,23 @@ class AnalyticDataExport(Dialogs.GenForm):
         # Add a vertical spacer to the main sizer        
         mainSizer.Add((0, 10))
 
+        # Create a HORIZONTAL sizer for the next row
+        r3Sizer = wx.BoxSizer(wx.HORIZONTAL)
+        # Create a VERTICAL sizer for the next element
+        v2 = wx.BoxSizer(wx.VERTICAL)
+        # Export Format.  (The order of the choices must match the FORMAT_ constants.)
+        formats = [_('Tab-delimited Text, one column per Keyword (*.txt)'),
+                   _('Tab-delimited Text, one line per Keyword (*.txt)'),
+                   _('Sparse Binary Matrix (*.tkm)')]
+        self.exportFormat = self.new_choice_box(_("Export Format"), v2, formats, FORMAT_TSV)
+        # Add the element sizer to the row sizer
+        r3Sizer.Add(v2, 1, wx.EXPAND)
+        # Add the row sizer to the main vertical sizer
+        mainSizer.Add(r3Sizer, 0, wx.EXPAND)
+
+        # Add a vertical spacer to the main sizer        
+        mainSizer.Add((0, 10))
+
         # Create a sizer for the buttons
         btnSizer = wx.BoxSizer(wx.HORIZONTAL)
         # Add the buttons
@@ -148,107 +165,58 @@ class AnalyticDataExport(Dialogs.GenForm):
         quoteList = []
         # The Quote Lookup allows us to find the Quote Number based on the data from the Quote List
         quoteLookup = {}
+        # The Quote Records hold the data for each Quote, keyed by Quote Number
+        quoteRecords = {}
         # The Clip List is the list of Clips to be sent to the Filter Dialog
         clipList = []
         # The Clip Lookup allows us to find the Clip Number based on the data from the Clip List
         clipLookup = {}
+        # The Clip Records hold the data for each Clip, keyed by Clip Number
+        clipRecords = {}
         # The Keyword List is the list of Keywords to be sent to the Filter Dialog
         keywordList = []
         # Show a WAIT cursor.  Assembling the data can take noticable time in some cases.
         TransanaGlobal.menuWindow.SetCursor(wx.StockCursor(wx.CURSOR_WAIT))
 
+        # Get the ID and Parent of every Collection with a single query.  This lets us work out Collection nesting
+        # and the Collection Node Strings for the report without loading each Collection record.
+        collectionData = DBInterface.dictionary_of_collections()
+        # Quotes and Clips, and the Keywords applied to them, are each gathered with a single query for the
+        # report's scope, rather than one query per Quote or Clip.  Start with none of each.
+        quoteData = []
+        quoteKeywords = {}
+        clipData = []
+        clipKeywords = {}
+
         # If we have an Library Number, we set up the Library Analytic Data Export
         if self.libraryNum <> 0:
             # Get the Library record
             tempLibrary = Library.Library(self.libraryNum)
 
-            # obtain a list of all Documents in the Library
-            tempDocumentList = DBInterface.list_of_documents(tempLibrary.number)
-            # initialize the temporary Quote List
-            tempQuoteList = []
-            # iterate through the Document List ...
-            for documentRecord in tempDocumentList:
-                # ... and add each Document's Quotes to the Temporary Quote list
-                tempQuoteList += DBInterface.list_of_quotes_by_document(documentRecord[0])
-                # Add the Document data to the Filter Dialog's Document List
+            # Add all Documents in the Library to the Filter Dialog's Document List
+            for documentRecord in DBInterface.list_of_documents(tempLibrary.number):
                 documentList.append((documentRecord[1], tempLibrary.id, True))
-            # For all the Quotes ...
-            for quoteRecord in tempQuoteList:
-                # ... add the Quote to the Quote List for filtering ...
-                quoteList.append((quoteRecord['QuoteID'], quoteRecord['CollectNum'], True))
-                # ... retain a pointer to the Quote Number keyed to the Quote ID and Collection Number ...
-                quoteLookup[(quoteRecord['QuoteID'], quoteRecord['CollectNum'])] = quoteRecord['QuoteNum']
-                # ... now get all the keywords for this Quote ...
-                quoteKeywordList = DBInterface.list_of_keywords(Quote = quoteRecord['QuoteNum'])
-                # ... and iterate through the list of Quote keywords.
-                for quoteKeyword in quoteKeywordList:
-                    # If the keyword isn't already in the Keyword List ...
-                    if (quoteKeyword[0], quoteKeyword[1], True) not in keywordList:
-                        # ... add the keyword to the keyword list for filtering.
-                        keywordList.append((quoteKeyword[0], quoteKeyword[1], True))
-
-            # obtain a list of all Episodes in that Library
-            tempEpisodeList = DBInterface.list_of_episodes_for_series(tempLibrary.id)
-            # initialize the temporary clip List
-            tempClipList = []
-            # iterate through the Episode List ...
-            for episodeRecord in tempEpisodeList:
-                # ... and add each Episode's Clips to the Temporary clip list
-                tempClipList += DBInterface.list_of_clips_by_episode(episodeRecord[0])
-                # Add the Episode data to the Filter Dialog's Episode List
+            # Add all Episodes in the Library to the Filter Dialog's Episode List
+            for episodeRecord in DBInterface.list_of_episodes_for_series(tempLibrary.id):
                 episodeList.append((episodeRecord[1], tempLibrary.id, True))
-            # For all the Clips ...
-            for clipRecord in tempClipList:
-                # ... add the Clip to the Clip List for filtering ...
-                clipList.append((clipRecord['ClipID'], clipRecord['CollectNum'], True))
-                # ... retain a pointer to the Clip Number keyed to the Clip ID and Collection Number ...
-                clipLookup[(clipRecord['ClipID'], clipRecord['CollectNum'])] = clipRecord['ClipNum']
-                # ... now get all the keywords for this Clip ...
-                clipKeywordList = DBInterface.list_of_keywords(Clip = clipRecord['ClipNum'])
-                # ... and iterate through the list of clip keywords.
-                for clipKeyword in clipKeywordList:
-                    # If the keyword isn't already in the Keyword List ...
-                    if (clipKeyword[0], clipKeyword[1], True) not in keywordList:
-                        # ... add the keyword to the keyword list for filtering.
-                        keywordList.append((clipKeyword[0], clipKeyword[1], True))
+            # Get the data and keywords for all Quotes from the Library's Documents
+            quoteData = DBInterface.list_of_analytic_data_quotes(libraryNum=self.libraryNum)
+            quoteKeywords = DBInterface.dictionary_of_analytic_data_keywords('Quote', libraryNum=self.libraryNum)
+            # Get the data and keywords for all Clips from the Library's Episodes
+            clipData = DBInterface.list_of_analytic_data_clips(libraryNum=self.libraryNum)
+            clipKeywords = DBInterface.dictionary_of_analytic_data_keywords('Clip', libraryNum=self.libraryNum)
             
         # If we have a Document Number, we set up the Document Analytic Data Export
         elif self.documentNum <> 0:
-            # First, we get a list of all the Quotes for the Document specified
-            tempQuoteList = DBInterface.list_of_quotes_by_document(self.documentNum)
-            # For all the Quotes ...
-            for quoteRecord in tempQuoteList:
-                # ... add the Quote to the Quote List for filtering ...
-                quoteList.append((quoteRecord['QuoteID'], quoteRecord['CollectNum'], True))
-                # ... retain a pointer to the Quote Number keyed to the Quote ID and Collection Number ...
-                quoteLookup[(quoteRecord['QuoteID'], quoteRecord['CollectNum'])] = quoteRecord['QuoteNum']
-                # ... now get all the keywords for this Quote ...
-                quoteKeywordList = DBInterface.list_of_keywords(Quote = quoteRecord['QuoteNum'])
-                # ... and iterate through the list of Quote keywords.
-                for quoteKeyword in quoteKeywordList:
-                    # If the keyword isn't already in the Keyword List ...
-                    if (quoteKeyword[0], quoteKeyword[1], True) not in keywordList:
-                        # ... add the keyword to the keyword list for filtering.
-                        keywordList.append((quoteKeyword[0], quoteKeyword[1], True))
+            # Get the data and keywords for all the Quotes for the Document specified
+            quoteData = DBInterface.list_of_analytic_data_quotes(documentNum=self.documentNum)
+            quoteKeywords = DBInterface.dictionary_of_analytic_data_keywords('Quote', sourceNum=self.documentNum)
 
         # If we have an Episode Number, we set up the Episode Analytic Data Export
         elif self.episodeNum <> 0:
-            # First, we get a list of all the Clips for the Episode specified
-            tempClipList = DBInterface.list_of_clips_by_episode(self.episodeNum)
-            # For all the Clips ...
-            for clipRecord in tempClipList:
-                # ... add the Clip to the Clip List for filtering ...
-                clipList.append((clipRecord['ClipID'], clipRecord['CollectNum'], True))
-                # ... retain a pointer to the Clip Number keyed to the Clip ID and Collection Number ...
-                clipLookup[(clipRecord['ClipID'], clipRecord['CollectNum'])] = clipRecord['ClipNum']
-                # ... now get all the keywords for this Clip ...
-                clipKeywordList = DBInterface.list_of_keywords(Clip = clipRecord['ClipNum'])
-                # ... and iterate through the list of clip keywords.
-                for clipKeyword in clipKeywordList:
-                    # If the keyword isn't already in the Keyword List ...
-                    if (clipKeyword[0], clipKeyword[1], True) not in keywordList:
-                        # ... add the keyword to the keyword list for filtering.
-                        keywordList.append((clipKeyword[0], clipKeyword[1], True))
+            # Get the data and keywords for all the Clips for the Episode specified
+            clipData = DBInterface.list_of_analytic_data_clips(episodeNum=self.episodeNum)
+            clipKeywords = DBInterface.dictionary_of_analytic_data_keywords('Clip', sourceNum=self.episodeNum)
 
         # If we don't have Library Number, Document Number, or Episode number, but DO have a Collection Number, we set
         # up the Clips for the Collection specified.  If we have neither, it's the GLOBAL Analytic Data Export,
@@ -256,54 +224,41 @@ class AnalyticDataExport(Dialogs.GenForm):
         else:
             # If we have a specific collection specified ...
             if self.collectionNum <> 0:
-                # ... load the specified collection.  We need its data.
-                tempCollection = Collection.Collection(self.collectionNum)
-                # Put the selected Collection's data into the Collection List as a starting place.
-                tempCollectionList = [(tempCollection.number, tempCollection.id, tempCollection.parent)]
+                # ... we want the Quotes and Clips from that Collection and all its nested Collections
+                collectionNums = self.GetNestedCollectionNums(collectionData, self.collectionNum)
             # If we don't have any selected collection ...
             else:
-                # ... then we should initialise the Collection List with data for all top-level collections, with parent = 0
-                tempCollectionList = DBInterface.list_of_collections()
-            # Iterate through the Collection List as long as it has entries
-            while len(tempCollectionList) > 0:
-                # Get the list of Quotes for the current Collection
-                tempQuoteList = DBInterface.list_of_quotes_by_collectionnum(tempCollectionList[0][0])
-                # For all the Quotes ...
-                for (quoteNo, quoteName, collNo, sourceDocNo) in tempQuoteList:
-                    # ... add the Quote to the Quote List for filtering ...
-                    quoteList.append((quoteName, collNo, True))
-                    # ... retain a pointer to the Quote Number keyed to the Quote ID and Collection Number ...
-                    quoteLookup[(quoteName, collNo)] = quoteNo
-                    # ... now get all the keywords for this Quote ...
-                    quoteKeywordList = DBInterface.list_of_keywords(Quote = quoteNo)
-                    # ... and iterate through the list of Quote keywords.
-                    for quoteKeyword in quoteKeywordList:
-                        # If the keyword isn't already in the Keyword List ...
-                        if (quoteKeyword[0], quoteKeyword[1], True) not in keywordList:
-                            # ... add the keyword to the keyword list for filtering.
-                            keywordList.append((quoteKeyword[0], quoteKeyword[1], True))
-
-                # Get the list of Clips for the current Collection
-                tempClipList = DBInterface.list_of_clips_by_collection(tempCollectionList[0][1], tempCollectionList[0][2])
-                # For all the Clips ...
-                for (clipNo, clipName, collNo) in tempClipList:
-                    # ... add the Clip to the Clip List for filtering ...
-                    clipList.append((clipName, collNo, True))
-                    # ... retain a pointer to the Clip Number keyed to the Clip ID and Collection Number ...
-                    clipLookup[(clipName, collNo)] = clipNo
-                    # ... now get all the keywords for this Clip ...
-                    clipKeywordList = DBInterface.list_of_keywords(Clip = clipNo)
-                    # ... and iterate through the list of clip keywords.
-                    for clipKeyword in clipKeywordList:
-                        # If the keyword isn't already in the Keyword List ...
-                        if (clipKeyword[0], clipKeyword[1], True) not in keywordList:
-                            # ... add the keyword to the keyword list for filtering.
-                            keywordList.append((clipKeyword[0], clipKeyword[1], True))
-
-                # Get the nested collections for the current collection and add them to the Collection List
-                tempCollectionList += DBInterface.list_of_collections(tempCollectionList[0][0])
-                # Remove the current Collection from the list.  We're done with it.
-                del(tempCollectionList[0])
+                # ... we want all the Quotes and Clips in all Collections
+                collectionNums = None
+            # Get the data and keywords for all the Quotes and Clips in the Collections
+            quoteData = DBInterface.list_of_analytic_data_quotes(collectionNums=collectionNums)
+            quoteKeywords = DBInterface.dictionary_of_analytic_data_keywords('Quote', collectionNums=collectionNums)
+            clipData = DBInterface.list_of_analytic_data_clips(collectionNums=collectionNums)
+            clipKeywords = DBInterface.dictionary_of_analytic_data_keywords('Clip', collectionNums=collectionNums)
+
+        # For all the Quotes ...
+        for quoteRecord in quoteData:
+            # ... add the Quote to the Quote List for filtering ...
+            quoteList.append((quoteRecord['QuoteID'], quoteRecord['CollectNum'], True))
+            # ... retain a pointer to the Quote Number keyed to the Quote ID and Collection Number ...
+            quoteLookup[(quoteRecord['QuoteID'], quoteRecord['CollectNum'])] = quoteRecord['QuoteNum']
+            # ... and retain the Quote's data for the export
+            quoteRecords[quoteRecord['QuoteNum']] = quoteRecord
+        # For all the Clips ...
+        for clipRecord in clipData:
+            # ... add the Clip to the Clip List for filtering ...
+            clipList.append((clipRecord['ClipID'], clipRecord['CollectNum'], True))
+            # ... retain a pointer to the Clip Number keyed to the Clip ID and Collection Number ...
+            clipLookup[(clipRecord['ClipID'], clipRecord['CollectNum'])] = clipRecord['ClipNum']
+            # ... and retain the Clip's data for the export
+            clipRecords[clipRecord['ClipNum']] = clipRecord
+        # Gather the distinct keywords applied to the Quotes and Clips ...
+        keywordSet = set()
+        for itemKeywords in quoteKeywords.values() + clipKeywords.values():
+            keywordSet.update(itemKeywords)
+        # ... and add them to the keyword list for filtering.
+        for (kwg, kw) in keywordSet:
+            keywordList.append((kwg, kw, True))
 
         # Put the Quote List in alphabetical order in preparation for Filtering..
         quoteList.sort()
@@ -434,11 +389,17 @@ class AnalyticDataExport(Dialogs.GenForm):
                 # ... nesting is meaningless, so we can just initialize this variable to False.
                 showNested = False
 
-            # Get the user-specified File Name
+            # Get the user-specified File Name and Export Format
             fs = self.exportFile.GetValue()
+            exportFormat = self.exportFormat.GetSelection()
+            # Binary Matrix files get the .tkm extension.  Text files get the .txt extension.
+            if exportFormat == FORMAT_BINARY:
+                extension = '.tkm'
+            else:
+                extension = '.txt'
             # Ensure that the file name has the proper extension.
-            if fs[-4:].lower() != '.txt':
-                fs = fs + '.txt'
+            if fs[-4:].lower() != extension:
+                fs = fs + extension
             # On the Mac, if no path is specified, the data is exported to a file INSIDE the application bundle, 
             # where no one will be able to find it.  Let's put it in the user's HOME directory instead.
             # I'm okay with not handling this on Windows, where it will be placed in the Program's folder
@@ -449,22 +410,19 @@ class AnalyticDataExport(Dialogs.GenForm):
                 if fs.find(os.sep) == -1:
                     # ... then prepend the HOME folder
                     fs = os.getenv("HOME") + os.sep + fs
-            # Open the output file for writing.
-            f = codecs.open(fs, 'w', 'utf8')    # file(fs, 'w')
-
             prompt = unicode(_('Collection Name\tItem Type\tItem Name\tSource File\tStart\tStop\tLength'), 'utf8')
-            # Write the Header line.  We're creating a tab-delimited file, so we'll use tabs to separate the items.
-            f.write(prompt)
-            # Add keywords to the Header.  Iterate through the Keyword List.
-            for keyword in keywordList:
-                # See if the user has left the keyword "checked" in the filter dialog.
-                if keyword[2]:
-                    # Encode and write all "checked" keywords to the Header.
-                    kwg = keyword[0]
-                    kw = keyword[1]
-                    f.write('\t%s : %s' % (kwg, kw))
-            # Add a line break to signal the end of the Header line. 
-            f.write('\n')
+            # Get the keywords the user has left "checked" in the filter dialog.  These are the columns of the matrix.
+            checkedKeywords = [(keyword[0], keyword[1]) for keyword in keywordList if keyword[2]]
+            # Create the sparse Object by Keyword matrix.  Each row is labelled with the fields named in the prompt.
+            matrix = KeywordMatrix.KeywordMatrix(checkedKeywords, prompt.split('\t'))
+
+            # Put the Document and Episode filter data in sets so they can be checked quickly
+            documentSet = set(documentList)
+            episodeSet = set(episodeList)
+            # The Collection Node Strings are worked out once per Collection
+            nodeStrings = {}
+            # Items without keywords have an empty keyword set
+            noKeywords = set()
 
             # Now iterate through the Quote List
             for quoteRec in quoteList:
@@ -472,51 +430,34 @@ class AnalyticDataExport(Dialogs.GenForm):
                 # Also, if we are using a collection report, either Nested Data should be requested OR the current
                 # Quote should be from the main collection if it is to be included in the report.
                 if quoteRec[2] and ((self.collectionNum == 0) or (showNested) or (quoteRec[1] == self.collectionNum)):
-                    # Load the Quote data.  The QuoteLookup dictionary allows this easily.
-                    # No need to load the Quote Text, which can be slow to load.
-                    quote = Quote.Quote(quoteLookup[quoteRec[0], quoteRec[1]], skipText=True)
-                    # Get the collection the Quote is from.
-                    collection = Collection.Collection(quote.collection_num)
-                    # Encode string values using the Export Encoding
-                    collectionID = collection.GetNodeString()
-                    quoteID = quote.id
-                    try:
-                        document = Document.Document(quote.source_document_num)
-                        documentID = document.id
-                        quoteSourceFilename = document.imported_file
-                        # If we're doing a Library report, we need the Quote's source document and Library for Document Filter comparison.
-                        if self.libraryNum != 0:
-                            library = Library.Library(document.library_num)
-                            libraryID = library.id
+                    # Get the Quote data.  The QuoteLookup dictionary allows this easily.
+                    quoteRecord = quoteRecords[quoteLookup[quoteRec[0], quoteRec[1]]]
+                    # Get the Node String of the collection the Quote is from.
+                    if not nodeStrings.has_key(quoteRecord['CollectNum']):
+                        nodeStrings[quoteRecord['CollectNum']] = self.GetCollectionNodeString(collectionData, quoteRecord['CollectNum'])
+                    collectionID = nodeStrings[quoteRecord['CollectNum']]
+                    quoteID = quoteRecord['QuoteID']
+                    # If the Quote's source document exists ...
+                    if quoteRecord['DocumentID'] != None:
+                        documentID = quoteRecord['DocumentID']
+                        quoteSourceFilename = quoteRecord['ImportedFile']
+                        # We need the Quote's source document and Library for Document Filter comparison.
+                        libraryID = quoteRecord['LibraryID']
                     # If we have an orphaned Quote ...
-                    except TransanaExceptions.RecordNotFoundError, e:
+                    else:
                         # ... then we don't know these values!
                         documentID = ''
-                        quoteSourceFilename = _('Source Document unknown')
+                        quoteSourceFilename = unicode(_('Source Document unknown'), 'utf8')
                         libraryID = 0
                         
                     # Implement Document filtering if needed.  If we have a Library Report, we need to confirm that the Source Document
                     # is "checked" in the filter list.  (If we don't have a Library Report, this check isn't needed.)
-                    if (self.libraryNum == 0) or ((documentID == '') and (libraryID == '')) or ((documentID, libraryID, True) in documentList):
-                        # Write the Quote's data values to the output file.  We're creating a tab-delimited file,
-                        # so we'll use tabs to separate the items.
-                        f.write('%s\t%s\t%s\t%s\t%s\t%s\t%d' % (collectionID, '1', quoteID, quoteSourceFilename,
-                                                            quote.start_char, quote.end_char,
-                                                            (quote.end_char - quote.start_char)))
-
-                        # Now we iterate through the keyword list ...
-                        for keyword in keywordList:
-                            # ... looking only at those keywords the user left "checked" in the filter dialog ...
-                            if keyword[2]:
-                                # ... and check to see if the Quote HAS the keyword.
-                                if quote.has_keyword(keyword[0], keyword[1]):
-                                    # If so, we write a "1", indicating True.
-                                    f.write('\t1')
-                                else:
-                                    # If not, we write a "0", indicating False.
-                                    f.write('\t0')
-                        # Add a line break to signal the end of the Quote record
-                        f.write('\n')
+                    if (self.libraryNum == 0) or ((documentID == '') and (libraryID == '')) or ((documentID, libraryID, True) in documentSet):
+                        # Add the Quote's data values and keywords to the matrix
+                        matrix.AddRow((collectionID, '1', quoteID, quoteSourceFilename,
+                                       '%s' % quoteRecord['StartChar'], '%s' % quoteRecord['EndChar'],
+                                       '%d' % (quoteRecord['EndChar'] - quoteRecord['StartChar'])),
+                                      quoteKeywords.get(quoteRecord['QuoteNum'], noKeywords))
 
             # Now iterate through the Clip List
             for clipRec in clipList:
@@ -524,42 +465,41 @@ class AnalyticDataExport(Dialogs.GenForm):
                 # Also, if we are using a collection report, either Nested Data should be requested OR the current
                 # clip should be from the main collection if it is to be included in the report.
                 if clipRec[2] and ((self.collectionNum == 0) or (showNested) or (clipRec[1] == self.collectionNum)):
-                    # Load the Clip data.  The ClipLookup dictionary allows this easily.
-                    # No need to load the Clip Transcripts, which can be slow to load.
-                    clip = Clip.Clip(clipLookup[clipRec[0], clipRec[1]], skipText=True)
-                    # Get the collection the clip is from.
-                    collection = Collection.Collection(clip.collection_num)
-                    # Encode string values using the Export Encoding
-                    collectionID = collection.GetNodeString()
-                    clipID = clip.id
-                    clipMediaFilename = clip.media_filename
-                    # If we're doing a Library report, we need the clip's source episode and Library for Episode Filter comparison.
-                    if self.libraryNum != 0:
-                        episode = Episode.Episode(clip.episode_num)
-                        library = Library.Library(episode.series_num)
+                    # Get the Clip data.  The ClipLookup dictionary allows this easily.
+                    clipRecord = clipRecords[clipLookup[clipRec[0], clipRec[1]]]
+                    # Get the Node String of the collection the clip is from.
+                    if not nodeStrings.has_key(clipRecord['CollectNum']):
+                        nodeStrings[clipRecord['CollectNum']] = self.GetCollectionNodeString(collectionData, clipRecord['CollectNum'])
+                    collectionID = nodeStrings[clipRecord['CollectNum']]
+                    clipID = clipRecord['ClipID']
+                    clipMediaFilename = self.GetMediaFilename(clipRecord['MediaFile'])
                     # Implement Episode filtering if needed.  If we have a Library Report, we need to confirm that the Source Episode
                     # is "checked" in the filter list.  (If we don't have a Library Report, this check isn't needed.)
-                    if (self.libraryNum == 0) or ((episode.id, library.id, True) in episodeList):
-                        # Write the Clip's data values to the output file.  We're creating a tab-delimited file,
-                        # so we'll use tabs to separate the items.
-                        f.write('%s\t%s\t%s\t%s\t%s\t%s\t%10.4f' % (collectionID, '2', clipID, clipMediaFilename,
-                                                            Misc.time_in_ms_to_str(clip.clip_start), Misc.time_in_ms_to_str(clip.clip_stop),
-                                                            (clip.clip_stop - clip.clip_start) / 1000.0))
-
-                        # Now we iterate through the keyword list ...
-                        for keyword in keywordList:
-                            # ... looking only at those keywords the user left "checked" in the filter dialog ...
-                            if keyword[2]:
-                                # ... and check to see if the Clip HAS the keyword.
-                                if clip.has_keyword(keyword[0], keyword[1]):
-                                    # If so, we write a "1", indicating True.
-                                    f.write('\t1')
-                                else:
-                                    # If not, we write a "0", indicating False.
-                                    f.write('\t0')
-                        # Add a line break to signal the end of the Clip record
-                        f.write('\n')
-
+                    if (self.libraryNum == 0) or ((clipRecord['EpisodeID'], clipRecord['LibraryID'], True) in episodeSet):
+                        # Add the Clip's data values and keywords to the matrix
+                        matrix.AddRow((collectionID, '2', clipID, clipMediaFilename,
+                                       Misc.time_in_ms_to_str(clipRecord['ClipStart']),
+                                       Misc.time_in_ms_to_str(clipRecord['ClipStop']),
+                                       '%10.4f' % ((clipRecord['ClipStop'] - clipRecord['ClipStart']) / 1000.0)),
+                                      clipKeywords.get(clipRecord['ClipNum'], noKeywords))
+
+            # If we're creating a Binary Matrix file ...
+            if exportFormat == FORMAT_BINARY:
+                # ... open the output file for writing in binary mode and write the matrix
+                f = open(fs, 'wb')
+                matrix.WriteBinary(f)
+            # If we're creating a text file ...
+            else:
+                # ... open the output file for writing.
+                f = codecs.open(fs, 'w', 'utf8')    # file(fs, 'w')
+                # If we're creating a long format file ...
+                if exportFormat == FORMAT_LONG:
+                    # ... write a line for each item's keyword
+                    matrix.WriteLong(f, unicode(_('Keyword Group'), 'utf8'), unicode(_('Keyword'), 'utf8'))
+                # If we're creating a standard tab-delimited file ...
+                else:
+                    # ... write a line for each item, with a column for each keyword
+                    matrix.WriteTSV(f)
             # Flush the output file's buffer (probably unnecessary)
             f.flush()
             # Close the output file.
@@ -581,6 +521,46 @@ class AnalyticDataExport(Dialogs.GenForm):
 
         # Destroy the Filter Dialog.  We're done with it.
         dlgFilter.Destroy()
+
+    def GetNestedCollectionNums(self, collectionData, collectionNum):
+        """ Get a list of the numbers of a Collection and all its nested Collections from the Collections dictionary """
+        # Note which Collections are nested directly in each Collection
+        children = {}
+        for (childNum, (childID, parentNum)) in collectionData.items():
+            children.setdefault(parentNum, []).append(childNum)
+        # Start with the Collection itself ...
+        collectionNums = [collectionNum]
+        # ... and add the nested Collections of each Collection in the list as we go
+        index = 0
+        while index < len(collectionNums):
+            collectionNums += children.get(collectionNums[index], [])
+            index += 1
+        return collectionNums
+
+    def GetCollectionNodeString(self, collectionData, collectionNum):
+        """ Get a Collection's Node String, as Collection.GetNodeString() does, from the Collections dictionary """
+        (nodeString, parentNum) = collectionData[collectionNum]
+        # Add the names of the parent collections, up to the root
+        while (parentNum != 0) and collectionData.has_key(parentNum):
+            (parentID, parentNum) = collectionData[parentNum]
+            nodeString = parentID + ' > ' + nodeString
+        return nodeString
+
+    def GetMediaFilename(self, mediaFile):
+        """ Get a Clip's Media Filename, as Clip.media_filename does, from the file name stored in the database """
+        # Media File names are handled with forward slashes
+        mediaFile = mediaFile.replace('\\', '/')
+        # Detection of the use of the Video Root Path is platform-dependent.
+        if wx.Platform == "__WXMSW__":
+            # On Windows, check for a colon in the position, which signals the presence or absence of a drive letter
+            useVideoRoot = (mediaFile[1:2] != ':') and (mediaFile[:2] != '//')
+        else:
+            # On Mac OS-X and *nix, check for a slash in the first position for the root folder designation
+            useVideoRoot = (mediaFile[:1] != '/')
+        # If we are using the Video Root Path, add it to the Filename
+        if useVideoRoot:
+            mediaFile = TransanaGlobal.configData.videoPath.replace('\\', '/') + mediaFile
+        return mediaFile.replace('/', os.sep)
         
     def OnBrowse(self, evt):
         """Invoked when the user activates the Browse button."""
@@ -588,7 +568,7 @@ class AnalyticDataExport(Dialogs.GenForm):
                         TransanaGlobal.configData.videoPath,
                         "",
                         "", 
-                        _("Text Files (*.txt)|*.txt|All files (*.*)|*.*"), 
+                        _("Text Files (*.txt)|*.txt|Keyword Matrix Files (*.tkm)|*.tkm|All files (*.*)|*.*"), 
                         wx.SAVE)
         # If user didn't cancel ..
         if fs != "":
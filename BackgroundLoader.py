@@ -0,0 +1,247 @@
+# Copyright (C) 2002-2016 Spurgeon Woods LLC
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of version 2 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+#
+
+""" This module implements the Background Loader for Transana, which fetches Documents, Transcripts, Quotes
+    and Clips from the database in a background thread so the interface stays responsive.  The loaded
+    objects are handed back to the GUI thread, which puts them into the interface.  Only the most recent
+    load request matters.  Requests that are superseded before or while they are fetched are discarded.
+
+    When the Background Loader is idle, it prefetches the items the user is likely to load next (such as
+    the neighbors of the loaded Clip in its Collection) into a small cache. """
+
+__author__ = 'David Woods <dwoods@transana.com>'
+
+DEBUG = False
+if DEBUG:
+    print "BackgroundLoader DEBUG is ON!"
+
+# import wxPython
+import wx
+# import Python's Queue module
+import Queue
+# import Python's collections module
+import collections
+# import Python's sys module
+import sys
+# import Python's threading module
+import threading
+# import Transana's Database Interface
+import DBInterface
+# import Transana's Constants
+import TransanaConstants
+
+
+class BackgroundLoader(threading.Thread):
+    """ A background thread that fetches data objects for the GUI thread, one request at a time """
+    def __init__(self):
+        """ Initialize and start the Background Loader thread """
+        # Initialize the Thread object
+        threading.Thread.__init__(self)
+        # Create the queue of load requests
+        self.requests = Queue.Queue()
+        # Initialize the request generation.  Each new request (or cancellation) increments this, which
+        # marks all earlier requests as superseded.
+        self.generation = 0
+        # Initialize the prefetch generation.  Only the most recent prefetch request is processed.
+        self.prefetchGeneration = 0
+        # Create the prefetch cache, which maps (itemType, itemNum) keys to (connection serial, data) values
+        # in the order the items were prefetched
+        self.cache = collections.OrderedDict()
+        # The prefetch cache is shared by the GUI thread and the background thread, so it needs a lock
+        self.cacheLock = threading.Lock()
+        # prevent the application from hanging on Close
+        self.setDaemon(1)
+        # Start the thread
+        self.start()
+
+    def Load(self, fetchFunc, fetchArgs, finishFunc, finishArgs):
+        """ Request a background load.  Call this from the GUI thread.
+              fetchFunc(*fetchArgs) runs in the background thread, and must not touch the GUI.
+              finishFunc(*finishArgs, preloaded=result) then runs in the GUI thread with the fetched result.
+            If the background fetch is not possible or fails, finishFunc(*finishArgs) is called in the GUI
+            thread instead, so the load is done (and any errors are reported) the usual way. """
+        # This request supersedes all earlier ones
+        self.generation += 1
+        # Add the request to the queue
+        self.requests.put(('Load', self.generation, (fetchFunc, fetchArgs, finishFunc, finishArgs)))
+
+    def Cancel(self):
+        """ Cancel any pending background load.  Call this from the GUI thread. """
+        # Mark all earlier requests as superseded
+        self.generation += 1
+
+    def IsCancelled(self, generation):
+        """ Has the request with the given generation been superseded? """
+        return generation != self.generation
+
+    def Prefetch(self, items, fetchFunc, listFunc=None, listArgs=()):
+        """ Request that items be prefetched into the cache.  Call this from the GUI thread.
+              items is a list of (itemType, itemNum) keys, most important first.
+              fetchFunc(itemType, itemNum) runs in the background thread and returns the data to cache.
+              If listFunc is given, listFunc(*listArgs) runs in the background thread to provide the items instead.
+            A new prefetch request replaces any earlier one that hasn't finished. """
+        # This request supersedes all earlier prefetch requests
+        self.prefetchGeneration += 1
+        # Add the request to the queue
+        self.requests.put(('Prefetch', self.prefetchGeneration, (items, fetchFunc, listFunc, listArgs)))
+
+    def TakePrefetched(self, key):
+        """ Remove an item from the prefetch cache and return its data, or None if it hasn't been prefetched.
+            Items are removed so that changes made to a loaded object can't leak into a later load.  The
+            caller should check that the data is still current. """
+        # Lock the cache
+        self.cacheLock.acquire()
+        try:
+            # Get the cached value, removing it from the cache
+            value = self.cache.pop(key, None)
+        finally:
+            # Unlock the cache
+            self.cacheLock.release()
+        # If the item wasn't prefetched, or was prefetched from a database that has since been closed ...
+        if (value == None) or (value[0] != DBInterface.get_connection_serial()):
+            # ... there's nothing to use
+            return None
+        # Return the prefetched data
+        return value[1]
+
+    def IsPrefetched(self, key):
+        """ Is an item in the prefetch cache? """
+        # Lock the cache
+        self.cacheLock.acquire()
+        try:
+            return self.cache.has_key(key)
+        finally:
+            # Unlock the cache
+            self.cacheLock.release()
+
+    def AddPrefetched(self, key, data):
+        """ Add an item to the prefetch cache, dropping the oldest items if the cache is full """
+        # Lock the cache
+        self.cacheLock.acquire()
+        try:
+            # Add the item
+            self.cache[key] = (DBInterface.get_connection_serial(), data)
+            # While the cache is too big ...
+            while len(self.cache) > TransanaConstants.prefetchCacheSize:
+                # ... drop the oldest item
+                self.cache.popitem(last=False)
+        finally:
+            # Unlock the cache
+            self.cacheLock.release()
+
+    def run(self):
+        """ Process load and prefetch requests """
+        # Process requests for the life of the program
+        while True:
+            # Wait for the next request
+            (requestType, generation, data) = self.requests.get()
+            # Process the request
+            if requestType == 'Load':
+                self.ProcessLoad(generation, data)
+            else:
+                self.ProcessPrefetch(generation, data)
+
+    def ProcessLoad(self, generation, data):
+        """ Fetch the data for a load request.  This runs in the background thread. """
+        (fetchFunc, fetchArgs, finishFunc, finishArgs) = data
+        # If the request has been superseded already ...
+        if self.IsCancelled(generation):
+            # ... skip it without touching the database
+            return
+        # If we can't get a database connection for this thread ...
+        if not DBInterface.open_worker_db():
+            # ... the GUI thread will have to do the whole load
+            wx.CallAfter(self.OnFinish, generation, finishFunc, finishArgs, None)
+            return
+        # Start exception handling
+        try:
+            # Fetch the data
+            result = fetchFunc(*fetchArgs)
+        # If there's a problem ...
+        except:
+
+            if DEBUG:
+                print "BackgroundLoader.ProcessLoad():"
+                print sys.exc_info()[0]
+                print sys.exc_info()[1]
+
+            # ... the GUI thread will do the load, and report any errors
+            result = None
+        # Pass the results to the GUI thread
+        wx.CallAfter(self.OnFinish, generation, finishFunc, finishArgs, result)
+
+    def ProcessPrefetch(self, generation, data):
+        """ Fill the prefetch cache for a prefetch request.  This runs in the background thread. """
+        (items, fetchFunc, listFunc, listArgs) = data
+        # If the request has been superseded, or we can't get a database connection for this thread ...
+        if (generation != self.prefetchGeneration) or not DBInterface.open_worker_db():
+            # ... skip it
+            return
+        # Start exception handling
+        try:
+            # If we need to determine the items to prefetch ...
+            if listFunc != None:
+                # ... do so
+                items = listFunc(*listArgs)
+        # If there's a problem ...
+        except:
+
+            if DEBUG:
+                print "BackgroundLoader.ProcessPrefetch():"
+                print sys.exc_info()[0]
+                print sys.exc_info()[1]
+
+            # ... prefetching is just an optimization, so give up quietly
+            return
+        # Iterate through the items
+        for key in items:
+            # If a load request is waiting, or this request has been superseded ...
+            if (not self.requests.empty()) or (generation != self.prefetchGeneration):
+                # ... stop prefetching.  (The load will request a new prefetch when it's done.)
+                break
+            # If the item has already been prefetched ...
+            if self.IsPrefetched(key):
+                # ... skip it
+                continue
+            # Start exception handling
+            try:
+                # Fetch the item and add it to the cache
+                self.AddPrefetched(key, fetchFunc(*key))
+            # If there's a problem, such as the item having been deleted ...
+            except:
+
+                if DEBUG:
+                    print "BackgroundLoader.ProcessPrefetch():", key
+                    print sys.exc_info()[0]
+                    print sys.exc_info()[1]
+
+                # ... just skip the item.  The problem will be reported if the user tries to load it.
+                pass
+
+    def OnFinish(self, generation, finishFunc, finishArgs, result):
+        """ Hand the results of a background load to the GUI.  This runs in the GUI thread. """
+        # If the request has been superseded while it was being fetched ...
+        if self.IsCancelled(generation):
+            # ... discard the results
+            return
+        # If the fetch worked ...
+        if result != None:
+            # ... pass the fetched data along
+            finishFunc(*finishArgs, preloaded=result)
+        # If not ...
+        else:
+            # ... do the load the usual way
+            finishFunc(*finishArgs)
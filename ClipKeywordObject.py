@@ -95,6 +95,18 @@ class ClipKeyword(object):
         #        Therefore, it does no checking for duplicate records.  If you want to
         #        use it for other purposes, you probably have to make it smarter!
 
+        # Get the Insert Query and its Data Values
+        (SQLText, values) = self.GetSaveQuery()
+        # Get a Database Cursor
+        dbCursor = DBInterface.get_db().cursor()
+        # Execute the Query
+        dbCursor.execute(SQLText, values)
+        # Close the Database Cursor
+        dbCursor.close()
+
+    def GetSaveQuery(self):
+        """ Get the query and data values that save the ClipKeyword record to the Database.  This allows
+            the Database Import routine to save ClipKeyword records in batches. """
         # If we're using Unicode ...
         if 'unicode' in wx.PlatformInfo:
             # ... encode the text fields for this object
@@ -105,8 +117,6 @@ class ClipKeyword(object):
             # ... no encoding is needed
             keywordGroup = self.keywordGroup
             keyword = self.keyword
-        # Get a Database Cursor
-        dbCursor = DBInterface.get_db().cursor()
         # Create the Insert Query
         SQLText = """ INSERT INTO ClipKeywords2
                         (DocumentNum, EpisodeNum, QuoteNum, ClipNum, SnapshotNum, KeywordGroup, Keyword, Example)
@@ -116,10 +126,7 @@ class ClipKeyword(object):
         SQLText = DBInterface.FixQuery(SQLText)
         # Prepare the Data Values for the query
         values = (self.documentNum, self.episodeNum, self.quoteNum, self.clipNum, self.snapshotNum, keywordGroup, keyword, self.example)
-        # Execute the Query
-        dbCursor.execute(SQLText, values)
-        # Close the Database Cursor
-        dbCursor.close()
+        return (SQLText, values)
     
     # Define Property getters and setters
     # Keyword Group Property
@@ -32,6 +32,8 @@ import wx
 
 # import Transana's Constants
 import TransanaConstants
+# import Transana's Background Loader
+import BackgroundLoader
 # Import the Menu Constants
 import MenuSetup
 # Import Transana's Global Values
@@ -132,6 +134,8 @@ class ControlObject(object):
         self.playInLoop = False         # Should we loop playback?
         self.LoopPresMode = None        # What presentation mode are we ignoring while Looping?
         self.shutdownPlayAllClips = False  # Flag to signal the need to reformat the screen following Play All Clips
+        # Create the Background Loader, which fetches objects from the database without blocking the interface
+        self.backgroundLoader = BackgroundLoader.BackgroundLoader()
 
     def Register(self, Menu='', Video='', Transcript='', Data='', Visualization='', PlayAllClips='', NotesBrowser='', Chat=''):
         """ The ControlObject can extert control only over those objects it knows about.  This method
@@ -212,9 +216,22 @@ class ControlObject(object):
             # ... minimize/restore the Report
             self.ReportWindows[win].Iconize(iconize)
 
-    def LoadDocument(self, library_name, document_name, document_number, textSearchItems=[]):
+    def LoadDocumentInBackground(self, library_name, document_name, document_number, textSearchItems=[]):
+        """ Load a Document, fetching it from the database in the background.  If the user selects
+            another item before the Document is fetched, this load is cancelled. """
+        self.backgroundLoader.Load(self.FetchDocument, (document_number,),
+                                   self.LoadDocument, (library_name, document_name, document_number, textSearchItems))
+
+    def FetchDocument(self, document_number):
+        """ Fetch a Document for LoadDocument().  This runs in the Background Loader thread. """
+        return Document.Document(document_number)
+
+    def LoadDocument(self, library_name, document_name, document_number, textSearchItems=[], preloaded=None):
         """ When a Document is identified to trigger systemic loading of all related information,
-            this method should be called so that all Transana Objects are set appropriately. """
+            this method should be called so that all Transana Objects are set appropriately.
+            preloaded is the Document, if it has already been fetched by the Background Loader. """
+        # This load supersedes any background load in progress
+        self.backgroundLoader.Cancel()
         # Initialize a variable indicating if we found the requested document
         documentFound = False
         # First, see if the selected Document is already loaded!  Iterate through the TranscriptWindow's Notebook Tabs ...
@@ -230,7 +247,10 @@ class ControlObject(object):
                         library = Library.Library(dataObj.library_num)
                         # Also load the Database copy of this Document, so we can check that it's up to date
                         # and hasn't been updated by another user.
-                        dbDataObj = Document.Document(document_number)
+                        if preloaded != None:
+                            dbDataObj = preloaded
+                        else:
+                            dbDataObj = Document.Document(document_number)
                         # If that library name matches the one we're opening ...
                         if (library_name == library.id):
                             # ... then the requested Document is already open.  Select its Notebook Page ...
@@ -259,8 +279,14 @@ class ControlObject(object):
             else:
                 self.TranscriptWindow.nb.SetPageText(self.TranscriptWindow.nb.GetSelection(), document_name)
                 
-            # Load the Document
-            tmpDocument = Document.Document(document_number)
+            # If the Document has already been fetched ...
+            if preloaded != None:
+                # ... use it
+                tmpDocument = preloaded
+            # Otherwise ...
+            else:
+                # ... load the Document
+                tmpDocument = Document.Document(document_number)
             # Load the Document into the Editor Interface (Transcripts and Documents act the same here!)
             self.TranscriptWindow.LoadTranscript(tmpDocument)
             # If we have Text Search Items ...
@@ -290,9 +316,29 @@ class ControlObject(object):
             # Enable the transcript menu item options
             self.MenuWindow.SetTranscriptOptions(True)
 
-    def LoadTranscript(self, library, episode, transcript, textSearchItems=[]):
+    def LoadTranscriptInBackground(self, library, episode, transcript, textSearchItems=[]):
+        """ Load a Transcript, fetching it from the database in the background.  If the user selects
+            another item before the Transcript is fetched, this load is cancelled. """
+        self.backgroundLoader.Load(self.FetchTranscript, (library, episode, transcript),
+                                   self.LoadTranscript, (library, episode, transcript, textSearchItems))
+
+    def FetchTranscript(self, library, episode, transcript):
+        """ Fetch the Library, Episode and Transcript for LoadTranscript().  This runs in the Background Loader thread. """
+        # Load the Library which owns the Episode which owns the Transcript
+        libraryObj = Library.Library(library)
+        # Load the Episode in the Library that owns the Transcript
+        episodeObj = Episode.Episode(series=libraryObj.id, episode=episode)
+        # Load the Transcript
+        transcriptObj = Transcript.Transcript(transcript, ep=episodeObj.number)
+        return (libraryObj, episodeObj, transcriptObj)
+
+    def LoadTranscript(self, library, episode, transcript, textSearchItems=[], preloaded=None):
         """ When a Transcript is identified to trigger systemic loading of all related information,
-            this method should be called so that all Transana Objects are set appropriately. """
+            this method should be called so that all Transana Objects are set appropriately.
+            preloaded is the (Library, Episode, Transcript) tuple, if they have already been fetched
+            by the Background Loader. """
+        # This load supersedes any background load in progress
+        self.backgroundLoader.Cancel()
         # First, let's see if there's already a video loaded in the system.  Iterate through all Notebook Pages.
         self.BringTranscriptToFront()
         # Before we do anything else, let's save the current transcript if it's been modified.
@@ -301,6 +347,8 @@ class ControlObject(object):
                 self.SaveTranscript(1, cleardoc=1, continueEditing=False)
             else:
                 self.SaveTranscript(1, cleardoc=1)
+            # Anything fetched in the background was fetched before this save, and may be out of date
+            preloaded = None
         # If the current Editor is a Document (not None, not a Transcript) ...
         if isinstance(self.TranscriptWindow.GetCurrentObject(), Document.Document) or \
            isinstance(self.TranscriptWindow.GetCurrentObject(), Quote.Quote):
@@ -338,11 +386,15 @@ class ControlObject(object):
         #   Library     -  the Library associated with the desired Transcript
         #   episode     -  the Episode associated with the desired Transcript
         #   transcript  -  the Transcript to be displayed in the Transcript Window
-        libraryObj = Library.Library(library)                                    # Load the Library which owns the Episode which owns the Transcript
-        episodeObj = Episode.Episode(series=libraryObj.id, episode=episode)   # Load the Episode in the Library that owns the Transcript
+        # If the objects have already been fetched ...
+        if preloaded != None:
+            # ... use them
+            (libraryObj, episodeObj, transcriptObj) = preloaded
+        # Otherwise, load them
+        else:
+            (libraryObj, episodeObj, transcriptObj) = self.FetchTranscript(library, episode, transcript)
         # Set the current object to the loaded Episode
         self.currentObj = episodeObj
-        transcriptObj = Transcript.Transcript(transcript, ep=episodeObj.number)
 
         # Load the Transcript in the Episode in the Library
         # reset the video start and end points
@@ -435,9 +487,36 @@ class ControlObject(object):
             # ... we have a Quote
             return 'Quote'
 
-    def LoadQuote(self, quote_number, textSearchItems=[]):
+    def LoadQuoteInBackground(self, quote_number, textSearchItems=[]):
+        """ Load a Quote, fetching it from the database in the background.  If the user selects
+            another item before the Quote is fetched, this load is cancelled. """
+        self.backgroundLoader.Load(self.FetchQuote, (quote_number,), self.LoadQuote, (quote_number, textSearchItems))
+
+    def FetchQuote(self, quote_number):
+        """ Fetch a Quote for LoadQuote().  This runs in the Background Loader thread, or in the GUI thread
+            for a regular load. """
+        # See if the Quote has been prefetched
+        prefetchedQuote = self.backgroundLoader.TakePrefetched(('Quote', quote_number))
+        # If so ...
+        if prefetchedQuote != None:
+            # ... load the Quote record without its text, which is quick ...
+            tmpQuote = Quote.Quote(quote_number, skipText=True)
+            # ... and if the Quote hasn't been saved since it was prefetched ...
+            if tmpQuote.lastsavetime == prefetchedQuote.lastsavetime:
+                # ... we can use the prefetched text
+                tmpQuote.text = prefetchedQuote.text
+                tmpQuote.plaintext = prefetchedQuote.plaintext
+                tmpQuote.skipText = False
+                return tmpQuote
+        # Load the Quote
+        return Quote.Quote(quote_number)
+
+    def LoadQuote(self, quote_number, textSearchItems=[], preloaded=None):
         """ When a Quote is identified to trigger systemic loading of all related information,
-            this method should be called so that all Transana Objects are set appropriately. """
+            this method should be called so that all Transana Objects are set appropriately.
+            preloaded is the Quote, if it has already been fetched by the Background Loader. """
+        # This load supersedes any background load in progress
+        self.backgroundLoader.Cancel()
         # Initialize a variable indicating if we found the requested Quote
         quoteFound = False
         # First, see if the selected Quote is already loaded!  Iterate through the TranscriptWindow's Notebook Tabs ...
@@ -460,8 +539,14 @@ class ControlObject(object):
 
         # If the requested document was not found ...
         if not quoteFound:
-            # Load the Quote
-            tmpQuote = Quote.Quote(quote_number)
+            # If the Quote has already been fetched ...
+            if preloaded != None:
+                # ... use it
+                tmpQuote = preloaded
+            # Otherwise ...
+            else:
+                # ... load the Quote
+                tmpQuote = self.FetchQuote(quote_number)
             # If the current Transcript Window's Notebook Page is NOT empty ...
             if (self.TranscriptWindow.dlg.editor.TranscriptObj != None):
                 # ... create a new Notebook Page for the Quote
@@ -498,6 +583,9 @@ class ControlObject(object):
             # Update the Transana Interface for this object
             self.UpdateCurrentObject(tmpQuote)
 
+            # Prefetch the items near this Quote in its Collection, as the user may well look at them next
+            self.PrefetchCollectionNeighbors('Quote', tmpQuote.number, tmpQuote.collection_num)
+
         # Get the current selection(s) from the Database Tree
         selItems = self.DataWindow.DBTab.tree.GetSelections()
         # If there are one or more items selected ...
@@ -517,12 +605,110 @@ class ControlObject(object):
                 # Now point the DBTree (the notebook's parent window's DBTab's tree) to the loaded Quote
                 self.DataWindow.DBTab.tree.select_Node(nodeList, 'QuoteNode')
 
-    def LoadClipByNumber(self, clipNum, textSearchItems=[]):
+    def LoadClipByNumberInBackground(self, clipNum, textSearchItems=[]):
+        """ Load a Clip, fetching it from the database in the background.  If the user selects
+            another item before the Clip is fetched, this load is cancelled. """
+        self.backgroundLoader.Load(self.FetchClip, (clipNum,), self.LoadClipByNumber, (clipNum, textSearchItems))
+
+    def FetchClip(self, clipNum):
+        """ Fetch a Clip and its Collection for LoadClipByNumber().  This runs in the Background Loader thread,
+            or in the GUI thread for a regular load. """
+        # Assume we'll need to load the Clip Transcripts
+        clipObj = None
+        # See if the Clip has been prefetched
+        prefetched = self.backgroundLoader.TakePrefetched(('Clip', clipNum))
+        # If so ...
+        if prefetched != None:
+            prefetchedClip = prefetched
+            # Note the save times of the prefetched Clip Transcripts
+            prefetchedState = {}
+            for tr in prefetchedClip.transcripts:
+                prefetchedState[tr.number] = tr.lastsavetime
+            # Get the current save times of the Clip Transcripts from the database
+            currentState = DBInterface.GetLastSaveTimes('Transcripts2', 'TranscriptNum', 'ClipNum', clipNum)
+            # If the Clip Transcripts haven't changed since they were prefetched ...
+            if currentState == prefetchedState:
+                # ... load the Clip record without its Transcripts, which is quick, ...
+                clipObj = Clip.Clip(clipNum, skipText=True)
+                # ... and use the prefetched Clip Transcripts
+                clipObj.transcripts = prefetchedClip.transcripts
+                clipObj.skipText = False
+        # If we don't have the Clip yet ...
+        if clipObj == None:
+            # ... load the Clip, including its Transcripts
+            clipObj = Clip.Clip(clipNum)
+        # Load the Collection that contains the Clip
+        collectionObj = Collection.Collection(clipObj.collection_num)
+        return (clipObj, collectionObj)
+
+    def PrefetchItem(self, itemType, itemNum):
+        """ Fetch a Clip or Quote for the prefetch cache.  This runs in the Background Loader thread. """
+        # If we have a Clip ...
+        if itemType == 'Clip':
+            # Load the Clip, including its Transcripts
+            clipObj = Clip.Clip(itemNum)
+            # Check that the media files exist now, while we're in the background.  On network drives
+            # this warms the file system cache, so LoadVideo()'s own check is quick.
+            os.path.exists(clipObj.media_filename)
+            for vid in clipObj.additional_media_files:
+                os.path.exists(vid['filename'])
+            return clipObj
+        # If we have a Quote ...
+        elif itemType == 'Quote':
+            # ... load the Quote
+            return Quote.Quote(itemNum)
+
+    def ListCollectionNeighbors(self, itemType, itemNum, collectionNum):
+        """ List the Clips and Quotes near an item in its Collection, nearest first, so they can be prefetched.
+            This runs in the Background Loader thread. """
+        # Get the Clips and Quotes in the Collection, with their sort orders
+        items = []
+        for (clipNum, clipID, collectNum, sortOrder) in DBInterface.list_of_clips_by_collectionnum(collectionNum, True):
+            items.append((sortOrder, clipID, 'Clip', clipNum))
+        for (quoteNum, quoteID, collectNum, sortOrder, sourceDocNum) in DBInterface.list_of_quotes_by_collectionnum(collectionNum, True):
+            items.append((sortOrder, quoteID, 'Quote', quoteNum))
+        # Put them in Collection order
+        items.sort()
+        # Find the item that was just loaded
+        for pos in range(len(items)):
+            if (items[pos][2] == itemType) and (items[pos][3] == itemNum):
+                break
+        # If it's not there (it may have just been moved or deleted) ...
+        else:
+            # ... there's nothing to prefetch
+            return []
+        # Build the list of neighbors, alternating next and previous, nearest first
+        neighbors = []
+        for distance in range(1, TransanaConstants.prefetchRadius + 1):
+            for neighborPos in (pos + distance, pos - distance):
+                if (neighborPos >= 0) and (neighborPos < len(items)):
+                    neighbors.append((items[neighborPos][2], items[neighborPos][3]))
+        return neighbors
+
+    def PrefetchCollectionNeighbors(self, itemType, itemNum, collectionNum):
+        """ Prefetch the Clips and Quotes near an item in its Collection """
+        # Working out the neighbors takes database queries, so leave that to the Background Loader too
+        self.backgroundLoader.Prefetch([], self.PrefetchItem, self.ListCollectionNeighbors, (itemType, itemNum, collectionNum))
+
+    def PrefetchItems(self, items):
+        """ Prefetch a list of (itemType, itemNum) items, such as the next few Clips in a Play All Clips list """
+        self.backgroundLoader.Prefetch(items, self.PrefetchItem)
+
+    def LoadClipByNumber(self, clipNum, textSearchItems=[], preloaded=None):
         """ When a Clip is identified to trigger systematic loading of all related information,
-            this method should be called so that all Transana Objects are set appropriately. """
-
-        # Load the Clip based on the ClipNumber.  (Let's get NotFound exceptions out of the way early!)
-        clipObj = Clip.Clip(clipNum)
+            this method should be called so that all Transana Objects are set appropriately.
+            preloaded is the (Clip, Collection) tuple, if they have already been fetched by the Background Loader. """
+        # This load supersedes any background load in progress
+        self.backgroundLoader.Cancel()
+
+        # If the Clip has already been fetched ...
+        if preloaded != None:
+            # ... use it
+            (clipObj, collectionObj) = preloaded
+        # Otherwise ...
+        else:
+            # Load the Clip based on the ClipNumber.  (Let's get NotFound exceptions out of the way early!)
+            (clipObj, collectionObj) = self.FetchClip(clipNum)
 
         # First, let's see if there's already a video loaded in the system.  Iterate through all Notebook Pages.
         self.BringTranscriptToFront()
@@ -532,6 +718,10 @@ class ControlObject(object):
                 self.SaveTranscript(1, cleardoc=1, continueEditing=False)
             else:
                 self.SaveTranscript(1, cleardoc=1)
+            # If the Clip was fetched in the background, it was fetched before this save and may be out of date
+            if preloaded != None:
+                # ... so load it again
+                (clipObj, collectionObj) = self.FetchClip(clipNum)
         # If the current Editor is a Document (not None, not a Transcript) ...
         if isinstance(self.TranscriptWindow.GetCurrentObject(), Document.Document) or \
            isinstance(self.TranscriptWindow.GetCurrentObject(), Quote.Quote):
@@ -566,8 +756,6 @@ class ControlObject(object):
 
         # Set the current object to the loaded Clip
         self.currentObj = clipObj
-        # Load the Collection that contains the loaded Clip
-        collectionObj = Collection.Collection(clipObj.collection_num)
         # set the video start and end points to the start and stop points defined in the clip
         self.VideoStartPoint = clipObj.clip_start                     # Set the Video Start Point to the Clip beginning
         self.VideoEndPoint = clipObj.clip_stop                        # Set the Video End Point to the Clip end
@@ -614,6 +802,9 @@ class ControlObject(object):
             # Enable the transcript menu item options
             self.MenuWindow.SetTranscriptOptions(True)
 
+            # Prefetch the items near this Clip in its Collection, as the user may well look at them next
+            self.PrefetchCollectionNeighbors('Clip', clipObj.number, clipObj.collection_num)
+
             return True
         else:
             # Remove any tabs in the Data Window beyond the Database Tab
@@ -66,6 +66,8 @@ import os
 import sys
 # import Python's string module
 import string
+# import Python's threading module
+import threading
 # import Transana's Clip object
 import Clip
 # import Transana's Collection Object
@@ -78,6 +80,8 @@ import Dialogs
 import Episode
 # import Transana's Keyword Object
 import KeywordObject
+# import Transana's Miscellaneous Functions
+import Misc
 # import Transana's Note Object
 import Note
 # import Transana's Library Object
@@ -94,6 +98,12 @@ import Transcript
 # Declare Global Variables
 # Database Reference
 _dbref = None
+# Background threads get their own database connections.  Remember the parameters needed to open them.
+_workerConnectArgs = None
+# Count database connections, so background threads can tell when the database has been changed
+_connectionSerial = 0
+# Per-thread data, holding a background thread's database connection
+_threadData = threading.local()
 
 def InitializeSingleUserDatabase():
     """ For single-user Transana only, this initializes (starts) the embedded MySQL Server. """
@@ -912,6 +922,33 @@ def CreateSynonymsTableQuery(num):
     # Return the query to the calling routine
     return query % num
 
+def CreateWordCountsTableQuery(num):
+    """ Create query for the Word Counts Table, the per-object word count index used by the Word Frequency Report """
+
+    # ObjectType is 'Document', 'Transcript' (Episode and Clip Transcripts), or 'Quote'.  Each indexed object
+    # also gets one row with a blank Word holding its total word count.  That row marks the object as indexed,
+    # even if it contains no words at all.
+    
+    # WordCounts Table: Test for existence and create if needed
+    query = """
+              CREATE TABLE IF NOT EXISTS WordCounts%d
+                (ObjectType    VARCHAR(20) NOT NULL,
+                 ObjectNum     INTEGER NOT NULL,
+                 Word          VARCHAR(100) NOT NULL,
+                 WordCount     INTEGER,
+                 PRIMARY KEY (ObjectType, ObjectNum, Word))
+                """
+    # Add MySQL-specific SQL if appropriate
+    if TransanaConstants.DBInstalled in ['MySQLdb-embedded', 'MySQLdb-server', 'PyMySQL']:
+        query += """
+                 DEFAULT CHARACTER SET utf8
+                 COLLATE utf8_bin
+            """
+    # Add the appropriate Table Type to the CREATE Query
+    query = SetTableType(TransanaGlobal.hasInnoDB, query)
+    # Return the query to the calling routine
+    return query % num
+
 
 def establish_db_exists(dbToOpen=None, usePrompt=True):
     """ Check for the existence of all database tables and create them
@@ -1540,6 +1577,34 @@ def establish_db_exists(dbToOpen=None, usePrompt=True):
         # Execute the Query
         dbCursor.execute(query)
 
+        # WordCounts2 Table: Test for existence and create if needed
+        query = CreateWordCountsTableQuery(2)
+        # Execute the Query
+        dbCursor.execute(query)
+
+        # The Note Search looks up Words in the Word Count index, so WordCounts2 needs an index by Word as well.
+        if TransanaConstants.DBInstalled in ['MySQLdb-embedded', 'MySQLdb-server', 'PyMySQL']:
+            query = "SHOW CREATE TABLE WordCounts2"
+            # Execute the Query
+            dbCursor.execute(query)
+            # now let's look at the data returned from the database
+            for data in dbCursor.fetchall():
+                # Check for "array" data and convert if needed
+                if type(data[1]).__name__ == 'array':
+                    d1 = data[1].tostring()
+                else:
+                    d1 = data[1]
+                # If the Word index isn't there yet ...
+                if not u"wordcountsword" in d1.lower():
+                    # ... add it
+                    query = "ALTER TABLE WordCounts2 ADD INDEX WordCountsWord (ObjectType, Word)"
+                    dbCursor2 = db.cursor()
+                    dbCursor2.execute(query)
+        elif TransanaConstants.DBInstalled in ['sqlite3']:
+            query = "CREATE INDEX IF NOT EXISTS WordCountsWord ON WordCounts2 (ObjectType, Word)"
+            # Execute the Query
+            dbCursor.execute(query)
+
         if TransanaConstants.DBInstalled in ['MySQLdb-embedded', 'MySQLdb-server', 'PyMySQL']:
             # Let's test for COLLATION.  ** NOTE:  THIS DOESN'T WORK for CHINESE!! **
             # Create a list of table to check
@@ -1678,8 +1743,8 @@ def establish_db_exists(dbToOpen=None, usePrompt=True):
                         query += "AFTER XMLText "
                 dbCursor.execute(query)
 
-        # See if there are any records that need Plain Text extraction
-        plainTextCount = CountItemsWithoutPlainText()
+        # See if there are any records that need Plain Text extraction or Word Count indexing
+        plainTextCount = CountItemsWithoutPlainText() + CountItemsWithoutWordCounts()
         # If there are ...
         if plainTextCount > 0:
             # ... import the Plain Text extractor (which cannot be imported above, at least not in it's alphabetic position)
@@ -1716,6 +1781,24 @@ def FixQuery(query):
         # ... just return the query unaltered
         return query
 
+def get_streaming_cursor(db):
+    """ Get a cursor that streams query results from the database rather than loading them all into memory.
+        No other query can be run on the database connection until all the results have been read or the
+        cursor has been closed. """
+    # If we're using MySQL ...
+    if TransanaConstants.DBInstalled in ['MySQLdb-embedded', 'MySQLdb-server', 'PyMySQL']:
+        # ... import the cursors module
+        if TransanaConstants.DBInstalled in ['PyMySQL']:
+            import pymysql.cursors as cursors
+        else:
+            import MySQLdb.cursors as cursors
+        # ... and use a server-side cursor
+        return db.cursor(cursors.SSCursor)
+    # If we're using sqlite ...
+    else:
+        # ... the standard cursor already steps through the results as they are fetched
+        return db.cursor()
+
 def UpdateTranscriptRecsfor240(self):
     """ For release 2.40, I changed the way clips created from other clips track their source transcript.
         Instead of remembering the Clip Transcript they were taken from, which often may get deleted,
@@ -1783,7 +1866,7 @@ def UpdateTranscriptRecsfor240(self):
                 # ... then indicate that with all 0 values
                 (TNum2, STNum2, CN2) = (0, 0, 0)
         # Build a query to update the data in the database
-        query = 'UPDATE Transcripts2 SET SourceTranscriptNum = %s WHERE TranscriptNum = %s'
+        query = 'UPDATE Transcripts2 SET SourceTranscriptNum = %s, LastSaveTime = CURRENT_TIMESTAMP WHERE TranscriptNum = %s'
         # Adjust the query for sqlite if needed
         query = FixQuery(query)
         # Execute the query
@@ -1793,6 +1876,11 @@ def get_db(dbToOpen=None, usePrompt=True):
     """ Get a connection object reference to the database.  If a connection has not yet been established, then create the connection.
         dbToOpen is passed if we are automatically importing a database following 2.42 to 2.50 Data Conversion. """
     global _dbref
+    global _workerConnectArgs
+    # If we're in a background thread that has its own database connection ...
+    if getattr(_threadData, 'dbref', None) != None:
+        # ... use that connection
+        return _threadData.dbref
     # If a database reference is not defined ...
     if (_dbref == None):
         # If we are NOT passed a database name, we need to get information from the user.
@@ -1891,6 +1979,8 @@ def get_db(dbToOpen=None, usePrompt=True):
                     _dbref.text_factory = str
                     # Set the Max Allowed Packet setting for use with sqlite (This number came from the sqlite documentation)
                     TransanaGlobal.max_allowed_packet = 2147483647
+                    # Background threads can open the same database file
+                    _workerConnectArgs = {'sqlite' : dbName.encode('utf8')}
                     # ... and we'll make this the default database to make it even easier.
                     TransanaGlobal.configData.database = databaseName
                     TransanaGlobal.configData.SaveConfiguration()
@@ -2231,6 +2321,23 @@ def get_db(dbToOpen=None, usePrompt=True):
                                 # If database limits have been exceeded, block the database open.
                                 _dbref = None
 
+                        # If we're connected to a database server ...
+                        if (_dbref != None) and (TransanaConstants.DBInstalled in ['MySQLdb-server', 'PyMySQL']):
+                            # ... remember what background threads need to open their own connections.
+                            # (Embedded MySQL doesn't allow this.)
+                            args = {'host' : dbServer, 'user' : userName, 'passwd' : password, 'port' : int(port)}
+                            # Unicode settings depend on the wxPython build ...
+                            if 'unicode' in wx.PlatformInfo:
+                                args['use_unicode'] = True
+                                if TransanaConstants.DBInstalled in ['PyMySQL']:
+                                    args['charset'] = 'utf8'
+                            # ... but an SSL connection is needed either way if one was requested
+                            if ssl:
+                                args['ssl'] = {'cert': sslClientCert, 'key': sslClientKey}
+                            _workerConnectArgs = {'mysql' : args,
+                                                  'database' : databaseName.encode(TransanaGlobal.encoding),
+                                                  'utf8' : (TransanaGlobal.DBVersion >= u'4.1')}
+
                         TransanaGlobal.configData.database = databaseName
 
                 # MySQLdb and PyMySQL handle exceptions differently.  This code tries to handle exceptions correctly for
@@ -2455,8 +2562,105 @@ def close_db():
         db.close()
 
     global _dbref
+    global _workerConnectArgs
+    global _connectionSerial
     # Remove all reference to the database
     _dbref = None
+    # Background threads can't connect to a closed database, and need to drop any connections they have
+    _workerConnectArgs = None
+    _connectionSerial += 1
+
+def get_connection_serial():
+    """ Return a number that changes whenever the database connection is closed, so data cached from one
+        database connection won't be used with another """
+    return _connectionSerial
+
+def worker_db_available():
+    """ Can background threads open their own connections to the current database? """
+    return _workerConnectArgs != None
+
+def open_worker_db():
+    """ Open a database connection for the current background thread.  While it is open, get_db() returns it
+        in this thread, so the usual object loading code can run outside the GUI thread.  Returns False if
+        background threads can't connect to the current database. """
+    # If this thread already has a connection to the current database ...
+    if (getattr(_threadData, 'dbref', None) != None) and (_threadData.serial == _connectionSerial):
+        # ... we can keep using it
+        return True
+    # Close any connection to a previous database
+    close_worker_db()
+    # Open a new connection
+    dbref = open_separate_db()
+    # If we couldn't connect ...
+    if dbref == None:
+        # ... signal failure
+        return False
+    # Remember the connection for this thread
+    _threadData.dbref = dbref
+    _threadData.serial = _connectionSerial
+    # Signal success
+    return True
+
+def open_separate_db():
+    """ Open a new connection to the current database, separate from the one get_db() returns.  The caller must
+        close it.  Returns None if a separate connection can't be opened, as with embedded MySQL. """
+    # Get the connection parameters
+    args = _workerConnectArgs
+    # If we can't open another connection ...
+    if args == None:
+        # ... signal failure
+        return None
+    # Start exception handling
+    try:
+        # If we're using sqlite ...
+        if args.has_key('sqlite'):
+            # ... connect to the database file, set up as get_db() does
+            dbref = sqlite3.connect(args['sqlite'])
+            dbref.isolation_level = None
+            dbref.text_factory = str
+        # If we're using a database server ...
+        else:
+            # ... connect to it
+            dbref = MySQLdb.connect(**args['mysql'])
+            # Get a Database Cursor
+            dbCursor = dbref.cursor()
+            # If we're using UTF-8 ...
+            if args['utf8']:
+                # ... set the Character Encoding settings
+                dbCursor.execute('SET CHARACTER SET utf8')
+                dbCursor.execute('SET character_set_connection = utf8')
+                dbCursor.execute('SET character_set_client = utf8')
+                dbCursor.execute('SET character_set_results = utf8')
+                dbCursor.execute('SET collation_connection = utf8_general_ci')
+            # Select the database
+            dbCursor.execute('USE %s' % args['database'])
+            # Close the Database Cursor
+            dbCursor.close()
+    # If the connection fails ...
+    except:
+        if DEBUG:
+            print "DBInterface.open_separate_db():"
+            print sys.exc_info()[0]
+            print sys.exc_info()[1]
+        # ... signal failure
+        return None
+    # Return the connection
+    return dbref
+
+def close_worker_db():
+    """ Close the current background thread's database connection, if it has one """
+    # If this thread has a database connection ...
+    if getattr(_threadData, 'dbref', None) != None:
+        # Start exception handling
+        try:
+            # Close the connection
+            _threadData.dbref.close()
+        # If the connection is already gone ...
+        except:
+            # ... that's fine
+            pass
+        # Remove all reference to the connection
+        _threadData.dbref = None
 
 
 def get_username():
@@ -3760,7 +3964,10 @@ def list_of_node_notes(** kwargs):
     return notelist
 
 def list_of_all_notes(reportType=None, searchText=None):
-    """ Get a list of all Notes for the Notes Browser """
+    """ Get a list of all Notes for the Notes Browser.  If searchText is passed, only Notes that contain searchText
+        AND that have a word starting with each of the words of searchText are included.  The word test uses the
+        Word Count index, so only the Notes it finds have to be checked for the full searchText.  (See
+        UpdateNoteWordCounts().) """
     # initialize the Notes List as empty
     notelist = []
 
@@ -3794,6 +4001,8 @@ def list_of_all_notes(reportType=None, searchText=None):
     # If we want the Snapshot report, limit the query to Snapshot notes
     elif reportType == 'SnapshotNode':
         query += " WHERE SnapshotNum <> 0"
+    # Initialize the query parameters
+    params = ()
     # If searchText is passed in, we want to limit the results to notes containing that text.
     # We need to add that to our Query
     if searchText != None:
@@ -3801,16 +4010,32 @@ def list_of_all_notes(reportType=None, searchText=None):
             query += " AND "
         else:
             query += " WHERE "
-        query += "LOWER(CAST(NoteText AS CHAR)) like '%%%s%%'" % searchText.lower().encode(TransanaGlobal.encoding)
+        # Split the search text into words the same way the Word Count index does
+        words = Misc.CountWordsInText(Misc.PrepareWordFrequencyText(searchText)).keys()
+        # For each word ...
+        for word in words:
+            # ... the Note must have an indexed word that starts with it.  (A range on the Word index is used rather
+            #     than LIKE so the index is used by both MySQL and sqlite.)
+            query += """NoteNum IN (SELECT ObjectNum FROM WordCounts2
+                                      WHERE ObjectType = %s AND
+                                            Word >= %s AND
+                                            Word < %s) AND """
+            params += ('Note', word[:100].encode(TransanaGlobal.encoding), (word[:100] + u'\uffff').encode(TransanaGlobal.encoding))
+        # The Note text must also contain the full search text.  Escape LIKE's wildcard characters.
+        searchPattern = searchText.lower().replace('!', '!!').replace('%', '!%').replace('_', '!_')
+        query += "LOWER(CAST(NoteText AS CHAR)) LIKE %s ESCAPE '!'"
+        params += ((u'%' + searchPattern + u'%').encode(TransanaGlobal.encoding), )
         
     # We always want to sort by NoteID
     query += " ORDER BY NoteID"
+    # Adjust the query for sqlite if needed
+    query = FixQuery(query)
     # Make sure we have a Database connection
     db = get_db()
     # Get a database cursor
     DBCursor = db.cursor()
     # Execute the query
-    DBCursor.execute(query)
+    DBCursor.execute(query, params)
     # Get the Results Set
     results = DBCursor.fetchall()
     # For each row in the results set ...
@@ -3941,6 +4166,175 @@ def list_of_keywords(** kwargs):
     DBCursor.close()
     return kwlist
 
+def dictionary_of_keywords(objectType, objectNums):
+    """Get the keywordgroup/keyword pairs for many objects of one type (Episode, Document, Clip, Quote or Snapshot)
+    with one query for each batch of 500 objects, rather than one query per object.  Returns a dictionary of
+    lists like the ones list_of_keywords() returns, keyed by object number.  Objects without keywords aren't included.
+
+    example: dictionary_of_keywords('Clip', [1, 2, 3])
+    """
+    d = {}
+    DBCursor = get_db().cursor()
+    # Process the object numbers in batches to keep the IN lists at a reasonable size
+    for batchStart in range(0, len(objectNums), 500):
+        batch = objectNums[batchStart : batchStart + 500]
+        query = """SELECT %sNum, KeywordGroup, Keyword, Example FROM ClipKeywords2
+                     WHERE %sNum IN (%s)
+                     ORDER BY KeywordGroup, Keyword""" % (objectType, objectType, ', '.join(['%s'] * len(batch)))
+        # Adjust the query for sqlite if needed
+        query = FixQuery(query)
+        DBCursor.execute(query, tuple(batch))
+        for (objectNum, kwg, kw, example) in DBCursor.fetchall():
+            if 'unicode' in wx.PlatformInfo:
+                d.setdefault(objectNum, []).append((ProcessDBDataForUTF8Encoding(kwg), \
+                                                    ProcessDBDataForUTF8Encoding(kw), \
+                                                    ProcessDBDataForUTF8Encoding(example)))
+            else:
+                d.setdefault(objectNum, []).append((kwg, kw, example))
+    DBCursor.close()
+    return d
+
+def dictionary_of_collections():
+    """ Get the Collection ID and Parent Collection Number of every Collection with a single query.  Returns a
+        dictionary of (CollectID, ParentCollectNum) tuples keyed by Collection Number. """
+    d = {}
+    query = "SELECT CollectNum, CollectID, ParentCollectNum FROM Collections2"
+    DBCursor = get_db().cursor()
+    DBCursor.execute(query)
+    for (collectNum, collectID, parentNum) in DBCursor.fetchall():
+        if 'unicode' in wx.PlatformInfo:
+            collectID = ProcessDBDataForUTF8Encoding(collectID)
+        # A NULL Parent Collection Number means a top-level Collection
+        if parentNum == None:
+            parentNum = 0
+        d[collectNum] = (collectID, parentNum)
+    DBCursor.close()
+    return d
+
+def _analytic_data_rows(query, scopeField=None, scopeNum=0, collectionNums=None):
+    """ Execute a query for the Analytic Data Export, limited to the records where scopeField = scopeNum, or to the
+        records in the Collections listed in collectionNums.  (The query must call the Quotes2 or Clips2 table "a".)
+        With neither limit, all records are returned.  Returns a list of row dictionaries. """
+    rows = []
+    DBCursor = get_db().cursor()
+    # If we're limited to a list of Collections ...
+    if collectionNums != None:
+        # ... process the Collection Numbers in batches to keep the IN lists at a reasonable size
+        for batchStart in range(0, len(collectionNums), 500):
+            batch = collectionNums[batchStart : batchStart + 500]
+            # Adjust the query for sqlite if needed
+            batchQuery = FixQuery(query + " WHERE a.CollectNum IN (%s)" % ', '.join(['%s'] * len(batch)))
+            DBCursor.execute(batchQuery, tuple(batch))
+            rows += fetchall_named(DBCursor)
+    # If we're limited to a Library, Document or Episode ...
+    elif scopeField != None:
+        # Adjust the query for sqlite if needed
+        DBCursor.execute(FixQuery(query + " WHERE %s = %%s" % scopeField), (scopeNum, ))
+        rows = fetchall_named(DBCursor)
+    else:
+        DBCursor.execute(query)
+        rows = fetchall_named(DBCursor)
+    DBCursor.close()
+    return rows
+
+def _analytic_data_scope(objectType, libraryNum, sourceNum):
+    """ Get the field that limits an Analytic Data Export query for the Quote or Clip objectType to a Library or
+        to a Source (Document or Episode) """
+    if libraryNum != 0:
+        if objectType == 'Quote':
+            return ('d.LibraryNum', libraryNum)
+        else:
+            return ('e.SeriesNum', libraryNum)
+    elif sourceNum != 0:
+        if objectType == 'Quote':
+            return ('a.SourceDocumentNum', sourceNum)
+        else:
+            return ('a.EpisodeNum', sourceNum)
+    else:
+        return (None, 0)
+
+def list_of_analytic_data_quotes(libraryNum=0, documentNum=0, collectionNums=None):
+    """ Get the data the Analytic Data Export needs for all the Quotes in a Library, in a Document, in the Collections
+        listed in collectionNums, or (with none of these) in the database, with a single query.  Returns a list of
+        dictionaries.  DocumentID, ImportedFile and LibraryID are None for orphaned Quotes. """
+    l = []
+    query = """SELECT a.QuoteNum, a.QuoteID, a.CollectNum, b.StartChar, b.EndChar,
+                      d.DocumentID, d.ImportedFile, s.SeriesID
+                 FROM Quotes2 a INNER JOIN QuotePositions2 b ON a.QuoteNum = b.QuoteNum
+                                LEFT JOIN Documents2 d ON a.SourceDocumentNum = d.DocumentNum
+                                LEFT JOIN Series2 s ON d.LibraryNum = s.SeriesNum"""
+    (scopeField, scopeNum) = _analytic_data_scope('Quote', libraryNum, documentNum)
+    for row in _analytic_data_rows(query, scopeField, scopeNum, collectionNums):
+        quoteID = row['QuoteID']
+        documentID = row['DocumentID']
+        # Quotes whose Document has no Imported File have an empty file name
+        importedFile = row['ImportedFile']
+        if (documentID != None) and (importedFile == None):
+            importedFile = ''
+        libraryID = row['SeriesID']
+        if 'unicode' in wx.PlatformInfo:
+            quoteID = ProcessDBDataForUTF8Encoding(quoteID)
+            if documentID != None:
+                documentID = ProcessDBDataForUTF8Encoding(documentID)
+                importedFile = ProcessDBDataForUTF8Encoding(importedFile)
+            if libraryID != None:
+                libraryID = ProcessDBDataForUTF8Encoding(libraryID)
+        l.append({'QuoteNum' : row['QuoteNum'], 'QuoteID' : quoteID, 'CollectNum' : row['CollectNum'],
+                  'StartChar' : row['StartChar'], 'EndChar' : row['EndChar'],
+                  'DocumentID' : documentID, 'ImportedFile' : importedFile, 'LibraryID' : libraryID})
+    return l
+
+def list_of_analytic_data_clips(libraryNum=0, episodeNum=0, collectionNums=None):
+    """ Get the data the Analytic Data Export needs for all the Clips in a Library, in an Episode, in the Collections
+        listed in collectionNums, or (with none of these) in the database, with a single query.  Returns a list of
+        dictionaries.  MediaFile is the file name as stored in the database, without the Video Root. """
+    l = []
+    query = """SELECT a.ClipNum, a.ClipID, a.CollectNum, a.ClipStart, a.ClipStop, a.MediaFile,
+                      e.EpisodeID, s.SeriesID
+                 FROM Clips2 a LEFT JOIN Episodes2 e ON a.EpisodeNum = e.EpisodeNum
+                               LEFT JOIN Series2 s ON e.SeriesNum = s.SeriesNum"""
+    (scopeField, scopeNum) = _analytic_data_scope('Clip', libraryNum, episodeNum)
+    for row in _analytic_data_rows(query, scopeField, scopeNum, collectionNums):
+        clipID = row['ClipID']
+        mediaFile = row['MediaFile']
+        episodeID = row['EpisodeID']
+        libraryID = row['SeriesID']
+        if 'unicode' in wx.PlatformInfo:
+            clipID = ProcessDBDataForUTF8Encoding(clipID)
+            mediaFile = ProcessDBDataForUTF8Encoding(mediaFile)
+            if episodeID != None:
+                episodeID = ProcessDBDataForUTF8Encoding(episodeID)
+            if libraryID != None:
+                libraryID = ProcessDBDataForUTF8Encoding(libraryID)
+        l.append({'ClipNum' : row['ClipNum'], 'ClipID' : clipID, 'CollectNum' : row['CollectNum'],
+                  'ClipStart' : row['ClipStart'], 'ClipStop' : row['ClipStop'], 'MediaFile' : mediaFile,
+                  'EpisodeID' : episodeID, 'LibraryID' : libraryID})
+    return l
+
+def dictionary_of_analytic_data_keywords(objectType, libraryNum=0, sourceNum=0, collectionNums=None):
+    """ Get the keywords applied to all the Quotes (objectType 'Quote') or Clips (objectType 'Clip') in a Library,
+        in a Document or Episode (sourceNum), in the Collections listed in collectionNums, or (with none of these)
+        in the database, with a single query.  Returns a dictionary of sets of (KeywordGroup, Keyword) tuples,
+        keyed by Quote or Clip Number.  Objects without keywords aren't included. """
+    d = {}
+    if objectType == 'Quote':
+        query = """SELECT k.QuoteNum AS ObjectNum, k.KeywordGroup, k.Keyword
+                     FROM ClipKeywords2 k INNER JOIN Quotes2 a ON k.QuoteNum = a.QuoteNum
+                                          LEFT JOIN Documents2 d ON a.SourceDocumentNum = d.DocumentNum"""
+    else:
+        query = """SELECT k.ClipNum AS ObjectNum, k.KeywordGroup, k.Keyword
+                     FROM ClipKeywords2 k INNER JOIN Clips2 a ON k.ClipNum = a.ClipNum
+                                          LEFT JOIN Episodes2 e ON a.EpisodeNum = e.EpisodeNum"""
+    (scopeField, scopeNum) = _analytic_data_scope(objectType, libraryNum, sourceNum)
+    for row in _analytic_data_rows(query, scopeField, scopeNum, collectionNums):
+        kwg = row['KeywordGroup']
+        kw = row['Keyword']
+        if 'unicode' in wx.PlatformInfo:
+            kwg = ProcessDBDataForUTF8Encoding(kwg)
+            kw = ProcessDBDataForUTF8Encoding(kw)
+        d.setdefault(row['ObjectNum'], set()).add((kwg, kw))
+    return d
+
 def list_of_snapshot_detail_keywords(** kwargs):
     """Get a list of all Snapshot Detail keywordgroup/keyword pairs for the specified
     qualifier (Snapshot numbers).  Result is a list of tuples,
@@ -4004,6 +4398,102 @@ def list_of_keyword_examples():
     dbCursor.close()
     return keywordExampleList
 
+def list_of_keyword_summary(KeywordGroup=None):
+    """ Get the data for the Keyword Summary Report with two queries rather than one query per Keyword.  Returns
+        a list of dictionaries, one for each Keyword of KeywordGroup (or of all Keyword Groups if KeywordGroup is
+        None), in Keyword Group and Keyword order.  Each dictionary holds the KeywordGroup, Keyword, Definition,
+        LineColorDef, DrawMode, LineWidth and LineStyle of the Keyword, and under 'Usage', a dictionary of
+        (count, total size) tuples by object type ('Episode', 'Document', 'Quote', 'Clip' or 'Snapshot') for the
+        object types the Keyword is applied to.  Sizes are in characters for Quotes and in milliseconds for Clips and
+        Snapshots, and are 0 for Episodes and Documents. """
+    # Build the WHERE clause and parameters that limit the queries to one Keyword Group, if requested
+    if KeywordGroup != None:
+        if 'unicode' in wx.PlatformInfo:
+            KeywordGroup = KeywordGroup.encode(TransanaGlobal.encoding)
+        whereClause = "WHERE KeywordGroup = %s"
+        params = (KeywordGroup, )
+    else:
+        whereClause = ""
+        params = ()
+    keywordList = []
+    keywordIndex = {}
+    DBCursor = get_db().cursor()
+    # Get the Keyword records
+    query = """SELECT KeywordGroup, Keyword, Definition, LineColorDef, DrawMode, LineWidth, LineStyle
+                 FROM Keywords2
+                 %s
+                 ORDER BY KeywordGroup, Keyword""" % whereClause
+    # Adjust the query for sqlite if needed
+    query = FixQuery(query)
+    DBCursor.execute(query, params)
+    for (kwg, kw, definition, lineColorDef, drawMode, lineWidth, lineStyle) in DBCursor.fetchall():
+        if 'unicode' in wx.PlatformInfo:
+            kwg = ProcessDBDataForUTF8Encoding(kwg)
+            kw = ProcessDBDataForUTF8Encoding(kw)
+            definition = ProcessDBDataForUTF8Encoding(definition)
+        # NULL values are treated as blank, as the Keyword Object does
+        if definition == None:
+            definition = ''
+        keywordRecord = { 'KeywordGroup' : kwg,
+                          'Keyword'      : kw,
+                          'Definition'   : definition,
+                          'LineColorDef' : lineColorDef or '',
+                          'DrawMode'     : drawMode or '',
+                          'LineWidth'    : int(lineWidth or 0),
+                          'LineStyle'    : lineStyle or '',
+                          'Usage'        : {} }
+        keywordList.append(keywordRecord)
+        keywordIndex[(kwg, kw)] = keywordRecord
+
+    # Get the number of objects each Keyword is applied to, and their total size, by object type, with a single
+    # aggregate query.  UNION (rather than UNION ALL) removes duplicate codings, such as a Snapshot that has a
+    # Keyword applied to the whole Snapshot and also to a Coding Shape, so each object is only counted once.
+    # (Unused object number columns in ClipKeywords2 may be 0 or NULL.)
+    query = """SELECT KeywordGroup, Keyword, ObjectType, COUNT(*), SUM(ObjectSize)
+                 FROM (SELECT KeywordGroup, Keyword, 'Episode' AS ObjectType, EpisodeNum AS ObjectNum, 0 AS ObjectSize
+                         FROM ClipKeywords2
+                         WHERE EpisodeNum > 0
+                       UNION
+                       SELECT KeywordGroup, Keyword, 'Document', DocumentNum, 0
+                         FROM ClipKeywords2
+                         WHERE DocumentNum > 0
+                       UNION
+                       SELECT ck.KeywordGroup, ck.Keyword, 'Quote', ck.QuoteNum, qp.EndChar - qp.StartChar
+                         FROM ClipKeywords2 ck, QuotePositions2 qp
+                         WHERE ck.QuoteNum > 0 AND
+                               qp.QuoteNum = ck.QuoteNum
+                       UNION
+                       SELECT ck.KeywordGroup, ck.Keyword, 'Clip', ck.ClipNum, c.ClipStop - c.ClipStart
+                         FROM ClipKeywords2 ck, Clips2 c
+                         WHERE ck.ClipNum > 0 AND
+                               c.ClipNum = ck.ClipNum
+                       UNION
+                       SELECT ck.KeywordGroup, ck.Keyword, 'Snapshot', ck.SnapshotNum, s.SnapshotDuration
+                         FROM ClipKeywords2 ck, Snapshots2 s
+                         WHERE ck.SnapshotNum > 0 AND
+                               s.SnapshotNum = ck.SnapshotNum
+                       UNION
+                       SELECT sk.KeywordGroup, sk.Keyword, 'Snapshot', sk.SnapshotNum, s.SnapshotDuration
+                         FROM SnapshotKeywords2 sk, Snapshots2 s
+                         WHERE s.SnapshotNum = sk.SnapshotNum) codings
+                 %s
+                 GROUP BY KeywordGroup, Keyword, ObjectType""" % whereClause
+    # Adjust the query for sqlite if needed
+    query = FixQuery(query)
+    DBCursor.execute(query, params)
+    for (kwg, kw, objectType, objectCount, totalSize) in DBCursor.fetchall():
+        if 'unicode' in wx.PlatformInfo:
+            kwg = ProcessDBDataForUTF8Encoding(kwg)
+            kw = ProcessDBDataForUTF8Encoding(kw)
+        # Skip codings for Keywords that no longer have a Keyword record
+        if keywordIndex.has_key((kwg, kw)):
+            # SUM() of no values is NULL, and MySQL returns SUM() as a Decimal
+            if totalSize == None:
+                totalSize = 0
+            keywordIndex[(kwg, kw)]['Usage'][objectType] = (int(objectCount), int(totalSize))
+    DBCursor.close()
+    return keywordList
+
 def SetKeywordExampleStatus(kwg, kw, clipNum, exampleValue):
     """ The SetKeywordExampleStatus(kwg, kw, clipNum, exampleValue) method sets the
         Example value in the ClipKeywords table for the appropriate KWG, KW, Clip
@@ -5073,6 +5563,257 @@ def ClearAllSynonyms():
     # Close the cursor
     DBCursor.close()
 
+# Word Count Index object types, mapped to the table and record number field that hold their PlainText
+WORDCOUNT_OBJECT_TABLES = {'Document'   : ('Documents2', 'DocumentNum'),
+                           'Transcript' : ('Transcripts2', 'TranscriptNum'),
+                           'Quote'      : ('Quotes2', 'QuoteNum')}
+
+def UpdateWordCounts(objectType, objectNum, plaintext, DBCursor=None, counts=None):
+    """ Replace the Word Count index entries for a Document, Transcript, or Quote based on its PlainText.
+        Pass the object's database cursor to include the update in the object's save transaction.
+        If the raw word counts for the PlainText have already been calculated, pass them in as counts. """
+    # If no database cursor was passed in ...
+    if DBCursor == None:
+        # ... get one, and remember to close it when we're done
+        cursor = get_db().cursor()
+    else:
+        cursor = DBCursor
+    # Remove any existing index entries for this object
+    query = "DELETE FROM WordCounts2 WHERE ObjectType = %s AND ObjectNum = %s"
+    # Adjust the query for sqlite if needed
+    query = FixQuery(query)
+    # Execute the query
+    cursor.execute(query, (objectType, objectNum))
+    # If the object HAS plain text (objects without it are left un-indexed so PlainTextUpdate can find them) ...
+    if plaintext != None:
+        # If we weren't given the word counts ...
+        if counts == None:
+            # ... count the words in the plain text
+            counts = Misc.CountWordsInText(Misc.PrepareWordFrequencyText(plaintext))
+        # The Word field is limited to 100 characters.  Combine the counts for any very long words that
+        # become identical when truncated, so we don't violate the Primary Key.
+        truncatedCounts = {}
+        for word in counts.keys():
+            truncatedCounts[word[:100]] = truncatedCounts.get(word[:100], 0) + counts[word]
+        # Initialize the total word count
+        total = 0
+        # Initialize the list of values to insert
+        values = []
+        # For each word ...
+        for word in truncatedCounts.keys():
+            # If we're using Unicode ...
+            if ('unicode' in wx.PlatformInfo) and isinstance(word, unicode):
+                # ... encode the word
+                dbWord = word.encode(TransanaGlobal.encoding)
+            else:
+                dbWord = word
+            # Add the word to the values to be inserted
+            values.append((objectType, objectNum, dbWord, truncatedCounts[word]))
+            # Add the word's count to the total
+            total += truncatedCounts[word]
+        # Add the blank-word total, which signals that this object has been indexed
+        values.append((objectType, objectNum, '', total))
+        # Define the Insert query
+        query = "INSERT INTO WordCounts2 (ObjectType, ObjectNum, Word, WordCount) VALUES (%s, %s, %s, %s)"
+        # Adjust the query for sqlite if needed
+        query = FixQuery(query)
+        # Insert all the words at once
+        cursor.executemany(query, values)
+    # If we created the cursor here ...
+    if DBCursor == None:
+        # ... close it
+        cursor.close()
+
+def DeleteWordCounts(objectType, objectNum, DBCursor=None):
+    """ Remove the Word Count index entries for a deleted Document, Transcript, or Quote """
+    # Passing None as the plain text removes all index entries without adding new ones
+    UpdateWordCounts(objectType, objectNum, None, DBCursor)
+
+def GetWordCounts(items):
+    """ Sum the indexed Word Counts for a list of (objectType, objectNum) tuples.
+        Returns a dictionary of raw word counts (synonyms NOT applied) and a list of the
+        (objectType, objectNum) items that have not been indexed yet. """
+    # Initialize the word count dictionary
+    words = {}
+    # Initialize the list of items missing from the index
+    missing = []
+    # Get a Database cursor
+    DBCursor = get_db().cursor()
+    # Group the requested object numbers by object type
+    objectNums = {}
+    for (objectType, objectNum) in items:
+        if objectNums.has_key(objectType):
+            objectNums[objectType].append(objectNum)
+        else:
+            objectNums[objectType] = [objectNum]
+    # For each object type ...
+    for objectType in objectNums.keys():
+        # ... process the object numbers in batches to keep the IN lists at a reasonable size
+        for batchStart in range(0, len(objectNums[objectType]), 500):
+            # Get the batch of object numbers
+            batch = objectNums[objectType][batchStart : batchStart + 500]
+            # Create the parameter placeholders for the IN list
+            inList = ', '.join(['%s'] * len(batch))
+            # First, find out which objects in the batch HAVE been indexed
+            query = """SELECT ObjectNum FROM WordCounts2
+                         WHERE ObjectType = %%s AND
+                               Word = %%s AND
+                               ObjectNum IN (%s)""" % inList
+            # Adjust the query for sqlite if needed
+            query = FixQuery(query)
+            # Execute the query
+            DBCursor.execute(query, (objectType, '') + tuple(batch))
+            # Note the indexed object numbers
+            indexed = [row[0] for row in DBCursor.fetchall()]
+            # Any object in the batch that is not indexed is missing
+            for objectNum in batch:
+                if not objectNum in indexed:
+                    missing.append((objectType, objectNum))
+            # Now let the database add up the word counts for the batch
+            query = """SELECT Word, SUM(WordCount) FROM WordCounts2
+                         WHERE ObjectType = %%s AND
+                               Word <> %%s AND
+                               ObjectNum IN (%s)
+                         GROUP BY Word""" % inList
+            # Adjust the query for sqlite if needed
+            query = FixQuery(query)
+            # Execute the query
+            DBCursor.execute(query, (objectType, '') + tuple(batch))
+            # Iterate through the results
+            for (word, count) in DBCursor.fetchall():
+                # Decode the word
+                word = ProcessDBDataForUTF8Encoding(word)
+                # Add the batch count to the total count for the word
+                words[word] = words.get(word, 0) + int(count)
+    # Close the Database Cursor
+    DBCursor.close()
+    # Return the results
+    return (words, missing)
+
+def list_of_items_without_word_counts():
+    """ Get a list of (objectType, objectNum) tuples for the Documents, Transcripts and Quotes that have
+        PlainText but have not yet been added to the Word Count index. """
+    # Create an empty list
+    l = []
+    # Get a Database Cursor
+    DBCursor = get_db().cursor()
+    # For each object type that has Plain Text ...
+    for objectType in ['Document', 'Transcript', 'Quote']:
+        # ... get the table and record number field names
+        (tableName, numField) = WORDCOUNT_OBJECT_TABLES[objectType]
+        # Find records with PlainText that lack the blank-word index row
+        query = """SELECT %s FROM %s a
+                     WHERE PlainText IS NOT NULL AND
+                           NOT EXISTS (SELECT ObjectNum FROM WordCounts2 b
+                                         WHERE b.ObjectType = %%s AND
+                                               b.ObjectNum = a.%s AND
+                                               b.Word = %%s)
+                     ORDER BY %s""" % (numField, tableName, numField, numField)
+        # Adjust the query for sqlite if needed
+        query = FixQuery(query)
+        # Execute the Query
+        DBCursor.execute(query, (objectType, ''))
+        # Iterate through the Results Set
+        for row in DBCursor.fetchall():
+            # Add the results to the list
+            l.append((objectType, row[0]))
+    # Close the Database Cursor
+    DBCursor.close()
+    # Return the list as the function results
+    return l
+
+def UpdateNoteWordCounts():
+    """ Add the Notes that are not in the Word Count index yet, such as Notes from before the index existed or
+        Notes added by an XML Import, to the index.  The Note Search needs them there.  (Notes are indexed
+        as they are saved, so usually there is nothing to do.) """
+    # Get a Database Cursor
+    DBCursor = get_db().cursor()
+    # Find the Notes that lack the blank-word index row
+    query = """SELECT NoteNum, NoteText FROM Notes2 a
+                 WHERE NOT EXISTS (SELECT ObjectNum FROM WordCounts2 b
+                                     WHERE b.ObjectType = %s AND
+                                           b.ObjectNum = a.NoteNum AND
+                                           b.Word = %s)"""
+    # Adjust the query for sqlite if needed
+    query = FixQuery(query)
+    # Execute the Query
+    DBCursor.execute(query, ('Note', ''))
+    # For each Note that needs to be indexed ...
+    for (noteNum, noteText) in DBCursor.fetchall():
+        # Check for "array" data and convert if needed
+        if type(noteText).__name__ == 'array':
+            if noteText.typecode == 'u':
+                noteText = noteText.tounicode()
+            else:
+                noteText = noteText.tostring()
+        # A Note without text is indexed as having no words
+        if noteText == None:
+            noteText = ''
+        # Encode the Note text, if needed
+        if 'unicode' in wx.PlatformInfo:
+            noteText = ProcessDBDataForUTF8Encoding(noteText)
+        # Add the Note to the index
+        UpdateWordCounts('Note', noteNum, noteText, DBCursor)
+    # Close the Database Cursor
+    DBCursor.close()
+
+def GetPlainText(objectType, objectNum):
+    """ Get just the PlainText for a Document, Transcript, or Quote, without loading the full object """
+    # Get the table and record number field names
+    (tableName, numField) = WORDCOUNT_OBJECT_TABLES[objectType]
+    # Define the query
+    query = "SELECT PlainText FROM %s WHERE %s = %%s" % (tableName, numField)
+    # Adjust the query for sqlite if needed
+    query = FixQuery(query)
+    # Get a Database Cursor
+    DBCursor = get_db().cursor()
+    # Execute the Query
+    DBCursor.execute(query, (objectNum, ))
+    # Get the result
+    row = DBCursor.fetchone()
+    # Close the Database Cursor
+    DBCursor.close()
+    # If there's no record or no Plain Text ...
+    if (row == None) or (row[0] == None):
+        # ... there's nothing to return
+        return None
+    # Get the Plain Text
+    plaintext = row[0]
+    # If we get an array, convert it to a string
+    if type(plaintext).__name__ == 'array':
+        plaintext = plaintext.tostring()
+    # If we're in Unicode mode, decode the Plain Text
+    if ('unicode' in wx.PlatformInfo) and isinstance(plaintext, str):
+        plaintext = plaintext.decode(TransanaGlobal.encoding)
+    # Return the Plain Text
+    return plaintext
+
+def GetLastSaveTimes(tableName, numField, keyField, keyValue):
+    """ Get the LastSaveTime values for the records in tableName where keyField matches keyValue, as a dictionary
+        keyed by the numField record numbers.  This is a quick way to see if cached objects are still current. """
+    # Create an empty dictionary
+    saveTimes = {}
+    # Define the query
+    query = "SELECT %s, LastSaveTime FROM %s WHERE %s = %%s" % (numField, tableName, keyField)
+    # Adjust the query for sqlite if needed
+    query = FixQuery(query)
+    # Get a Database Cursor
+    DBCursor = get_db().cursor()
+    # Execute the Query
+    DBCursor.execute(query, (keyValue, ))
+    # Iterate through the Results Set
+    for (num, lastSaveTime) in DBCursor.fetchall():
+        # Add the results to the dictionary
+        saveTimes[num] = lastSaveTime
+    # Close the Database Cursor
+    DBCursor.close()
+    # Return the dictionary as the function results
+    return saveTimes
+
+def CountItemsWithoutWordCounts():
+    """ Return the number of Documents, Transcripts, and Quotes that need to be added to the Word Count index """
+    return len(list_of_items_without_word_counts())
+
 def ClearSourceEpisodeRecords(episodeNum):
     """ When an Episode is deleted, it must be removed from any Snapshots that claim it. """
 
@@ -5085,11 +5826,13 @@ def ClearSourceEpisodeRecords(episodeNum):
     DBCursor = get_db().cursor()
 
     # Define a query to delete the appropriate records
+    # (Changing the records means changing their LastSaveTime too, so an XML Export of changes includes them.)
     query = """ UPDATE Snapshots2
                   SET EpisodeNum = 0,
                       TranscriptNum = 0,
                       SnapshotTimeCode = 0,
-                      SnapshotDuration = 0
+                      SnapshotDuration = 0,
+                      LastSaveTime = CURRENT_TIMESTAMP
                   WHERE EpisodeNum = %s """
     # Adjust the query for sqlite if needed
     query = FixQuery(query)
@@ -5111,15 +5854,16 @@ def ClearSourceTranscriptRecords(transcriptNum):
     # Get a Database cursor
     DBCursor = get_db().cursor()
 
-    # Define a query to delete the appropriate records
-    query = "UPDATE Transcripts2 SET SourceTranscriptNum = 0 where SourceTranscriptNum = %s"
+    # Define a query to delete the appropriate records.
+    # (Changing the records means changing their LastSaveTime too, so an XML Export of changes includes them.)
+    query = "UPDATE Transcripts2 SET SourceTranscriptNum = 0, LastSaveTime = CURRENT_TIMESTAMP where SourceTranscriptNum = %s"
     # Adjust the query for sqlite if needed
     query = FixQuery(query)
     # Execute the query
     DBCursor.execute(query, (transcriptNum, ))
 
     # Define a query to delete the appropriate records
-    query = "UPDATE Snapshots2 SET TranscriptNum = 0 where TranscriptNum = %s"
+    query = "UPDATE Snapshots2 SET TranscriptNum = 0, LastSaveTime = CURRENT_TIMESTAMP where TranscriptNum = %s"
     # Adjust the query for sqlite if needed
     query = FixQuery(query)
     # Execute the query
@@ -5139,8 +5883,9 @@ def ClearSourceDocumentRecords(documentNum):
     # Get a Database cursor
     DBCursor = get_db().cursor()
 
-    # Define a query to delete the appropriate records
-    query = "UPDATE Quotes2 SET SourceDocumentNum = 0 where SourceDocumentNum = %s"
+    # Define a query to delete the appropriate records.
+    # (Changing the records means changing their LastSaveTime too, so an XML Export of changes includes them.)
+    query = "UPDATE Quotes2 SET SourceDocumentNum = 0, LastSaveTime = CURRENT_TIMESTAMP where SourceDocumentNum = %s"
     # Adjust the query for sqlite if needed
     query = FixQuery(query)
     # Execute the query
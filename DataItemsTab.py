@@ -285,9 +285,9 @@ class DataItemsTab(wx.Panel):
         else:
             # ... if we have a Clip ...
             if self.gridClips.GetCellValue(row, 4) == 'Clip':
-                # Load the Clip
-                # Switched to CallAfter because of crashes on the Mac.
-                wx.CallAfter(self.ControlObject.LoadClipByNumber, int(self.gridClips.GetCellValue(row, 3)))
+                # Load the Clip.  The Clip is fetched in the background, and loaded into the interface after this
+                # event is done.  (Loading it directly caused crashes on the Mac.)
+                self.ControlObject.LoadClipByNumberInBackground(int(self.gridClips.GetCellValue(row, 3)))
 
                 # NOTE:  LoadClipByNumber eliminates the DataItemsTab, so no further processing can occur!!
                 #        There used to be code here to select the Clip in the Database window, but it stopped
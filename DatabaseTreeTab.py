@@ -11514,8 +11514,14 @@ class _DBTreeCtrl(wx.TreeCtrl):
                             libraryname=self.GetItemText(self.GetItemParent(sel_item))
                             # Capture the Document Name
                             documentname=self.GetItemText(sel_item)
-                            # Load the document via the ControlObject
-                            self.parent.ControlObject.LoadDocument(libraryname, documentname, sel_item_data.recNum, textSearchItems=sel_item_data.textSearchItems)
+                            # If only one Document is selected ...
+                            if len(sel_items) == 1:
+                                # ... load it in the background, so that selecting another item cancels this load
+                                self.parent.ControlObject.LoadDocumentInBackground(libraryname, documentname, sel_item_data.recNum, textSearchItems=sel_item_data.textSearchItems)
+                            # If multiple Documents are selected ...
+                            else:
+                                # ... load the document via the ControlObject
+                                self.parent.ControlObject.LoadDocument(libraryname, documentname, sel_item_data.recNum, textSearchItems=sel_item_data.textSearchItems)
 
                     # If the item is an Episode, Add a Transcript
                     elif sel_item_data.nodetype == 'EpisodeNode':
@@ -11542,8 +11548,14 @@ class _DBTreeCtrl(wx.TreeCtrl):
                                 episodename=self.GetItemText(self.GetItemParent(sel_item))
                                 # Capture the Transcript Name
                                 transcriptname=self.GetItemText(sel_item)
-                                # Load the first transcript via the ControlObject
-                                self.parent.ControlObject.LoadTranscript(libraryname, episodename, transcriptname, textSearchItems=sel_item_data.textSearchItems)
+                                # If only one Transcript is selected ...
+                                if len(sel_items) == 1:
+                                    # ... load it in the background, so that selecting another item cancels this load
+                                    self.parent.ControlObject.LoadTranscriptInBackground(libraryname, episodename, transcriptname, textSearchItems=sel_item_data.textSearchItems)
+                                # If multiple Transcripts are selected, the first must be loaded before the others can be added
+                                else:
+                                    # Load the first transcript via the ControlObject
+                                    self.parent.ControlObject.LoadTranscript(libraryname, episodename, transcriptname, textSearchItems=sel_item_data.textSearchItems)
                                 # Signal that we now have loaded the first transcript
                                 firstTr = False
                             # If we are looking at the second or later items ...
@@ -11589,13 +11601,20 @@ class _DBTreeCtrl(wx.TreeCtrl):
                         sel_items = self.GetSelections()
                         # Iterate through the selected items
                         for sel_item in sel_items:
-                            # Load the Quote via the ControlObject
-                            self.parent.ControlObject.LoadQuote(sel_item_data.recNum, textSearchItems=sel_item_data.textSearchItems)
+                            # If only one Quote is selected ...
+                            if len(sel_items) == 1:
+                                # ... load it in the background, so that selecting another item cancels this load
+                                self.parent.ControlObject.LoadQuoteInBackground(sel_item_data.recNum, textSearchItems=sel_item_data.textSearchItems)
+                            # If multiple Quotes are selected ...
+                            else:
+                                # Load the Quote via the ControlObject
+                                self.parent.ControlObject.LoadQuote(sel_item_data.recNum, textSearchItems=sel_item_data.textSearchItems)
 
                     # If the item is a Clip, load the appropriate object.
                     elif (sel_item_data.nodetype == 'ClipNode') or (sel_item_data.nodetype == 'SearchClipNode'):
-                        # Load everything via the ControlObject
-                        self.parent.ControlObject.LoadClipByNumber(sel_item_data.recNum, textSearchItems=sel_item_data.textSearchItems)
+                        # Load everything via the ControlObject, fetching the Clip in the background so that
+                        # selecting another item cancels this load
+                        self.parent.ControlObject.LoadClipByNumberInBackground(sel_item_data.recNum, textSearchItems=sel_item_data.textSearchItems)
 
                     # If the item is a Snapshot, open a Snapshot Window
                     elif (sel_item_data.nodetype == 'SnapshotNode') or (sel_item_data.nodetype == 'SearchSnapshotNode'):
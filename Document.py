@@ -482,48 +482,7 @@ class Document(DataObject.DataObject):
 
                 # We need to add the Start and End Character Position information 
                 # to the QuotePositions Table.  (A new Document won't have any Quotes yet.)
-
-                # First, delete old data if it exists
-                query = "DELETE FROM QuotePositions2 WHERE DocumentNum = %s"
-                # Adjust the query for sqlite if needed
-                query = DBInterface.FixQuery(query)
-                # Execute the query
-                c.execute(query, (self.number, ))
-                # If there are Quotes in the Quote Dictionary ...
-                if len(self.quote_dict) > 0:
-                    # Add MySQL-specific bulk insert SQL
-                    if TransanaConstants.DBInstalled in ['MySQLdb-embedded', 'MySQLdb-server', 'PyMySQL']:
-                        query = "INSERT INTO QuotePositions2 (QuoteNum, DocumentNum, StartChar, EndChar) VALUES "
-                        values = ()
-                        for key in self.quote_dict.keys():
-                            query += "(%s, %s, %s, %s), "
-                            values += (key, self.number, self.quote_dict[key][0], self.quote_dict[key][1])
-                        # Strip the final comma off the query!
-                        query = query[:-2]
-                        # Adjust the query for sqlite if needed
-                        query = DBInterface.FixQuery(query)
-                        # Execute the query
-                        c.execute(query, values)
-                    else:
-
-#                        print "Document.db_save():  QuotePositions not BULK inserted for sqlite yet!!"
-
-                        query = "INSERT INTO QuotePositions2 (QuoteNum, DocumentNum, StartChar, EndChar) VALUES "
-                        query += "(%s, %s, %s, %s) "
-                        for key in self.quote_dict.keys():
-                            values = (key, self.number, self.quote_dict[key][0], self.quote_dict[key][1])
-
-#                            print
-#                            print
-#                            print "Document.db_save():"
-#                            print query
-#                            print values
-#                            print
-
-                            # Adjust the query for sqlite if needed
-                            query = DBInterface.FixQuery(query)
-                            # Execute the query
-                            c.execute(query, values)
+                self._db_save_quote_positions(c)
 
             # If the object number is 0, we have a new object
             if self.number == 0:
@@ -630,6 +589,8 @@ class Document(DataObject.DataObject):
                 raise SaveError, prompt
             # If there's no error prompt ...
             else:
+                # Update the Word Count index for the Word Frequency Report
+                DBInterface.UpdateWordCounts('Document', self.number, self.plaintext, c)
                 if use_transactions:
                     # ... Commit the database transaction
                     c.execute('COMMIT')
@@ -641,6 +602,43 @@ class Document(DataObject.DataObject):
             # For Partial Transcript Editing, update the Paragraph Information for long transcripts
             self.UpdateParagraphs()
 
+    def _db_save_quote_positions(self, c):
+        """ Replace the QuotePositions records for this Document with the positions in the Quote Dictionary,
+            using the database cursor c """
+        # First, delete old data if it exists
+        query = "DELETE FROM QuotePositions2 WHERE DocumentNum = %s"
+        # Adjust the query for sqlite if needed
+        query = DBInterface.FixQuery(query)
+        # Execute the query
+        c.execute(query, (self.number, ))
+        # If there are Quotes in the Quote Dictionary ...
+        if len(self.quote_dict) > 0:
+            # Add MySQL-specific bulk insert SQL
+            if TransanaConstants.DBInstalled in ['MySQLdb-embedded', 'MySQLdb-server', 'PyMySQL']:
+                query = "INSERT INTO QuotePositions2 (QuoteNum, DocumentNum, StartChar, EndChar) VALUES "
+                values = ()
+                for key in self.quote_dict.keys():
+                    query += "(%s, %s, %s, %s), "
+                    values += (key, self.number, self.quote_dict[key][0], self.quote_dict[key][1])
+                # Strip the final comma off the query!
+                query = query[:-2]
+                # Adjust the query for sqlite if needed
+                query = DBInterface.FixQuery(query)
+                # Execute the query
+                c.execute(query, values)
+            else:
+
+#                print "Document.db_save():  QuotePositions not BULK inserted for sqlite yet!!"
+
+                query = "INSERT INTO QuotePositions2 (QuoteNum, DocumentNum, StartChar, EndChar) VALUES "
+                query += "(%s, %s, %s, %s) "
+                for key in self.quote_dict.keys():
+                    values = (key, self.number, self.quote_dict[key][0], self.quote_dict[key][1])
+                    # Adjust the query for sqlite if needed
+                    query = DBInterface.FixQuery(query)
+                    # Execute the query
+                    c.execute(query, values)
+
     def db_delete(self, use_transactions=1):
         """Delete this object record from the database."""
         result = 1
@@ -715,6 +713,10 @@ class Document(DataObject.DataObject):
             if result:
                 DBInterface.delete_all_keywords_for_a_group(0, self.number, 0, 0, 0)
 
+            # Remove the Document from the Word Count index
+            if result:
+                DBInterface.DeleteWordCounts('Document', self.number, c)
+
             # Delete the actual record.
             self._db_do_delete(use_transactions, c, result)
 
@@ -384,9 +384,9 @@ class DocumentQuotesTab(wx.Panel):
         else:
             # ... if we have a Quote ...
             if self.gridQuotes.GetCellValue(row, 4) == 'Quote':
-                # Load the Quote
-                # Switched to CallAfter because of crashes on the Mac.
-                wx.CallAfter(self.ControlObject.LoadQuote, int(self.gridQuotes.GetCellValue(row, 3)))
+                # Load the Quote.  The Quote is fetched in the background, and loaded into the interface after this
+                # event is done.  (Loading it directly caused crashes on the Mac.)
+                self.ControlObject.LoadQuoteInBackground(int(self.gridQuotes.GetCellValue(row, 3)))
 
 ##                # NOTE:  LoadClipByNumber eliminates the DataItemsTab, so no further processing can occur!!
 ##                #        There used to be code here to select the Clip in the Database window, but it stopped
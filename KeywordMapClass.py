@@ -1921,6 +1921,15 @@ class KeywordMap(wx.Frame):
         # We need to remember Snapshot Color for when self.keywordAsColor is False
         # Otherwise, whole snapshot coding may get a different color than detail snapshot coding.
         snapshotColor = {}
+        # Redrawing after a change to the Filter settings re-uses the codings that have already been read, so checking
+        # them against the Filter settings is most of the work.  Check against sets rather than lists, and look up each
+        # keyword's row in a dictionary rather than searching the Keyword List for every coding.
+        clipFilterSet = set(self.clipFilterList)
+        snapshotFilterSet = set(self.snapshotFilterList)
+        quoteFilterSet = set(self.quoteFilterList)
+        keywordRows = {}
+        for (index, keyword) in enumerate(self.filteredKeywordList):
+            keywordRows.setdefault(keyword, index)
 
         if not self.embedded:
             # Now that we have all necessary information, let's create and populate the graphic
@@ -2238,14 +2247,14 @@ class KeywordMap(wx.Frame):
             # If we're in the Keyword Visualization and showEmbeddedLabels is enabled ...
             # NOTE:  This is ONLY to be used for testing the mouse-overs, not in production!
             if self.embedded and self.showEmbeddedLabels:
-                self.graphic.AddText("%s : %s" % (KWG, KW), 2, self.CalcY(self.filteredKeywordList.index((KWG, KW))) - 7)
+                self.graphic.AddText("%s : %s" % (KWG, KW), 2, self.CalcY(keywordRows[(KWG, KW)]) - 7)
 
         # Set a counter for missing colors
         nextColour = 0
         # For each record in the Clip List ...
         for (KWG, KW, Start, Stop, ClipNum, ClipName, CollectNum) in self.clipList:
             # If the record should be displayed based on the Clip and Keyword sections of the Filter Dialog ...
-            if ((ClipName, CollectNum, True) in self.clipFilterList) and ((KWG, KW) in self.filteredKeywordList):
+            if ((ClipName, CollectNum, True) in clipFilterSet) and ((KWG, KW) in keywordRows):
                 # See if the Clip's start is before the portion of the map being displayed
                 if Start < self.startTime:
                     Start = self.startTime
@@ -2263,8 +2272,8 @@ class KeywordMap(wx.Frame):
                     # Initialize a list for Temporary Lines
                     tempLine = []
                     # Add the Coding Line
-                    tempLine.append((self.CalcX(Start), self.CalcY(self.filteredKeywordList.index((KWG, KW))),
-                                     self.CalcX(Stop), self.CalcY(self.filteredKeywordList.index((KWG, KW)))))
+                    tempLine.append((self.CalcX(Start), self.CalcY(keywordRows[(KWG, KW)]),
+                                     self.CalcX(Stop), self.CalcY(keywordRows[(KWG, KW)])))
                     # If we're in the Keyword Map and are NOT using Colors as Keywords (i.e., colors are Clips) ....
                     if (not self.embedded) and (not self.colorAsKeywords):
                         # Update the color index here, at the clip transition
@@ -2338,23 +2347,23 @@ class KeywordMap(wx.Frame):
                                 self.graphic.SetColour("GREEN")
                             else:
                                 self.graphic.SetColour("WHITE")
-                            tempLine = [(self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW))), self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW))))]
+                            tempLine = [(self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)]), self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)]))]
                             self.graphic.AddLines(tempLine)
                             if self.colorOutput:
                                 self.graphic.SetColour("RED")
                             else:
                                 self.graphic.SetColour("BLACK")
-                            tempLine = [(self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW)))-overlapThickness+1, self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW)))-overlapThickness+1)]
+                            tempLine = [(self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)])-overlapThickness+1, self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)])-overlapThickness+1)]
                             self.graphic.AddLines(tempLine)
                             if self.colorOutput:
                                 self.graphic.SetColour("BLUE")
                             else:
                                 self.graphic.SetColour("GRAY")
-                            tempLine = [(self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW)))+overlapThickness, self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW)))+overlapThickness)]
+                            tempLine = [(self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)])+overlapThickness, self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)])+overlapThickness)]
                             self.graphic.AddLines(tempLine)
                             # Let's remember the clip start and stop boundaries, to be drawn at the end so they won't get over-written
-                            overlapLines.append(((self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW)))-(self.barHeight / 2), self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW)))+(self.barHeight / 2)),))
-                            overlapLines.append(((self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW)))-(self.barHeight / 2), self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW)))+(self.barHeight / 2)),))
+                            overlapLines.append(((self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)])-(self.barHeight / 2), self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)])+(self.barHeight / 2)),))
+                            overlapLines.append(((self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)])-(self.barHeight / 2), self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)])+(self.barHeight / 2)),))
 
                     # ... add the new Clip to the Clip List
                     self.keywordClipList[(KWG, KW)].append(('Clip', Start, Stop, ClipNum, ClipName))
@@ -2367,7 +2376,7 @@ class KeywordMap(wx.Frame):
         # For each record in the Snapshot List ...
         for (KWG, KW, Start, Stop, SnapshotNum, SnapshotName, CollectNum) in self.snapshotList:
             # If the record should be displayed based on the Snapshot and Keyword sections of the Filter Dialog ...
-            if ((SnapshotName, CollectNum, True) in self.snapshotFilterList) and ((KWG, KW) in self.filteredKeywordList):
+            if ((SnapshotName, CollectNum, True) in snapshotFilterSet) and ((KWG, KW) in keywordRows):
                 # See if the Snapshot's start is before the portion of the map being displayed
                 if Start < self.startTime:
                     Start = self.startTime
@@ -2385,8 +2394,8 @@ class KeywordMap(wx.Frame):
                     # Initialize a list for Temporary Lines
                     tempLine = []
                     # Add the Coding Line
-                    tempLine.append((self.CalcX(Start), self.CalcY(self.filteredKeywordList.index((KWG, KW))),
-                                     self.CalcX(Stop), self.CalcY(self.filteredKeywordList.index((KWG, KW)))))
+                    tempLine.append((self.CalcX(Start), self.CalcY(keywordRows[(KWG, KW)]),
+                                     self.CalcX(Stop), self.CalcY(keywordRows[(KWG, KW)])))
                     # If we're in the Keyword Map and are NOT using Colors as Keywords (i.e., colors are Clips) ....
                     if (not self.embedded) and (not self.colorAsKeywords):
                         # Update the color index here, at the clip transition
@@ -2459,23 +2468,23 @@ class KeywordMap(wx.Frame):
                                 self.graphic.SetColour("GREEN")
                             else:
                                 self.graphic.SetColour("WHITE")
-                            tempLine = [(self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW))), self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW))))]
+                            tempLine = [(self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)]), self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)]))]
                             self.graphic.AddLines(tempLine)
                             if self.colorOutput:
                                 self.graphic.SetColour("RED")
                             else:
                                 self.graphic.SetColour("BLACK")
-                            tempLine = [(self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW)))-overlapThickness+1, self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW)))-overlapThickness+1)]
+                            tempLine = [(self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)])-overlapThickness+1, self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)])-overlapThickness+1)]
                             self.graphic.AddLines(tempLine)
                             if self.colorOutput:
                                 self.graphic.SetColour("BLUE")
                             else:
                                 self.graphic.SetColour("GRAY")
-                            tempLine = [(self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW)))+overlapThickness, self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW)))+overlapThickness)]
+                            tempLine = [(self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)])+overlapThickness, self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)])+overlapThickness)]
                             self.graphic.AddLines(tempLine)
                             # Let's remember the clip start and stop boundaries, to be drawn at the end so they won't get over-written
-                            overlapLines.append(((self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW)))-(self.barHeight / 2), self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW)))+(self.barHeight / 2)),))
-                            overlapLines.append(((self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW)))-(self.barHeight / 2), self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW)))+(self.barHeight / 2)),))
+                            overlapLines.append(((self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)])-(self.barHeight / 2), self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)])+(self.barHeight / 2)),))
+                            overlapLines.append(((self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)])-(self.barHeight / 2), self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)])+(self.barHeight / 2)),))
 
                     # ... add the new Clip to the Clip List
                     self.keywordClipList[(KWG, KW)].append(('Snapshot', Start, Stop, SnapshotNum, SnapshotName))
@@ -2488,7 +2497,7 @@ class KeywordMap(wx.Frame):
         # For each record in the Quote List ...
         for (KWG, KW, Start, Stop, QuoteNum, QuoteName, CollectNum) in self.quoteList:
             # If the record should be displayed based on the Quote and Keyword sections of the Filter Dialog ...
-            if ((QuoteName, CollectNum, True) in self.quoteFilterList) and ((KWG, KW) in self.filteredKeywordList):
+            if ((QuoteName, CollectNum, True) in quoteFilterSet) and ((KWG, KW) in keywordRows):
                 # See if the Quote's start is before the portion of the map being displayed
                 if Start < self.startChar:
                     Start = self.startChar
@@ -2507,8 +2516,8 @@ class KeywordMap(wx.Frame):
                     tempLine = []
 
                     # Add the Coding Line
-                    tempLine.append((self.CalcX(Start), self.CalcY(self.filteredKeywordList.index((KWG, KW))),
-                                     self.CalcX(Stop), self.CalcY(self.filteredKeywordList.index((KWG, KW)))))
+                    tempLine.append((self.CalcX(Start), self.CalcY(keywordRows[(KWG, KW)]),
+                                     self.CalcX(Stop), self.CalcY(keywordRows[(KWG, KW)])))
                     # If we're in the Keyword Map and are NOT using Colors as Keywords (i.e., colors are Quotes) ....
                     if (not self.embedded) and (not self.colorAsKeywords):
                         # Update the color index here, at the quote transition
@@ -2569,23 +2578,23 @@ class KeywordMap(wx.Frame):
                                 self.graphic.SetColour("GREEN")
                             else:
                                 self.graphic.SetColour("WHITE")
-                            tempLine = [(self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW))), self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW))))]
+                            tempLine = [(self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)]), self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)]))]
                             self.graphic.AddLines(tempLine)
                             if self.colorOutput:
                                 self.graphic.SetColour("RED")
                             else:
                                 self.graphic.SetColour("BLACK")
-                            tempLine = [(self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW)))-overlapThickness+1, self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW)))-overlapThickness+1)]
+                            tempLine = [(self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)])-overlapThickness+1, self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)])-overlapThickness+1)]
                             self.graphic.AddLines(tempLine)
                             if self.colorOutput:
                                 self.graphic.SetColour("BLUE")
                             else:
                                 self.graphic.SetColour("GRAY")
-                            tempLine = [(self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW)))+overlapThickness, self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW)))+overlapThickness)]
+                            tempLine = [(self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)])+overlapThickness, self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)])+overlapThickness)]
                             self.graphic.AddLines(tempLine)
                             # Let's remember the clip start and stop boundaries, to be drawn at the end so they won't get over-written
-                            overlapLines.append(((self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW)))-(self.barHeight / 2), self.CalcX(overlapStart), self.CalcY(self.filteredKeywordList.index((KWG, KW)))+(self.barHeight / 2)),))
-                            overlapLines.append(((self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW)))-(self.barHeight / 2), self.CalcX(overlapEnd), self.CalcY(self.filteredKeywordList.index((KWG, KW)))+(self.barHeight / 2)),))
+                            overlapLines.append(((self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)])-(self.barHeight / 2), self.CalcX(overlapStart), self.CalcY(keywordRows[(KWG, KW)])+(self.barHeight / 2)),))
+                            overlapLines.append(((self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)])-(self.barHeight / 2), self.CalcX(overlapEnd), self.CalcY(keywordRows[(KWG, KW)])+(self.barHeight / 2)),))
 
                     # ... add the new Quote to the Clip List
                     self.keywordClipList[(KWG, KW)].append(('Quote', Start, Stop, QuoteNum, QuoteName))
@@ -0,0 +1,214 @@
+# Copyright (C) 2002-2016 Spurgeon Woods LLC
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of version 2 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+#
+
+""" This module implements a sparse Object by Keyword matrix, such as the Analytic Data Export produces.
+
+    Each row of the matrix is an object (a Quote or a Clip, for example), described by a label of text fields.
+    Each column is a keyword.  Most objects have only a few of the keywords in a codebook, so rather than holding
+    a 1 or a 0 for every cell, the matrix holds the column numbers of each row's keywords, one row after another,
+    with the position where each row starts.  (This is the Compressed Sparse Row layout.)
+
+    The matrix can be written as:
+
+      Tab-delimited text, with a 1 or a 0 for every keyword on every row, as the Analytic Data Export always has.
+
+      Long format text, with a line for each object's keyword.
+
+      Binary, for statistical tools.  All numbers are little-endian.  The file has:
+        a header of the characters 'TKWM', then the format version, the number of rows, the number of columns,
+          the number of codings and the number of label fields, as 4-byte unsigned integers (24 bytes in all)
+        the row starts, rows + 1 4-byte integers.  Row r's codings are at row starts[r] to row starts[r + 1] - 1.
+        the column numbers of the codings, codings 4-byte integers
+        the text, as lists of UTF-8 strings.  Each list is its number of strings as a 4-byte unsigned integer,
+        then each string's length in bytes as a 4-byte unsigned integer followed by the string.  There is:
+          one list of the label field names
+          a list of the Keyword Group and the Keyword for each column
+          a list of the label fields for each row
+      With NumPy and SciPy, for example, the matrix can be read as
+        indptr = numpy.fromfile(f, '<i4', rows + 1), indices = numpy.fromfile(f, '<i4', codings) and
+        scipy.sparse.csr_matrix((numpy.ones(codings), indices, indptr), shape=(rows, columns)). """
+
+__author__ = 'David Woods <dwoods@transana.com>'
+
+DEBUG = False
+if DEBUG:
+    print "KeywordMatrix DEBUG is ON!"
+
+# import Python's array module
+import array
+# import Python's struct module
+import struct
+# import Python's sys module
+import sys
+
+# The characters that start a binary matrix file
+BINARY_MAGIC = 'TKWM'
+# The version of the binary matrix file format
+BINARY_VERSION = 2
+# The layout of the binary matrix file header
+BINARY_HEADER = '<4sIIIII'
+
+
+class KeywordMatrix(object):
+    """ A sparse Object by Keyword matrix.  keywords is the list of (Keyword Group, Keyword) tuples that make up the
+        columns, in order.  labelNames is the list of the names of the label fields that describe each row. """
+
+    def __init__(self, keywords, labelNames):
+        # The columns of the matrix
+        self.keywords = list(keywords)
+        # The column number of each keyword
+        self.keywordIndex = dict([(keyword, index) for (index, keyword) in enumerate(self.keywords)])
+        # The names of the label fields
+        self.labelNames = list(labelNames)
+        # The label of each row
+        self.labels = []
+        # The position in self.columns where each row's codings start.  The last entry is where the next row will start.
+        self.rowStarts = array.array('i', [0])
+        # The column numbers of the codings of each row, one row after another
+        self.columns = array.array('i')
+
+    def AddRow(self, label, keywords):
+        """ Add a row to the matrix.  label is a tuple of the row's label fields, as text.  keywords is the
+            row's (Keyword Group, Keyword) tuples.  Keywords that aren't columns of the matrix are ignored. """
+        # Get the column numbers of the row's keywords, in order
+        columns = [self.keywordIndex[keyword] for keyword in keywords if self.keywordIndex.has_key(keyword)]
+        columns.sort()
+        # Add the row's codings, and note where the next row will start
+        self.columns.extend(columns)
+        self.rowStarts.append(len(self.columns))
+        self.labels.append(label)
+
+    def GetRowCount(self):
+        """ Get the number of rows in the matrix """
+        return len(self.labels)
+
+    def GetCodingCount(self):
+        """ Get the number of codings (cells with a 1) in the matrix """
+        return len(self.columns)
+
+    def GetRow(self, row):
+        """ Get the column numbers of the codings of a row """
+        return self.columns[self.rowStarts[row]:self.rowStarts[row + 1]]
+
+    def WriteTSV(self, f):
+        """ Write the matrix to the file f as tab-delimited text, with a 1 or a 0 for every keyword on every row """
+        # Write the Header line, with the label field names followed by the keywords
+        f.write('\t'.join(self.labelNames))
+        for (kwg, kw) in self.keywords:
+            f.write('\t%s : %s' % (kwg, kw))
+        f.write('\n')
+        # A row without codings has a 0 for every keyword
+        noCodings = ['\t0'] * len(self.keywords)
+        # Write the rows one at a time, so only one row is ever expanded
+        for row in xrange(len(self.labels)):
+            cells = list(noCodings)
+            for column in self.GetRow(row):
+                cells[column] = '\t1'
+            f.write('\t'.join(self.labels[row]) + ''.join(cells) + '\n')
+
+    def WriteLong(self, f, keywordGroupName='Keyword Group', keywordName='Keyword'):
+        """ Write the matrix to the file f as long format tab-delimited text, with a line for each coding.
+            keywordGroupName and keywordName are the names of the keyword fields for the Header line. """
+        # Write the Header line
+        f.write('\t'.join(self.labelNames + [keywordGroupName, keywordName]) + '\n')
+        # Write a line for each coding of each row
+        for row in xrange(len(self.labels)):
+            label = '\t'.join(self.labels[row])
+            for column in self.GetRow(row):
+                f.write('%s\t%s\t%s\n' % (label, self.keywords[column][0], self.keywords[column][1]))
+
+    def WriteBinary(self, f):
+        """ Write the matrix to the file f, which must be opened in binary mode, in the binary matrix format """
+        # Write the header
+        f.write(struct.pack(BINARY_HEADER, BINARY_MAGIC, BINARY_VERSION, len(self.labels), len(self.keywords),
+                            len(self.columns), len(self.labelNames)))
+        # Write the row starts and the column numbers of the codings, as little-endian integers
+        for data in (self.rowStarts, self.columns):
+            if sys.byteorder != 'little':
+                data = array.array('i', data)
+                data.byteswap()
+            data.tofile(f)
+        # Write the text.  Each string is written with its length, so the text can contain any characters.
+        WriteStrings(f, self.labelNames)
+        for keyword in self.keywords:
+            WriteStrings(f, keyword)
+        for label in self.labels:
+            WriteStrings(f, label)
+
+
+def WriteStrings(f, strings):
+    """ Write a list of strings to the binary matrix file f, as the number of strings followed by each string's
+        length and UTF-8 text """
+    f.write(struct.pack('<I', len(strings)))
+    for s in strings:
+        if isinstance(s, unicode):
+            s = s.encode('utf8')
+        f.write(struct.pack('<I', len(s)))
+        f.write(s)
+
+def ReadStrings(f, count=None):
+    """ Read a list of strings from the binary matrix file f.  If count is given, the list must have that many
+        strings.  Raises ValueError if the file is damaged. """
+    (stringCount, ) = struct.unpack('<I', ReadBytes(f, 4))
+    if (count != None) and (stringCount != count):
+        raise ValueError('Damaged Keyword Matrix file')
+    strings = []
+    for index in xrange(stringCount):
+        (length, ) = struct.unpack('<I', ReadBytes(f, 4))
+        strings.append(ReadBytes(f, length).decode('utf8'))
+    return strings
+
+def ReadBytes(f, length):
+    """ Read exactly length bytes from the binary matrix file f.  Raises ValueError if the file ends first. """
+    data = f.read(length)
+    if len(data) != length:
+        raise ValueError('Damaged Keyword Matrix file')
+    return data
+
+def ReadBinary(f):
+    """ Read a matrix from the file f, which must be opened in binary mode, in the binary matrix format.
+        Raises ValueError if the file isn't a binary matrix file this version can read. """
+    header = f.read(struct.calcsize(BINARY_HEADER))
+    if len(header) != struct.calcsize(BINARY_HEADER):
+        raise ValueError('Not a Keyword Matrix file')
+    (magic, version, rowCount, columnCount, codingCount, labelCount) = struct.unpack(BINARY_HEADER, header)
+    if (magic != BINARY_MAGIC) or (version != BINARY_VERSION):
+        raise ValueError('Not a Keyword Matrix file')
+    # Read the row starts and the column numbers of the codings
+    rowStarts = array.array('i')
+    columns = array.array('i')
+    try:
+        rowStarts.fromfile(f, rowCount + 1)
+        columns.fromfile(f, codingCount)
+    # If the file ends first ...
+    except EOFError:
+        raise ValueError('Damaged Keyword Matrix file')
+    if sys.byteorder != 'little':
+        rowStarts.byteswap()
+        columns.byteswap()
+    # Read the text
+    labelNames = ReadStrings(f, labelCount)
+    keywords = [tuple(ReadStrings(f, 2)) for column in xrange(columnCount)]
+    labels = [tuple(ReadStrings(f)) for row in xrange(rowCount)]
+    # The row starts must describe the codings that were read
+    if (rowStarts[0] != 0) or (rowStarts[-1] != codingCount) or (len(labels) != rowCount):
+        raise ValueError('Damaged Keyword Matrix file')
+    # Create the matrix
+    matrix = KeywordMatrix(keywords, labelNames)
+    matrix.labels = labels
+    matrix.rowStarts = rowStarts
+    matrix.columns = columns
+    return matrix
@@ -37,8 +37,8 @@ import DBInterface
 import Dialogs
 # import Transana's Filter Dialog Box
 import FilterDialog
-# Import Transana's keyword object
-import KeywordObject as Keyword
+# Import Transana's Miscellaneous functions
+import Misc
 # Import Transana's SnapshotWindow so we can get CodingStyleGraphics for keywords that have color and style defined
 import SnapshotWindow
 # Import Transana's Text Report infrastructure
@@ -88,6 +88,10 @@ class KeywordSummaryReport(wx.Object):
         for kwg in kwgList:
             # ... and add them to the Keyword Group List, along with a boolean suggesting they should be displayed initially
             self.keywordGroupFilterList.append((kwg, True))
+        # The Keyword Examples and the Keywords of the Keyword Groups, with their usage, are loaded once and kept,
+        # so a change to the Filter settings doesn't have to query the database again.
+        self.keywordExamplesList = None
+        self.keywordData = None
         # Trigger the ReportText method that causes the report to be displayed.
         self.report.CallDisplay()
 
@@ -147,7 +151,8 @@ class KeywordSummaryReport(wx.Object):
             # ... we don't need a subtitle ...
             self.subtitle = ''
             # and we need a list of all Keyword Groups as the list of groups to be included in the Report.
-            keywordGroupList = DBInterface.list_of_keyword_groups()
+            # The Keyword Group Filter List already has them all.
+            keywordGroupList = [kwg for (kwg, checked) in self.keywordGroupFilterList]
 
         # If a subtitle is defined ...
         if self.subtitle != '':
@@ -179,12 +184,23 @@ class KeywordSummaryReport(wx.Object):
             # Skip a couple of lines.
             reportText.InsertStyledText('\n\n')
 
-        # Initialize an empty list for Keyword Examples
-        keywordExamplesList = []
-        # Iterate through the list of all keyword examples ...
-        for KWE in DBInterface.list_of_keyword_examples():
-            # ... adding the keywords to the KeywordExamples List
-            keywordExamplesList.append((KWE[3], KWE[4]))
+        # If the Keyword Examples haven't been loaded yet ...
+        if self.keywordExamplesList == None:
+            # Initialize an empty set for Keyword Examples
+            self.keywordExamplesList = set()
+            # Iterate through the list of all keyword examples ...
+            for KWE in DBInterface.list_of_keyword_examples():
+                # ... adding the keywords to the KeywordExamples List
+                self.keywordExamplesList.add((KWE[3], KWE[4]))
+
+        # If the Keyword data hasn't been loaded yet ...
+        if self.keywordData == None:
+            # ... initialize a dictionary for the Keywords of each Keyword Group
+            self.keywordData = {}
+            # Get the Keywords and their usage for the passed-in Keyword Group, or for all Keyword Groups, all at once
+            for keywordRecord in DBInterface.list_of_keyword_summary(self.keywordGroupName):
+                # ... and sort them by Keyword Group.  (They are already in Keyword order.)
+                self.keywordData.setdefault(keywordRecord['KeywordGroup'], []).append(keywordRecord)
 
         # Get the graphic for the Keyword Example indicator
         kweGraphic = TransanaImages.Clip16.GetImage()
@@ -217,20 +233,21 @@ class KeywordSummaryReport(wx.Object):
                     # Turn bold off
                     reportText.SetBold(False)
 
-                # Get the list of Keywords defined for that group
-                keywordList = DBInterface.list_of_keywords_by_group(keywordGroup)
                 # Iterate through the list of Keywords
-                for keyword in keywordList:
-                    # Load the Keyword object
-                    keywordObject = Keyword.Keyword(keywordGroup, keyword)
+                for keywordRecord in self.keywordData.get(keywordGroup, []):
+                    # Get the Keyword and its definition
+                    keyword = keywordRecord['Keyword']
+                    definition = keywordRecord['Definition']
+                    # Describe how many objects the Keyword is applied to
+                    usageText = self.GetUsageText(keywordRecord['Usage'])
 
                     # If we're using the RichTextCtrl ...
                     if TransanaConstants.USESRTC:
-                        # if there's NO keyword definition ...
-                        if keywordObject.definition.strip() == '':
+                        # if there's NO keyword definition or usage ...
+                        if (definition.strip() == '') and (usageText == ''):
                             # ... then we want paragraph spacing after THIS paragraph
                             parSpacingAfter = 20
-                        # If there IS a keyword definition ...
+                        # If there IS a keyword definition or usage ...
                         else:
                             # ... we DON'T want paragraph spacing after yet.
                             parSpacingAfter = 0
@@ -246,29 +263,29 @@ class KeywordSummaryReport(wx.Object):
                                                parSpacingAfter = parSpacingAfter)
 
                         # Check to see if this keyword has a Keyword Example
-                        if (keywordGroup, keyword) in keywordExamplesList:
+                        if (keywordGroup, keyword) in self.keywordExamplesList:
                             # If so, add the Keyword Example Indicator Graphic
                             reportText.WriteText(' ')
                             reportText.WriteImage(kweGraphic)
 
                         # If the Keyword has a defined Color ...
-                        if keywordObject.lineColorDef != '':
+                        if keywordRecord['LineColorDef'] != '':
                             # ... let's create a Keyword Style dictionary to hold style data.
                             #     Use the color and default to FilledRectangle, Solid, 3.
-                            keywordStyle = {'lineColorDef' :  keywordObject.lineColorDef,
+                            keywordStyle = {'lineColorDef' :  keywordRecord['LineColorDef'],
                                             'drawMode'     :  'FilledRectangle',
                                             'lineStyle'    :  'Solid',
                                             'lineWidth'    :  3 
                                             }
                             # If the Keyword has a defined Coding Shape, use that.
-                            if keywordObject.drawMode != '':
-                                keywordStyle['drawMode'] = keywordObject.drawMode
+                            if keywordRecord['DrawMode'] != '':
+                                keywordStyle['drawMode'] = keywordRecord['DrawMode']
                             # If the Keyword has a defined Line Style, use that.
-                            if keywordObject.lineStyle != '':
-                                keywordStyle['lineStyle'] = keywordObject.lineStyle
+                            if keywordRecord['LineStyle'] != '':
+                                keywordStyle['lineStyle'] = keywordRecord['LineStyle']
                             # If the Keyword has a defined Line Width, use that
-                            if keywordObject.lineWidth != '':
-                                keywordStyle['lineWidth'] = keywordObject.lineWidth
+                            if keywordRecord['LineWidth'] != '':
+                                keywordStyle['lineWidth'] = keywordRecord['LineWidth']
                             # Create a graphic showing the appropriate Coding Style
                             codingGraphic = SnapshotWindow.CodingKeyGraphic(keywordStyle)
                             # Add the Coding Graphic to the Report
@@ -278,15 +295,31 @@ class KeywordSummaryReport(wx.Object):
                         # Finish the paragraph
                         reportText.Newline()
 
+                        # If the Keyword has been applied to anything ...
+                        if usageText != '':
+                            # ... if there's NO keyword definition, we want paragraph spacing after the usage
+                            if definition.strip() == '':
+                                parSpacingAfter = 20
+                            else:
+                                parSpacingAfter = 0
+                            # Reduce font size, .5 inch left indent
+                            reportText.SetTxtStyle(fontSize = 10,
+                                                   parLeftIndent = 126, parRightIndent = 0,
+                                                   parSpacingAfter = parSpacingAfter)
+                            # Add the usage to the report
+                            reportText.WriteText(usageText)
+                            # Finish the paragraph
+                            reportText.Newline()
+
                         # If there IS a paragraph definition ...
-                        if keywordObject.definition.strip() != '':
+                        if definition.strip() != '':
                             # Reduce font size, .5 inch left indent, have paragraph spacing after
                             reportText.SetTxtStyle(fontSize = 10,
                                                    parLeftIndent = 126, parRightIndent = 0,
                                                    parSpacingAfter = 20)
 
                             # Strip white space out of the definition.
-                            reportText.WriteText(keywordObject.definition.strip())
+                            reportText.WriteText(definition.strip())
 
                             # Finish the paragraph
                             reportText.Newline()
@@ -297,9 +330,15 @@ class KeywordSummaryReport(wx.Object):
                         # Add the Keyword to the report
                         reportText.InsertStyledText('  %s\n' % keyword)
 
+                        # If the Keyword has been applied to anything ...
+                        if usageText != '':
+                            # ... add the usage to the report
+                            reportText.SetFont('Courier New', 10, 0x000000, 0xFFFFFF)
+                            reportText.InsertStyledText('    %s\n' % usageText)
+
                         # Add the Keyword Definition to the Report
                         # Keyword Definitions can have line breaks embedded in them.  If so, break them up into separate lines here!
-                        definitionLines = string.split(keywordObject.definition, '\n')
+                        definitionLines = string.split(definition, '\n')
                         # Set the font for the Keyword Definitions
                         reportText.SetFont('Courier New', 10, 0x000000, 0xFFFFFF)
                         # ... get the style specifier for that font ...
@@ -339,6 +378,35 @@ class KeywordSummaryReport(wx.Object):
         # Once we're done constructing the report, make it Read Only
         reportText.SetReadOnly(True)
 
+    def GetUsageText(self, usage):
+        """ Describe the usage of a Keyword, as returned by DBInterface.list_of_keyword_summary(), such as
+            "Quotes: 3 (450 characters), Clips: 2 (0:01:15.0)".  Returns an empty string if the Keyword
+            isn't applied to anything. """
+        # The prompts for each object type, in the order they are listed.  Episodes and Documents have no size.
+        # Encode with UTF-8 rather than TransanaGlobal.encoding because these are prompts, not DB Data.
+        prompts = [('Document', _("Documents: %d"), None),
+                   ('Episode',  _("Episodes: %d"), None),
+                   ('Quote',    _("Quotes: %d (%d characters)"), 'characters'),
+                   ('Clip',     _("Clips: %d (%s)"), 'time'),
+                   ('Snapshot', _("Snapshots: %d (%s)"), 'time')]
+        # Start with an empty list of usage descriptions
+        usageList = []
+        # Iterate through the object types ...
+        for (objectType, prompt, sizeType) in prompts:
+            # ... skipping the ones the Keyword isn't applied to
+            if usage.has_key(objectType):
+                if 'unicode' in wx.PlatformInfo:
+                    prompt = unicode(prompt, 'utf8')
+                (objectCount, totalSize) = usage[objectType]
+                # Describe the number of objects, with their total length or duration if they have one
+                if sizeType == 'characters':
+                    usageList.append(prompt % (objectCount, totalSize))
+                elif sizeType == 'time':
+                    usageList.append(prompt % (objectCount, Misc.time_in_ms_to_str(totalSize)))
+                else:
+                    usageList.append(prompt % objectCount)
+        return ', '.join(usageList)
+
     def OnFilter(self, event):
         """ This method, required by TextReport, implements the call to the Filter Dialog.  It needs to be
             in the report parent because the TextReport doesn't know the appropriate filter parameters. """
@@ -1032,6 +1032,13 @@ class LibraryMap(wx.Frame):
         """ Actually Draw the Series Map """
         self.keywordClipList = {}
 
+        # Redrawing after a change to the Filter settings re-uses the codings that have already been read, so checking
+        # them against the Filter settings is most of the work.  Check against sets rather than lists.
+        episodeSet = set(self.episodeList)
+        clipFilterSet = set(self.clipFilterList)
+        snapshotFilterSet = set(self.snapshotFilterList)
+        keywordSet = set(self.filteredKeywordList)
+
         # Series Keyword Sequence Map, if multi-line display is desired
         if (self.reportType == 1) and (not self.singleLineDisplay):
             epCount = 0
@@ -1057,9 +1064,9 @@ class LibraryMap(wx.Frame):
             # Now we iterate through the CLIPS.
             for (KWG, KW, Start, Stop, ClipNum, ClipName, CollectNum, episodeName, seriesName) in self.clipList:
                 # We make sure they are selected in the Filter, checking the Episode, Clips and Keyword selections
-                if ((episodeName, seriesName, True) in self.episodeList) and \
-                   ((ClipName, CollectNum, True) in self.clipFilterList) and \
-                   ((KWG, KW) in self.filteredKeywordList):
+                if ((episodeName, seriesName, True) in episodeSet) and \
+                   ((ClipName, CollectNum, True) in clipFilterSet) and \
+                   ((KWG, KW) in keywordSet):
                     # Now we track the start and end times compared to the current display limits
                     if Start < self.startTime:
                         Start = self.startTime
@@ -1132,9 +1139,9 @@ class LibraryMap(wx.Frame):
             # Now we iterate through the Snapshot List.
             for (KWG, KW, Start, Stop, SnapshotNum, SnapshotName, CollectNum, episodeName, seriesName) in self.snapshotList:
                 # We make sure they are selected in the Filter, checking the Episode, Clips and Keyword selections
-                if ((episodeName, seriesName, True) in self.episodeList) and \
-                   ((SnapshotName, CollectNum, True) in self.snapshotFilterList) and \
-                   ((KWG, KW) in self.filteredKeywordList):
+                if ((episodeName, seriesName, True) in episodeSet) and \
+                   ((SnapshotName, CollectNum, True) in snapshotFilterSet) and \
+                   ((KWG, KW) in keywordSet):
                     # Now we track the start and end times compared to the current display limits
                     if Start < self.startTime:
                         Start = self.startTime
@@ -1466,10 +1473,10 @@ class LibraryMap(wx.Frame):
             for (KWG, KW, Start, Stop, ClipNum, ClipName, CollectNum, episodeName, seriesName) in self.clipList:
                 # Check the clip against the Episode List, the Clip Filter List, the Snapshot Filter List, and the 
                 # Keyword Filter list to see if it should be included in the report.
-                if ((episodeName, seriesName, True) in self.episodeList) and \
-                   (((ClipName, CollectNum, True) in self.clipFilterList) or
-                    ((ClipName, CollectNum, True) in self.snapshotFilterList))and \
-                   ((KWG, KW) in self.filteredKeywordList):
+                if ((episodeName, seriesName, True) in episodeSet) and \
+                   (((ClipName, CollectNum, True) in clipFilterSet) or
+                    ((ClipName, CollectNum, True) in snapshotFilterSet))and \
+                   ((KWG, KW) in keywordSet):
 
                     # We compare the Clip's Start Time with the Map's boundaries.  We only want the portion of the clip
                     # that falls within the Map's upper and lower boundaries.
@@ -1601,9 +1608,9 @@ class LibraryMap(wx.Frame):
             for (KWG, KW, Start, Stop, SnapshotNum, SnapshotName, CollectNum, episodeName, seriesName) in self.snapshotList:
                 # Check the clip against the Episode List, the Snapshot Filter List, and the Keyword Filter list to see if
                 # it should be included in the report.
-                if ((episodeName, seriesName, True) in self.episodeList) and \
-                   ((SnapshotName, CollectNum, True) in self.snapshotFilterList) and \
-                   ((KWG, KW) in self.filteredKeywordList):
+                if ((episodeName, seriesName, True) in episodeSet) and \
+                   ((SnapshotName, CollectNum, True) in snapshotFilterSet) and \
+                   ((KWG, KW) in keywordSet):
 
                     # We compare the Snapshot's Start Time with the Map's boundaries.  We only want the portion of the clip
                     # that falls within the Map's upper and lower boundaries.
@@ -58,6 +58,8 @@ import ColorConfig
 import BatchFileProcessor
 # Import Transana Options Settings 
 import OptionsSettings
+# Import Transana's Parsed Text Cache
+import ParsedTextCache
 # Import Transana's Constants
 import TransanaConstants
 # Import Transana Globals
@@ -882,6 +884,10 @@ class MenuWindow(wx.Frame):  # wx.MDIParentFrame
                 TransanaGlobal.connectionTimer.Stop()
             # Save Configuration Data
             TransanaGlobal.configData.SaveConfiguration()
+            # If the Parsed Text Cache should be kept between sessions ...
+            if TransanaConstants.parsedTextCachePersist:
+                # ... save it in the user's profile directory
+                ParsedTextCache.Save(TransanaGlobal.configData.GetDefaultProfilePath())
             # We need to force the Media Window to close along with all of the other windows.
             # (The other windows all close automatically.)
             if self.ControlObject != None:
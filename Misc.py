@@ -21,7 +21,7 @@ __author__ = 'David Woods <dwoods@transana.com>, Nathaniel Case'
 # Patch sent by David Fraser to eliminate need for mx module
 
 #import mx.DateTime
-import string, sys
+import re, string, sys
 
 #def datestr_to_dt(datestr):
 #    """Construct a DateTime object from a given date string.  This function
@@ -246,3 +246,76 @@ def unistrip(strng, left=True):
 	strng = strng[:-1]
     # return the results
     return strng
+
+
+# Word Frequency text preparation.  These regular expressions are compiled once here because the
+# Word Count index (see DBInterface.UpdateWordCounts()) runs them every time a Document, Transcript,
+# or Quote is saved, in addition to their use in the Word Frequency Report.
+# Multiple periods, questions marks, plus signs, exclamation points, hyphens
+WF_MULTIPLE_PUNCTUATION = re.compile('[\.?:\*+!-][\.?:\*+!-]+')
+# Parentheses, brackets, braces, quotation marks, slashes, ampersands, equal signs, asterisks, pound sign(hashtag),
+# less than, greater than
+WF_BRACKETS = re.compile('[()\[\]{}"/&=\*#<>]')
+# Apostrophes PRECEDED by white space
+WF_LEADING_APOSTROPHE = re.compile("\s'")
+# Certain unicode characters that seem to cause problems (smart quotes, double-angle quotes, etc.)
+# Also, the 4 Jeffersonian special symbols
+WF_UNICODE_SYMBOLS = re.compile(u'\u00ab|\u00b0|\u00bb|\u2018|\u2019|\u2022|\u201c|\u201d|\u2039|\u203a|\u2191|\u2193')
+# Commas, periods, questions marks, exclamation points, colons, semicolons, and apostrophes followed by whitespace
+WF_TRAILING_PUNCTUATION = re.compile('[,\.?!:;\']\s')
+# Final punctuation at the end of the string, not followed by whitespace
+WF_FINAL_PUNCTUATION = re.compile('[\.?!\']$')
+# Multiple whitespace characters
+WF_WHITESPACE = re.compile('\s+')
+
+def PrepareWordFrequencyText(text):
+    """ Clean up the messy PlainText of a Transana object for word counting, removing punctuation, etc.
+        Words are returned separated by newline characters. """
+    # strip multiple periods, questions marks, plus signs, exclamation points, hyphens
+    text = WF_MULTIPLE_PUNCTUATION.sub(' ', text)
+    # Strip parentheses, brackets, braces, quotation marks, slashes, ampersands, equal signs, asterisks, pound sign(hashtag),
+    # less than, greater than
+    text = WF_BRACKETS.sub(' ', text)
+    # Apostrophes PRECEDED by white space
+    text = WF_LEADING_APOSTROPHE.sub(' ', text)
+    # Remove certain unicode characters that seem to cause problems (smart quotes, double-angle quotes, etc.)
+    # Also, the 4 Jeffersonian special symbols
+    text = WF_UNICODE_SYMBOLS.sub(u'', text)
+    # Strip commas, periods, questions marks, exclamation points, colons, semicolons, and apostrophes
+    # followed by whitespace (but NOT those NOT followed by white space, leaving "2.2", "1,000" and
+    # "won't" intact.)
+    text = WF_TRAILING_PUNCTUATION.sub(' ', text)
+    # String final punctuation at tend of the string, not followed by whitespace
+    text = WF_FINAL_PUNCTUATION.sub('', text)
+    # Strip multiple whitespace characters, replacing all whitespace with single spaces
+    text = WF_WHITESPACE.sub('\n', text)
+    # Return the prepared text
+    return text
+
+def CountWordsInText(text, words=None):
+    """ Take prepared text (see PrepareWordFrequencyText()) and return a dictionary of raw word counts,
+        (key = word, value = count).  Synonyms are NOT applied here.  An existing dictionary can be
+        passed in to allow additional text to be added. """
+    # If no dictionary was passed in ...
+    if words == None:
+        # ... initialize one
+        words = {}
+    # For each line of the prepared text ...
+    for line in text.split('\n'):
+        # ... remove whitespace and compensate for different cases
+        word = line.strip().lower()
+        # There are certain "words" that should not be included.  These can slip past PrepareWordFrequencyText.
+        if not word in ['', '-', ':']:
+            # Add the word to the dictionary or increment its count
+            words[word] = words.get(word, 0) + 1
+    # Return the word dictionary
+    return words
+
+def CountPlainTextWords(item):
+    """ Count the raw words in the PlainText of a Transana object.  item is an (objectType, objectNum, plaintext)
+        tuple, and (objectType, objectNum, wordCounts) is returned.  This is a module-level function without
+        wxPython or database dependencies so it can run in a multiprocessing.Pool worker process. """
+    # Unpack the item
+    (objectType, objectNum, plaintext) = item
+    # Prepare the text and count the words
+    return (objectType, objectNum, CountWordsInText(PrepareWordFrequencyText(plaintext)))
@@ -362,6 +362,8 @@ class Note(DataObject.DataObject):
                 raise RecordNotFoundError, (self.id, len(data))
             # Close the temporary database cursor
             tempDBCursor.close()
+        # Update the Word Count index for the Note, which the Note Search uses
+        DBInterface.UpdateWordCounts('Note', self.number, self.text, c)
         # Close the main database cursor
         c.close()
 
@@ -371,6 +373,9 @@ class Note(DataObject.DataObject):
         # Initialize delete operation.  Initiating a Transaction is never necessary here.
         (db, c) = self._db_start_delete(use_transactions)
         result = 1
+
+        # Remove the Note from the Word Count index
+        DBInterface.DeleteWordCounts('Note', self.number, c)
         
         # Delete the actual record.
         self._db_do_delete(use_transactions, c, result)
@@ -64,6 +64,9 @@ import TransanaImages
 # import Transana's Transcript object
 import Transcript
 
+# The time, in milliseconds, the Note Search waits after the last change to the Search Text before searching
+NOTE_SEARCH_DELAY = 400
+
 class MySplitter(wx.SplitterWindow):
     """ A local subclass of the wxSplitterWindow """
     def __init__(self, parent, ID):
@@ -104,6 +107,10 @@ class NotesBrowser(wx.Dialog):  # (wx.MDIChildFrame)
         self.activeTree = None
         # Initialize the Search Text string
         self.searchText = ''
+        # The Note Search waits for typing to pause.  Initialize the timer that starts the search.
+        self.searchTimer = None
+        # Note whether we've made sure all Notes are in the Word Count index, which the Note Search uses
+        self.noteWordCountsChecked = False
         # Define the Control Object
         self.ControlObject = None
         # Create the Notes Browser's main Sizer
@@ -163,6 +170,8 @@ class NotesBrowser(wx.Dialog):  # (wx.MDIChildFrame)
         self.noteSearch.Bind(wx.EVT_TEXT_ENTER, self.OnAllNotesSearch)
         # When the noteSearch control loses focus, that should trigger a search too.
         self.noteSearch.Bind(wx.EVT_KILL_FOCUS, self.OnAllNotesSearch)
+        # Changing the Search Text triggers a search once typing pauses
+        self.noteSearch.Bind(wx.EVT_TEXT, self.OnSearchTextChanged)
         # Add the Search Text box to the note search sizer
         noteSearchSizer.Add(self.noteSearch, 1, wx.EXPAND | wx.RIGHT, 5)
         # ... and create a button with that graphic
@@ -232,7 +241,9 @@ class NotesBrowser(wx.Dialog):  # (wx.MDIChildFrame)
         if self.ControlObject != None:
             self.ControlObject.Register(NotesBrowser=self)
 
-    def AddNote(self, tree, rootNode, noteNum, noteID, seriesNum, episodeNum, transcriptNum, collectionNum, clipNum, snapshotNum, documentNum, quoteNum, noteTaker):
+    def AddNote(self, tree, rootNode, noteNum, noteID, seriesNum, episodeNum, transcriptNum, collectionNum, clipNum, snapshotNum, documentNum, quoteNum, noteTaker, index=None):
+        """ Add a Note to rootNode of a Notes Browser Tree Control, at the end or, if index is passed, at that
+            position """
         # If we have a Library Note ...
         if seriesNum > 0:
             # Load the Library to get the needed data
@@ -316,8 +327,11 @@ class NotesBrowser(wx.Dialog):  # (wx.MDIChildFrame)
 
         # If we have a Root node ...
         if rootNode != None:
-            # ... create the Tree Item for the Note ...
-            item = tree.AppendItem(rootNode, noteID)
+            # ... create the Tree Item for the Note at the end of the Root node or at the requested position ...
+            if index == None:
+                item = tree.AppendItem(rootNode, noteID)
+            else:
+                item = tree.InsertItemBefore(rootNode, index, noteID)
             # ... add the Item Data ...
             tree.SetPyData(item, nodeData)
             # ... add the path data if defined ...
@@ -331,18 +345,8 @@ class NotesBrowser(wx.Dialog):  # (wx.MDIChildFrame)
         """ Populate the Notes Browser Tree Controls, limiting by SearchText if such a value is passed in """
         # Clear all the nodes from the Tree.  We're starting over.
         tree.DeleteAllItems()
-        # Include the Database Name as the Tree Root
-        prompt = _('Database: %s')
-        # Encode the Database Name if necessary
-        if ('unicode' in wx.PlatformInfo):
-            prompt = unicode(prompt, 'utf8')
-        # Add the Database Name to the prompt
-        prompt = prompt % TransanaGlobal.configData.database
-        # If searchText is specified, add it to the Tree Root prompt
-        if searchText != None:
-            prompt += ' ' + unicode(_('Text: %s'), 'utf8') % searchText
         # Add the Tree's root node
-        root = tree.AddRoot(prompt)
+        root = tree.AddRoot(self.GetRootPrompt(searchText))
         tree.SetPyData(root, DatabaseTreeTab._NodeData('RootNode'))
         # Add a Library Node at the first level
         LibraryNode = tree.AppendItem(root, _('Library'))
@@ -374,26 +378,19 @@ class NotesBrowser(wx.Dialog):  # (wx.MDIChildFrame)
 
         # Get a list of all Notes from the Database
         notes = DBInterface.list_of_all_notes(searchText=searchText)
+        # Note the first level node for each type of Note
+        categoryNodes = {'LibraryNode' : LibraryNode,
+                         'EpisodeNode' : episodeNode,
+                         'TranscriptNode' : transcriptNode,
+                         'CollectionNode' : collectionNode,
+                         'ClipNode' : clipNode}
+        if TransanaConstants.proVersion:
+            categoryNodes['DocumentNode'] = documentNode
+            categoryNodes['QuoteNode'] = quoteNode
+            categoryNodes['SnapshotNode'] = snapshotNode
         # Iterate through the list of notes
         for note in notes:
-            if note['SeriesNum'] > 0:
-                rootNode = LibraryNode
-            elif TransanaConstants.proVersion and (note['DocumentNum'] > 0):
-                rootNode = documentNode
-            elif note['EpisodeNum'] > 0:
-                rootNode = episodeNode
-            elif note['TranscriptNum'] > 0:
-                rootNode = transcriptNode
-            elif note['CollectNum'] > 0:
-                rootNode = collectionNode
-            elif TransanaConstants.proVersion and (note['QuoteNum'] > 0):
-                rootNode = quoteNode
-            elif note['ClipNum'] > 0:
-                rootNode = clipNode
-            elif TransanaConstants.proVersion and (note['SnapshotNum'] > 0):
-                rootNode = snapshotNode
-            else:
-                rootNode = None
+            rootNode = categoryNodes.get(self.GetNoteCategory(note), None)
             if rootNode != None:
                 self.AddNote(tree, rootNode, note['NoteNum'], note['NoteID'], note['SeriesNum'], note['EpisodeNum'], note['TranscriptNum'], note['CollectNum'], note['ClipNum'], note['SnapshotNum'], note['DocumentNum'], note['QuoteNum'], note['NoteTaker'])
 
@@ -402,6 +399,101 @@ class NotesBrowser(wx.Dialog):  # (wx.MDIChildFrame)
         # Return the root node.
         return root
 
+    def GetRootPrompt(self, searchText=None):
+        """ Get the text for the root node of a Notes Browser Tree Control """
+        # Include the Database Name as the Tree Root
+        prompt = _('Database: %s')
+        # Encode the Database Name if necessary
+        if ('unicode' in wx.PlatformInfo):
+            prompt = unicode(prompt, 'utf8')
+        # Add the Database Name to the prompt
+        prompt = prompt % TransanaGlobal.configData.database
+        # If searchText is specified, add it to the Tree Root prompt
+        if searchText != None:
+            prompt += ' ' + unicode(_('Text: %s'), 'utf8') % searchText
+        return prompt
+
+    def GetNoteCategory(self, note):
+        """ Get the node type of the first level node a Note, as returned by DBInterface.list_of_all_notes(),
+            belongs under.  Returns None if the Note doesn't belong in the tree. """
+        if note['SeriesNum'] > 0:
+            return 'LibraryNode'
+        elif TransanaConstants.proVersion and (note['DocumentNum'] > 0):
+            return 'DocumentNode'
+        elif note['EpisodeNum'] > 0:
+            return 'EpisodeNode'
+        elif note['TranscriptNum'] > 0:
+            return 'TranscriptNode'
+        elif note['CollectNum'] > 0:
+            return 'CollectionNode'
+        elif TransanaConstants.proVersion and (note['QuoteNum'] > 0):
+            return 'QuoteNode'
+        elif note['ClipNum'] > 0:
+            return 'ClipNode'
+        elif TransanaConstants.proVersion and (note['SnapshotNum'] > 0):
+            return 'SnapshotNode'
+        else:
+            return None
+
+    def UpdateSearchTreeCtrl(self, tree, searchText=None):
+        """ Update a Notes Browser Tree Control for new search text in place.  Notes that no longer match are
+            removed and Notes that now match are added, but Notes that still match are left alone, so their
+            objects don't have to be loaded again. """
+        # Get the root node
+        root = tree.GetRootItem()
+        # If the tree hasn't been populated yet ...
+        if not root.IsOk():
+            # ... then there's nothing to update.  Populate it.
+            return self.PopulateTreeCtrl(tree, searchText)
+        # Update the Search Text in the root node
+        tree.SetItemText(root, self.GetRootPrompt(searchText))
+        # Note the first level node for each type of Note, and the tree items of the Notes already in the tree
+        categoryNodes = {}
+        noteItems = {}
+        (categoryNode, cookie) = tree.GetFirstChild(root)
+        while categoryNode.IsOk():
+            categoryNodes[tree.GetPyData(categoryNode).nodetype] = categoryNode
+            (noteItem, cookie2) = tree.GetFirstChild(categoryNode)
+            while noteItem.IsOk():
+                noteItems[tree.GetPyData(noteItem).recNum] = noteItem
+                (noteItem, cookie2) = tree.GetNextChild(categoryNode, cookie2)
+            (categoryNode, cookie) = tree.GetNextChild(root, cookie)
+
+        # Get a list of the matching Notes from the Database
+        notes = DBInterface.list_of_all_notes(searchText=searchText)
+        # Note the Note Numbers of the matching Notes
+        noteNums = set([note['NoteNum'] for note in notes])
+        # Remove the Notes that no longer match from the tree
+        for noteNum in noteItems.keys():
+            if not noteNum in noteNums:
+                tree.Delete(noteItems[noteNum])
+                del noteItems[noteNum]
+        # Track the position of the next Note under each first level node
+        positions = {}
+        # Iterate through the list of notes, which are in order
+        for note in notes:
+            nodeType = self.GetNoteCategory(note)
+            rootNode = categoryNodes.get(nodeType, None)
+            if rootNode != None:
+                # If the Note is already in the tree ...
+                if noteItems.has_key(note['NoteNum']):
+                    # ... it just needs its name updated, in case it has been renamed
+                    if tree.GetItemText(noteItems[note['NoteNum']]) != note['NoteID']:
+                        tree.SetItemText(noteItems[note['NoteNum']], note['NoteID'])
+                # If not, add it in the right position
+                else:
+                    self.AddNote(tree, rootNode, note['NoteNum'], note['NoteID'], note['SeriesNum'], note['EpisodeNum'], note['TranscriptNum'], note['CollectNum'], note['ClipNum'], note['SnapshotNum'], note['DocumentNum'], note['QuoteNum'], note['NoteTaker'], index=positions.get(nodeType, 0))
+                positions[nodeType] = positions.get(nodeType, 0) + 1
+        # Return the root node.
+        return root
+
+    def CheckNoteWordCounts(self):
+        """ Make sure all Notes are in the Word Count index the Note Search uses.  This only needs to be done
+            once while the Notes Browser is open, as Notes are indexed when they are saved. """
+        if not self.noteWordCountsChecked:
+            DBInterface.UpdateNoteWordCounts()
+            self.noteWordCountsChecked = True
+
     def FindTreeNode(self, note):
         """ Find the NODE for a specific Note Object """
         # Get the Node Data for the Note Object passed in.
@@ -810,6 +902,8 @@ class NotesBrowser(wx.Dialog):  # (wx.MDIChildFrame)
         if self.treeNotebook.GetPageText(event.GetSelection()) == unicode(_("Notes"), 'utf8'):
             self.notesRoot = self.PopulateTreeCtrl(self.treeNotebookNotesTabTreeCtrl)
         elif self.treeNotebook.GetPageText(event.GetSelection()) == unicode(_("Note Search"), 'utf8'):
+            # Make sure all Notes can be found by the search
+            self.CheckNoteWordCounts()
             self.searchRoot = self.PopulateTreeCtrl(self.treeNotebookSearchTabTreeCtrl, self.noteSearch.GetValue())
 
 
@@ -977,19 +1071,43 @@ class NotesBrowser(wx.Dialog):  # (wx.MDIChildFrame)
 
     def OnAllNotesSearch(self, event):
         """ "Search All Notes" has been activated.  We search for a string across all notes. """
-        # If the search text has changed ...
-        if self.searchText != self.noteSearch.GetValue():
-            # ... update the variable that remembers our search term
-            self.searchText = self.noteSearch.GetValue()
-            # If it's empty ...
-            if self.searchText == '':
-                # ... we need to pass "None" rather than an empty string so the query works right.
-                self.searchText = None
-            # Populate the Tree Control with all the Nodes and Notes it needs!
-            self.searchRoot = self.PopulateTreeCtrl(self.treeNotebookSearchTabTreeCtrl, self.searchText)
+        # If a search is waiting for typing to pause, we don't need it any more
+        if (self.searchTimer != None) and self.searchTimer.IsRunning():
+            self.searchTimer.Stop()
+        # Search now
+        self.SearchAllNotes()
         # Don't forget to call the parent method.  Forgetting this causes problems when EVT_KILL_FOCUS calls this method
         event.Skip()
 
+    def OnSearchTextChanged(self, event):
+        """ The Search Text has changed.  Search once typing pauses, rather than for every keystroke. """
+        # If a search is already waiting ...
+        if (self.searchTimer != None) and self.searchTimer.IsRunning():
+            # ... start its wait over
+            self.searchTimer.Restart(NOTE_SEARCH_DELAY)
+        # Otherwise ...
+        else:
+            # ... schedule a search
+            self.searchTimer = wx.CallLater(NOTE_SEARCH_DELAY, self.SearchAllNotes)
+        event.Skip()
+
+    def SearchAllNotes(self):
+        """ Search for the Search Text across all notes, if it has changed """
+        # Get the search text
+        searchText = self.noteSearch.GetValue()
+        # If it's empty ...
+        if searchText == '':
+            # ... we need to pass "None" rather than an empty string so the query works right.
+            searchText = None
+        # If the search text has changed ...
+        if self.searchText != searchText:
+            # ... update the variable that remembers our search term
+            self.searchText = searchText
+            # Make sure all Notes can be found by the search
+            self.CheckNoteWordCounts()
+            # Update the Tree Control with the Notes that match
+            self.searchRoot = self.UpdateSearchTreeCtrl(self.treeNotebookSearchTabTreeCtrl, self.searchText)
+
     def OnKeyUp(self, event):
         """ Process the KEY_UP event for Notes within the Notes Browser on OS X.
             On OS X, Cut, Copy, and Paste don't work out-of-the-box within the Notes Browser the
@@ -1448,6 +1566,9 @@ class NotesBrowser(wx.Dialog):  # (wx.MDIChildFrame)
 
     def OnClose(self, event):
         """ Implement the Window Close function, as required by the Note Editor """
+        # If a search is waiting for typing to pause, cancel it
+        if (self.searchTimer != None) and self.searchTimer.IsRunning():
+            self.searchTimer.Stop()
         # Save the active note, if there is one
         self.SaveNoteAndClear()
         # Remove the reference to the Notes Browser from the Control Object
@@ -0,0 +1,245 @@
+# Copyright (C) 2002-2016 Spurgeon Woods LLC
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of version 2 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+#
+
+""" This module implements the Parsed Text Cache for Transana.  The same transcript text is parsed over and
+    over, for example every time a report that shows Clip Transcripts is run.  The Parsed Text Cache holds
+    the results of parsing (such as the time-code-free XML for reports),
+    keyed by a hash of the text they were made from, so parsing the same text again can be skipped.
+
+    Because the key is the content of the text, a cached result can never be out of date.  Edited text
+    simply gets a new key, and results for text that's no longer used drop out of the cache as it fills.
+    The cache can be saved to the user's profile directory so it survives between sessions. """
+
+__author__ = 'David Woods <dwoods@transana.com>'
+
+DEBUG = False
+if DEBUG:
+    print "ParsedTextCache DEBUG is ON!"
+
+# import Python's cPickle module
+import cPickle
+# import Python's collections module
+import collections
+# import Python's hashlib module
+import hashlib
+# import Python's os module
+import os
+# import Python's sys module
+import sys
+# import Python's threading module
+import threading
+# import Transana's Constants
+import TransanaConstants
+
+# The version of the cache file format.  Cache files with a different version are ignored.
+CACHE_VERSION = 1
+
+# The cache maps (hash, kind) keys to (size, value) entries, least recently used first
+_cache = collections.OrderedDict()
+# The total size of the cached values, in characters
+_cacheSize = 0
+# The cache is used by the GUI thread and by background threads, so it needs a lock
+_cacheLock = threading.Lock()
+# Has the cache changed since it was loaded or saved?
+_cacheChanged = False
+
+
+def GetKey(text, kind):
+    """ Get the cache key for the result of a kind of parsing applied to text """
+    # Hash the text.  (Unicode text is hashed as UTF-8.)
+    if isinstance(text, unicode):
+        text = text.encode('utf8')
+    return (hashlib.sha1(text).hexdigest(), kind)
+
+def GetSize(text, value):
+    """ Estimate the memory used by a cached value, in characters """
+    # String values are measured directly.  Other values are estimated from the size of the text they were
+    # parsed from.
+    if isinstance(value, (str, unicode)):
+        return len(value) + 100
+    else:
+        return len(text) + 100
+
+def Get(text, kind):
+    """ Get a cached result for a kind of parsing applied to text, or None if there isn't one """
+    key = GetKey(text, kind)
+    # Lock the cache
+    _cacheLock.acquire()
+    try:
+        # Get the cached entry, if there is one
+        entry = _cache.pop(key, None)
+        # If there's no cached entry ...
+        if entry == None:
+            # ... there's nothing to return
+            return None
+        # Put the entry back at the end of the cache, as the most recently used
+        _cache[key] = entry
+        # Return the cached value
+        return entry[1]
+    finally:
+        # Unlock the cache
+        _cacheLock.release()
+
+def Put(text, kind, value):
+    """ Add the result of a kind of parsing applied to text to the cache """
+    global _cacheSize, _cacheChanged
+    key = GetKey(text, kind)
+    size = GetSize(text, value)
+    # Values bigger than the whole cache aren't cached
+    if size > TransanaConstants.parsedTextCacheSize:
+        return
+    # Lock the cache
+    _cacheLock.acquire()
+    try:
+        # If the value is already cached, remove it so it can be re-added as the most recently used
+        oldEntry = _cache.pop(key, None)
+        if oldEntry != None:
+            _cacheSize -= oldEntry[0]
+        # Add the value
+        _cache[key] = (size, value)
+        _cacheSize += size
+        _cacheChanged = True
+        # While the cache is too big ...
+        while _cacheSize > TransanaConstants.parsedTextCacheSize:
+            # ... drop the least recently used entry
+            (oldKey, oldEntry) = _cache.popitem(last=False)
+            _cacheSize -= oldEntry[0]
+    finally:
+        # Unlock the cache
+        _cacheLock.release()
+
+def GetOrCreate(text, kind, createFunc, *args):
+    """ Get a cached result for a kind of parsing applied to text.  If it isn't cached, createFunc(text, *args)
+        is called to create it, and the result is added to the cache. """
+    # Check the cache
+    value = Get(text, kind)
+    # If the value isn't cached ...
+    if value == None:
+        # ... create it ...
+        value = createFunc(text, *args)
+        # ... and cache it
+        Put(text, kind, value)
+
+        if DEBUG:
+            print "ParsedTextCache.GetOrCreate():  %s created, %d entries, %d characters" % (kind, len(_cache), _cacheSize)
+
+    # Return the value
+    return value
+
+def Clear():
+    """ Empty the cache """
+    global _cacheSize, _cacheChanged
+    # Lock the cache
+    _cacheLock.acquire()
+    try:
+        _cache.clear()
+        _cacheSize = 0
+        _cacheChanged = True
+    finally:
+        # Unlock the cache
+        _cacheLock.release()
+
+def GetCacheFilename(path):
+    """ Get the name of the cache file in a directory """
+    return os.path.join(path, 'ParsedTextCache.dat')
+
+def Load(path):
+    """ Load the cache saved in the directory path, if there is one.  The cache is only an optimization, so
+        any problem just leaves the cache empty. """
+    global _cache, _cacheSize, _cacheChanged
+    filename = GetCacheFilename(path)
+    # If there's no saved cache, there's nothing to do
+    if not os.path.exists(filename):
+        return
+    # Start exception handling
+    try:
+        # Read the saved cache
+        f = open(filename, 'rb')
+        try:
+            (version, entries) = cPickle.load(f)
+        finally:
+            f.close()
+        # If the saved cache has a different format ...
+        if version != CACHE_VERSION:
+            # ... ignore it
+            return
+        # Lock the cache
+        _cacheLock.acquire()
+        try:
+            # Start with the saved entries, least recently used first ...
+            newCache = collections.OrderedDict(entries)
+            # ... followed by anything cached since the program started
+            for (key, entry) in _cache.items():
+                newCache.pop(key, None)
+                newCache[key] = entry
+            _cache = newCache
+            _cacheSize = sum([entry[0] for entry in _cache.values()])
+            # Drop the least recently used entries if the cache size limit has been reduced
+            while _cacheSize > TransanaConstants.parsedTextCacheSize:
+                (oldKey, oldEntry) = _cache.popitem(last=False)
+                _cacheSize -= oldEntry[0]
+            _cacheChanged = False
+        finally:
+            # Unlock the cache
+            _cacheLock.release()
+    # If there's a problem ...
+    except:
+
+        if DEBUG:
+            print "ParsedTextCache.Load():"
+            print sys.exc_info()[0]
+            print sys.exc_info()[1]
+
+        # ... just start with an empty cache
+        pass
+
+def Save(path):
+    """ Save the cache in the directory path, if it has changed """
+    global _cacheChanged
+    # If the cache hasn't changed, or the directory doesn't exist, there's nothing to do
+    if (not _cacheChanged) or (not os.path.exists(path)):
+        return
+    filename = GetCacheFilename(path)
+    # Lock the cache
+    _cacheLock.acquire()
+    try:
+        # Get a copy of the cache entries
+        entries = _cache.items()
+    finally:
+        # Unlock the cache
+        _cacheLock.release()
+    # Start exception handling
+    try:
+        # Write the cache to a temporary file, then replace the old cache file, so a failed save can't leave a damaged cache
+        f = open(filename + '.tmp', 'wb')
+        try:
+            cPickle.dump((CACHE_VERSION, entries), f, cPickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rename(filename + '.tmp', filename)
+        _cacheChanged = False
+    # If there's a problem ...
+    except:
+
+        if DEBUG:
+            print "ParsedTextCache.Save():"
+            print sys.exc_info()[0]
+            print sys.exc_info()[1]
+
+        # ... the cache just won't be available next time
+        pass
@@ -45,7 +45,7 @@ class PlainTextUpdate(wx.Dialog):
                            numRecords   The number of records that will be updated  """
         # Remember the total number of records passed in, or obtain that number if needed
         if numRecords == 0:
-            self.numRecords = DBInterface.CountItemsWithoutPlainText()
+            self.numRecords = DBInterface.CountItemsWithoutPlainText() + DBInterface.CountItemsWithoutWordCounts()
         else:
             self.numRecords = numRecords
 
@@ -54,7 +54,7 @@ class PlainTextUpdate(wx.Dialog):
         # Add the Main Sizer
         mainSizer = wx.BoxSizer(wx.VERTICAL)
         # Add a gauge based on the number of records to be handled
-        self.gauge = wx.Gauge(self, -1, numRecords)
+        self.gauge = wx.Gauge(self, -1, self.numRecords)
         mainSizer.Add(self.gauge, 0, wx.EXPAND | wx.LEFT | wx.TOP | wx.RIGHT, 5)
         # Add a TextCtrl to provide user information
         self.txtCtrl = wx.TextCtrl(self, -1, "", style=wx.TE_LEFT | wx.TE_MULTILINE)
@@ -238,4 +238,23 @@ class PlainTextUpdate(wx.Dialog):
             if counter % 20 == 0:
                 wx.YieldIfNeeded()
 
+        # The records above were added to the Word Count index when they were saved.  Now get a list of
+        # the records that already had Plain Text but have not yet been added to the Word Count index.
+        wordCountItems = DBInterface.list_of_items_without_word_counts()
+        # Update User Info
+        self.txtCtrl.AppendText("%5d Word Count Index Records\n" % len(wordCountItems))
+        # Iterate through the list
+        for (objectType, objectNum) in wordCountItems:
+            # The Word Count index only needs the Plain Text, so we don't need to load the whole object
+            # or the hidden RichTextCtrl here.
+            DBInterface.UpdateWordCounts(objectType, objectNum, DBInterface.GetPlainText(objectType, objectNum), dbCursor)
+
+            # Update the Record Counter
+            counter += 1
+            # Update the Progress Bar
+            self.gauge.SetValue(min(counter, self.numRecords))
+            # This form can freeze up and appear non-responsive.  Every 20 items, we should avoid that
+            if counter % 20 == 0:
+                wx.YieldIfNeeded()
+
         dbCursor.close()
@@ -452,6 +452,16 @@ class PlayAllClips(wx.Dialog):  # (wx.MDIChildFrame)
                 self.clipNowPlaying = self.clipNowPlaying + 1
                 self.HasStartedPlaying = False
 
+                # Prefetch the upcoming clips while this one plays, and the previous clip in case the user
+                # presses the Previous button.  (This replaces the Collection-based prefetch done by the load,
+                # as the Clip List can span several Collections.)
+                prefetchList = []
+                for pos in range(self.clipNowPlaying, min(self.clipNowPlaying + TransanaConstants.prefetchRadius, len(self.clipList))):
+                    prefetchList.append(('Clip', self.clipList[pos][0]))
+                if self.clipNowPlaying > 1:
+                    prefetchList.append(('Clip', self.clipList[self.clipNowPlaying - 2][0]))
+                self.ControlObject.PrefetchItems(prefetchList)
+
                 # Let's display the Keywords Tab during PlayAllClips
                 self.ControlObject.ShowDataTab(1)
 
@@ -32,14 +32,27 @@ IN_TRANSANA = True
 import wx
 import wx.richtext as richtext
 
-# import Python's cStringIO, os, and string modules
-import cStringIO, os, string
+# import Python's cStringIO, os, re, shutil, string, sys, and tempfile modules
+import cStringIO, os, re, shutil, string, sys, tempfile
 # import Python's XML Sax handler
 import xml.sax.handler
 
-if DEBUG:
+if DEBUG or (__name__ == '__main__'):
     import time
 
+# When exporting RTF, the document body is held in memory up to this size (in bytes), and in a temporary file beyond it
+RTF_EXPORT_SPOOL_SIZE = 4 * 1024 * 1024
+# When exporting RTF, output is written in blocks of about this size (in bytes)
+RTF_EXPORT_BLOCK_SIZE = 64 * 1024
+
+# The RTF Parser works through the RTF data a token at a time rather than a character at a time.
+# A text run is everything up to the next curly bracket or backslash ...
+RTF_TEXT_RUN = re.compile(r'[^\\{}]+')
+# ... a control word is a backslash followed by letters and an optional numeric parameter ...
+RTF_CONTROL_WORD = re.compile(r'\\([A-Za-z]*)(-?[0-9]*)')
+# ... and when skipping over a block, only escaped characters and curly brackets matter.
+RTF_BLOCK_DELIMITER = re.compile(r'\\[\s\S]|[{}]')
+
 
 class PyRichTextRTFHandler(richtext.RichTextFileHandler):
     """ A RichTextFileHandler that can handle Rich Text Format files,
@@ -150,13 +163,13 @@ class PyRichTextRTFHandler(richtext.RichTextFileHandler):
 
         # Extract the wxRichTextBuffer data to the stream object
         if xmlHandler.SaveStream(buf, stream):
-            # Convert the stream to a string
-            contents = stream.getvalue()
+            # Go back to the start of the stream
+            stream.seek(0)
             # Get the XML to RTF File Handler
             fileHandler = XMLToRTFHandler()
-            # Use xml.sax, with the XML to RTF File Handler, to parse the XML and create
-            # an RTF Output string.
-            xml.sax.parseString(contents, fileHandler)
+            # Use xml.sax, with the XML to RTF File Handler, to parse the XML from the stream and create
+            # the RTF Output.
+            xml.sax.parse(stream, fileHandler)
             # Use the XML to RTF File Handler to save the RTF Output String to a file or
             # to populate the StringIO object if we're to return a string
             fileHandler.saveFile(fileobj)
@@ -265,6 +278,14 @@ class XMLToRTFHandler(xml.sax.handler.ContentHandler):
 
         # Define the parsed text output  (cStringIO used for the speed improvements it provides!)
         self.outputString = cStringIO.StringIO()
+        # The RTF document body can't be written until the whole document has been processed, because the font and
+        # color tables that go in front of it are built along the way.  Each time the parsed text output gets large,
+        # it is moved to a temporary file, which stays in memory unless the document is large.
+        self.outputFile = tempfile.SpooledTemporaryFile(max_size=RTF_EXPORT_SPOOL_SIZE)
+        # The formatting of the current text block
+        self.runFormat = None
+        # The formatting of the previous text block, if it hasn't been closed yet
+        self.openRun = None
 
         # Define a variable for tracking what element we are changing
         self.element = ''
@@ -294,6 +315,10 @@ class XMLToRTFHandler(xml.sax.handler.ContentHandler):
         # Remember the element's name
         self.element = name
 
+        # Anything but a text or symbol element ends the previous text block
+        if not name in [u'text', u'symbol']:
+            self.closeRun()
+
         # If the element is a paragraphlayout, paragraph, symbol, or text element ...
         if name in [u'paragraphlayout', u'paragraph', u'symbol', u'text']:
 
@@ -324,16 +349,14 @@ class XMLToRTFHandler(xml.sax.handler.ContentHandler):
                 cascadesource = u'paragraph'
             # For each type of character style we need to cascade ...
             for x in charcascade:
-                # ... iterate through the dictionary elements ...
-                for y in self.fontAttributes[x].keys():
-                    # ... and assign the character cascade source styles (cascadesource) to the destination element (x)
-                    self.fontAttributes[x][y] = self.fontAttributes[cascadesource][y]
+                # ... assign the character cascade source styles (cascadesource) to the destination element (x).
+                # (All the style dictionaries have the same keys.)
+                self.fontAttributes[x].update(self.fontAttributes[cascadesource])
             # For each type of paragraph style we need to cascade ...
             for x in paracascade:
-                # ... iterate through the dictionary elements ...
-                for y in self.paragraphAttributes[x].keys():
-                    # ... and assign the paragraph cascade source styles (cascadesource) to the destination element (x)
-                    self.paragraphAttributes[x][y] = self.paragraphAttributes[cascadesource][y]
+                # ... assign the paragraph cascade source styles (cascadesource) to the destination element (x).
+                # (All the style dictionaries have the same keys.)
+                self.paragraphAttributes[x].update(self.paragraphAttributes[cascadesource])
 
             # If the element is a paragraph element or a paragraph layout element, there is extra processing to do at the start
             if name in [u'paragraph', u'paragraphlayout']:
@@ -409,15 +432,13 @@ class XMLToRTFHandler(xml.sax.handler.ContentHandler):
                 charcascade = [u'symbol', u'text']
             # For each type of character style we need to cascade ...
             for x in charcascade:
-                # ... iterate through the dictionary elements ...
-                for y in self.fontAttributes[x].keys():
-                    # ... and assign the character cascade source styles (cascadesource) to the destination element (x)
-                    self.fontAttributes[x][y] = self.fontAttributes[cascadesource][y]
+                # ... assign the character cascade source styles (cascadesource) to the destination element (x).
+                # (All the style dictionaries have the same keys.)
+                self.fontAttributes[x].update(self.fontAttributes[cascadesource])
             for x in paracascade:
-                # ... iterate through the dictionary elements ...
-                for y in self.paragraphAttributes[x].keys():
-                    # ... and assign the paragraph cascade source styles (cascadesource) to the destination element (x)
-                    self.paragraphAttributes[x][y] = self.paragraphAttributes[cascadesource][y]
+                # ... assign the paragraph cascade source styles (cascadesource) to the destination element (x).
+                # (All the style dictionaries have the same keys.)
+                self.paragraphAttributes[x].update(self.paragraphAttributes[cascadesource])
 
             if DEBUG:
                 # List unknown elements
@@ -648,21 +669,23 @@ class XMLToRTFHandler(xml.sax.handler.ContentHandler):
 
         # Add Font formatting when we process text or symbol tags, as text and symbol specs can modify paragraph-level font specifications
         if name in [u'text', u'symbol']:
+            # The formatting is gathered into a string, so it can be compared with the formatting of the previous text block
+            runFormat = []
             # Begin an RTF block
-            self.outputString.write('{')
+            runFormat.append('{')
             # Add Font Face information
-            self.outputString.write('\\f%d' % self.fontTable.index(self.fontAttributes[name][u'fontface']))
+            runFormat.append('\\f%d' % self.fontTable.index(self.fontAttributes[name][u'fontface']))
             # Add Font Size information
-            self.outputString.write('\\fs%d' % (int(self.fontAttributes[name][u'fontpointsize']) * 2))
+            runFormat.append('\\fs%d' % (int(self.fontAttributes[name][u'fontpointsize']) * 2))
             # If bold, add Bold
             if self.fontAttributes[name][u'fontweight'] == str(wx.FONTWEIGHT_BOLD):
-                self.outputString.write('\\b')
+                runFormat.append('\\b')
             # If Italics, add Italics
             if self.fontAttributes[name][u'fontstyle'] == str(wx.FONTSTYLE_ITALIC):
-                self.outputString.write('\\i')
+                runFormat.append('\\i')
             # If Underline, add Underline
             if self.fontAttributes[name][u'fontunderlined'] == u'1':
-                self.outputString.write('\\ul')
+                runFormat.append('\\ul')
             # If Text Color is not black ...
             if self.fontAttributes[name][u'textcolor'] != '#000000':
                 # Check the color table.  If the color is not there ...
@@ -670,7 +693,7 @@ class XMLToRTFHandler(xml.sax.handler.ContentHandler):
                     # ... add it to the color table
                     self.colorTable.append(self.fontAttributes[name][u'textcolor'])
                 # ... Add text foreground color
-                self.outputString.write('\\cf%d' % self.colorTable.index(self.fontAttributes[name][u'textcolor']))
+                runFormat.append('\\cf%d' % self.colorTable.index(self.fontAttributes[name][u'textcolor']))
             # If Text Background Color is not White ...
             if self.fontAttributes[name][u'bgcolor'] != '#FFFFFF':
                 # Check the color table.  If the color is not there ...
@@ -679,11 +702,22 @@ class XMLToRTFHandler(xml.sax.handler.ContentHandler):
                     self.colorTable.append(self.fontAttributes[name][u'bgcolor'])
                 # ... Add text background color to the RTF output string
                 # Replaced "cb" with "highlight" for WORD compatibility.  "cb" works in OS X TextEdit.
-                # self.outputString.write('\\cb%d' % self.colorTable.index(self.fontAttributes[name][u'bgcolor']))
-                self.outputString.write('\\highlight%d' % self.colorTable.index(self.fontAttributes[name][u'bgcolor']))
+                # runFormat.append('\\cb%d' % self.colorTable.index(self.fontAttributes[name][u'bgcolor']))
+                runFormat.append('\\highlight%d' % self.colorTable.index(self.fontAttributes[name][u'bgcolor']))
 
             # Done with formatting string.  Add a space to terminate the formatting block, but don't close the text block yet.
-            self.outputString.write(' ')
+            runFormat.append(' ')
+            self.runFormat = ''.join(runFormat)
+
+            # If the previous text block has the same formatting and nothing has been written since it ended ...
+            if self.runFormat == self.openRun:
+                # ... just continue it.  Adjacent text with the same formatting becomes one RTF block.
+                self.openRun = None
+            # Otherwise ...
+            else:
+                # ... close the previous text block and start a new RTF block
+                self.closeRun()
+                self.outputString.write(self.runFormat)
 
 
     def characters(self, data):
@@ -788,14 +822,24 @@ class XMLToRTFHandler(xml.sax.handler.ContentHandler):
             
     def endElement(self, name):
         """ xml.sax required method for handling the ending of an XML element (the close tag) """
-        # If we have a text, data, or symbol end tag ...
-        if name in [u'text', u'data', u'symbol']:
+        # If we have a text or symbol end tag ...
+        if name in [u'text', u'symbol']:
+            # ... the RTF block needs to be closed.  That's put off until something else is written, so that
+            # if the next text block has the same formatting, the two can be combined.
+            self.openRun = self.runFormat
+        # If we have a data end tag ...
+        elif name in [u'data']:
             # ... we need to close the RTF block
             self.outputString.write('}')
         # If we have a paragraph end tag ...
         elif name in [u'paragraph']:
-            # ... we need to add the end paragraph RTF information
+            # ... we need to close the last text block and add the end paragraph RTF information
+            self.closeRun()
             self.outputString.write('\par\n')
+            # If the parsed text output is getting large ...
+            if self.outputString.tell() > RTF_EXPORT_BLOCK_SIZE:
+                # ... move it to the temporary file
+                self.flush()
         # If we have a text, data, paragraph, paragraphlayout, or richtext end tag ...
         if name in [u'text', u'data', u'paragraph', u'paragraphlayout', u'richtext']:
             # ... we need to clear the element type, as we're no longer processing that type of element!
@@ -806,6 +850,17 @@ class XMLToRTFHandler(xml.sax.handler.ContentHandler):
         # stream containing the RTF output stream rather than saving to a file.  I haven't written
         # getRTFString() or getStream() methods yet, but it wouldn't be hard.
 
+    def closeRun(self):
+        """ Close the previous text block, if it hasn't been closed yet """
+        if self.openRun != None:
+            self.outputString.write('}')
+            self.openRun = None
+
+    def flush(self):
+        """ Move the parsed text output to the temporary file holding the RTF document body """
+        self.outputFile.write(self.outputString.getvalue())
+        self.outputString = cStringIO.StringIO()
+
     def saveFile(self, filename):
         """ Save the RTF Output String to a file or to a StringIO object """
         # If filename is a string or unicode object ...
@@ -949,8 +1004,12 @@ class XMLToRTFHandler(xml.sax.handler.ContentHandler):
         # Specify widow/orphan control
         f.write('\\widowctrl\n')
 
-        # now add the RTF output string from the XML parser
-        f.write(self.outputString.getvalue())
+        # now add the RTF document body from the XML parser, copying it from the temporary file a block at a time
+        self.closeRun()
+        self.flush()
+        self.outputFile.seek(0)
+        shutil.copyfileobj(self.outputFile, f, RTF_EXPORT_BLOCK_SIZE)
+        self.outputFile.close()
 
         # Close the RTF document string
         f.write('}')
@@ -1004,6 +1063,9 @@ class RTFTowxRichTextCtrlParser:
 
         # Create an object to hold font specifications for the current font
         self.txtAttr = richtext.RichTextAttr()
+        # Text is gathered here until the style changes, so each run of text can be added to the
+        # wxRichTextCtrl with a single WriteText() call
+        self.pendingText = []
         
         # Apply the default font specifications to the current font object
         self.SetTxtStyle(fontFace = self.font['fontfacename'], fontSize = self.font['fontpointsize'],
@@ -1099,6 +1161,9 @@ class RTFTowxRichTextCtrlParser:
 
             The SetTxtStyle() method handles overlapping styles in a way that avoids this problem.  """
 
+        # Text gathered so far uses the OLD style, so add it to the document before the style changes
+        self.flush_text()
+
         # If the font face (font name) is specified, set the font face
         if fontFace:
             self.txtAttr.SetFontFaceName(fontFace)
@@ -1191,7 +1256,12 @@ class RTFTowxRichTextCtrlParser:
 
 #            print "No progress dialog.", len(self.buffer)
 
-        # We need to go through the file buffer one character at a time
+        # Determine how often to update the progress dialog
+        if progressDlg:
+            progressStep = min(50000, int(len(self.buffer) / 20))
+            nextProgress = progressStep
+
+        # We need to go through the file buffer one token (a curly bracket, control word, or run of text) at a time
         while self.index < len(self.buffer):
 
             # On rare occasions, text gets placed OUT OF ORDER in the transcript during RTF import.
@@ -1203,9 +1273,11 @@ class RTFTowxRichTextCtrlParser:
 
                 self.txtCtrl.SetInsertionPoint(self.txtCtrl.GetLastPosition() - self.insertionOffset - 1)
 
-            if progressDlg and (self.index % min(50000, int(len(self.buffer) / 20)) == 0) and (not IN_TRANSANA):
+            if progressDlg and (self.index >= nextProgress) and (not IN_TRANSANA):
 
                 progressDlg.Update(self.index)
+                # Determine when to update the progress dialog next
+                nextProgress = self.index + progressStep
                 
             # Get one character
             c = self.buffer[self.index]
@@ -1218,7 +1290,7 @@ class RTFTowxRichTextCtrlParser:
                 print c,
 
             # Handle curly brackets and backslash characters
-            if "{}\\".count(c) > 0:
+            if c in "{}\\":
 
                 # Open curly bracket starts an RTF text block, but don't reset FONT if we have "{\*"!!
                 if (c == '{') and (self.buffer[self.index : self.index + 3] != '{\\*'):
@@ -1256,8 +1328,8 @@ class RTFTowxRichTextCtrlParser:
                         elif (val in [145, 146]):
                             # 27 is the HEX value for chr(39), the apostrophe character.
                             val = 39
-                            # Replace the hex representation in the self.buffer text.  
-                            self.buffer = self.buffer[:self.index] + "\u39" + self.buffer[self.index+4:]
+                            # (There's no need to replace the hex representation in the self.buffer text, which is
+                            # slow for long documents.  The index moves past it below.)
                             # Apostrophes are special because they have meaning in RTF.  Add it to the
                             # txt variable here, or it won't show up anywhere!
                             txt += "'"
@@ -1267,8 +1339,8 @@ class RTFTowxRichTextCtrlParser:
                         elif (val in [147, 148]):
                             # 22 is the HEX value for chr(34), the quotation mark character.
                             val = 34
-                            # Replace smart quote with regular quotes in the self.buffer text.  
-                            self.buffer = self.buffer[:self.index+2] + '22' + self.buffer[self.index+4:]
+                            # (There's no need to replace the smart quote in the self.buffer text, which is
+                            # slow for long documents.  The index moves past it below.)
 
                         # Word en-dash and em-dash cause problems.  These come across as "\'96" and "\'97"
                         #(hex for 150) and needs to be replaced with the unicode equivalent.
@@ -1284,17 +1356,14 @@ class RTFTowxRichTextCtrlParser:
                         elif (val == 129) and (self.buffer[self.index:self.index+8] == "\\'81\\'8b"):
                             # This representation seems to work best, although it's not the right Font Size.
                             val = 176
-                            # Replace the odd RTF character specification with one that works better
-                            self.buffer = self.buffer[:self.index] + "\u176" + self.buffer[self.index+8:]
-                            # We need to move the index by 1 character here, as 176 is more than 2 digits wide!
-                            # NOTE:  This sucks, but I can't figure out the right way to do it!
-                            self.index += 1
+                            # The odd RTF character specification is 8 characters wide rather than 4, so we
+                            # need to move the index past the first half of it here.
+                            self.index += 4
 
                         # An old style of the Closed Dot comes up across as "\'95" (hex 149, or 0xb7)
                         elif (val == 149):
                             # This representation seems to work best, although it's not the right Font Size.
                             val = 8226
-                            self.buffer = self.buffer[:self.index] + "\u82" + self.buffer[self.index+4:]
 
                         # This is BOGUS.  I don't like it, and I know it's not right.  But I can't figure it out.
                         # So if the codepage indicates we have a WORD FOR MAC export, we have to ignore certain
@@ -1498,6 +1567,8 @@ class RTFTowxRichTextCtrlParser:
                             
                         # If we're in an image ...
                         elif self.in_image:
+                            # Add any text gathered so far before the image
+                            self.flush_text()
                             # If there's data in the local text variable ...
                             if txt != '':
                                 # ... and that data STARTS with an asterisk ...
@@ -1539,6 +1610,8 @@ class RTFTowxRichTextCtrlParser:
 
                         # ... if we're in a URL / Hyperlink field ...
                         elif self.in_field > 0:
+                            # Add any text gathered so far before the link
+                            self.flush_text()
                             # If we're expecting the URL to come next ...
                             if self.in_url:
                                 # ... check for the HYPERLINK keyword ...
@@ -1588,7 +1661,7 @@ class RTFTowxRichTextCtrlParser:
 
                     # Process the Non-Breaking Space here?
                     elif self.buffer[self.index + 1] == '~':
-                        self.txtCtrl.WriteText(' ')
+                        self.write_text(' ')
                         self.index += 2
                     # If we have a backslash character ...
                     elif c == '\\':
@@ -1602,21 +1675,29 @@ class RTFTowxRichTextCtrlParser:
 
             # If we don't have a special character (\\, { or }) to process ...
             else:
-                # If we're in the color table and have a semicolon character ...
-                if (self.in_color_table) and (c == ";"):
-                    # ... then increment the color index to the next color
-                    self.colorIndex += 1
+                # ... get the whole run of text up to the next special character
+                textRun = RTF_TEXT_RUN.match(self.buffer, self.index)
+                run = textRun.group()
+                # If we're in the color table ...
+                if self.in_color_table:
+                    # ... then each semicolon character increments the color index to the next color
+                    self.colorIndex += run.count(';')
+                    run = run.replace(';', '')
+                # Newlines and \r characters are not part of the text
+                run = run.replace('\r', '').replace('\n', '')
                 # If we're in the Font Table ...
-                elif self.in_font_table:
-                    # ... if we DON'T have a semicolon, which signals the end of the font name) ...
-                    if c != ';' and c != '\n' and c != '\r':
-                        self.fontName += c
-                # For any other character other than a newline or \r ...
-                elif (c != '\r' and c != '\n'):
-                    # ... add the character to the local text variable ...
-                    txt = txt + c
-                # ... and move on to the next character
-                self.index += 1
+                if self.in_font_table:
+                    # ... add everything but semicolons, which signal the end of the font name, to the font name
+                    self.fontName += run.replace(';', '')
+                # Otherwise ...
+                else:
+                    # ... add the text to the local text variable ...
+                    txt += run
+                # ... and move on to the next token
+                self.index = textRun.end()
+
+        # Add any remaining text to the document
+        self.flush_text()
 
         if readOnly:
             self.txtCtrl.SetReadOnly(True)
@@ -1630,6 +1711,56 @@ class RTFTowxRichTextCtrlParser:
         if DEBUG:
             print "Exiting PyRTFParser.RTFTowxRichTextCtrlParser.process_doc():", time.time() - startTime
 
+    def write_text(self, txt):
+        """ Add text to the document in the current style.  The text is gathered until the style changes,
+            and then added by flush_text(). """
+        self.pendingText.append(txt)
+
+    def flush_text(self):
+        """ Add the text gathered since the last style change to the wxRichTextCtrl in a single WriteText() call """
+        # If there's no gathered text, there's nothing to do
+        if len(self.pendingText) == 0:
+            return
+        # Get the gathered text and clear the list
+        pendingText = self.pendingText
+        self.pendingText = []
+        # Start Exception Handling
+        try:
+            # Combine the gathered text.  (This fails if 8-bit strings are mixed with Unicode.)
+            txt = ''.join(pendingText)
+        # If the text can't be combined ...
+        except UnicodeDecodeError:
+            # ... add the pieces one at a time, so that only the problem pieces get replaced
+            pieces = pendingText
+        # If the text was combined ...
+        else:
+            # ... add it all at once
+            pieces = [txt]
+        # Add the text to the wxRichTextCtrl
+        for txt in pieces:
+            # NOTE:  I don't appear to need to decode things here.  I think RTF takes care of that in the way it
+            #        encodes Unicode characters.  If you run into encoding problems, try determing self.encoding from
+            #        the RTF file (maybe the ansicpg in the rtf header) and use txt.decode(self.encoding).
+
+            # Start Exception Handling
+            try:
+                # ... then add that text to the wxRichTextCtrl.
+                self.txtCtrl.WriteText(txt)
+
+            # If we get a UnicodeDecodeError ...
+            except UnicodeDecodeError:
+                # ... put a SPACE in the Transcript
+                self.txtCtrl.WriteText(' ')
+
+                # ... and put a note in the Error Log!
+                print "RTFParser.RTFTowxRichTextCtrlParser.flush_text():  UnicodeDecodeError:", len(txt),
+                if len(txt) == 1:
+                    print ord(txt)
+                else:
+                    for x in txt:
+                        print ord(x),
+                    print
+
     def hex2int(self, data):
         """ Image data is stored in a file-friendly Hex format.  We need to convert it to an image-friendly binary format. """
         # Initialize the conversion result variable
@@ -1730,7 +1861,7 @@ class RTFTowxRichTextCtrlParser:
             if (len(self.list_txt) > 0):
                 # ... then it's now time to insert the list text in front of the new text.
                 # That is, we finally have all the list formatting in place.
-                self.txtCtrl.WriteText(self.list_txt + txt)
+                self.write_text(self.list_txt + txt)
                 # Clear the list text
                 self.list_txt = ''
             # If we're inside the Font Table ...
@@ -1739,33 +1870,8 @@ class RTFTowxRichTextCtrlParser:
                 self.fontName += txt
             # Otherwise ...
             else:
-                # NOTE:  I don't appear to need to decode things here.  I think RTF takes care of that in the way it
-                #        encodes Unicode characters.  If you run into encoding problems, try determing self.encoding from
-                #        the RTF file (maybe the ansicpg in the rtf header) and use txt.decode(self.encoding).
-
-                # Start Exception Handling
-                try:
-                    # ... then add that text to the wxRichTextCtrl.
-                    self.txtCtrl.WriteText(txt)
-
-#                    print txt.encode('utf8')
-#                    print self.txtAttr.GetFontFaceName()
-#                    print self.font
-#                    print
-                    
-                # If we get a UnicodeDecodeError ...
-                except UnicodeDecodeError:
-                    # ... put a SPACE in the Transcript
-                    self.txtCtrl.WriteText(' ')
-
-                    # ... and put a note in the Error Log!
-                    print "RTFParser.RTFTowxRichTextCtrlParser.process_txt():  UnicodeDecodeError:", len(txt),
-                    if len(txt) == 1:
-                        print ord(txt)
-                    else:
-                        for x in txt:
-                            print ord(x),
-                        print
+                # ... add the text to the document.  (It's gathered until the style changes.)
+                self.write_text(txt)
 
     def process_control_word(self):
         """ Process a Rich Text Format control word """
@@ -1776,38 +1882,17 @@ class RTFTowxRichTextCtrlParser:
 
         # Start exception handling
         try:
-            # Initialize the ControlWord variable
-            cw = ""
-            # Move to the first character following the backslash
-            self.index += 1
-            # Get the character to process
+            # Get the control word (the LETTERS following the backslash) and any number that modifies it
+            # (digits, where only the first character can be the minus sign)
+            controlWord = RTF_CONTROL_WORD.match(self.buffer, self.index)
+            (cw, numstr) = controlWord.groups()
+            # Move to the first character following the control word and its number ...
+            self.index = controlWord.end()
+            # ... and get that character
             c = self.buffer[self.index]
-            # As long as we are processing LETTERS ...
-            while string.ascii_letters.count(c) > 0:
-                # ... add the character to the control word ...
-                cw = cw + c
-                # ... increment the index ...
-                self.index += 1
-                # ... and look at the next character
-                c = self.buffer[self.index]
-
-            # Now index is at the first character after the control word, which might be a number that modifies the control word.
-            # As long as we are processing NUMBERS or the minus sign ...
-            if (string.digits.count(c) > 0 or (c == '-')):
-                # Start collecting digits.  (This structure means only the first character can be the minus sign.)
-                numstr = c
-                # Increment the index ...
-                self.index += 1
-                # ... and look for the next digit
-                c = self.buffer[self.index]
-                # From now on, we only want digits ...
-                while string.digits.count(c) > 0:
-                    # ... add the next digit to the number string ...
-                    numstr += c
-                    # ... increment the index ...
-                    self.index += 1
-                    # ... and look for the next digit
-                    c = self.buffer[self.index]
+
+            # If the control word has a number ...
+            if numstr != '':
                 # Start exception handling
                 try:
                     # Convert the number string to an integer
@@ -1941,7 +2026,7 @@ class RTFTowxRichTextCtrlParser:
                 # We're using Unicode Character 8226
                 tempChar = unichr(8226)
                 # And we need to process it at Text
-                self.txtCtrl.WriteText(tempChar)
+                self.write_text(tempChar)
 
             # Color Table specification
             elif cw == "colortbl":
@@ -2263,6 +2348,8 @@ class RTFTowxRichTextCtrlParser:
                 # Set the wxRichTextCtrl's paragraph left, first line, and right indents
                 self.SetTxtStyle(parLeftIndent = (self.antitwips(self.paragraph['leftindent'] + self.paragraph['firstlineindent']), self.antitwips(0 - self.paragraph['firstlineindent'])),
                                  parRightIndent = self.antitwips(self.paragraph['rightindent']))
+                # Add the paragraph's text before ending the paragraph
+                self.flush_text()
                 # Specify the Newline() placement
                 self.txtCtrl.Newline()
 
@@ -2412,6 +2499,8 @@ class RTFTowxRichTextCtrlParser:
                 try:
                     # Unicode character 8232 is a line separator!
                     if num == 8232:
+                        # Add the text before the line separator first
+                        self.flush_text()
                         self.txtCtrl.Newline()
                     # Otherwise ...
                     else:
@@ -2743,47 +2832,190 @@ class RTFTowxRichTextCtrlParser:
         """ Seek to the end of the current RTF block. """
         # Note our current nesting level, knowing that we're currently IN the block we want to leave
         desired_nest = self.nest - 1
-        # note our current position in the RTF text
-        x = self.index
-        # As long as we don't reach the end of the RTF text ...        
-        while x < len(self.buffer):
-            # ... look for backslashes and skip them
-            if self.buffer[x] == "\\":
-                x = x + 1
+        # If we don't find the end of the block, we'll end up past the end of the RTF text
+        endPos = len(self.buffer) + 1
+        # Jump from one escaped character or curly bracket to the next.  (Skipped blocks can hold a lot of
+        # image or theme data, so we don't want to look at every character.)
+        for delimiter in RTF_BLOCK_DELIMITER.finditer(self.buffer, self.index):
             # Look for new block starts ...
-            elif self.buffer[x] == "{":
+            if delimiter.group() == "{":
                 # ... which increase our level of nesting
                 self.nest = self.nest + 1
                 # As we nest, add the LAST value as the new value unicodeByteStack
                 self.unicodeByteStack.append(self.unicodeByteStack[-1])
             # Look for block ends ...
-            elif self.buffer[x] == "}":
+            elif delimiter.group() == "}":
                 # ... which decrease out level of nesting
                 self.nest = self.nest - 1
                 # ... and reduce the unicodeTypeStack by one
                 self.unicodeByteStack = self.unicodeByteStack[:-1]
                 # When we've reached the closer of our current RTF block ...
                 if self.nest == desired_nest:
-                    # ... we can stop iterating
+                    # ... note the position after it ...
+                    endPos = delimiter.end()
+                    # ... and we can stop iterating
                     break
-            # Move to the next position in the RTF text
-            x = x + 1
+            # (Escaped characters, a backslash plus one character, are simply skipped.)
         # We can now set the new position in the RTF text for processing after the end of the RTF block
-        self.index = x + 1
+        self.index = endPos
 
     def antitwips(self, num):
         """ Convert from twips to 10ths of a millimeter, which is what the wxRichTextCtrl uses """
         return int((num * 254.0 / 72.0) /20.0)
 
+def SampleWordRTF(paragraphs=2000):
+    """ Create Rich Text Format data resembling what Microsoft Word produces for an interview transcript,
+        for benchmarking the RTF Parser """
+    # Word puts a font table, color table, style sheet, and a lot of document information up front
+    header = ["{\\rtf1\\adeflang1025\\ansi\\ansicpg1252\\uc1\\adeff0\\deff0\\stshfdbch0\\stshfloch0\\deflang1033\\deflangfe1033",
+              "{\\fonttbl{\\f0\\froman\\fcharset0\\fprq2{\\*\\panose 02020603050405020304}Times New Roman;}",
+              "{\\f1\\fmodern\\fcharset0\\fprq1{\\*\\panose 02070309020205020404}Courier New;}}",
+              "{\\colortbl;\\red0\\green0\\blue0;\\red0\\green0\\blue255;\\red255\\green0\\blue0;}",
+              "{\\*\\defchp \\fs24}{\\*\\defpap \\ql \\li0\\ri0\\widctlpar\\wrapdefault\\aspalpha\\aspnum\\faauto\\adjustright\\rin0\\lin0\\itap0 }",
+              "{\\stylesheet{\\ql \\li0\\ri0\\widctlpar\\wrapdefault\\aspalpha\\aspnum\\faauto\\adjustright\\rin0\\lin0\\itap0 \\rtlch\\fcs1 \\af0\\afs24\\alang1025 \\ltrch\\fcs0 \\fs24\\lang1033\\langfe1033\\cgrid\\langnp1033\\langfenp1033 \\snext0 \\sqformat \\spriority0 Normal;}}",
+              "{\\*\\rsidtbl \\rsid1463424\\rsid2101584}{\\*\\generator Microsoft Word 14.0.7128;}",
+              "{\\info{\\title Interview}{\\author Transana}}",
+              "{\\*\\themedata " + ('504b030414000600080000002100e9de0fbfff0000001c020000130000005b436f6e74656e745f54797065735d2e786d6c' * 200) + "}",
+              "\\paperw12240\\paperh15840\\margl1440\\margr1440\\margt1440\\margb1440\\gutter0\\ltrsect \\n"]
+    # Each paragraph has a speaker in bold, smart quotes and apostrophes, and a time code in a different font and color
+    paragraph = "\\pard\\plain \\ltrpar\\ql \\li0\\ri0\\sa200\\sl276\\slmult1\\widctlpar\\wrapdefault\\aspalpha\\aspnum\\faauto\\adjustright\\rin0\\lin0\\itap0 " + \
+                "\\rtlch\\fcs1 \\af0\\afs24\\alang1025 \\ltrch\\fcs0 \\fs24\\lang1033\\langfe1033\\cgrid\\langnp1033\\langfenp1033 " + \
+                "{\\rtlch\\fcs1 \\af0 \\ltrch\\fcs0 \\b\\insrsid1463424 Interviewer:}{\\rtlch\\fcs1 \\af0 \\ltrch\\fcs0 \\insrsid1463424  " + \
+                "So tell me about what happened when you first got to the school.  I\\'92m especially interested in \\'93the early days\\'94 " + \
+                "and how the other teachers reacted to the new program, since that\\'92s what most of our questions are about.}" + \
+                "{\\rtlch\\fcs1 \\af1 \\ltrch\\fcs0 \\f1\\cf2\\insrsid1463424 \\u164\\'a4<%d>}{\\rtlch\\fcs1 \\af0 \\ltrch\\fcs0 \\insrsid2101584 \\par }\n"
+    # Build the document
+    body = []
+    for x in range(paragraphs):
+        body.append(paragraph % (x * 1000))
+    return ''.join(header) + ''.join(body) + "}"
+
+def SampleRichTextXML(paragraphs=2000):
+    """ Create wxRichTextCtrl XML data resembling an edited interview transcript, for benchmarking RTF export.
+        Editing splits text into several XML text elements with the same formatting. """
+    # The XML header and paragraph layout
+    header = '<?xml version="1.0" encoding="UTF-8"?>\n<richtext version="1.0.0.0" xmlns="http://www.wxwidgets.org">\n' + \
+             '  <paragraphlayout textcolor="#000000" fontpointsize="12" fontstyle="90" fontweight="90" fontunderlined="0" ' + \
+             'fontface="Courier New" alignment="1" parspacingafter="10" parspacingbefore="0" linespacing="10">\n'
+    # Each paragraph has a speaker in bold, text split by editing, and a time code with its hidden time data
+    paragraph = '    <paragraph>\n' + \
+                '      <text fontweight="92">Interviewer:</text>\n' + \
+                '      <text>" So tell me about what happened when you first got to the school.  "</text>\n' + \
+                '      <text>I\xe2\x80\x99m especially interested in \xe2\x80\x9cthe early days\xe2\x80\x9d and how the other </text>\n' + \
+                '      <text>teachers reacted to the new program, since that\xe2\x80\x99s what most of our questions are about.</text>\n' + \
+                '      <text textcolor="#FF0000">\xc2\xa4</text>\n' + \
+                '      <text textcolor="#FF0000" fontpointsize="1">&lt;%d&gt;</text>\n' + \
+                '    </paragraph>\n'
+    # Build the document
+    body = []
+    for x in range(paragraphs):
+        body.append(paragraph % (x * 1000))
+    return header + ''.join(body) + '  </paragraphlayout>\n</richtext>\n'
+
+def BenchmarkExport(xmlData, handlerClass, repetitions=1):
+    """ Convert wxRichTextCtrl XML data to Rich Text Format using handlerClass, and return the throughput in
+        characters per second and the size of the RTF produced """
+    # Note the best time
+    bestTime = None
+    for x in range(repetitions):
+        # Convert the XML data to RTF, noting the time taken
+        startTime = time.time()
+        handler = handlerClass()
+        xml.sax.parse(cStringIO.StringIO(xmlData), handler)
+        output = cStringIO.StringIO()
+        handler.saveFile(output)
+        elapsed = time.time() - startTime
+        if (bestTime == None) or (elapsed < bestTime):
+            bestTime = elapsed
+    # Return the throughput and the output size
+    return (len(xmlData) / max(bestTime, 0.000001), len(output.getvalue()))
+
+def Benchmark(rtfData, parserClass, repetitions=1):
+    """ Import RTF data into a wxRichTextCtrl using parserClass, and return the throughput in characters per second """
+    # Create a hidden frame holding a wxRichTextCtrl
+    frame = wx.Frame(None, -1, 'PyRTFParser Benchmark')
+    txtCtrl = richtext.RichTextCtrl(frame, -1)
+    # Note the best time
+    bestTime = None
+    for x in range(repetitions):
+        # Start with an empty control
+        txtCtrl.Clear()
+        # Import the RTF data, noting the time taken
+        startTime = time.time()
+        parserClass(txtCtrl, buf=rtfData, displayProgress=False)
+        elapsed = time.time() - startTime
+        if (bestTime == None) or (elapsed < bestTime):
+            bestTime = elapsed
+    # Clean up
+    frame.Destroy()
+    # Return the throughput
+    return len(rtfData) / max(bestTime, 0.000001)
+
 # If we're running in stand-alone test mode
 if __name__ == '__main__':
-    # Create an xml.sax parser
-    parser = xml.sax.make_parser()
-    # Define our XML to RTF Handler
-    handler = XMLToRTFHandler()
-    # Set the parser to use the handler
-    parser.setContentHandler(handler)
-    # Open a test XML file, 'test.xml', which should be created by saving XML from a wxRichTextCtrl, and parse it
-    parser.parse("test.xml")
-    # Save the resulting RTF string to a file called 'text.rtf'
-    handler.saveFile("test.rtf")
+    # If we're asked to benchmark RTF import ...
+    #   python PyRTFParser.py benchmark [file.rtf] [other_PyRTFParser.py]
+    # (Benchmark an older version of this file, saved under another name, to compare before and after.)
+    if (len(sys.argv) > 1) and (sys.argv[1] == 'benchmark'):
+        # Create a wxPython application
+        app = wx.App(False)
+        # The parser doesn't need Transana's special handling here
+        IN_TRANSANA = False
+        # If an RTF file is specified ...
+        if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
+            # ... read it
+            f = open(sys.argv[2], 'rb')
+            rtfData = f.read()
+            f.close()
+        # Otherwise ...
+        else:
+            # ... use generated Word-style RTF
+            rtfData = SampleWordRTF()
+        # List the parsers to benchmark
+        parsers = [('this version', RTFTowxRichTextCtrlParser)]
+        # If another version of the parser is specified ...
+        if len(sys.argv) > 3:
+            # ... load it
+            import imp
+            otherModule = imp.load_source('OtherPyRTFParser', sys.argv[3])
+            otherModule.IN_TRANSANA = False
+            parsers.append((sys.argv[3], otherModule.RTFTowxRichTextCtrlParser))
+        # Benchmark each parser
+        for (name, parserClass) in parsers:
+            print "%s:  %d characters, %0.0f characters per second" % (name, len(rtfData), Benchmark(rtfData, parserClass, 3))
+    # If we're asked to benchmark RTF export ...
+    #   python PyRTFParser.py exportbenchmark [file.xml] [other_PyRTFParser.py]
+    elif (len(sys.argv) > 1) and (sys.argv[1] == 'exportbenchmark'):
+        # If an XML file is specified ...
+        if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
+            # ... read it
+            f = open(sys.argv[2], 'rb')
+            xmlData = f.read()
+            f.close()
+        # Otherwise ...
+        else:
+            # ... use generated transcript XML
+            xmlData = SampleRichTextXML()
+        # List the handlers to benchmark
+        handlers = [('this version', XMLToRTFHandler)]
+        # If another version of the handler is specified ...
+        if len(sys.argv) > 3:
+            # ... load it
+            import imp
+            otherModule = imp.load_source('OtherPyRTFParser', sys.argv[3])
+            handlers.append((sys.argv[3], otherModule.XMLToRTFHandler))
+        # Benchmark each handler
+        for (name, handlerClass) in handlers:
+            (throughput, outputSize) = BenchmarkExport(xmlData, handlerClass, 3)
+            print "%s:  %d characters, %0.0f characters per second, %d characters of RTF" % (name, len(xmlData), throughput, outputSize)
+    else:
+        # Create an xml.sax parser
+        parser = xml.sax.make_parser()
+        # Define our XML to RTF Handler
+        handler = XMLToRTFHandler()
+        # Set the parser to use the handler
+        parser.setContentHandler(handler)
+        # Open a test XML file, 'test.xml', which should be created by saving XML from a wxRichTextCtrl, and parse it
+        parser.parse("test.xml")
+        # Save the resulting RTF string to a file called 'text.rtf'
+        handler.saveFile("test.rtf")
@@ -544,6 +544,8 @@ class Quote(DataObject.DataObject):
             raise SaveError, prompt
         # If there's no error prompt ...
         else:
+            # Update the Word Count index for the Word Frequency Report
+            DBInterface.UpdateWordCounts('Quote', self.number, self.plaintext, c)
             # ... Commit the database transaction
             if use_transactions:
                 c.execute('COMMIT')
@@ -581,6 +583,10 @@ class Quote(DataObject.DataObject):
             if result:
                 DBInterface.delete_all_keywords_for_a_group(0, 0, 0, self.number, 0)
 
+            # Remove the Quote from the Word Count index
+            if result:
+                DBInterface.DeleteWordCounts('Quote', self.number, c)
+
             # Delete the actual record.
             self._db_do_delete(use_transactions, c, result)
 
@@ -56,10 +56,14 @@ import KeywordObject as Keyword
 import Misc
 # Import Transana's Note object
 import Note
+# Import Transana's Parsed Text Cache
+import ParsedTextCache
 # import the Transana XML-to-RTC Import Parser
 import PyXML_RTCImportParser
 # import Transana's Quote Object
 import Quote
+# import Transana's Report Model
+import ReportModel
 # Import Transana's Library Object
 import Library
 # import Transana's Snapshot Object
@@ -245,6 +249,10 @@ class ReportGenerator(wx.Object):
         self.snapshotFilterList = []
         # Define the Keyword Filter List as well, which does NOT differ based on report type
         self.keywordFilterList = []
+        # The report data hasn't been read yet
+        self.reportData = None
+        # Objects and lists loaded for the report are kept, so changes to the Filter settings don't have to load them again
+        self.dataCache = {}
         # To speed report creation, freeze GUI updates based on changes to the report text
         self.report.reportText.Freeze()
         # Trigger the ReportText method that causes the report to be displayed.
@@ -255,9 +263,19 @@ class ReportGenerator(wx.Object):
     def OnDisplay(self, reportText):
         """ This method, required by TextReport, populates the TextReport.  The reportText parameter is
             the wxSTC control from the TextReport object.  It needs to be in the report parent because
-            the TextReport doesn't know anything about the actual data.  """
-        # Create minorList as a blank Dictionary Object
-        minorList = {}
+            the TextReport doesn't know anything about the actual data.  The report is built as a Report Model,
+            which is then rendered into the control.  """
+        # Create a Report Model the size of the report window, so images are scaled as they would be in the window
+        reportModel = ReportModel.ReportModel(reportText.GetSize())
+        # Build the report
+        self.BuildReportModel(reportModel)
+        # Show the report in the report window, which keeps the Report Model for saving the report
+        self.report.ShowModel(reportModel)
+
+    def BuildReportModel(self, reportText):
+        """ Build the report.  reportText is a ReportModel, or anything else with the methods of the report's
+            Rich Text Ctrl.  The report data is only read from the database the first time the report is built,
+            so changes to the Filter settings don't have to read it again. """
         # We need variables to count the number of quotes displayed and to accumulate their total length.
         self.quoteCount = 0
         self.quoteTotalLength = 0
@@ -313,1128 +331,558 @@ class ReportGenerator(wx.Object):
         # Add the Title to the page
         reportText.WriteText(self.title + '\n')
 
-        # If a Collection is passed in ...
-        if self.collection != None:
-            # The major label for objects for the Collection report is Clip
-            majorLabel = _('Clip')
-            # An empty Collection (number == 0) signals the request for the Global report
-            if self.collection.number == 0:
-                # The global report has no subtitle.
-                self.subtitle = ''
-                # We initialize the major list to an empty list for the global report
-                majorList = []
-            # A non-empty collection signals a scoped report.
-            else:
-                # Add a subtitle and ...
-                if 'unicode' in wx.PlatformInfo:
-                    # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
-                    prompt = unicode(_("Collection: %s"), 'utf8')
-                else:
-                    prompt = _("Collection: %s")
-                self.subtitle = prompt % self.collection.GetNodeString()
-                
-                # initialize the Major List of report elements.  Clips and Snapshots will be sorted and included.
-                majorList = []
-                # initialize a Dictionary for all Report Artifacts (for sorting!)
-                tmpDict = {}
-                
-                # Get a list of all Clips in the Collection.
-                tmpClipList = DBInterface.list_of_clips_by_collectionnum(self.collection.number, includeSortOrder=True)
-                # For each Clip ...
-                for x in tmpClipList:
-                    # ... add the Clip to the Dictionary with the Sort Order as the key and with the Object Type added
-                    tmpDict[x[3]] = (('Clip',) + x)
-
-                if TransanaConstants.proVersion:
-                    # Get a list of all Quotes in the Collection.
-                    tmpQuoteList = DBInterface.list_of_quotes_by_collectionnum(self.collection.number, includeSortOrder=True)
-                    # For each Quote ...
-                    for x in tmpQuoteList:
-                        # ... add the Quote to the Dictionary with the Sort Order as the key and with the Object Type added
-                        tmpDict[x[3]] = (('Quote',) + x[:-1])
-
-                    # Get a list of all Snapshots in the Collection.
-                    tmpSnapshotList = DBInterface.list_of_snapshots_by_collectionnum(self.collection.number, includeSortOrder=True)
-                    # For each Snapshot ...
-                    for x in tmpSnapshotList:
-                        # ... add the Snapshot to the Dictionary with the Sort Order as the key and with the Object Type added
-                        tmpDict[x[3]] = (('Snapshot',) + x)
-                        
-                # Get the Dictionary's Keys
-                order = tmpDict.keys()
-                # Sort the Dictionary's Keys
-                order.sort()
-                # For each element in the sorted list of Keys ...
-                for x in order:
-                    # Add the elemnt to the Major List.
-                    majorList.append(tmpDict[x][:-1])
+        # Get the report data
+        (majorLabel, majorList, minorList) = self.GetReportData(populateFilterList)
 
-            # If we're supposed to show Nested Collection data ...
-            if self.showNested:
-                # ... we first need to get the nested collections for the top level
-                nestedCollections = DBInterface.list_of_collections(self.collection.number)
-                # As long as there are entries in the list of nested collections that haven't been processed ...
-                while len(nestedCollections) > 0:
-                    # ... extract the data from the top of the nested collection list ...
-                    (collNum, collName, parentCollNum) = nestedCollections[0]
-                    # ... and remove that entry from the list.
-                    del(nestedCollections[0])
-                    # initialize a Dictionary for all Report Artifacts (for sorting!)
-                    tmpDict = {}
-                    # Get a list of all Clips in the Collection.
-                    tmpClipList = DBInterface.list_of_clips_by_collectionnum(collNum, includeSortOrder=True)
-                    # For each Clip ...
-                    for x in tmpClipList:
-                        # ... add the Clip to the Dictionary with the Sort Order as the key and with the Object Type added
-                        tmpDict[x[3]] = (('Clip',) + x)
-                    if TransanaConstants.proVersion:
-                        # Get a list of all Quotes in the Collection.
-                        tmpQuoteList = DBInterface.list_of_quotes_by_collectionnum(collNum, includeSortOrder=True)
-                        # For each Quote ...
-                        for x in tmpQuoteList:
-                            # ... add the Quote to the Dictionary with the Sort Order as the key and with the Object Type added
-                            tmpDict[x[3]] = (('Quote',) + x[:-1])
-                        # Get a list of all Snapshots in the Collection.
-                        tmpSnapshotList = DBInterface.list_of_snapshots_by_collectionnum(collNum, includeSortOrder=True)
-                        # For each Snapshot ...
-                        for x in tmpSnapshotList:
-                            # ... add the Snapshot to the Dictionary with the Sort Order as the key and with the Object Type added
-                            tmpDict[x[3]] = (('Snapshot',) + x)
-                    # Get the Dictionary's Keys
-                    order = tmpDict.keys()
-                    # Sort the Dictionary's Keys
-                    order.sort()
-                    # For each element in the sorted list of Keys ...
-                    for x in order:
-                        # Add the elemnt to the Major List.
-                        majorList.append(tmpDict[x][:-1])
+        # If we have a Collection Report showing Nested Collection data ...
+        if (self.collection != None) and self.showNested:
+            # If we have 100 or fewer records, only show the Keyword Summary if Keywords are being shown.
+            if len(majorList) <= 100:
+                self.showKeywordSummary = self.showKeywords
+            # If we have over 100 records, show the Keyword Summary regardless.
+            else:
+                self.showKeywordSummary = True
 
-                    # Then get the nested collections under the new collection and add them to the Nested Collection list
-                    # They get added at the FRONT of the list so that the report will mirror the organization of the
-                    # database Tree.
-                    nestedCollections = DBInterface.list_of_collections(collNum) + nestedCollections
+        # Apply Default Filter here, if appropriate
+        self.OnFilter(None)
+        # Check the Filter settings against sets, which is much faster than checking against the lists on large reports
+        filterSet = set(self.filterList)
+        documentFilterSet = set(self.documentFilterList)
+        quoteFilterSet = set(self.quoteFilterList)
+        snapshotFilterSet = set(self.snapshotFilterList)
+        keywordFilterSet = set(self.keywordFilterList)
+	
+        # ...  add a subtitle
+        if 'unicode' in wx.PlatformInfo:
+            # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+            prompt = unicode(_("Filter Configuration: %s"), 'utf8')
+        else:
+            prompt = _("Filter Configuration: %s")
 
-                # If we have 100 or fewer records, only show the Keyword Summary if Keywords are being shown.
-                if len(majorList) <= 100:
-                    self.showKeywordSummary = self.showKeywords
-                # If we have over 100 records, show the Keyword Summary regardless.
-                else:
-                    self.showKeywordSummary = True
+        # There's a problem in wxPython 2.8.12.0 on Windows.  If you use too many format changes in too
+        # long a document, you run out of Windows GDI resources.  This problem can be ameliorated (but not
+        # totally eliminated) by reducing the number of times BOLD text is used.
+        #
+        # So if we're on Windows and have more than 350 elements in the report, DON'T use BOLD as much!
+        # This flag is the signal.
+        useBold = True   # not ((len(majorList) > 350) and  ('wxMSW' in wx.PlatformInfo))
 
-            # Put all the Keywords for the Clips and Snapshots in the majorList in the minorList.
-            # Start by iterating through the Major List
-            for (objType, objNo, objName, collNo) in majorList:
-                # Create a Minor List dictionary entry, indexed to clip or snapshot number, for the keywords.
-                if objType == 'Quote':
-                    minorList[(objType, objNo)] = DBInterface.list_of_keywords(Quote = objNo)
-                elif objType == 'Clip':
-                    minorList[(objType, objNo)] = DBInterface.list_of_keywords(Clip = objNo)
-                elif objType == 'Snapshot':
-                    minorList[(objType, objNo)] = DBInterface.list_of_keywords(Snapshot = objNo)
-                # If we're populating Filter Lists ...
-                if populateFilterList:
-                    # If we have a Quote ...
-                    if objType == 'Quote':
-                        # ... add it to the Quote Filter List
-                        listToPopulate = self.quoteFilterList
-                    # If we have a Clip ...
-                    elif objType == 'Clip':
-                        # ... add it to the regular Filter List
-                        listToPopulate = self.filterList
-                    # If we have a Snapshot ...
-                    elif objType == 'Snapshot':
-                        # ... add it to the Snapshot Filter List
-                        listToPopulate = self.snapshotFilterList
-                    # ... then add the Artifact data to the appropiate Filter List, initially checked ...
-                    listToPopulate.append((objName, collNo, True))
-                    # ... and iterate through that clip's keywords or the snapshot's whole snapshot keywords ...
-                    for (kwg, kw, ex) in minorList[(objType, objNo)]:
-                        # ... check to see if the entry is NOT already in the list ...
-                        if (kwg, kw, True) not in self.keywordFilterList:
-                            # ... and add the keyword entry to the Keyword Filter List if it's not already there.
-                            self.keywordFilterList.append((kwg, kw, True))
+        # If a subtitle is defined ...
+        if self.subtitle != '':
+            # ... set the subtitle font
+            reportText.SetTxtStyle(fontSize=12, fontBold=False, fontUnderline=False, parSpacingBefore = 0, parSpacingAfter = 0)
+            # Add the subtitle to the page
+            reportText.WriteText(self.subtitle + '\n')
+            # Finish the paragraph
+#            reportText.Newline()
+        if self.configName != '':
+            self.configLine = prompt % self.configName
+            # ... set the subtitle font
+            reportText.SetTxtStyle(fontSize=10, fontBold=False, fontUnderline=False, parSpacingBefore = 0, parSpacingAfter = 0)
+            # Add the subtitle to the page
+            reportText.WriteText(self.configLine + '\n')
 
-                    # If we have a Snapshot ...
-                    if objType == 'Snapshot':
-                        # ... get a list of the Snapshot's Detail Coding
-                        tmpList = DBInterface.list_of_snapshot_detail_keywords(Snapshot = objNo)
-                        # For each Keyword Group : Keyword pair ...
-                        for (kwg, kw) in tmpList:
-                            # ... check to see if the entry is NOT already in the list ...
-                            if (kwg, kw, True) not in self.keywordFilterList:
-                                # ... and add the keyword entry to the Keyword Filter List if it's not already there.
-                                self.keywordFilterList.append((kwg, kw, True))
+        # Initialize the initial data structure that will be turned into the report
+        self.data = []
+        # Create a Dictionary Data Structure to accumulate Keyword Counts
+        keywordCounts = {}
+        # Create a Dictionary Data Structure to accumulate Keyword Times
+        keywordTimes = {}
+        keywordLengths = {}
+        # Because Snapshot records are coded two different ways, we need to be able to keep track of what
+        # we've already counted in clipCount and ClipTotalTime so we don't count it twice.
+        self.itemsCounted = set()
 
-        # If a Document Name is passed in ...
-        elif self.documentName != None:
-            # ...  add a subtitle
+        # The majorList and minorList are constructed differently for the Episode and Document versions of the report,
+        # and so the report must be built differently here too!
+        if (self.episodeName == None) and (self.documentName == None):
             if 'unicode' in wx.PlatformInfo:
                 # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
-                prompt = unicode(_("Document: %s"), 'utf8')
+                majorLabel = unicode(majorLabel, 'utf8')
+
+            # Let's keep track of the current collection name so we can tell when to print
+            # the Collection Header and Collection Notes if that's how the report is configured
+            # If we have a Collection-based Report ...
+            if (self.collection != None):
+                # ... put garbage into the workingCollection variable so it will trigger printing for the
+                # first Collection
+                workingCollection = ('NoCollectionString', 0)
+            # If we're not doing a Collection Report ...
             else:
-                prompt = _("Episode: %s")
-            self.subtitle = prompt % self.documentName
-            # First, get the Document Object ...
-            docObj = Document.Document(libraryID=self.seriesName, documentID=self.documentName)
+                # Initialize workingCollection to an empty string, as we won't be using it.
+                workingCollection = ''
 
-            # initialize the Major List of report elements.  Quotes and Snapshots will be sorted and included.
-            majorList = []
-            # initialize a Dictionary for all Report Artifacts (for sorting!)
-            tmpDict = {}
-                
-            # Get a list of all Quotes created from the Document
-            tmpQuoteList = DBInterface.list_of_quotes_by_document(docObj.number)
-            # For each Quote ...
-            for x in tmpQuoteList:
-                # ... specify that this is a Quote
-                x['Type'] = 'Quote'
-                # ... add the Quote to the Dictionary with the Sort Order as the key and with the Object Type added
-                tmpDict[(x['StartChar'], x['EndChar'], x['CollectID'], x['CollectNum'], x['QuoteID'], 'Quote')] = x
+            # If there are 20 or more items in the list, or at least 3 images ...
+            if (self.collection != None) and ((len(majorList) >= 20) or (len(self.snapshotFilterList) > 3)):
+                # ... create a Progress Dialog.  (The PARENT is needed to prevent the report being hidden
+                #     behind Transana!)
+                progress = wx.ProgressDialog(self.title, _('Assembling report contents'), parent=self.report)
 
-##            if TransanaConstants.proVersion:
-##                # Get a list of all Snapshots in the Collection.
-##                tmpSnapshotList = DBInterface.list_of_snapshots_by_episode(epObj.number)
-##                # For each Snapshot ...
-##                for x in tmpSnapshotList:
-##                    # ... specify that this is a Snapshot
-##                    x['Type'] = 'Snapshot'
-##                    # ... add the Snapshot to the Dictionary with the Sort Order as the key and with the Object Type added
-##                    tmpDict[(x['SnapshotStart'], x['SnapshotStop'], x['CollectID'], x['CollectNum'], x['SnapshotID'], 'Snapshot')] = x
-            # Get the Dictionary's Keys
-            order = tmpDict.keys()
-            # Sort the Dictionary's Keys
-            order.sort()
-            # For each element in the sorted list of Keys ...
-            for x in order:
-                # Add the elemnt to the Major List.
-                majorList.append(tmpDict[x])
+            # Iterate through the major list
+            for (objType, groupNo, group, parentCollNo) in majorList:
 
-            # Put all the Keywords for the Quotes and Snapshots in the majorList in the minorList.
-            # Start by iterating through the Major List
-            for item in majorList:
-                # Create a Minor List dictionary entry, indexed to quote or snapshot number, for the keywords.
-                if item['Type'] == 'Quote':
-                    minorList[(item['Type'], item['QuoteNum'])] = DBInterface.list_of_keywords(Quote = item['QuoteNum'])
-##                elif item['Type'] == 'Snapshot':
-##                    minorList[(item['Type'], item['SnapshotNum'])] = DBInterface.list_of_keywords(Snapshot = item['SnapshotNum'])
-                # If we're populating Filter Lists ...
-                if populateFilterList:
-                    # If we have a Snapshot ...
-                    if item['Type'] == 'Snapshot':
-                        # ... add it to the Snapshot Filter List
-                        listToPopulate = self.snapshotFilterList
-                        objName = item['SnapshotID']
-                        objNo = item['SnapshotNum']
-                    # If we DON'T have a Snapshot ...
-                    else:
-                        # ... add it to the Quote Filter List
-                        listToPopulate = self.quoteFilterList
-                        objName = item['QuoteID']
-                        objNo = item['QuoteNum']
-                    # ... then add the Artifact data to the appropiate Filter List, initially checked ...
-                    listToPopulate.append((objName, item['CollectNum'], True))
-                    # ... and iterate through that quote's keywords or the snapshot's whole snapshot keywords ...
-                    for (kwg, kw, ex) in minorList[(item['Type'], objNo)]:
-                        # ... check to see if the entry is NOT already in the list ...
-                        if (kwg, kw, True) not in self.keywordFilterList:
-                            # ... and add the keyword entry to the Keyword Filter List if it's not already there.
-                            self.keywordFilterList.append((kwg, kw, True))
+                # If our majorLabel is Clip/Snapshot ...
+                if majorLabel.encode('utf8') in [_('Document'), _('Episode'), _('Clip'), _('Snapshot'), _('Quote')]:
+                    # ... set the majorLabel to match the object type (but translated)
+                    if objType == 'Document':
+                        majorLabel = _('Document')
+                    elif objType == 'Episode':
+                        majorLabel = _('Episode')
+                    elif objType == 'Clip':
+                        majorLabel = _('Clip')
+                    elif objType == 'Snapshot':
+                        majorLabel = _('Snapshot')
+                    elif objType == _('Quote'):
+                        majorLabel = _('Quote')
 
-##                    # If we have a Snapshot ...
-##                    if item['Type'] == 'Snapshot':
-##                        # ... get a list of the Snapshot's Detail Coding
-##                        tmpList = DBInterface.list_of_snapshot_detail_keywords(Snapshot = item['SnapshotNum'])
-##                        # For each Keyword Group : Keyword pair ...
-##                        for (kwg, kw) in tmpList:
-##                            # ... check to see if the entry is NOT already in the list ...
-##                            if (kwg, kw, True) not in self.keywordFilterList:
-##                                # ... and add the keyword entry to the Keyword Filter List if it's not already there.
-##                                self.keywordFilterList.append((kwg, kw, True))
+                    try:
+                        # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+                        majorLabel = unicode(majorLabel, 'utf8')
+                    except TypeError:
+                        pass
 
-        # If an Episode Name is passed in ...
-        elif self.episodeName != None:
-            # ...  add a subtitle
-            if 'unicode' in wx.PlatformInfo:
-                # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
-                prompt = unicode(_("Episode: %s"), 'utf8')
-            else:
-                prompt = _("Episode: %s")
-            self.subtitle = prompt % self.episodeName
-            # First, get the Episode Object ...
-            epObj = Episode.Episode(series = self.seriesName, episode = self.episodeName)
+                # If a Collection Name is passed in ...
+                if self.collection != None:
+                    # ... then our Filter comparison is based on Clip data
+                    filterVal = (group, parentCollNo, True)
+                # If a Library Name is passed in ...            
+                elif self.seriesName != None:
+                    # ... then our Filter comparison is based on Episode data
+                    filterVal = (group, self.seriesName, True)
+                # If this report is called for a SearchLibraryResult ...
+                elif (self.searchSeries != None) and (self.treeCtrl != None):
+                    # ... then our Filter comparison is based on the search Library from the TreeCtrl
+                    filterVal = (group, self.treeCtrl.GetItemText(self.searchSeries), True)
+                # If this report is called for a SearchCollectionResult ...
+                elif (self.searchColl != None) and (self.treeCtrl != None):
+                    # ... then our Filter comparison is based on Search Collection data
+                    filterVal = (group, parentCollNo, True)
 
-            # initialize the Major List of report elements.  Clips and Snapshots will be sorted and included.
-            majorList = []
-            # initialize a Dictionary for all Report Artifacts (for sorting!)
-            tmpDict = {}
-                
-            # Get a list of all Clips created from the Episode
-            tmpClipList = DBInterface.list_of_clips_by_episode(epObj.number)
-            # For each Clip ...
-            for x in tmpClipList:
-                # ... specify that this is a Clip
-                x['Type'] = 'Clip'
-                # ... add the Clip to the Dictionary with the Sort Order as the key and with the Object Type added
-                tmpDict[(x['ClipStart'], x['ClipStop'], x['CollectID'], x['CollectNum'], x['ClipID'], 'Clip')] = x
+                # now that we have the filter comparison data, we see if it's actually in the Filter List.
+                if ((objType == 'Document') and (filterVal in documentFilterSet)) or \
+                   ((objType == 'Snapshot') and (filterVal in snapshotFilterSet)) or \
+                   ((objType == 'Quote')    and (filterVal in quoteFilterSet)) or \
+                   (filterVal in filterSet):
+                    # If we have Collection-based data ...
+                    if (self.collection != None) or ((self.searchColl != None) and (self.treeCtrl != None)):
+                        # ... load the collection the current clip is in
+                        tempColl = self.GetCachedData(Collection.Collection, parentCollNo)
 
-            if TransanaConstants.proVersion:
-                # Get a list of all Snapshots in the Collection.
-                tmpSnapshotList = DBInterface.list_of_snapshots_by_episode(epObj.number)
-                # For each Snapshot ...
-                for x in tmpSnapshotList:
-                    # ... specify that this is a Snapshot
-                    x['Type'] = 'Snapshot'
-                    # ... add the Snapshot to the Dictionary with the Sort Order as the key and with the Object Type added
-                    tmpDict[(x['SnapshotStart'], x['SnapshotStop'], x['CollectID'], x['CollectNum'], x['SnapshotID'], 'Snapshot')] = x
-            # Get the Dictionary's Keys
-            order = tmpDict.keys()
-            # Sort the Dictionary's Keys
-            order.sort()
-            # For each element in the sorted list of Keys ...
-            for x in order:
-                # Add the elemnt to the Major List.
-                majorList.append(tmpDict[x])
+                        # Check to see if we're showing Collection headers, if we're showing nested collections (since
+                        # there's no point showing collection headers if there aren't different collections!), and
+                        # see if the new collection is different from the collection of the last clip displayed.
+                        if (workingCollection != '') and \
+                           (self.showNested or self.showComments or self.showCollectionNotes) and \
+                           (workingCollection[0] != tempColl.GetNodeString()):
+                            # Format text for the next section of the report
+                            reportText.SetTxtStyle(fontSize=12, fontBold=useBold, fontUnderline=False,
+                                                   parAlign = wx.TEXT_ALIGNMENT_LEFT,
+                                                   parLeftIndent = 0,
+                                                   parSpacingBefore = 24, parSpacingAfter = 0)
+                            # Add the Collections header and data to the report
+                            reportText.WriteText(_('Collection: '))
+#                            reportText.SetTxtStyle(fontBold=False)
+                            reportText.WriteText('%s\n' % tempColl.GetNodeString())
+                            
+                            # If we are supposed to show Comments ...
+                            if self.showComments:
+                                # ... if the collection has a comment ...
+                                if tempColl.comment != u'':
+                                    # Set the font for the comments
+                                    reportText.SetTxtStyle(fontSize=10, fontBold=useBold, parLeftIndent=63, parRightIndent=63,
+                                                           parSpacingBefore = 0, parSpacingAfter = 0)
+                                    # Add the header to the report
+                                    reportText.WriteText(_('Collection Comment:\n'))
+                                    reportText.SetTxtStyle(fontBold=False, parLeftIndent=127,
+                                                           parSpacingBefore = 0, parSpacingAfter = 0)
+                                    # Add the content of the Collection Comment to the report
+                                    reportText.WriteText('%s\n' % tempColl.comment)
 
-            # Put all the Keywords for the Clips and Snapshots in the majorList in the minorList.
-            # Start by iterating through the Major List
-            for item in majorList:
-                # Create a Minor List dictionary entry, indexed to clip or snapshot number, for the keywords.
-                if item['Type'] == 'Clip':
-                    minorList[(item['Type'], item['ClipNum'])] = DBInterface.list_of_keywords(Clip = item['ClipNum'])
-                elif item['Type'] == 'Snapshot':
-                    minorList[(item['Type'], item['SnapshotNum'])] = DBInterface.list_of_keywords(Snapshot = item['SnapshotNum'])
-                # If we're populating Filter Lists ...
-                if populateFilterList:
-                    # If we have a Snapshot ...
-                    if item['Type'] == 'Snapshot':
-                        # ... add it to the Snapshot Filter List
-                        listToPopulate = self.snapshotFilterList
-                        objName = item['SnapshotID']
-                        objNo = item['SnapshotNum']
-                    # If we DON'T have a Snapshot ...
+                            # If we're supposed to show Collection Notes ...
+                            if self.showCollectionNotes:
+                                # ... get a list of notes, including their object numbers
+                                notesList = self.GetCachedData(DBInterface.list_of_notes, Collection=tempColl.number, includeNumber=True)
+                                # If there are notes for this Clip ...
+                                if (len(notesList) > 0):
+                                    # Set the font for the Notes
+                                    reportText.SetTxtStyle(fontSize=10, fontBold=useBold,
+                                                           parLeftIndent=63, parRightIndent=63,
+                                                           parSpacingBefore = 0, parSpacingAfter=0)
+                                    # Add the header to the report
+                                    reportText.WriteText(_('Collection Notes:\n'))
+#                                    reportText.Newline()
+                                    # Iterate throught the list of notes ...
+                                    for note in notesList:
+                                        # ... load each note ...
+                                        tempNote = self.GetCachedData(Note.Note, note[0])
+                                        reportText.SetTxtStyle(fontBold=useBold, parLeftIndent=127, parSpacingBefore = 0, parSpacingAfter = 0)
+                                        # Add the note ID to the report
+                                        reportText.WriteText('%s\n' % tempNote.id)
+#                                        reportText.Newline()
+                                        # Turn bold off.
+                                        reportText.SetTxtStyle(fontBold=False, parLeftIndent=190)
+                                        # Add the note text to the report (rstrip() prevents formatting problems when a note ends with blank lines)
+                                        reportText.WriteText('%s\n' % tempNote.text.rstrip())
+#                                        reportText.Newline()
+                            # Update the workingCollection variable with the data for the current collection so we'll
+                            # be able to tell when the collection changes
+                            workingCollection = (tempColl.GetNodeString(), tempColl.number)
+                            
+                            # We need to indent EVERYTHING else to adjust for these headers
+                            baseIndent = 63
+                        else:
+                            # We DON'T need to indent later paragraphs
+                            baseIndent = 63
                     else:
-                        # ... add it to the regular Filter List
-                        listToPopulate = self.filterList
-                        objName = item['ClipID']
-                        objNo = item['ClipNum']
-                    # ... then add the Artifact data to the appropiate Filter List, initially checked ...
-                    listToPopulate.append((objName, item['CollectNum'], True))
-                    # ... and iterate through that clip's keywords or the snapshot's whole snapshot keywords ...
-                    for (kwg, kw, ex) in minorList[(item['Type'], objNo)]:
-                        # ... check to see if the entry is NOT already in the list ...
-                        if (kwg, kw, True) not in self.keywordFilterList:
-                            # ... and add the keyword entry to the Keyword Filter List if it's not already there.
-                            self.keywordFilterList.append((kwg, kw, True))
+                        # We DON'T need to indent later paragraphs
+                        baseIndent = 0
+                            
+                    # ... Set the formatting for the report, including turning off previous formatting
+                    reportText.SetTxtStyle(fontSize = 12, fontBold = True, fontUnderline = False,
+                                           parAlign = wx.TEXT_ALIGNMENT_LEFT,
+                                           parLeftIndent = baseIndent, parRightIndent = 0,
+                                           parSpacingBefore = 36, parSpacingAfter = 2)
 
-                    # If we have a Snapshot ...
-                    if item['Type'] == 'Snapshot':
-                        # ... get a list of the Snapshot's Detail Coding
-                        tmpList = DBInterface.list_of_snapshot_detail_keywords(Snapshot = item['SnapshotNum'])
-                        # For each Keyword Group : Keyword pair ...
-                        for (kwg, kw) in tmpList:
-                            # ... check to see if the entry is NOT already in the list ...
-                            if (kwg, kw, True) not in self.keywordFilterList:
-                                # ... and add the keyword entry to the Keyword Filter List if it's not already there.
-                                self.keywordFilterList.append((kwg, kw, True))
+                    if DEBUG:
+                        print "%s, %s (majorLabel, group) l=%d (baseindent), r=0, b=36, a=0" % (majorLabel, group, baseIndent)
 
-        # If a Library Name is passed in ...            
-        elif self.seriesName != None:
-            # ...  add a subtitle
-            if 'unicode' in wx.PlatformInfo:
-                # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
-                prompt = unicode(_("Library: %s"), 'utf8')
-            else:
-                prompt = _("Library: %s")
-            self.subtitle = prompt % self.seriesName
-            # The label for our Major unit should reflect that these are Episodes
-            majorLabel = _('Episode')
-            # Initialize the Major List
-            majorList = []
+                    # Add the group name to the report
+                    reportText.WriteText('%s: ' % majorLabel)
 
-            # Get the Library Object
-            tmpLibraryObj = Library.Library(self.seriesName)
-            # Get a Dictionary of all items in this Library
-            tempDict = DBInterface.dictionary_of_documents_and_episodes(tmpLibraryObj)
-            # Get the keys to the dictionary
-            keys = tempDict.keys()
-            # Sort the keys so the report will be displayed in the correct order
-            keys.sort()
-            # For each Key in the data list ...
-            for key in keys:
-                # ... get the data object's Name from the dictionary Key ...
-                objName = key[0]
-                # ... and get the Object's Type, Number, and Parent Number from the dictionary Value
-                (objType, objNum, objParentNum) = tempDict[key]
-                # Put the Item in the Major List
-                majorList.append((objType, objNum, objName, objParentNum))
-                # If we have a Document ...
-                if objType == 'Document':
-                    # Put all the Keywords for the Document in the majorList in the minorList
-                    minorList[(objType, objNum)] = DBInterface.list_of_keywords(Document = objNum)
-                # If we have an Episode ...
-                elif objType == 'Episode':
-                    # Put all the Keywords for the Episodes in the majorList in the minorList
-                    minorList[(objType, objNum)] = DBInterface.list_of_keywords(Episode = objNum)
-                # If we're populating the Filter Lists ...
-                if populateFilterList:
-                    if objType == 'Document':
-                        # ... Add the Document data to the document Filter List ...
-                        self.documentFilterList.append((objName, self.seriesName, True))
-                    else:
-                        # ... Add the Episode data to the main Filter List ...
-                        self.filterList.append((objName, self.seriesName, True))
-                    # ... Iterate through the keywords that were just added to the Minor List (only for this Key) ...
-                    for (kwg, kw, ex) in minorList[(objType, objNum)]:
-                        # .. and IF they're not already in the list ...
-                        if (kwg, kw, True) not in self.keywordFilterList:
-                            # ... add them to the Keyword Filter List
-                            self.keywordFilterList.append((kwg, kw, True))
-
-        # If this report is called for a SearchLibraryResult, we build the majorList based on the contents of the Tree Control.
-        elif (self.searchSeries != None) and (self.treeCtrl != None):
-            # Get the Search Result Name for the subtitle
-            searchResultNode = self.searchSeries
-            # Start a loop to move up the tree.  Keep going until interrupted.
-            while True:
-                # Move up to the Parent of the current node
-                searchResultNode = self.treeCtrl.GetItemParent(searchResultNode)
-                # Get the Data for the new node
-                tempData = self.treeCtrl.GetPyData(searchResultNode)
-                # If we are at the SearchResultsNode ...
-                if tempData.nodetype == 'SearchResultsNode':
-                    # ... we can stop moving up.  Break the loop.
-                    break
-            # Now build the subtitle
-            if 'unicode' in wx.PlatformInfo:
-                # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
-                prompt = unicode(_("Search Library: %s"), 'utf8')
-            else:
-                prompt = _("Search Library: %s")
-            self.subtitle = prompt % (self.treeCtrl.GetItemText(self.searchSeries),)
-            # The majorLabel is for Episodes in this case
-            majorLabel = _('Episode')
-            # Initialize the majorList to an empty list
-            majorList = []
-            # Get the first Child node from the searchColl collection
-            (item, cookie) = self.treeCtrl.GetFirstChild(self.searchSeries)
-            # Process all children in the searchLibrary Library.  (IsOk() fails when all children are processed.)
-            while item.IsOk():
-                # Get the child item's Name
-                itemText = self.treeCtrl.GetItemText(item)
-                # Get the child item's Node Data
-                itemData = self.treeCtrl.GetPyData(item)
-                # See if the item is a Document
-                if itemData.nodetype == 'SearchDocumentNode':
-                    # If it's a Document, add the Document's Node Data to the majorList
-                    majorList.append(('Document', itemData.recNum, itemText, itemData.parent))
-                    # If we're populating the Filter Lists ...
-                    if populateFilterList:
-                        # ... Add the Episode data to the main Filter List ...
-                        self.documentFilterList.append((itemText, self.treeCtrl.GetItemText(self.treeCtrl.GetItemParent(item)), True))
-                # See if the item is an Episode
-                elif itemData.nodetype == 'SearchEpisodeNode':
-                    # If it's an Episode, add the Episode's Node Data to the majorList
-                    majorList.append(('Episode', itemData.recNum, itemText, itemData.parent))
-                    # If we're populating the Filter Lists ...
-                    if populateFilterList:
-                        # ... Add the Episode data to the main Filter List ...
-                        self.filterList.append((itemText, self.treeCtrl.GetItemText(self.treeCtrl.GetItemParent(item)), True))
-                # Get the next Child Item and continue the loop
-                (item, cookie) = self.treeCtrl.GetNextChild(self.searchSeries, cookie)
+                    # If we're showing Hyperlinks to Clips/Snapshots ...
+                    if self.showHyperlink and objType.lower() != 'episode':
+                        # Define a Hyperlink Style (Blue, underlined)
+                        urlStyle = richtext.RichTextAttr()
+                        urlStyle.SetFontFaceName('Courier New')
+                        urlStyle.SetFontSize(12)
+                        urlStyle.SetTextColour(wx.BLUE)
+                        urlStyle.SetFontUnderlined(True)
+                        # Apply the Hyperlink Style
+                        reportText.BeginStyle(urlStyle)
+                        # Insert the Hyperlink information, object type and object number
+                        reportText.BeginURL("transana:%s=%d" % (objType, groupNo))
 
-##            print "ReportGenerator.OnDisplay():  Search Library Report"
-##            print "majorList:"
-##            for x in range(len(majorList)):
-##                print x, majorList[x]
-##            print
+                    # Add the group name to the report
+                    reportText.WriteText('%s\n' % group)
+                    # End the paragraph
+#                    reportText.Newline()
 
-            # Once we have the Episodes in the majorList, we can gather their keywords into the minorList.
-            # Start by iterating through the Major List
-            for (objType, EpNo, epName, epParentNo) in majorList:
-                # If we have a Document ...
-                if objType == 'Document':
-                    # Get all the keywords for the indicated Document and add them to the Minor List, keyed to the Document Name.
-                    minorList[('Document', EpNo)] = DBInterface.list_of_keywords(Document = EpNo)
-                # If we have an Episode ...
-                elif objType == 'Episode':
-                    # Get all the keywords for the indicated Episode and add them to the Minor List, keyed to the Episode Name.
-                    minorList[('Episode', EpNo)] = DBInterface.list_of_keywords(Episode = EpNo)
-                # If we're populating the Filter Lists ...
-                if populateFilterList:
-                    # ... Iterate through the keywords that were just added to the Minor List (only for this Key) ...
-                    for (kwg, kw, ex) in minorList[(objType, EpNo)]:
-                        # .. and IF they're not already in the list ...
-                        if (kwg, kw, True) not in self.keywordFilterList:
-                            # ... add them to the Keyword Filter List
-                            self.keywordFilterList.append((kwg, kw, True))
+                    # If we're showing Hyperlinks to Documents, Clips, or Snapshots, but NOT Episodes ...
+                    # (Episodes can't be hyperlinked directly.)
+                    if self.showHyperlink and objType.lower() != 'episode':
+                        # End the Hyperlink
+                        reportText.EndURL()
+                        # Stop using the Hyperlink Style
+                        reportText.EndStyle()
 
-##            print "minorList:"
-##            for x in range(len(minorList)):
-##                print x, minorList[x]
-##            print
+                    # ... Set the formatting for the report, including turning off previous formatting
+                    reportText.SetTxtStyle(fontSize = 10, fontBold = useBold,
+                                           parLeftIndent = baseIndent + 63, parRightIndent = 63,
+                                           parSpacingBefore = 0, parSpacingAfter = 0)
 
-        # If this report is called for a SearchCollectionResult, we build the majorList based on the contents of the Tree Control.
-        elif (self.searchColl != None) and (self.treeCtrl != None):
-            # Get the Search Result Name for the subtitle
-            searchResultNode = self.searchColl
-            # Start a loop to move up the tree.  Keep going until interrupted.
-            while True:
-                # Move up to the Parent of the current node
-                searchResultNode = self.treeCtrl.GetItemParent(searchResultNode)
-                # Get the Data for the new node
-                tempData = self.treeCtrl.GetPyData(searchResultNode)
-                # If we are at the SearchResultsNode ...
-                if tempData.nodetype in ['SearchRootNode', 'SearchResultsNode']:
-                    # ... we can stop moving up.  Break the loop.
-                    break
-            # Now build the subtitle
-            if 'unicode' in wx.PlatformInfo:
-                # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
-                prompt = unicode(_("Search Collection: %s"), 'utf8')
-            else:
-                prompt = _("Search Collection: %s")
-            self.subtitle = prompt % (self.treeCtrl.GetItemText(self.searchColl),)
-            # The majorLabel is for Clips in this case
-            majorLabel = _('Clip')
-            # Initialize the majorList to an empty list
-            majorList = []
-            # Extracting data from the treeCtrl requires a "cookie" value, which is initialized to 0
-            cookie = 0
-            # Get the first Child node from the searchColl collection
-            (item, cookie) = self.treeCtrl.GetFirstChild(self.searchColl)
-            # Create an empty list for Nested Collections so we can recurse through them
-            nestedCollections = []
-            # While looking at children, we need a pointer to the parent node
-            currentNode = self.searchColl
-            # Process all children in the searchColl collection
-            while item.IsOk():
-                # Get the item's Name
-                itemText = self.treeCtrl.GetItemText(item)
-                # Get the item's Node Data
-                itemData = self.treeCtrl.GetPyData(item)
-                # See if the item is a Clip
-                if itemData.nodetype in ['SearchQuoteNode', 'SearchClipNode', 'SearchSnapshotNode']:
-                    if itemData.nodetype == 'SearchQuoteNode':
-                        objType = 'Quote'
-                    elif itemData.nodetype == 'SearchClipNode':
-                        objType = 'Clip'
-                    elif itemData.nodetype == 'SearchSnapshotNode':
-                        objType = 'Snapshot'
-                    # If it's a Clip, add the Clip's Node Data to the majorList
-                    majorList.append((objType, itemData.recNum, itemText, itemData.parent))
-                    # If we're populating the Filter List ...
-                    if populateFilterList:
-                        # If we have a Quote ...
+                    # If we have Collection-based data, we add some Clip-specific data
+                    if (self.collection != None) or ((self.searchColl != None) and (self.treeCtrl != None)):
+                        # Add the header to the report
+                        reportText.WriteText(_('Collection:'))
+                        reportText.SetTxtStyle(fontBold = False)
+                        # Add the data to the report, the full Collection path in this case
+                        reportText.WriteText('  %s\n' % (tempColl.GetNodeString(),))
+                        # If we're looking at a Quote ...
                         if objType == 'Quote':
-                            # ... add it to the regular Filter List
-                            listToPopulate = self.quoteFilterList
-                        # If we have a Clip ...
+                            # Get the full Quote data
+                            quoteObj = self.GetCachedData(Quote.Quote, groupNo)
+                            tmpObj = quoteObj
+                            try:
+                                # If we have a Quote, load the Source Document!
+                                tmpDoc = self.GetCachedData(Document.Document, num=tmpObj.source_document_num)
+                            except TransanaExceptions.RecordNotFoundError:
+                                tmpDoc = None
+                        # If we're looking at a Clip ...
                         elif objType == 'Clip':
-                            # ... add it to the regular Filter List
-                            listToPopulate = self.filterList
-                        # If we have a Snapshot ...
+                            # Get the full Clip data
+                            clipObj = self.GetCachedData(Clip.Clip, groupNo)
+                            tmpObj = clipObj
+                        # If we're looking at a Snapshot ...
                         elif objType == 'Snapshot':
-                            # ... add it to the Snapshot Filter List
-                            listToPopulate = self.snapshotFilterList
-                        # ... then add the Artifact data to the appropiate Filter List, initially checked ...
-                        listToPopulate.append((itemText, itemData.parent, True))
-                # If we have a Collection Node ...
-                elif self.showNested and (itemData.nodetype == 'SearchCollectionNode'):
-                    # ... add it to the list of nested Collections to be processed
-                    nestedCollections.append(item)
+                            # Get the full Snapshot data
+                            snapshotObj = self.GetCachedData(Snapshot.Snapshot, groupNo, suppressEpisodeError = True)
+                            tmpObj = snapshotObj
+                        # If we're supposed to show the Media File Name ...
+                        if self.showFile:
+                            # Turn bold on.
+                            reportText.SetTxtStyle(fontBold = useBold)
+                            if objType == 'Quote':
+                                # Add the header to the report
+                                reportText.WriteText(_('Source File:'))
+                            else:
+                                # Add the header to the report
+                                reportText.WriteText(_('File:'))
+                            # Turn bold off.
+                            reportText.SetTxtStyle(fontBold = False)
+                            # If we have a Quote ...
+                            if objType == 'Quote':
+                                if tmpDoc != None:
+                                    # Add the data to the report, the file name in this case
+                                    reportText.WriteText(_('  %s\n') % tmpDoc.imported_file)
+                                    prompt = unicode(_("imported on %s\n"), "utf8")
+                                    # sqlite gives a string rather than a datetime object
+                                    if isinstance(tmpDoc.import_date, str):
+                                        # start exception handling in case of formatting problems
+                                        try:
+                                            # Convert the date string to a datetime object
+                                            tmpDate = datetime.datetime.strptime(tmpDoc.import_date, '%Y-%m-%d %H:%M:%S')
+                                            # Display the correct date
+                                            reportText.WriteText(prompt % tmpDate.strftime('%x'))
+                                        # If the conversion fails ...
+                                        except ValueError:
+                                            # ... display the un-converted string.
+                                            reportText.WriteText(prompt % tmpDoc.import_date)
+                                    # MySQL returns a datetime object.
+                                    else:
+                                        reportText.WriteText(prompt % tmpDoc.import_date.strftime('%x'))
+#                                else:
+#                                    reportText.WriteText(_("The source Document for this Quote has been deleted.") + u'\n')
+                            # If we have a Clip ...
+                            elif objType == 'Clip':
+                                # Add the data to the report, the file name in this case
+                                reportText.WriteText(_('  %s\n') % tmpObj.media_filename)
+                                # Add Additional Media File info
+                                for mediaFile in tmpObj.additional_media_files:
+                                    reportText.WriteText(_('       %s\n') % mediaFile['filename'])
+                            # If we have a Snapshot ...
+                            elif objType == 'Snapshot':
+                                # Add the data to the report, the file name in this case
+                                reportText.WriteText(_('  %s\n') % tmpObj.image_filename)
 
-                # When we get to the last Child Item for the current node, ...
-                if item == self.treeCtrl.GetLastChild(currentNode):
-                    # ... check to see if there are nested collections that need to be processed.  If so ...
-                    if len(nestedCollections) > 0:
-                        # ... set the current node pointer to the first nested collection ...
-                        currentNode = nestedCollections[0]
-                        # ... get the first child node of the nested collection ...
-                        (item, cookie) = self.treeCtrl.GetFirstChild(nestedCollections[0])
-                        # ... and remove the nested collection from the list waiting to be processed
-                        del(nestedCollections[0])
-                    # If there are no nested collections to be processed ...
-                    else:
-                        # ... stop looping.  We're done.
-                        break
-                # If we're not at the Last Child Item ...
-                else:
-                    # ... get the next Child Item and continue the loop
-                    (item, cookie) = self.treeCtrl.GetNextChild(currentNode, cookie)
-
-            # Put all the Keywords for the Clips and Snapshots in the majorList in the minorList.
-            # Start by iterating through the Major List
-            for (objType, objNo, objName, collNo) in majorList:
-                # Create a Minor List dictionary entry, indexed to clip or snapshot number, for the keywords.
-                if objType == 'Quote':
-                    minorList[(objType, objNo)] = DBInterface.list_of_keywords(Quote = objNo)
-                elif objType == 'Clip':
-                    minorList[(objType, objNo)] = DBInterface.list_of_keywords(Clip = objNo)
-                elif objType == 'Snapshot':
-                    minorList[(objType, objNo)] = DBInterface.list_of_keywords(Snapshot = objNo)
-                # If we're populating Filter Lists ...
-                if populateFilterList:
-                    # ... and iterate through that clip's keywords or the snapshot's whole snapshot keywords ...
-                    for (kwg, kw, ex) in minorList[(objType, objNo)]:
-                        # ... check to see if the entry is NOT already in the list ...
-                        if (kwg, kw, True) not in self.keywordFilterList:
-                            # ... and add the keyword entry to the Keyword Filter List if it's not already there.
-                            self.keywordFilterList.append((kwg, kw, True))
-
-                    # If we have a Snapshot ...
-                    if objType == 'Snapshot':
-                        # ... get a list of the Snapshot's Detail Coding
-                        tmpList = DBInterface.list_of_snapshot_detail_keywords(Snapshot = objNo)
-                        # For each Keyword Group : Keyword pair ...
-                        for (kwg, kw) in tmpList:
-                            # ... check to see if the entry is NOT already in the list ...
-                            if (kwg, kw, True) not in self.keywordFilterList:
-                                # ... and add the keyword entry to the Keyword Filter List if it's not already there.
-                                self.keywordFilterList.append((kwg, kw, True))
-
-        # Apply Default Filter here, if appropriate
-        self.OnFilter(None)
-	
-        # ...  add a subtitle
-        if 'unicode' in wx.PlatformInfo:
-            # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
-            prompt = unicode(_("Filter Configuration: %s"), 'utf8')
-        else:
-            prompt = _("Filter Configuration: %s")
+                        # If we're supposed to show the Clip/Snapshot Time data ...
+                        if self.showTime:
+                            # We DON'T show this if we have a Snapshot with no defined duration
+                            if (objType == 'Clip') or (objType == 'Quote') or \
+                               ((objType == 'Snapshot') and (tmpObj.episode_num > 0) and (tmpObj.episode_duration > 0)):
+                                # Turn bold on.
+                                reportText.SetTxtStyle(fontBold = useBold, parSpacingAfter = 0)
+                                if objType == 'Quote':
+                                    # Add the header to the report
+                                    reportText.WriteText(_('Position:'))
+                                else:
+                                    # Add the header to the report
+                                    reportText.WriteText(_('Time:'))
+                                # Turn bold off.
+                                reportText.SetTxtStyle(fontBold = False)
+                                if objType == 'Quote':
+                                    # Add the data to the report, the Quote start and end characters in this case
+                                    reportText.WriteText('  %s - %s   (' % (quoteObj.start_char, quoteObj.end_char))
+                                # If we have a Clip ...
+                                elif objType == 'Clip':
+                                    # Add the data to the report, the Clip start and stop times in this case
+                                    reportText.WriteText('  %s - %s   (' % (Misc.time_in_ms_to_str(clipObj.clip_start), Misc.time_in_ms_to_str(clipObj.clip_stop)))
+                                # If we have a Snapshot ...
+                                elif objType == 'Snapshot':
+                                    # Add the data to the report, the Snapshot start and stop times in this case
+                                    reportText.WriteText('  %s - %s   (' % (Misc.time_in_ms_to_str(tmpObj.episode_start), Misc.time_in_ms_to_str(tmpObj.episode_start + tmpObj.episode_duration)))
+                                # Turn bold on.
+                                reportText.SetTxtStyle(fontBold = useBold)
+                                # Add the header to the report
+                                reportText.WriteText(_('Length:'))
+                                # Turn bold off.
+                                reportText.SetTxtStyle(fontBold = False)
+                                # If we have a Quote ...
+                                if objType == 'Quote':
+                                    # Add the data to the report, the Quote length in this case
+                                    reportText.WriteText('  %s)\n' % (quoteObj.end_char - quoteObj.start_char))
+                                # If we have a Clip ...
+                                elif objType == 'Clip':
+                                    # Add the data to the report, the Clip Length in this case
+                                    reportText.WriteText('  %s)\n' % (Misc.time_in_ms_to_str(clipObj.clip_stop - clipObj.clip_start)))
+                                # If we have a Snapshot ...
+                                elif objType == 'Snapshot':
+                                    # Add the data to the report, the Snapshot Duration in this case
+                                    reportText.WriteText('  %s)\n' % (Misc.time_in_ms_to_str(tmpObj.episode_duration)))
 
-        # There's a problem in wxPython 2.8.12.0 on Windows.  If you use too many format changes in too
-        # long a document, you run out of Windows GDI resources.  This problem can be ameliorated (but not
-        # totally eliminated) by reducing the number of times BOLD text is used.
-        #
-        # So if we're on Windows and have more than 350 elements in the report, DON'T use BOLD as much!
-        # This flag is the signal.
-        useBold = True   # not ((len(majorList) > 350) and  ('wxMSW' in wx.PlatformInfo))
+                        # If we have a Quote ...
+                        if objType == 'Quote':
+                            # Increment the Item Counter
+                            self.quoteCount += 1
+                            # Add the Quote's length to the Quote Total Length accumulator
+                            self.quoteTotalLength += quoteObj.end_char - quoteObj.start_char
+                        # If we have a Clip ...
+                        if objType == 'Clip':
+                            # Increment the Item Counter
+                            self.clipCount += 1
+                            # Add the Clip's length to the Clip Total Time accumulator
+                            self.clipTotalTime += clipObj.clip_stop - clipObj.clip_start
+                        # If we have a Snapshot ...
+                        elif (objType == 'Snapshot'):
+                            # Increment the Item Counter
+                            self.snapshotCount += 1
+                            if (tmpObj.episode_num > 0):
+                                # Add the Snapshot's length to the Total Time accumulator
+                                self.snapshotTotalTime += snapshotObj.episode_duration
 
-        # If a subtitle is defined ...
-        if self.subtitle != '':
-            # ... set the subtitle font
-            reportText.SetTxtStyle(fontSize=12, fontBold=False, fontUnderline=False, parSpacingBefore = 0, parSpacingAfter = 0)
-            # Add the subtitle to the page
-            reportText.WriteText(self.subtitle + '\n')
-            # Finish the paragraph
-#            reportText.Newline()
-        if self.configName != '':
-            self.configLine = prompt % self.configName
-            # ... set the subtitle font
-            reportText.SetTxtStyle(fontSize=10, fontBold=False, fontUnderline=False, parSpacingBefore = 0, parSpacingAfter = 0)
-            # Add the subtitle to the page
-            reportText.WriteText(self.configLine + '\n')
+                        # If we're supposed to show Source Information, and the item HAS source information ...
+                        if self.showSourceInfo:
+                            reportText.SetTxtStyle(fontSize = 10, parSpacingAfter = 0)
+                            if (objType == 'Quote'):
+                                if(tmpDoc != None):
+                                    # Turn bold on.
+                                    reportText.SetTxtStyle(fontBold = useBold)
+                                    # Add the header to the report
+                                    reportText.WriteText(_('Library:'))
+                                    reportText.SetTxtStyle(fontBold = False)
+                                    # Add the data to the report
+                                    reportText.WriteText('  %s\n' % tmpDoc.library_id)
+                            else:
+                                if tmpObj.series_id != '':
+                                    # Turn bold on.
+                                    reportText.SetTxtStyle(fontBold = useBold)
+                                    # Add the header to the report
+                                    reportText.WriteText(_('Library:'))
+                                    reportText.SetTxtStyle(fontBold = False)
+                                    # Add the data to the report
+                                    reportText.WriteText('  %s\n' % tmpObj.series_id)
+                                if tmpObj.episode_num > 0:
+                                    # Turn bold on.
+                                    reportText.SetTxtStyle(fontBold = useBold)
+                                    # Add the header to the report
+                                    reportText.WriteText(_('Episode:'))
+                                    reportText.SetTxtStyle(fontBold = False)
+                                    # Add the data to the report
+                                    reportText.WriteText('  %s\n' % tmpObj.episode_id)
 
-        # Initialize the initial data structure that will be turned into the report
-        self.data = []
-        # Create a Dictionary Data Structure to accumulate Keyword Counts
-        keywordCounts = {}
-        # Create a Dictionary Data Structure to accumulate Keyword Times
-        keywordTimes = {}
-        keywordLengths = {}
-        # Because Snapshot records are coded two different ways, we need to be able to keep track of what
-        # we've already counted in clipCount and ClipTotalTime so we don't count it twice.
-        self.itemsCounted = []
+                        # If we're supposed to show Source Information or Quote Text or Clip Transcripts ...
+                        if self.showSourceInfo or self.showQuoteText or self.showTranscripts:
+                            reportText.SetTxtStyle(fontSize = 10, parSpacingAfter = 0)
 
-        # The majorList and minorList are constructed differently for the Episode and Document versions of the report,
-        # and so the report must be built differently here too!
-        if (self.episodeName == None) and (self.documentName == None):
-            if 'unicode' in wx.PlatformInfo:
-                # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
-                majorLabel = unicode(majorLabel, 'utf8')
+                            if (objType == 'Quote'):
+                                # Turn bold on.
+                                reportText.SetTxtStyle(fontBold =useBold)
+                                # Add the header to the report
+                                reportText.WriteText(_('Document:'))
+                                # Turn bold off.
+                                reportText.SetTxtStyle(fontBold = False)
+                                # If a Source Document was found ...
+                                if tmpDoc != None:
+                                    # Add the data to the report, the Source Document ID in this case
+                                    reportText.WriteText('  %s\n' % (tmpDoc.id,))
+                                # if no Source Document is found, we have an orphan.
+                                else:
+                                    # Add the data to the report, the Source Document ID in this case
+                                    reportText.WriteText('  %s\n' % _('The original Document has been deleted.'))
 
-            # Let's keep track of the current collection name so we can tell when to print
-            # the Collection Header and Collection Notes if that's how the report is configured
-            # If we have a Collection-based Report ...
-            if (self.collection != None):
-                # ... put garbage into the workingCollection variable so it will trigger printing for the
-                # first Collection
-                workingCollection = ('NoCollectionString', 0)
-            # If we're not doing a Collection Report ...
-            else:
-                # Initialize workingCollection to an empty string, as we won't be using it.
-                workingCollection = ''
+                                if self.showQuoteText:
+                                    # Turn bold on.
+                                    reportText.SetTxtStyle(fontSize = 10, fontFace = 'Courier New', fontBold = useBold,
+                                                           parLeftIndent = baseIndent + 63, parRightIndent = 0,
+                                                           parSpacingBefore = 0, parSpacingAfter = 0)
+                                    # Add the header to the report
+                                    reportText.WriteText(_('Quote Text:\n'))
+                                
+                                    # Turn bold off.
+                                    reportText.SetTxtStyle(fontBold = False)
+                                    # Add the Quote Text to the report.  Quote text *must* be in XML format.
 
-            # If there are 20 or more items in the list, or at least 3 images ...
-            if (self.collection != None) and ((len(majorList) >= 20) or (len(self.snapshotFilterList) > 3)):
-                # ... create a Progress Dialog.  (The PARENT is needed to prevent the report being hidden
-                #     behind Transana!)
-                progress = wx.ProgressDialog(self.title, _('Assembling report contents'), parent=self.report)
+                                    # Strip the time codes for the report
+                                    text = self.GetReportXML(tmpObj.text)
 
-            # Iterate through the major list
-            for (objType, groupNo, group, parentCollNo) in majorList:
+                                    # Create the Transana XML to RTC Import Parser.  This is needed so that we can
+                                    # pull XML transcripts into the existing RTC without resetting the contents of
+                                    # the reportText RTC, which wipes out all accumulated Report data.
+                                    # Pass the reportText RTC and the desired additional margins in.
+                                    handler = PyXML_RTCImportParser.XMLToRTCHandler(reportText, (127 + baseIndent, 127))
+                                    # Parse the transcript text, adding it to the reportText RTC
+                                    xml.sax.parseString(text, handler)
 
-                # If our majorLabel is Clip/Snapshot ...
-                if majorLabel.encode('utf8') in [_('Document'), _('Episode'), _('Clip'), _('Snapshot'), _('Quote')]:
-                    # ... set the majorLabel to match the object type (but translated)
-                    if objType == 'Document':
-                        majorLabel = _('Document')
-                    elif objType == 'Episode':
-                        majorLabel = _('Episode')
-                    elif objType == 'Clip':
-                        majorLabel = _('Clip')
-                    elif objType == 'Snapshot':
-                        majorLabel = _('Snapshot')
-                    elif objType == _('Quote'):
-                        majorLabel = _('Quote')
+                            elif (objType == 'Clip'):
+                                # Iterate through the clips transcripts
+                                for tr in clipObj.transcripts:
+                                    if self.showSourceInfo:
+                                        # Default the Episode Transcript to None in case the load fails
+                                        episodeTranscriptObj = None
+                                        # Begin exception handling
+                                        try:
+                                            # If the Clip Object has a defined Source Transcript ...
+                                            if tr.source_transcript > 0:
+                                                # ... try to load that source transcript
+                                                # To save time here, we can skip loading the actual transcript text, which can take time once we start dealing with images!
+                                                episodeTranscriptObj = self.GetCachedData(Transcript.Transcript, tr.source_transcript, skipText=True)
+                                        # if the record is not found (orphaned Clip)
+                                        except TransanaExceptions.RecordNotFoundError:
+                                            # We don't need to do anything.
+                                            pass
 
-                    try:
-                        # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
-                        majorLabel = unicode(majorLabel, 'utf8')
-                    except TypeError:
-                        pass
-
-                # If a Collection Name is passed in ...
-                if self.collection != None:
-                    # ... then our Filter comparison is based on Clip data
-                    filterVal = (group, parentCollNo, True)
-                # If a Library Name is passed in ...            
-                elif self.seriesName != None:
-                    # ... then our Filter comparison is based on Episode data
-                    filterVal = (group, self.seriesName, True)
-                # If this report is called for a SearchLibraryResult ...
-                elif (self.searchSeries != None) and (self.treeCtrl != None):
-                    # ... then our Filter comparison is based on the search Library from the TreeCtrl
-                    filterVal = (group, self.treeCtrl.GetItemText(self.searchSeries), True)
-                # If this report is called for a SearchCollectionResult ...
-                elif (self.searchColl != None) and (self.treeCtrl != None):
-                    # ... then our Filter comparison is based on Search Collection data
-                    filterVal = (group, parentCollNo, True)
-
-                # now that we have the filter comparison data, we see if it's actually in the Filter List.
-                if ((objType == 'Document') and (filterVal in self.documentFilterList)) or \
-                   ((objType == 'Snapshot') and (filterVal in self.snapshotFilterList)) or \
-                   ((objType == 'Quote')    and (filterVal in self.quoteFilterList)) or \
-                   (filterVal in self.filterList):
-                    # If we have Collection-based data ...
-                    if (self.collection != None) or ((self.searchColl != None) and (self.treeCtrl != None)):
-                        # ... load the collection the current clip is in
-                        tempColl = Collection.Collection(parentCollNo)
+                                        # If an Episode Transcript was found ...
+                                        if episodeTranscriptObj != None:
+                                            # Turn bold on.
+                                            reportText.SetTxtStyle(fontSize = 10, fontFace = 'Courier New', fontBold = useBold,
+                                                                   parLeftIndent = baseIndent + 63, parRightIndent = 0,
+                                                                   parSpacingBefore = 0, parSpacingAfter = 0)
+                                            # Add the header to the report
+                                            reportText.WriteText(_('Episode Transcript:'))
+                                            # Turn bold off.
+                                            reportText.SetTxtStyle(fontBold = False)
+                                            # Add the data to the report, the Episode Transcript ID in this case
+                                            reportText.WriteText('  %s\n' % (episodeTranscriptObj.id,))
+    #                                        reportText.Newline()
+                                        # if no Episode Transcript is found, we have an orphan.
+                                        else:
+                                            # Turn bold on.
+                                            reportText.SetTxtStyle(fontBold =useBold)
+                                            # Add the header to the report
+                                            reportText.WriteText(_('Episode Transcript:'))
+                                            # Turn bold off.
+                                            reportText.SetTxtStyle(fontBold = False)
+                                            # Add the data to the report, the Episode Transcript ID in this case
+                                            reportText.WriteText('  %s\n' % _('The Episode Transcript has been deleted.'))
+    #                                        reportText.Newline()
 
-                        # Check to see if we're showing Collection headers, if we're showing nested collections (since
-                        # there's no point showing collection headers if there aren't different collections!), and
-                        # see if the new collection is different from the collection of the last clip displayed.
-                        if (workingCollection != '') and \
-                           (self.showNested or self.showComments or self.showCollectionNotes) and \
-                           (workingCollection[0] != tempColl.GetNodeString()):
-                            # Format text for the next section of the report
-                            reportText.SetTxtStyle(fontSize=12, fontBold=useBold, fontUnderline=False,
-                                                   parAlign = wx.TEXT_ALIGNMENT_LEFT,
-                                                   parLeftIndent = 0,
-                                                   parSpacingBefore = 24, parSpacingAfter = 0)
-                            # Add the Collections header and data to the report
-                            reportText.WriteText(_('Collection: '))
-#                            reportText.SetTxtStyle(fontBold=False)
-                            reportText.WriteText('%s\n' % tempColl.GetNodeString())
-                            
-                            # If we are supposed to show Comments ...
-                            if self.showComments:
-                                # ... if the collection has a comment ...
-                                if tempColl.comment != u'':
-                                    # Set the font for the comments
-                                    reportText.SetTxtStyle(fontSize=10, fontBold=useBold, parLeftIndent=63, parRightIndent=63,
-                                                           parSpacingBefore = 0, parSpacingAfter = 0)
-                                    # Add the header to the report
-                                    reportText.WriteText(_('Collection Comment:\n'))
-                                    reportText.SetTxtStyle(fontBold=False, parLeftIndent=127,
-                                                           parSpacingBefore = 0, parSpacingAfter = 0)
-                                    # Add the content of the Collection Comment to the report
-                                    reportText.WriteText('%s\n' % tempColl.comment)
+                                    if self.showTranscripts:
+                                        # Turn bold on.
+                                        reportText.SetTxtStyle(fontSize = 10, fontFace = 'Courier New', fontBold = useBold,
+                                                               parLeftIndent = baseIndent + 63, parRightIndent = 0,
+                                                               parSpacingBefore = 0, parSpacingAfter = 0)
+                                        # Add the header to the report
+                                        reportText.WriteText(_('Clip Transcript:\n'))
+    #                                    reportText.Newline()
 
-                            # If we're supposed to show Collection Notes ...
-                            if self.showCollectionNotes:
-                                # ... get a list of notes, including their object numbers
-                                notesList = DBInterface.list_of_notes(Collection=tempColl.number, includeNumber=True)
-                                # If there are notes for this Clip ...
-                                if (len(notesList) > 0):
-                                    # Set the font for the Notes
-                                    reportText.SetTxtStyle(fontSize=10, fontBold=useBold,
-                                                           parLeftIndent=63, parRightIndent=63,
-                                                           parSpacingBefore = 0, parSpacingAfter=0)
-                                    # Add the header to the report
-                                    reportText.WriteText(_('Collection Notes:\n'))
-#                                    reportText.Newline()
-                                    # Iterate throught the list of notes ...
-                                    for note in notesList:
-                                        # ... load each note ...
-                                        tempNote = Note.Note(note[0])
-                                        reportText.SetTxtStyle(fontBold=useBold, parLeftIndent=127, parSpacingBefore = 0, parSpacingAfter = 0)
-                                        # Add the note ID to the report
-                                        reportText.WriteText('%s\n' % tempNote.id)
-#                                        reportText.Newline()
                                         # Turn bold off.
-                                        reportText.SetTxtStyle(fontBold=False, parLeftIndent=190)
-                                        # Add the note text to the report (rstrip() prevents formatting problems when a note ends with blank lines)
-                                        reportText.WriteText('%s\n' % tempNote.text.rstrip())
-#                                        reportText.Newline()
-                            # Update the workingCollection variable with the data for the current collection so we'll
-                            # be able to tell when the collection changes
-                            workingCollection = (tempColl.GetNodeString(), tempColl.number)
-                            
-                            # We need to indent EVERYTHING else to adjust for these headers
-                            baseIndent = 63
-                        else:
-                            # We DON'T need to indent later paragraphs
-                            baseIndent = 63
-                    else:
-                        # We DON'T need to indent later paragraphs
-                        baseIndent = 0
-                            
-                    # ... Set the formatting for the report, including turning off previous formatting
-                    reportText.SetTxtStyle(fontSize = 12, fontBold = True, fontUnderline = False,
-                                           parAlign = wx.TEXT_ALIGNMENT_LEFT,
-                                           parLeftIndent = baseIndent, parRightIndent = 0,
-                                           parSpacingBefore = 36, parSpacingAfter = 2)
+                                        reportText.SetTxtStyle(fontBold = False)
+                                        # Add the Transcript to the report
+                                        # Clip Transcripts could be in the old RTF format, or they could have been
+                                        # updated to the new XML format.  These require different processing.
 
-                    if DEBUG:
-                        print "%s, %s (majorLabel, group) l=%d (baseindent), r=0, b=36, a=0" % (majorLabel, group, baseIndent)
+                                        # If we have a Rich Text Format document ...
+                                        if tr.text[:5].lower() == u'{\\rtf':
+                                            # Get the transcript as XML without time codes for the report
+                                            tmpText = self.GetReportXML(tr.text)
 
-                    # Add the group name to the report
-                    reportText.WriteText('%s: ' % majorLabel)
+                                            # Create the Transana XML to RTC Import Parser.  This is needed so that we can
+                                            # pull XML transcripts into the existing RTC without resetting the contents of
+                                            # the reportText RTC, which wipes out all accumulated Report data.
+                                            # Pass the reportText RTC and the desired additional margins in.
+                                            handler = PyXML_RTCImportParser.XMLToRTCHandler(reportText, (127 + baseIndent, 127))
+                                            # Parse the transcript text, adding it to the reportText RTC
+                                            xml.sax.parseString(tmpText, handler)
 
-                    # If we're showing Hyperlinks to Clips/Snapshots ...
-                    if self.showHyperlink and objType.lower() != 'episode':
-                        # Define a Hyperlink Style (Blue, underlined)
-                        urlStyle = richtext.RichTextAttr()
-                        urlStyle.SetFontFaceName('Courier New')
-                        urlStyle.SetFontSize(12)
-                        urlStyle.SetTextColour(wx.BLUE)
-                        urlStyle.SetFontUnderlined(True)
-                        # Apply the Hyperlink Style
-                        reportText.BeginStyle(urlStyle)
-                        # Insert the Hyperlink information, object type and object number
-                        reportText.BeginURL("transana:%s=%d" % (objType, groupNo))
+                                            del(handler)
 
-                    # Add the group name to the report
-                    reportText.WriteText('%s\n' % group)
-                    # End the paragraph
-#                    reportText.Newline()
+                                        # If we have an XML document ...
+                                        elif tr.text[:5].lower() == u'<?xml':
+                                            # Strip the time codes for the report
+                                            tmpText = self.GetReportXML(tr.text)
 
-                    # If we're showing Hyperlinks to Documents, Clips, or Snapshots, but NOT Episodes ...
-                    # (Episodes can't be hyperlinked directly.)
-                    if self.showHyperlink and objType.lower() != 'episode':
-                        # End the Hyperlink
-                        reportText.EndURL()
-                        # Stop using the Hyperlink Style
-                        reportText.EndStyle()
+                                            # Create the Transana XML to RTC Import Parser.  This is needed so that we can
+                                            # pull XML transcripts into the existing RTC without resetting the contents of
+                                            # the reportText RTC, which wipes out all accumulated Report data.
+                                            # Pass the reportText RTC and the desired additional margins in.
+                                            handler = PyXML_RTCImportParser.XMLToRTCHandler(reportText, (127 + baseIndent, 127))
+                                            # Parse the transcript text, adding it to the reportText RTC
+                                            xml.sax.parseString(tmpText, handler)
 
-                    # ... Set the formatting for the report, including turning off previous formatting
-                    reportText.SetTxtStyle(fontSize = 10, fontBold = useBold,
-                                           parLeftIndent = baseIndent + 63, parRightIndent = 63,
-                                           parSpacingBefore = 0, parSpacingAfter = 0)
-
-                    # If we have Collection-based data, we add some Clip-specific data
-                    if (self.collection != None) or ((self.searchColl != None) and (self.treeCtrl != None)):
-                        # Add the header to the report
-                        reportText.WriteText(_('Collection:'))
-                        reportText.SetTxtStyle(fontBold = False)
-                        # Add the data to the report, the full Collection path in this case
-                        reportText.WriteText('  %s\n' % (tempColl.GetNodeString(),))
-                        # If we're looking at a Quote ...
-                        if objType == 'Quote':
-                            # Get the full Quote data
-                            quoteObj = Quote.Quote(groupNo)
-                            tmpObj = quoteObj
-                            try:
-                                # If we have a Quote, load the Source Document!
-                                tmpDoc = Document.Document(num=tmpObj.source_document_num)
-                            except TransanaExceptions.RecordNotFoundError:
-                                tmpDoc = None
-                        # If we're looking at a Clip ...
-                        elif objType == 'Clip':
-                            # Get the full Clip data
-                            clipObj = Clip.Clip(groupNo)
-                            tmpObj = clipObj
-                        # If we're looking at a Snapshot ...
-                        elif objType == 'Snapshot':
-                            # Get the full Snapshot data
-                            snapshotObj = Snapshot.Snapshot(groupNo, suppressEpisodeError = True)
-                            tmpObj = snapshotObj
-                        # If we're supposed to show the Media File Name ...
-                        if self.showFile:
-                            # Turn bold on.
-                            reportText.SetTxtStyle(fontBold = useBold)
-                            if objType == 'Quote':
-                                # Add the header to the report
-                                reportText.WriteText(_('Source File:'))
-                            else:
-                                # Add the header to the report
-                                reportText.WriteText(_('File:'))
-                            # Turn bold off.
-                            reportText.SetTxtStyle(fontBold = False)
-                            # If we have a Quote ...
-                            if objType == 'Quote':
-                                if tmpDoc != None:
-                                    # Add the data to the report, the file name in this case
-                                    reportText.WriteText(_('  %s\n') % tmpDoc.imported_file)
-                                    prompt = unicode(_("imported on %s\n"), "utf8")
-                                    # sqlite gives a string rather than a datetime object
-                                    if isinstance(tmpDoc.import_date, str):
-                                        # start exception handling in case of formatting problems
-                                        try:
-                                            # Convert the date string to a datetime object
-                                            tmpDate = datetime.datetime.strptime(tmpDoc.import_date, '%Y-%m-%d %H:%M:%S')
-                                            # Display the correct date
-                                            reportText.WriteText(prompt % tmpDate.strftime('%x'))
-                                        # If the conversion fails ...
-                                        except ValueError:
-                                            # ... display the un-converted string.
-                                            reportText.WriteText(prompt % tmpDoc.import_date)
-                                    # MySQL returns a datetime object.
-                                    else:
-                                        reportText.WriteText(prompt % tmpDoc.import_date.strftime('%x'))
-#                                else:
-#                                    reportText.WriteText(_("The source Document for this Quote has been deleted.") + u'\n')
-                            # If we have a Clip ...
-                            elif objType == 'Clip':
-                                # Add the data to the report, the file name in this case
-                                reportText.WriteText(_('  %s\n') % tmpObj.media_filename)
-                                # Add Additional Media File info
-                                for mediaFile in tmpObj.additional_media_files:
-                                    reportText.WriteText(_('       %s\n') % mediaFile['filename'])
-                            # If we have a Snapshot ...
-                            elif objType == 'Snapshot':
-                                # Add the data to the report, the file name in this case
-                                reportText.WriteText(_('  %s\n') % tmpObj.image_filename)
-
-                        # If we're supposed to show the Clip/Snapshot Time data ...
-                        if self.showTime:
-                            # We DON'T show this if we have a Snapshot with no defined duration
-                            if (objType == 'Clip') or (objType == 'Quote') or \
-                               ((objType == 'Snapshot') and (tmpObj.episode_num > 0) and (tmpObj.episode_duration > 0)):
-                                # Turn bold on.
-                                reportText.SetTxtStyle(fontBold = useBold, parSpacingAfter = 0)
-                                if objType == 'Quote':
-                                    # Add the header to the report
-                                    reportText.WriteText(_('Position:'))
-                                else:
-                                    # Add the header to the report
-                                    reportText.WriteText(_('Time:'))
-                                # Turn bold off.
-                                reportText.SetTxtStyle(fontBold = False)
-                                if objType == 'Quote':
-                                    # Add the data to the report, the Quote start and end characters in this case
-                                    reportText.WriteText('  %s - %s   (' % (quoteObj.start_char, quoteObj.end_char))
-                                # If we have a Clip ...
-                                elif objType == 'Clip':
-                                    # Add the data to the report, the Clip start and stop times in this case
-                                    reportText.WriteText('  %s - %s   (' % (Misc.time_in_ms_to_str(clipObj.clip_start), Misc.time_in_ms_to_str(clipObj.clip_stop)))
-                                # If we have a Snapshot ...
-                                elif objType == 'Snapshot':
-                                    # Add the data to the report, the Snapshot start and stop times in this case
-                                    reportText.WriteText('  %s - %s   (' % (Misc.time_in_ms_to_str(tmpObj.episode_start), Misc.time_in_ms_to_str(tmpObj.episode_start + tmpObj.episode_duration)))
-                                # Turn bold on.
-                                reportText.SetTxtStyle(fontBold = useBold)
-                                # Add the header to the report
-                                reportText.WriteText(_('Length:'))
-                                # Turn bold off.
-                                reportText.SetTxtStyle(fontBold = False)
-                                # If we have a Quote ...
-                                if objType == 'Quote':
-                                    # Add the data to the report, the Quote length in this case
-                                    reportText.WriteText('  %s)\n' % (quoteObj.end_char - quoteObj.start_char))
-                                # If we have a Clip ...
-                                elif objType == 'Clip':
-                                    # Add the data to the report, the Clip Length in this case
-                                    reportText.WriteText('  %s)\n' % (Misc.time_in_ms_to_str(clipObj.clip_stop - clipObj.clip_start)))
-                                # If we have a Snapshot ...
-                                elif objType == 'Snapshot':
-                                    # Add the data to the report, the Snapshot Duration in this case
-                                    reportText.WriteText('  %s)\n' % (Misc.time_in_ms_to_str(tmpObj.episode_duration)))
-
-                        # If we have a Quote ...
-                        if objType == 'Quote':
-                            # Increment the Item Counter
-                            self.quoteCount += 1
-                            # Add the Quote's length to the Quote Total Length accumulator
-                            self.quoteTotalLength += quoteObj.end_char - quoteObj.start_char
-                        # If we have a Clip ...
-                        if objType == 'Clip':
-                            # Increment the Item Counter
-                            self.clipCount += 1
-                            # Add the Clip's length to the Clip Total Time accumulator
-                            self.clipTotalTime += clipObj.clip_stop - clipObj.clip_start
-                        # If we have a Snapshot ...
-                        elif (objType == 'Snapshot'):
-                            # Increment the Item Counter
-                            self.snapshotCount += 1
-                            if (tmpObj.episode_num > 0):
-                                # Add the Snapshot's length to the Total Time accumulator
-                                self.snapshotTotalTime += snapshotObj.episode_duration
-
-                        # If we're supposed to show Source Information, and the item HAS source information ...
-                        if self.showSourceInfo:
-                            reportText.SetTxtStyle(fontSize = 10, parSpacingAfter = 0)
-                            if (objType == 'Quote'):
-                                if(tmpDoc != None):
-                                    # Turn bold on.
-                                    reportText.SetTxtStyle(fontBold = useBold)
-                                    # Add the header to the report
-                                    reportText.WriteText(_('Library:'))
-                                    reportText.SetTxtStyle(fontBold = False)
-                                    # Add the data to the report
-                                    reportText.WriteText('  %s\n' % tmpDoc.library_id)
-                            else:
-                                if tmpObj.series_id != '':
-                                    # Turn bold on.
-                                    reportText.SetTxtStyle(fontBold = useBold)
-                                    # Add the header to the report
-                                    reportText.WriteText(_('Library:'))
-                                    reportText.SetTxtStyle(fontBold = False)
-                                    # Add the data to the report
-                                    reportText.WriteText('  %s\n' % tmpObj.series_id)
-                                if tmpObj.episode_num > 0:
-                                    # Turn bold on.
-                                    reportText.SetTxtStyle(fontBold = useBold)
-                                    # Add the header to the report
-                                    reportText.WriteText(_('Episode:'))
-                                    reportText.SetTxtStyle(fontBold = False)
-                                    # Add the data to the report
-                                    reportText.WriteText('  %s\n' % tmpObj.episode_id)
-
-                        # If we're supposed to show Source Information or Quote Text or Clip Transcripts ...
-                        if self.showSourceInfo or self.showQuoteText or self.showTranscripts:
-                            reportText.SetTxtStyle(fontSize = 10, parSpacingAfter = 0)
-
-                            if (objType == 'Quote'):
-                                # Turn bold on.
-                                reportText.SetTxtStyle(fontBold =useBold)
-                                # Add the header to the report
-                                reportText.WriteText(_('Document:'))
-                                # Turn bold off.
-                                reportText.SetTxtStyle(fontBold = False)
-                                # If a Source Document was found ...
-                                if tmpDoc != None:
-                                    # Add the data to the report, the Source Document ID in this case
-                                    reportText.WriteText('  %s\n' % (tmpDoc.id,))
-                                # if no Source Document is found, we have an orphan.
-                                else:
-                                    # Add the data to the report, the Source Document ID in this case
-                                    reportText.WriteText('  %s\n' % _('The original Document has been deleted.'))
-
-                                if self.showQuoteText:
-                                    # Turn bold on.
-                                    reportText.SetTxtStyle(fontSize = 10, fontFace = 'Courier New', fontBold = useBold,
-                                                           parLeftIndent = baseIndent + 63, parRightIndent = 0,
-                                                           parSpacingBefore = 0, parSpacingAfter = 0)
-                                    # Add the header to the report
-                                    reportText.WriteText(_('Quote Text:\n'))
-                                
-                                    # Turn bold off.
-                                    reportText.SetTxtStyle(fontBold = False)
-                                    # Add the Quote Text to the report.  Quote text *must* be in XML format.
-
-                                    # Strip the time codes for the report
-                                    text = reportText.StripTimeCodes(tmpObj.text)
-
-                                    # Create the Transana XML to RTC Import Parser.  This is needed so that we can
-                                    # pull XML transcripts into the existing RTC without resetting the contents of
-                                    # the reportText RTC, which wipes out all accumulated Report data.
-                                    # Pass the reportText RTC and the desired additional margins in.
-                                    handler = PyXML_RTCImportParser.XMLToRTCHandler(reportText, (127 + baseIndent, 127))
-                                    # Parse the transcript text, adding it to the reportText RTC
-                                    xml.sax.parseString(text, handler)
-
-                            elif (objType == 'Clip'):
-                                # Iterate through the clips transcripts
-                                for tr in clipObj.transcripts:
-                                    if self.showSourceInfo:
-                                        # Default the Episode Transcript to None in case the load fails
-                                        episodeTranscriptObj = None
-                                        # Begin exception handling
-                                        try:
-                                            # If the Clip Object has a defined Source Transcript ...
-                                            if tr.source_transcript > 0:
-                                                # ... try to load that source transcript
-                                                # To save time here, we can skip loading the actual transcript text, which can take time once we start dealing with images!
-                                                episodeTranscriptObj = Transcript.Transcript(tr.source_transcript, skipText=True)
-                                        # if the record is not found (orphaned Clip)
-                                        except TransanaExceptions.RecordNotFoundError:
-                                            # We don't need to do anything.
-                                            pass
-
-                                        # If an Episode Transcript was found ...
-                                        if episodeTranscriptObj != None:
-                                            # Turn bold on.
-                                            reportText.SetTxtStyle(fontSize = 10, fontFace = 'Courier New', fontBold = useBold,
-                                                                   parLeftIndent = baseIndent + 63, parRightIndent = 0,
-                                                                   parSpacingBefore = 0, parSpacingAfter = 0)
-                                            # Add the header to the report
-                                            reportText.WriteText(_('Episode Transcript:'))
-                                            # Turn bold off.
-                                            reportText.SetTxtStyle(fontBold = False)
-                                            # Add the data to the report, the Episode Transcript ID in this case
-                                            reportText.WriteText('  %s\n' % (episodeTranscriptObj.id,))
-    #                                        reportText.Newline()
-                                        # if no Episode Transcript is found, we have an orphan.
-                                        else:
-                                            # Turn bold on.
-                                            reportText.SetTxtStyle(fontBold =useBold)
-                                            # Add the header to the report
-                                            reportText.WriteText(_('Episode Transcript:'))
-                                            # Turn bold off.
-                                            reportText.SetTxtStyle(fontBold = False)
-                                            # Add the data to the report, the Episode Transcript ID in this case
-                                            reportText.WriteText('  %s\n' % _('The Episode Transcript has been deleted.'))
-    #                                        reportText.Newline()
-
-                                    if self.showTranscripts:
-                                        # Turn bold on.
-                                        reportText.SetTxtStyle(fontSize = 10, fontFace = 'Courier New', fontBold = useBold,
-                                                               parLeftIndent = baseIndent + 63, parRightIndent = 0,
-                                                               parSpacingBefore = 0, parSpacingAfter = 0)
-                                        # Add the header to the report
-                                        reportText.WriteText(_('Clip Transcript:\n'))
-    #                                    reportText.Newline()
-
-                                        # Turn bold off.
-                                        reportText.SetTxtStyle(fontBold = False)
-                                        # Add the Transcript to the report
-                                        # Clip Transcripts could be in the old RTF format, or they could have been
-                                        # updated to the new XML format.  These require different processing.
-
-                                        # If we have a Rich Text Format document ...
-                                        if tr.text[:5].lower() == u'{\\rtf':
-                                            # Create a temporary RTC control
-                                            tmpTxtCtrl = TranscriptEditor_RTC.TranscriptEditor(reportText.parent, pos=(-20, -20), suppressGDIWarning = True)
-                                            # ... import the RTF data into the report text
-                                            tmpTxtCtrl.LoadRTFData(tr.text, clearDoc=True)
-                                            # Pull the data back out of the control as XML
-                                            tmpText = tmpTxtCtrl.GetFormattedSelection('XML')
-                                            # Strip the time codes for the report
-                                            tmpText = reportText.StripTimeCodes(tmpText)
-
-                                            # Create the Transana XML to RTC Import Parser.  This is needed so that we can
-                                            # pull XML transcripts into the existing RTC without resetting the contents of
-                                            # the reportText RTC, which wipes out all accumulated Report data.
-                                            # Pass the reportText RTC and the desired additional margins in.
-                                            handler = PyXML_RTCImportParser.XMLToRTCHandler(reportText, (127 + baseIndent, 127))
-                                            # Parse the transcript text, adding it to the reportText RTC
-                                            xml.sax.parseString(tmpText, handler)
-
-                                            del(handler)
-
-                                            # Destroy the temporary RTC control
-                                            tmpTxtCtrl.Destroy()
-
-                                        # If we have an XML document ...
-                                        elif tr.text[:5].lower() == u'<?xml':
-                                            # Strip the time codes for the report
-                                            tr.text = reportText.StripTimeCodes(tr.text)
-
-                                            # Create the Transana XML to RTC Import Parser.  This is needed so that we can
-                                            # pull XML transcripts into the existing RTC without resetting the contents of
-                                            # the reportText RTC, which wipes out all accumulated Report data.
-                                            # Pass the reportText RTC and the desired additional margins in.
-                                            handler = PyXML_RTCImportParser.XMLToRTCHandler(reportText, (127 + baseIndent, 127))
-                                            # Parse the transcript text, adding it to the reportText RTC
-                                            xml.sax.parseString(tr.text, handler)
-
-                                        # If we have a transcript that is neither RTF nor XML (shouldn't happen!)
-                                        else:
-                                            # ... then just import it directly.  Treat it as plain text.
-                                            # (rstrip() prevents formatting problems when a transcript ends with blank lines)
-                                            reportText.WriteText(tr.text.rstrip())
+                                        # If we have a transcript that is neither RTF nor XML (shouldn't happen!)
+                                        else:
+                                            # ... then just import it directly.  Treat it as plain text.
+                                            # (rstrip() prevents formatting problems when a transcript ends with blank lines)
+                                            reportText.WriteText(tr.text.rstrip())
 
                             # If we have a Snapshot ...
                             elif objType == 'Snapshot':
@@ -1609,7 +1057,7 @@ class ReportGenerator(wx.Object):
                                 for key in tmpKeys:
 
                                     # See if the keyword should be included, based on the Keyword Filter List
-                                    if (key[0], key[1], True) in self.keywordFilterList:
+                                    if (key[0], key[1], True) in keywordFilterSet:
 
                                         # Add the keyword
                                         reportText.WriteText('%s : %s  (' % (key[0], key[1]))
@@ -1628,7 +1076,7 @@ class ReportGenerator(wx.Object):
                                                 if tmpObj.episode_num > 0:
                                                     keywordTimes['%s : %s' % (key[0], key[1])] = tmpObj.episode_duration
                                             # Remember that THIS Snapshot with THIS Keyword HAS been counted now
-                                            self.itemsCounted.append(('Snapshot', tmpObj.number, key[0], key[1]))
+                                            self.itemsCounted.add(('Snapshot', tmpObj.number, key[0], key[1]))
                                         # Get the Graphic for the Coding Key
                                         tmpImage = SnapshotWindow.CodingKeyGraphic(tmpObj.keywordStyles[key])
                                         # Add the Image to the Report
@@ -1647,11 +1095,11 @@ class ReportGenerator(wx.Object):
                     else:
                         if objType == 'Episode':
                             # Get the full Episode data
-                            tmpObj = Episode.Episode(groupNo)
+                            tmpObj = self.GetCachedData(Episode.Episode, groupNo)
                             fileName = tmpObj.media_filename
                             addFiles = tmpObj.additional_media_files
                             # Get the Episode's Transcript records
-                            transcripts = DBInterface.list_transcripts(tmpObj.series_id, tmpObj.id)
+                            transcripts = self.GetCachedData(DBInterface.list_transcripts, tmpObj.series_id, tmpObj.id)
                             # For each transcript ...
                             for tr in transcripts:
                                 # Turn bold on.
@@ -1686,7 +1134,7 @@ class ReportGenerator(wx.Object):
                                     reportText.EndStyle()
 
                         elif objType == 'Document':
-                            tmpObj = Document.Document(groupNo)
+                            tmpObj = self.GetCachedData(Document.Document, groupNo)
                             fileName = tmpObj.imported_file
                             addFiles = []
                         # If we're supposed to show the Media File Name ...
@@ -1800,7 +1248,7 @@ class ReportGenerator(wx.Object):
                         # Iterate through the list of Keywords for the group
                         for (keywordGroup, keyword, example) in minorList[(objType, groupNo)]:
                             # See if the keyword should be included, based on the Keyword Filter List
-                            if (keywordGroup, keyword, True) in self.keywordFilterList:
+                            if (keywordGroup, keyword, True) in keywordFilterSet:
                                 if self.showKeywords:
                                     # Add the Keyword to the report
                                     reportText.WriteText('%s : %s\n' % (keywordGroup, keyword))
@@ -1816,7 +1264,7 @@ class ReportGenerator(wx.Object):
                                             keywordTimes['%s : %s' % (keywordGroup, keyword)] = 0
                                             keywordLengths['%s : %s' % (keywordGroup, keyword)] = 0
                                         # Remember that THIS Episode with THIS Keyword HAS been counted now
-                                        self.itemsCounted.append((objType, tmpObj.number, keywordGroup, keyword))
+                                        self.itemsCounted.add((objType, tmpObj.number, keywordGroup, keyword))
                                 elif objType == 'Quote':
                                     # if THIS Quote with THIS Keyword has NOT already been counted ...
                                     if not (('Quote', tmpObj.number, keywordGroup, keyword) in self.itemsCounted):
@@ -1835,7 +1283,7 @@ class ReportGenerator(wx.Object):
                                             if (self.episodeName != None) or (self.collection != None) or (self.searchColl != None):
                                                 keywordLengths['%s : %s' % (keywordGroup, keyword)] += tmpObj.end_char - tmpObj.start_char
                                         # Remember that THIS Clip with THIS Keyword HAS been counted now
-                                        self.itemsCounted.append(('Quote', tmpObj.number, keywordGroup, keyword))
+                                        self.itemsCounted.add(('Quote', tmpObj.number, keywordGroup, keyword))
                                 elif objType == 'Clip':
                                     # if THIS Clip with THIS Keyword has NOT already been counted ...
                                     if not (('Clip', clipObj.number, keywordGroup, keyword) in self.itemsCounted):
@@ -1854,7 +1302,7 @@ class ReportGenerator(wx.Object):
                                             if (self.episodeName != None) or (self.collection != None) or (self.searchColl != None):
                                                 keywordTimes['%s : %s' % (keywordGroup, keyword)] += clipObj.clip_stop - clipObj.clip_start
                                         # Remember that THIS Clip with THIS Keyword HAS been counted now
-                                        self.itemsCounted.append(('Clip', clipObj.number, keywordGroup, keyword))
+                                        self.itemsCounted.add(('Clip', clipObj.number, keywordGroup, keyword))
                                 # If we have a Snapshot
                                 elif objType == 'Snapshot':
                                     # if THIS Snapshot with THIS Keyword has NOT already been counted ...
@@ -1873,7 +1321,7 @@ class ReportGenerator(wx.Object):
                                                ((self.episodeName != None) or (self.collection != None) or (self.searchColl != None)):
                                                 keywordTimes['%s : %s' % (keywordGroup, keyword)] += tmpObj.episode_duration
                                         # Remember that THIS Snapshot with THIS Keyword HAS been counted now
-                                        self.itemsCounted.append(('Snapshot', tmpObj.number, keywordGroup, keyword))
+                                        self.itemsCounted.add(('Snapshot', tmpObj.number, keywordGroup, keyword))
                                 else:
                                     print "Line 1868", objType
                                     
@@ -1912,13 +1360,13 @@ class ReportGenerator(wx.Object):
                         notesList = []
                         # ... get a list of notes, including their object numbers
                         if self.showQuoteNotes and (objType == 'Quote'):
-                            notesList = DBInterface.list_of_notes(Quote=tmpObj.number, includeNumber=True)
+                            notesList = self.GetCachedData(DBInterface.list_of_notes, Quote=tmpObj.number, includeNumber=True)
                             prompt = _('Quote Notes:\n')
                         elif self.showClipNotes and (objType == 'Clip'):
-                            notesList = DBInterface.list_of_notes(Clip=tmpObj.number, includeNumber=True)
+                            notesList = self.GetCachedData(DBInterface.list_of_notes, Clip=tmpObj.number, includeNumber=True)
                             prompt = _('Clip Notes:\n')
                         elif self.showSnapshotNotes and (objType == 'Snapshot'):
-                            notesList = DBInterface.list_of_notes(Snapshot=tmpObj.number, includeNumber=True)
+                            notesList = self.GetCachedData(DBInterface.list_of_notes, Snapshot=tmpObj.number, includeNumber=True)
                             prompt = _('Snapshot Notes:\n')
                         # If there are notes for this Clip ...
                         if len(notesList) > 0:
@@ -1933,7 +1381,7 @@ class ReportGenerator(wx.Object):
                             # Iterate throught the list of notes ...
                             for note in notesList:
                                 # ... load each note ...
-                                tempNote = Note.Note(note[0])
+                                tempNote = self.GetCachedData(Note.Note, note[0])
                                 # Turn bold on.
                                 reportText.SetTxtStyle(fontBold = useBold,
                                                        parLeftIndent = baseIndent + 127, parRightIndent = 0,
@@ -1970,7 +1418,7 @@ class ReportGenerator(wx.Object):
             # If this is a Document Report ...
             if self.documentName != '':
                 try:
-                    tmpDoc = Document.Document(libraryID = self.seriesName, documentID = self.documentName)
+                    tmpDoc = self.GetCachedData(Document.Document, libraryID = self.seriesName, documentID = self.documentName)
                 except:
                     tmpDoc = None
 
@@ -1979,28 +1427,28 @@ class ReportGenerator(wx.Object):
                 if itemRecord['Type'] == 'Quote':
                     # our Filter comparison is based on Quote data
                     filterVal = (itemRecord['QuoteID'], itemRecord['CollectNum'], True)
-                    filterList = self.quoteFilterList
+                    filterList = quoteFilterSet
                     prompt = _('Quote')
                     # Load the Quote Object
-                    tmpObj = Quote.Quote(num=itemRecord['QuoteNum'])
+                    tmpObj = self.GetCachedData(Quote.Quote, num=itemRecord['QuoteNum'])
                 elif itemRecord['Type'] == 'Clip':
                     # our Filter comparison is based on Clip data
                     filterVal = (itemRecord['ClipID'], itemRecord['CollectNum'], True)
-                    filterList = self.filterList
+                    filterList = filterSet
                     prompt = _('Clip')
                     # Load the Clip Object
-                    tmpObj = Clip.Clip(itemRecord['ClipNum'])
+                    tmpObj = self.GetCachedData(Clip.Clip, itemRecord['ClipNum'])
                 elif itemRecord['Type'] == 'Snapshot':
                     # our Filter comparison is based on Clip data
                     filterVal = (itemRecord['SnapshotID'], itemRecord['CollectNum'], True)                    
-                    filterList = self.snapshotFilterList
+                    filterList = snapshotFilterSet
                     prompt = _('Snapshot')
                     # Load the Snapshot Object
-                    tmpObj = Snapshot.Snapshot(itemRecord['SnapshotNum'], suppressEpisodeError = True)
+                    tmpObj = self.GetCachedData(Snapshot.Snapshot, itemRecord['SnapshotNum'], suppressEpisodeError = True)
                 # now that we have the filter comparison data, we see if it's actually in the Filter List.
                 if filterVal in filterList:
                     # First, load the collection the current clip is in
-                    collectionObj = Collection.Collection(itemRecord['CollectNum'])
+                    collectionObj = self.GetCachedData(Collection.Collection, itemRecord['CollectNum'])
                     # Set the font for the heading.
                     reportText.SetTxtStyle(fontSize = 12, fontBold = True)
                     reportText.SetTxtStyle(parAlign = wx.TEXT_ALIGNMENT_LEFT,
@@ -2210,7 +1658,7 @@ class ReportGenerator(wx.Object):
                                 # Add the Quote Text to the report.  Quote text *must* be in XML format.
 
                                 # Strip the time codes for the report
-                                text = reportText.StripTimeCodes(tmpObj.text)
+                                text = self.GetReportXML(tmpObj.text)
 
                                 # Create the Transana XML to RTC Import Parser.  This is needed so that we can
                                 # pull XML transcripts into the existing RTC without resetting the contents of
@@ -2232,7 +1680,7 @@ class ReportGenerator(wx.Object):
                                         if tr.source_transcript > 0:
                                             # ... try to load that source transcript
                                             # To save time here, we can skip loading the actual transcript text, which can take time once we start dealing with images!
-                                            episodeTranscriptObj = Transcript.Transcript(tr.source_transcript, skipText=True)
+                                            episodeTranscriptObj = self.GetCachedData(Transcript.Transcript, tr.source_transcript, skipText=True)
                                     # if the record is not found (orphaned Clip)
                                     except TransanaExceptions.RecordNotFoundError:
                                         # We don't need to do anything.
@@ -2285,14 +1733,8 @@ class ReportGenerator(wx.Object):
                                     # If we have a Rich Text Format document ...
                                     if tr.text[:5].lower() == u'{\\rtf':
 
-                                        # Create a temporary RTC control
-                                        tmpTxtCtrl = TranscriptEditor_RTC.TranscriptEditor(reportText.parent, pos=(-20, -20), suppressGDIWarning = True)
-                                        # ... import the RTF data into the report text
-                                        tmpTxtCtrl.LoadRTFData(tr.text, clearDoc=True)
-                                        # Pull the data back out of the control as XML
-                                        tmpText = tmpTxtCtrl.GetFormattedSelection('XML')
-                                        # Strip the time codes for the report
-                                        tmpText = reportText.StripTimeCodes(tmpText)
+                                        # Get the transcript as XML without time codes for the report
+                                        tmpText = self.GetReportXML(tr.text)
 
                                         # Create the Transana XML to RTC Import Parser.  This is needed so that we can
                                         # pull XML transcripts into the existing RTC without resetting the contents of
@@ -2302,13 +1744,10 @@ class ReportGenerator(wx.Object):
                                         # Parse the transcript text, adding it to the reportText RTC
                                         xml.sax.parseString(tmpText, handler)
 
-                                        # Destroy the temporary RTC control
-                                        tmpTxtCtrl.Destroy()
-
                                     # If we have an XML document ...
                                     elif tr.text[:5].lower() == u'<?xml':
                                         # Strip the time codes for the report
-                                        tr.text = reportText.StripTimeCodes(tr.text)
+                                        tmpText = self.GetReportXML(tr.text)
 
                                         # Create the Transana XML to RTC Import Parser.  This is needed so that we can
                                         # pull XML transcripts into the existing RTC without resetting the contents of
@@ -2316,7 +1755,7 @@ class ReportGenerator(wx.Object):
                                         # Pass the reportText RTC and the desired additional margins in.
                                         handler = PyXML_RTCImportParser.XMLToRTCHandler(reportText, (127, 127))
                                         # Parse the transcript text, adding it to the reportText RTC
-                                        xml.sax.parseString(tr.text, handler)
+                                        xml.sax.parseString(tmpText, handler)
 
                                     # If we have a transcript that is neither RTF nor XML (shouldn't happen!)
                                     else:
@@ -2497,7 +1936,7 @@ class ReportGenerator(wx.Object):
                             for key in tmpKeys:
                                 
                                 # See if the keyword should be included, based on the Keyword Filter List
-                                if (key[0], key[1], True) in self.keywordFilterList:
+                                if (key[0], key[1], True) in keywordFilterSet:
 
                                     # Add the keyword
                                     reportText.WriteText('%s : %s  (' % (key[0], key[1]))
@@ -2515,7 +1954,7 @@ class ReportGenerator(wx.Object):
                                             if tmpObj.episode_num > 0:
                                                 keywordTimes['%s : %s' % (key[0], key[1])] += tmpObj.episode_duration
                                         # Remember that THIS Snapshot with THIS Keyword HAS been counted now
-                                        self.itemsCounted.append(('Snapshot', tmpObj.number, key[0], key[1]))
+                                        self.itemsCounted.add(('Snapshot', tmpObj.number, key[0], key[1]))
 
                                     # Get the Graphic for the Coding Key
                                     tmpImage = SnapshotWindow.CodingKeyGraphic(tmpObj.keywordStyles[key])
@@ -2575,7 +2014,7 @@ class ReportGenerator(wx.Object):
                         # Iterate through the list of Keywords for the group
                         for (keywordGroup, keyword, example) in minorList[(itemRecord['Type'], recNum)]:
                             # See if the keyword should be included, based on the Keyword Filter List
-                            if (keywordGroup, keyword, True) in self.keywordFilterList:
+                            if (keywordGroup, keyword, True) in keywordFilterSet:
                                 # Add the Keyword to the report
                                 reportText.WriteText('%s : %s\n' % (keywordGroup, keyword))
 #                                reportText.Newline()
@@ -2592,7 +2031,7 @@ class ReportGenerator(wx.Object):
                                             keywordTimes['%s : %s' % (keywordGroup, keyword)] = 0
                                             keywordLengths['%s : %s' % (keywordGroup, keyword)] = tmpObj.end_char - tmpObj.start_char
                                         # Remember that THIS Quote with THIS Keyword HAS been counted now
-                                        self.itemsCounted.append(('Quote', tmpObj.number, keywordGroup, keyword))
+                                        self.itemsCounted.add(('Quote', tmpObj.number, keywordGroup, keyword))
                                 # If we have a Clip ...
                                 elif itemRecord['Type'] == 'Clip':
                                     # if THIS Clip with THIS Keyword has NOT already been counted ...
@@ -2606,7 +2045,7 @@ class ReportGenerator(wx.Object):
                                             keywordTimes['%s : %s' % (keywordGroup, keyword)] = tmpObj.clip_stop - tmpObj.clip_start
                                             keywordLengths['%s : %s' % (keywordGroup, keyword)] = 0
                                         # Remember that THIS Clip with THIS Keyword HAS been counted now
-                                        self.itemsCounted.append(('Clip', tmpObj.number, keywordGroup, keyword))
+                                        self.itemsCounted.add(('Clip', tmpObj.number, keywordGroup, keyword))
                                 # If we have a Snapshot ...
                                 elif itemRecord['Type'] == 'Snapshot':
                                     # if THIS Snapshot with THIS Keyword has NOT already been counted ...
@@ -2625,7 +2064,7 @@ class ReportGenerator(wx.Object):
                                                ((self.episodeName != None) or (self.collection != None) or (self.searchColl != None)):
                                                 keywordTimes['%s : %s' % (keywordGroup, keyword)] += tmpObj.episode_duration
                                         # Remember that THIS Snapshot with THIS Keyword HAS been counted now
-                                        self.itemsCounted.append(('Snapshot', tmpObj.number, keywordGroup, keyword))
+                                        self.itemsCounted.add(('Snapshot', tmpObj.number, keywordGroup, keyword))
                                     
                     # if we are supposed to show Comments ...
                     if self.showComments:
@@ -2659,13 +2098,13 @@ class ReportGenerator(wx.Object):
                         notesList = []
                         # ... get a list of notes, including their object numbers
                         if self.showQuoteNotes and (itemRecord['Type'] == 'Quote'):
-                            notesList = DBInterface.list_of_notes(Quote=tmpObj.number, includeNumber=True)
+                            notesList = self.GetCachedData(DBInterface.list_of_notes, Quote=tmpObj.number, includeNumber=True)
                             prompt = _('Quote Notes:\n')
                         elif self.showClipNotes and (itemRecord['Type'] == 'Clip'):
-                            notesList = DBInterface.list_of_notes(Clip=tmpObj.number, includeNumber=True)
+                            notesList = self.GetCachedData(DBInterface.list_of_notes, Clip=tmpObj.number, includeNumber=True)
                             prompt = _('Clip Notes:\n')
                         elif self.showSnapshotNotes and (itemRecord['Type'] == 'Snapshot'):
-                            notesList = DBInterface.list_of_notes(Snapshot=tmpObj.number, includeNumber=True)
+                            notesList = self.GetCachedData(DBInterface.list_of_notes, Snapshot=tmpObj.number, includeNumber=True)
                             prompt = _('Snapshot Notes:\n')
                         # If there are notes for this object ...
                         if len(notesList) > 0:
@@ -2678,7 +2117,7 @@ class ReportGenerator(wx.Object):
                             # Iterate throught the list of notes ...
                             for note in notesList:
                                 # ... load each note ...
-                                tempNote = Note.Note(note[0])
+                                tempNote = self.GetCachedData(Note.Note, note[0])
                                 # Turn bold on.
                                 reportText.SetTxtStyle(fontBold = useBold, parLeftIndent = 127, parRightIndent = 127,
                                                        parSpacingBefore = 0, parSpacingAfter = 0)
@@ -2731,99 +2170,756 @@ class ReportGenerator(wx.Object):
                                    parLeftIndent = 32, parRightIndent = 0, parSpacingBefore = 0, parSpacingAfter = 0,
                                    parTabs = [1143 - macAdjust], overrideGDIWarning = True)
 
-            # Get a list of the Keyword Group : Keyword pairs that have been used
-            countKeys = keywordCounts.keys()
-            # Sort the list
-            countKeys.sort()
-            # Add the sorted keywords to the summary with their counts
-            for key in countKeys:
-                prompt = '%s\t%5d'
-                if (self.documentName != None) or (self.episodeName != None) or (self.collection != None) or (self.searchColl != None):
-                    if len(keywordLengths) > 0:
-                        # Add the text to the report.
-                        prompt += '  %10d'
-                    if len(keywordTimes) > 0:
-                        # Add the text to the report.
-                        prompt += '  %10s'
-                data = (key[:keyWidth], keywordCounts[key])
+            # Get a list of the Keyword Group : Keyword pairs that have been used
+            countKeys = keywordCounts.keys()
+            # Sort the list
+            countKeys.sort()
+            # Add the sorted keywords to the summary with their counts
+            for key in countKeys:
+                prompt = '%s\t%5d'
+                if (self.documentName != None) or (self.episodeName != None) or (self.collection != None) or (self.searchColl != None):
+                    if len(keywordLengths) > 0:
+                        # Add the text to the report.
+                        prompt += '  %10d'
+                    if len(keywordTimes) > 0:
+                        # Add the text to the report.
+                        prompt += '  %10s'
+                data = (key[:keyWidth], keywordCounts[key])
+
+                if (self.documentName != None) or (self.episodeName != None) or (self.collection != None) or (self.searchColl != None):
+                    if len(keywordLengths) > 0:
+                        if keywordLengths.has_key(key):
+                            data += (keywordLengths[key],)
+                        else:
+                            data += (0,)
+                    if len(keywordTimes) > 0:
+                        if keywordTimes.has_key(key):
+                            data += (Misc.time_in_ms_to_str(keywordTimes[key]),)
+                        else:
+                            data += (Misc.time_in_ms_to_str(0), )
+
+                prompt += '\n'
+                # Add the text to the report.
+                reportText.WriteText(prompt % data)
+#                reportText.Newline()
+
+            # Show total number of items reported
+            if self.quoteCount + self.clipCount + self.snapshotCount > 0:
+                # Set the font for the data
+                reportText.SetTxtStyle(fontSize = 10, parSpacingBefore = 0, parSpacingAfter = 0,
+                                       parTabs = [1121 - macAdjust, 1250 - macAdjust], overrideGDIWarning = True)
+                # Add the total Item Count
+                reportText.WriteText(u'\n' + (unicode(_('Items:'), 'utf8') + u'\t%6d\n') % (self.quoteCount + self.clipCount + self.snapshotCount))
+#                reportText.Newline()
+
+            # If we have Documents / Quotes ...
+            if self.quoteCount > 0:
+                # If we have a Library Report ...
+                if self.collection == None and self.documentName == None and self.episodeName == None:
+                    prompt = u'  ' + unicode(_('Documents:'), 'utf8') + u'\t%6d'
+                else:
+                    prompt = u'  ' + unicode(_('Quotes:'), 'utf8') + u'\t%6d'
+                data = (self.quoteCount,)
+                if self.showKeywords  or self.showKeywordSummary or self.showTime:
+                    prompt += u'  %10s'
+                    data += (self.quoteTotalLength,)
+                # Add the total Item Count
+                reportText.WriteText(prompt % data)
+                reportText.WriteText('\n')
+                
+            # If we have Episodes / Clips ...
+            if self.clipCount > 0:
+                # If we have a Library Report ...
+                if self.collection == None and self.documentName == None and self.episodeName == None:
+                    prompt = u'  ' + unicode(_('Episodes:'), 'utf8') + u'\t%6d'
+                else:
+                    prompt = u'  ' + unicode(_('Clips:'), 'utf8') + u'\t%6d'
+                data = (self.clipCount,)
+                if self.showKeywords  or self.showKeywordSummary or self.showTime:
+                    if ((self.documentName != None) or (self.episodeName != None) or \
+                        (self.collection != None) or (self.searchColl != None)) and \
+                        (len(keywordLengths) > 0):
+                        prompt += u'            '
+                    prompt += u'   %s'
+                    data += (Misc.time_in_ms_to_str(self.clipTotalTime),)
+                # Add the total Item Count
+                reportText.WriteText(prompt % data)
+                reportText.WriteText('\n')
+
+            # If we have Snapshots ...
+            if self.snapshotCount > 0:
+                prompt = u'  ' + unicode(_('Snapshots:'), 'utf8') + u'\t%6d'
+                data = (self.snapshotCount,)
+                if self.showKeywords  or self.showKeywordSummary or self.showTime:
+                    if ((self.documentName != None) or (self.episodeName != None) or \
+                        (self.collection != None) or (self.searchColl != None)) and \
+                        (len(keywordLengths) > 0):
+                        prompt += u'            '
+                    prompt += u'   %s'
+                    data += (Misc.time_in_ms_to_str(self.snapshotTotalTime),)
+                # Add the total Item Count
+                reportText.WriteText(prompt % data)
+                reportText.WriteText('\n')
+
+        # Make the control read only, now that it's done
+        reportText.SetReadOnly(True)
+
+    def GetReportData(self, populateFilterList):
+        """ Get the report data, as (majorLabel, majorList, minorList).  The data is kept, and is re-used as long as
+            the Nested Data setting doesn't change.  If populateFilterList is True, the data is read again and the
+            Filter Lists are populated. """
+        # If we have the data for the current Nested Data setting, and don't need to populate the Filter Lists ...
+        if (not populateFilterList) and (self.reportData != None) and (self.reportData[0] == self.showNested):
+            # ... we don't need to read it again
+            return self.reportData[1]
+        # Initialize the majorLabel, which not all reports use
+        majorLabel = None
+        # Create minorList as a blank Dictionary Object
+        minorList = {}
+
+        # If a Collection is passed in ...
+        if self.collection != None:
+            # The major label for objects for the Collection report is Clip
+            majorLabel = _('Clip')
+            # An empty Collection (number == 0) signals the request for the Global report
+            if self.collection.number == 0:
+                # The global report has no subtitle.
+                self.subtitle = ''
+                # We initialize the major list to an empty list for the global report
+                majorList = []
+            # A non-empty collection signals a scoped report.
+            else:
+                # Add a subtitle and ...
+                if 'unicode' in wx.PlatformInfo:
+                    # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+                    prompt = unicode(_("Collection: %s"), 'utf8')
+                else:
+                    prompt = _("Collection: %s")
+                self.subtitle = prompt % self.collection.GetNodeString()
+                
+                # initialize the Major List of report elements.  Clips and Snapshots will be sorted and included.
+                majorList = []
+                # initialize a Dictionary for all Report Artifacts (for sorting!)
+                tmpDict = {}
+                
+                # Get a list of all Clips in the Collection.
+                tmpClipList = DBInterface.list_of_clips_by_collectionnum(self.collection.number, includeSortOrder=True)
+                # For each Clip ...
+                for x in tmpClipList:
+                    # ... add the Clip to the Dictionary with the Sort Order as the key and with the Object Type added
+                    tmpDict[x[3]] = (('Clip',) + x)
+
+                if TransanaConstants.proVersion:
+                    # Get a list of all Quotes in the Collection.
+                    tmpQuoteList = DBInterface.list_of_quotes_by_collectionnum(self.collection.number, includeSortOrder=True)
+                    # For each Quote ...
+                    for x in tmpQuoteList:
+                        # ... add the Quote to the Dictionary with the Sort Order as the key and with the Object Type added
+                        tmpDict[x[3]] = (('Quote',) + x[:-1])
+
+                    # Get a list of all Snapshots in the Collection.
+                    tmpSnapshotList = DBInterface.list_of_snapshots_by_collectionnum(self.collection.number, includeSortOrder=True)
+                    # For each Snapshot ...
+                    for x in tmpSnapshotList:
+                        # ... add the Snapshot to the Dictionary with the Sort Order as the key and with the Object Type added
+                        tmpDict[x[3]] = (('Snapshot',) + x)
+                        
+                # Get the Dictionary's Keys
+                order = tmpDict.keys()
+                # Sort the Dictionary's Keys
+                order.sort()
+                # For each element in the sorted list of Keys ...
+                for x in order:
+                    # Add the elemnt to the Major List.
+                    majorList.append(tmpDict[x][:-1])
+
+            # If we're supposed to show Nested Collection data ...
+            if self.showNested:
+                # ... we first need to get the nested collections for the top level
+                nestedCollections = DBInterface.list_of_collections(self.collection.number)
+                # As long as there are entries in the list of nested collections that haven't been processed ...
+                while len(nestedCollections) > 0:
+                    # ... extract the data from the top of the nested collection list ...
+                    (collNum, collName, parentCollNum) = nestedCollections[0]
+                    # ... and remove that entry from the list.
+                    del(nestedCollections[0])
+                    # initialize a Dictionary for all Report Artifacts (for sorting!)
+                    tmpDict = {}
+                    # Get a list of all Clips in the Collection.
+                    tmpClipList = DBInterface.list_of_clips_by_collectionnum(collNum, includeSortOrder=True)
+                    # For each Clip ...
+                    for x in tmpClipList:
+                        # ... add the Clip to the Dictionary with the Sort Order as the key and with the Object Type added
+                        tmpDict[x[3]] = (('Clip',) + x)
+                    if TransanaConstants.proVersion:
+                        # Get a list of all Quotes in the Collection.
+                        tmpQuoteList = DBInterface.list_of_quotes_by_collectionnum(collNum, includeSortOrder=True)
+                        # For each Quote ...
+                        for x in tmpQuoteList:
+                            # ... add the Quote to the Dictionary with the Sort Order as the key and with the Object Type added
+                            tmpDict[x[3]] = (('Quote',) + x[:-1])
+                        # Get a list of all Snapshots in the Collection.
+                        tmpSnapshotList = DBInterface.list_of_snapshots_by_collectionnum(collNum, includeSortOrder=True)
+                        # For each Snapshot ...
+                        for x in tmpSnapshotList:
+                            # ... add the Snapshot to the Dictionary with the Sort Order as the key and with the Object Type added
+                            tmpDict[x[3]] = (('Snapshot',) + x)
+                    # Get the Dictionary's Keys
+                    order = tmpDict.keys()
+                    # Sort the Dictionary's Keys
+                    order.sort()
+                    # For each element in the sorted list of Keys ...
+                    for x in order:
+                        # Add the elemnt to the Major List.
+                        majorList.append(tmpDict[x][:-1])
+
+                    # Then get the nested collections under the new collection and add them to the Nested Collection list
+                    # They get added at the FRONT of the list so that the report will mirror the organization of the
+                    # database Tree.
+                    nestedCollections = DBInterface.list_of_collections(collNum) + nestedCollections
+
+            # Get the Keywords for all the Clips and Snapshots in the majorList at once
+            keywordLists = self.GetKeywordLists([(objType, objNo) for (objType, objNo, objName, collNo) in majorList])
+            # Put all the Keywords for the Clips and Snapshots in the majorList in the minorList.
+            # Start by iterating through the Major List
+            for (objType, objNo, objName, collNo) in majorList:
+                # Create a Minor List dictionary entry, indexed to clip or snapshot number, for the keywords.
+                if objType == 'Quote':
+                    minorList[(objType, objNo)] = keywordLists[(objType, objNo)]
+                elif objType == 'Clip':
+                    minorList[(objType, objNo)] = keywordLists[(objType, objNo)]
+                elif objType == 'Snapshot':
+                    minorList[(objType, objNo)] = keywordLists[(objType, objNo)]
+                # If we're populating Filter Lists ...
+                if populateFilterList:
+                    # If we have a Quote ...
+                    if objType == 'Quote':
+                        # ... add it to the Quote Filter List
+                        listToPopulate = self.quoteFilterList
+                    # If we have a Clip ...
+                    elif objType == 'Clip':
+                        # ... add it to the regular Filter List
+                        listToPopulate = self.filterList
+                    # If we have a Snapshot ...
+                    elif objType == 'Snapshot':
+                        # ... add it to the Snapshot Filter List
+                        listToPopulate = self.snapshotFilterList
+                    # ... then add the Artifact data to the appropiate Filter List, initially checked ...
+                    listToPopulate.append((objName, collNo, True))
+                    # ... and iterate through that clip's keywords or the snapshot's whole snapshot keywords ...
+                    for (kwg, kw, ex) in minorList[(objType, objNo)]:
+                        # ... check to see if the entry is NOT already in the list ...
+                        if (kwg, kw, True) not in self.keywordFilterList:
+                            # ... and add the keyword entry to the Keyword Filter List if it's not already there.
+                            self.keywordFilterList.append((kwg, kw, True))
+
+                    # If we have a Snapshot ...
+                    if objType == 'Snapshot':
+                        # ... get a list of the Snapshot's Detail Coding
+                        tmpList = DBInterface.list_of_snapshot_detail_keywords(Snapshot = objNo)
+                        # For each Keyword Group : Keyword pair ...
+                        for (kwg, kw) in tmpList:
+                            # ... check to see if the entry is NOT already in the list ...
+                            if (kwg, kw, True) not in self.keywordFilterList:
+                                # ... and add the keyword entry to the Keyword Filter List if it's not already there.
+                                self.keywordFilterList.append((kwg, kw, True))
+
+        # If a Document Name is passed in ...
+        elif self.documentName != None:
+            # ...  add a subtitle
+            if 'unicode' in wx.PlatformInfo:
+                # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+                prompt = unicode(_("Document: %s"), 'utf8')
+            else:
+                prompt = _("Episode: %s")
+            self.subtitle = prompt % self.documentName
+            # First, get the Document Object ...
+            docObj = Document.Document(libraryID=self.seriesName, documentID=self.documentName)
+
+            # initialize the Major List of report elements.  Quotes and Snapshots will be sorted and included.
+            majorList = []
+            # initialize a Dictionary for all Report Artifacts (for sorting!)
+            tmpDict = {}
+                
+            # Get a list of all Quotes created from the Document
+            tmpQuoteList = DBInterface.list_of_quotes_by_document(docObj.number)
+            # For each Quote ...
+            for x in tmpQuoteList:
+                # ... specify that this is a Quote
+                x['Type'] = 'Quote'
+                # ... add the Quote to the Dictionary with the Sort Order as the key and with the Object Type added
+                tmpDict[(x['StartChar'], x['EndChar'], x['CollectID'], x['CollectNum'], x['QuoteID'], 'Quote')] = x
+
+##            if TransanaConstants.proVersion:
+##                # Get a list of all Snapshots in the Collection.
+##                tmpSnapshotList = DBInterface.list_of_snapshots_by_episode(epObj.number)
+##                # For each Snapshot ...
+##                for x in tmpSnapshotList:
+##                    # ... specify that this is a Snapshot
+##                    x['Type'] = 'Snapshot'
+##                    # ... add the Snapshot to the Dictionary with the Sort Order as the key and with the Object Type added
+##                    tmpDict[(x['SnapshotStart'], x['SnapshotStop'], x['CollectID'], x['CollectNum'], x['SnapshotID'], 'Snapshot')] = x
+            # Get the Dictionary's Keys
+            order = tmpDict.keys()
+            # Sort the Dictionary's Keys
+            order.sort()
+            # For each element in the sorted list of Keys ...
+            for x in order:
+                # Add the elemnt to the Major List.
+                majorList.append(tmpDict[x])
+
+            # Get the Keywords for all the Quotes in the majorList at once
+            keywordLists = self.GetKeywordLists([(item['Type'], item['QuoteNum']) for item in majorList if item['Type'] == 'Quote'])
+            # Put all the Keywords for the Quotes and Snapshots in the majorList in the minorList.
+            # Start by iterating through the Major List
+            for item in majorList:
+                # Create a Minor List dictionary entry, indexed to quote or snapshot number, for the keywords.
+                if item['Type'] == 'Quote':
+                    minorList[(item['Type'], item['QuoteNum'])] = keywordLists[(item['Type'], item['QuoteNum'])]
+##                elif item['Type'] == 'Snapshot':
+##                    minorList[(item['Type'], item['SnapshotNum'])] = DBInterface.list_of_keywords(Snapshot = item['SnapshotNum'])
+                # If we're populating Filter Lists ...
+                if populateFilterList:
+                    # If we have a Snapshot ...
+                    if item['Type'] == 'Snapshot':
+                        # ... add it to the Snapshot Filter List
+                        listToPopulate = self.snapshotFilterList
+                        objName = item['SnapshotID']
+                        objNo = item['SnapshotNum']
+                    # If we DON'T have a Snapshot ...
+                    else:
+                        # ... add it to the Quote Filter List
+                        listToPopulate = self.quoteFilterList
+                        objName = item['QuoteID']
+                        objNo = item['QuoteNum']
+                    # ... then add the Artifact data to the appropiate Filter List, initially checked ...
+                    listToPopulate.append((objName, item['CollectNum'], True))
+                    # ... and iterate through that quote's keywords or the snapshot's whole snapshot keywords ...
+                    for (kwg, kw, ex) in minorList[(item['Type'], objNo)]:
+                        # ... check to see if the entry is NOT already in the list ...
+                        if (kwg, kw, True) not in self.keywordFilterList:
+                            # ... and add the keyword entry to the Keyword Filter List if it's not already there.
+                            self.keywordFilterList.append((kwg, kw, True))
+
+##                    # If we have a Snapshot ...
+##                    if item['Type'] == 'Snapshot':
+##                        # ... get a list of the Snapshot's Detail Coding
+##                        tmpList = DBInterface.list_of_snapshot_detail_keywords(Snapshot = item['SnapshotNum'])
+##                        # For each Keyword Group : Keyword pair ...
+##                        for (kwg, kw) in tmpList:
+##                            # ... check to see if the entry is NOT already in the list ...
+##                            if (kwg, kw, True) not in self.keywordFilterList:
+##                                # ... and add the keyword entry to the Keyword Filter List if it's not already there.
+##                                self.keywordFilterList.append((kwg, kw, True))
+
+        # If an Episode Name is passed in ...
+        elif self.episodeName != None:
+            # ...  add a subtitle
+            if 'unicode' in wx.PlatformInfo:
+                # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+                prompt = unicode(_("Episode: %s"), 'utf8')
+            else:
+                prompt = _("Episode: %s")
+            self.subtitle = prompt % self.episodeName
+            # First, get the Episode Object ...
+            epObj = Episode.Episode(series = self.seriesName, episode = self.episodeName)
+
+            # initialize the Major List of report elements.  Clips and Snapshots will be sorted and included.
+            majorList = []
+            # initialize a Dictionary for all Report Artifacts (for sorting!)
+            tmpDict = {}
+                
+            # Get a list of all Clips created from the Episode
+            tmpClipList = DBInterface.list_of_clips_by_episode(epObj.number)
+            # For each Clip ...
+            for x in tmpClipList:
+                # ... specify that this is a Clip
+                x['Type'] = 'Clip'
+                # ... add the Clip to the Dictionary with the Sort Order as the key and with the Object Type added
+                tmpDict[(x['ClipStart'], x['ClipStop'], x['CollectID'], x['CollectNum'], x['ClipID'], 'Clip')] = x
+
+            if TransanaConstants.proVersion:
+                # Get a list of all Snapshots in the Collection.
+                tmpSnapshotList = DBInterface.list_of_snapshots_by_episode(epObj.number)
+                # For each Snapshot ...
+                for x in tmpSnapshotList:
+                    # ... specify that this is a Snapshot
+                    x['Type'] = 'Snapshot'
+                    # ... add the Snapshot to the Dictionary with the Sort Order as the key and with the Object Type added
+                    tmpDict[(x['SnapshotStart'], x['SnapshotStop'], x['CollectID'], x['CollectNum'], x['SnapshotID'], 'Snapshot')] = x
+            # Get the Dictionary's Keys
+            order = tmpDict.keys()
+            # Sort the Dictionary's Keys
+            order.sort()
+            # For each element in the sorted list of Keys ...
+            for x in order:
+                # Add the elemnt to the Major List.
+                majorList.append(tmpDict[x])
+
+            # Get the Keywords for all the Clips and Snapshots in the majorList at once
+            keywordLists = self.GetKeywordLists([(item['Type'], item['ClipNum']) for item in majorList if item['Type'] == 'Clip'] + \
+                                                [(item['Type'], item['SnapshotNum']) for item in majorList if item['Type'] == 'Snapshot'])
+            # Put all the Keywords for the Clips and Snapshots in the majorList in the minorList.
+            # Start by iterating through the Major List
+            for item in majorList:
+                # Create a Minor List dictionary entry, indexed to clip or snapshot number, for the keywords.
+                if item['Type'] == 'Clip':
+                    minorList[(item['Type'], item['ClipNum'])] = keywordLists[(item['Type'], item['ClipNum'])]
+                elif item['Type'] == 'Snapshot':
+                    minorList[(item['Type'], item['SnapshotNum'])] = keywordLists[(item['Type'], item['SnapshotNum'])]
+                # If we're populating Filter Lists ...
+                if populateFilterList:
+                    # If we have a Snapshot ...
+                    if item['Type'] == 'Snapshot':
+                        # ... add it to the Snapshot Filter List
+                        listToPopulate = self.snapshotFilterList
+                        objName = item['SnapshotID']
+                        objNo = item['SnapshotNum']
+                    # If we DON'T have a Snapshot ...
+                    else:
+                        # ... add it to the regular Filter List
+                        listToPopulate = self.filterList
+                        objName = item['ClipID']
+                        objNo = item['ClipNum']
+                    # ... then add the Artifact data to the appropiate Filter List, initially checked ...
+                    listToPopulate.append((objName, item['CollectNum'], True))
+                    # ... and iterate through that clip's keywords or the snapshot's whole snapshot keywords ...
+                    for (kwg, kw, ex) in minorList[(item['Type'], objNo)]:
+                        # ... check to see if the entry is NOT already in the list ...
+                        if (kwg, kw, True) not in self.keywordFilterList:
+                            # ... and add the keyword entry to the Keyword Filter List if it's not already there.
+                            self.keywordFilterList.append((kwg, kw, True))
+
+                    # If we have a Snapshot ...
+                    if item['Type'] == 'Snapshot':
+                        # ... get a list of the Snapshot's Detail Coding
+                        tmpList = DBInterface.list_of_snapshot_detail_keywords(Snapshot = item['SnapshotNum'])
+                        # For each Keyword Group : Keyword pair ...
+                        for (kwg, kw) in tmpList:
+                            # ... check to see if the entry is NOT already in the list ...
+                            if (kwg, kw, True) not in self.keywordFilterList:
+                                # ... and add the keyword entry to the Keyword Filter List if it's not already there.
+                                self.keywordFilterList.append((kwg, kw, True))
+
+        # If a Library Name is passed in ...            
+        elif self.seriesName != None:
+            # ...  add a subtitle
+            if 'unicode' in wx.PlatformInfo:
+                # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+                prompt = unicode(_("Library: %s"), 'utf8')
+            else:
+                prompt = _("Library: %s")
+            self.subtitle = prompt % self.seriesName
+            # The label for our Major unit should reflect that these are Episodes
+            majorLabel = _('Episode')
+            # Initialize the Major List
+            majorList = []
+
+            # Get the Library Object
+            tmpLibraryObj = Library.Library(self.seriesName)
+            # Get a Dictionary of all items in this Library
+            tempDict = DBInterface.dictionary_of_documents_and_episodes(tmpLibraryObj)
+            # Get the Keywords for all the items in this Library at once
+            keywordLists = self.GetKeywordLists([(objType, objNum) for (objType, objNum, objParentNum) in tempDict.values()])
+            # Get the keys to the dictionary
+            keys = tempDict.keys()
+            # Sort the keys so the report will be displayed in the correct order
+            keys.sort()
+            # For each Key in the data list ...
+            for key in keys:
+                # ... get the data object's Name from the dictionary Key ...
+                objName = key[0]
+                # ... and get the Object's Type, Number, and Parent Number from the dictionary Value
+                (objType, objNum, objParentNum) = tempDict[key]
+                # Put the Item in the Major List
+                majorList.append((objType, objNum, objName, objParentNum))
+                # If we have a Document ...
+                if objType == 'Document':
+                    # Put all the Keywords for the Document in the majorList in the minorList
+                    minorList[(objType, objNum)] = keywordLists[(objType, objNum)]
+                # If we have an Episode ...
+                elif objType == 'Episode':
+                    # Put all the Keywords for the Episodes in the majorList in the minorList
+                    minorList[(objType, objNum)] = keywordLists[(objType, objNum)]
+                # If we're populating the Filter Lists ...
+                if populateFilterList:
+                    if objType == 'Document':
+                        # ... Add the Document data to the document Filter List ...
+                        self.documentFilterList.append((objName, self.seriesName, True))
+                    else:
+                        # ... Add the Episode data to the main Filter List ...
+                        self.filterList.append((objName, self.seriesName, True))
+                    # ... Iterate through the keywords that were just added to the Minor List (only for this Key) ...
+                    for (kwg, kw, ex) in minorList[(objType, objNum)]:
+                        # .. and IF they're not already in the list ...
+                        if (kwg, kw, True) not in self.keywordFilterList:
+                            # ... add them to the Keyword Filter List
+                            self.keywordFilterList.append((kwg, kw, True))
+
+        # If this report is called for a SearchLibraryResult, we build the majorList based on the contents of the Tree Control.
+        elif (self.searchSeries != None) and (self.treeCtrl != None):
+            # Get the Search Result Name for the subtitle
+            searchResultNode = self.searchSeries
+            # Start a loop to move up the tree.  Keep going until interrupted.
+            while True:
+                # Move up to the Parent of the current node
+                searchResultNode = self.treeCtrl.GetItemParent(searchResultNode)
+                # Get the Data for the new node
+                tempData = self.treeCtrl.GetPyData(searchResultNode)
+                # If we are at the SearchResultsNode ...
+                if tempData.nodetype == 'SearchResultsNode':
+                    # ... we can stop moving up.  Break the loop.
+                    break
+            # Now build the subtitle
+            if 'unicode' in wx.PlatformInfo:
+                # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+                prompt = unicode(_("Search Library: %s"), 'utf8')
+            else:
+                prompt = _("Search Library: %s")
+            self.subtitle = prompt % (self.treeCtrl.GetItemText(self.searchSeries),)
+            # The majorLabel is for Episodes in this case
+            majorLabel = _('Episode')
+            # Initialize the majorList to an empty list
+            majorList = []
+            # Get the first Child node from the searchColl collection
+            (item, cookie) = self.treeCtrl.GetFirstChild(self.searchSeries)
+            # Process all children in the searchLibrary Library.  (IsOk() fails when all children are processed.)
+            while item.IsOk():
+                # Get the child item's Name
+                itemText = self.treeCtrl.GetItemText(item)
+                # Get the child item's Node Data
+                itemData = self.treeCtrl.GetPyData(item)
+                # See if the item is a Document
+                if itemData.nodetype == 'SearchDocumentNode':
+                    # If it's a Document, add the Document's Node Data to the majorList
+                    majorList.append(('Document', itemData.recNum, itemText, itemData.parent))
+                    # If we're populating the Filter Lists ...
+                    if populateFilterList:
+                        # ... Add the Episode data to the main Filter List ...
+                        self.documentFilterList.append((itemText, self.treeCtrl.GetItemText(self.treeCtrl.GetItemParent(item)), True))
+                # See if the item is an Episode
+                elif itemData.nodetype == 'SearchEpisodeNode':
+                    # If it's an Episode, add the Episode's Node Data to the majorList
+                    majorList.append(('Episode', itemData.recNum, itemText, itemData.parent))
+                    # If we're populating the Filter Lists ...
+                    if populateFilterList:
+                        # ... Add the Episode data to the main Filter List ...
+                        self.filterList.append((itemText, self.treeCtrl.GetItemText(self.treeCtrl.GetItemParent(item)), True))
+                # Get the next Child Item and continue the loop
+                (item, cookie) = self.treeCtrl.GetNextChild(self.searchSeries, cookie)
+
+##            print "ReportGenerator.OnDisplay():  Search Library Report"
+##            print "majorList:"
+##            for x in range(len(majorList)):
+##                print x, majorList[x]
+##            print
 
-                if (self.documentName != None) or (self.episodeName != None) or (self.collection != None) or (self.searchColl != None):
-                    if len(keywordLengths) > 0:
-                        if keywordLengths.has_key(key):
-                            data += (keywordLengths[key],)
-                        else:
-                            data += (0,)
-                    if len(keywordTimes) > 0:
-                        if keywordTimes.has_key(key):
-                            data += (Misc.time_in_ms_to_str(keywordTimes[key]),)
-                        else:
-                            data += (Misc.time_in_ms_to_str(0), )
+            # Get the Keywords for all the items in the majorList at once
+            keywordLists = self.GetKeywordLists([(objType, EpNo) for (objType, EpNo, epName, epParentNo) in majorList])
+            # Once we have the Episodes in the majorList, we can gather their keywords into the minorList.
+            # Start by iterating through the Major List
+            for (objType, EpNo, epName, epParentNo) in majorList:
+                # If we have a Document ...
+                if objType == 'Document':
+                    # Get all the keywords for the indicated Document and add them to the Minor List, keyed to the Document Name.
+                    minorList[('Document', EpNo)] = keywordLists[(objType, EpNo)]
+                # If we have an Episode ...
+                elif objType == 'Episode':
+                    # Get all the keywords for the indicated Episode and add them to the Minor List, keyed to the Episode Name.
+                    minorList[('Episode', EpNo)] = keywordLists[(objType, EpNo)]
+                # If we're populating the Filter Lists ...
+                if populateFilterList:
+                    # ... Iterate through the keywords that were just added to the Minor List (only for this Key) ...
+                    for (kwg, kw, ex) in minorList[(objType, EpNo)]:
+                        # .. and IF they're not already in the list ...
+                        if (kwg, kw, True) not in self.keywordFilterList:
+                            # ... add them to the Keyword Filter List
+                            self.keywordFilterList.append((kwg, kw, True))
 
-                prompt += '\n'
-                # Add the text to the report.
-                reportText.WriteText(prompt % data)
-#                reportText.Newline()
+##            print "minorList:"
+##            for x in range(len(minorList)):
+##                print x, minorList[x]
+##            print
 
-            # Show total number of items reported
-            if self.quoteCount + self.clipCount + self.snapshotCount > 0:
-                # Set the font for the data
-                reportText.SetTxtStyle(fontSize = 10, parSpacingBefore = 0, parSpacingAfter = 0,
-                                       parTabs = [1121 - macAdjust, 1250 - macAdjust], overrideGDIWarning = True)
-                # Add the total Item Count
-                reportText.WriteText(u'\n' + (unicode(_('Items:'), 'utf8') + u'\t%6d\n') % (self.quoteCount + self.clipCount + self.snapshotCount))
-#                reportText.Newline()
+        # If this report is called for a SearchCollectionResult, we build the majorList based on the contents of the Tree Control.
+        elif (self.searchColl != None) and (self.treeCtrl != None):
+            # Get the Search Result Name for the subtitle
+            searchResultNode = self.searchColl
+            # Start a loop to move up the tree.  Keep going until interrupted.
+            while True:
+                # Move up to the Parent of the current node
+                searchResultNode = self.treeCtrl.GetItemParent(searchResultNode)
+                # Get the Data for the new node
+                tempData = self.treeCtrl.GetPyData(searchResultNode)
+                # If we are at the SearchResultsNode ...
+                if tempData.nodetype in ['SearchRootNode', 'SearchResultsNode']:
+                    # ... we can stop moving up.  Break the loop.
+                    break
+            # Now build the subtitle
+            if 'unicode' in wx.PlatformInfo:
+                # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+                prompt = unicode(_("Search Collection: %s"), 'utf8')
+            else:
+                prompt = _("Search Collection: %s")
+            self.subtitle = prompt % (self.treeCtrl.GetItemText(self.searchColl),)
+            # The majorLabel is for Clips in this case
+            majorLabel = _('Clip')
+            # Initialize the majorList to an empty list
+            majorList = []
+            # Extracting data from the treeCtrl requires a "cookie" value, which is initialized to 0
+            cookie = 0
+            # Get the first Child node from the searchColl collection
+            (item, cookie) = self.treeCtrl.GetFirstChild(self.searchColl)
+            # Create an empty list for Nested Collections so we can recurse through them
+            nestedCollections = []
+            # While looking at children, we need a pointer to the parent node
+            currentNode = self.searchColl
+            # Process all children in the searchColl collection
+            while item.IsOk():
+                # Get the item's Name
+                itemText = self.treeCtrl.GetItemText(item)
+                # Get the item's Node Data
+                itemData = self.treeCtrl.GetPyData(item)
+                # See if the item is a Clip
+                if itemData.nodetype in ['SearchQuoteNode', 'SearchClipNode', 'SearchSnapshotNode']:
+                    if itemData.nodetype == 'SearchQuoteNode':
+                        objType = 'Quote'
+                    elif itemData.nodetype == 'SearchClipNode':
+                        objType = 'Clip'
+                    elif itemData.nodetype == 'SearchSnapshotNode':
+                        objType = 'Snapshot'
+                    # If it's a Clip, add the Clip's Node Data to the majorList
+                    majorList.append((objType, itemData.recNum, itemText, itemData.parent))
+                    # If we're populating the Filter List ...
+                    if populateFilterList:
+                        # If we have a Quote ...
+                        if objType == 'Quote':
+                            # ... add it to the regular Filter List
+                            listToPopulate = self.quoteFilterList
+                        # If we have a Clip ...
+                        elif objType == 'Clip':
+                            # ... add it to the regular Filter List
+                            listToPopulate = self.filterList
+                        # If we have a Snapshot ...
+                        elif objType == 'Snapshot':
+                            # ... add it to the Snapshot Filter List
+                            listToPopulate = self.snapshotFilterList
+                        # ... then add the Artifact data to the appropiate Filter List, initially checked ...
+                        listToPopulate.append((itemText, itemData.parent, True))
+                # If we have a Collection Node ...
+                elif self.showNested and (itemData.nodetype == 'SearchCollectionNode'):
+                    # ... add it to the list of nested Collections to be processed
+                    nestedCollections.append(item)
 
-            # If we have Documents / Quotes ...
-            if self.quoteCount > 0:
-                # If we have a Library Report ...
-                if self.collection == None and self.documentName == None and self.episodeName == None:
-                    prompt = u'  ' + unicode(_('Documents:'), 'utf8') + u'\t%6d'
-                else:
-                    prompt = u'  ' + unicode(_('Quotes:'), 'utf8') + u'\t%6d'
-                data = (self.quoteCount,)
-                if self.showKeywords  or self.showKeywordSummary or self.showTime:
-                    prompt += u'  %10s'
-                    data += (self.quoteTotalLength,)
-                # Add the total Item Count
-                reportText.WriteText(prompt % data)
-                reportText.WriteText('\n')
-                
-            # If we have Episodes / Clips ...
-            if self.clipCount > 0:
-                # If we have a Library Report ...
-                if self.collection == None and self.documentName == None and self.episodeName == None:
-                    prompt = u'  ' + unicode(_('Episodes:'), 'utf8') + u'\t%6d'
+                # When we get to the last Child Item for the current node, ...
+                if item == self.treeCtrl.GetLastChild(currentNode):
+                    # ... check to see if there are nested collections that need to be processed.  If so ...
+                    if len(nestedCollections) > 0:
+                        # ... set the current node pointer to the first nested collection ...
+                        currentNode = nestedCollections[0]
+                        # ... get the first child node of the nested collection ...
+                        (item, cookie) = self.treeCtrl.GetFirstChild(nestedCollections[0])
+                        # ... and remove the nested collection from the list waiting to be processed
+                        del(nestedCollections[0])
+                    # If there are no nested collections to be processed ...
+                    else:
+                        # ... stop looping.  We're done.
+                        break
+                # If we're not at the Last Child Item ...
                 else:
-                    prompt = u'  ' + unicode(_('Clips:'), 'utf8') + u'\t%6d'
-                data = (self.clipCount,)
-                if self.showKeywords  or self.showKeywordSummary or self.showTime:
-                    if ((self.documentName != None) or (self.episodeName != None) or \
-                        (self.collection != None) or (self.searchColl != None)) and \
-                        (len(keywordLengths) > 0):
-                        prompt += u'            '
-                    prompt += u'   %s'
-                    data += (Misc.time_in_ms_to_str(self.clipTotalTime),)
-                # Add the total Item Count
-                reportText.WriteText(prompt % data)
-                reportText.WriteText('\n')
+                    # ... get the next Child Item and continue the loop
+                    (item, cookie) = self.treeCtrl.GetNextChild(currentNode, cookie)
 
-            # If we have Snapshots ...
-            if self.snapshotCount > 0:
-                prompt = u'  ' + unicode(_('Snapshots:'), 'utf8') + u'\t%6d'
-                data = (self.snapshotCount,)
-                if self.showKeywords  or self.showKeywordSummary or self.showTime:
-                    if ((self.documentName != None) or (self.episodeName != None) or \
-                        (self.collection != None) or (self.searchColl != None)) and \
-                        (len(keywordLengths) > 0):
-                        prompt += u'            '
-                    prompt += u'   %s'
-                    data += (Misc.time_in_ms_to_str(self.snapshotTotalTime),)
-                # Add the total Item Count
-                reportText.WriteText(prompt % data)
-                reportText.WriteText('\n')
+            # Get the Keywords for all the Clips and Snapshots in the majorList at once
+            keywordLists = self.GetKeywordLists([(objType, objNo) for (objType, objNo, objName, collNo) in majorList])
+            # Put all the Keywords for the Clips and Snapshots in the majorList in the minorList.
+            # Start by iterating through the Major List
+            for (objType, objNo, objName, collNo) in majorList:
+                # Create a Minor List dictionary entry, indexed to clip or snapshot number, for the keywords.
+                if objType == 'Quote':
+                    minorList[(objType, objNo)] = keywordLists[(objType, objNo)]
+                elif objType == 'Clip':
+                    minorList[(objType, objNo)] = keywordLists[(objType, objNo)]
+                elif objType == 'Snapshot':
+                    minorList[(objType, objNo)] = keywordLists[(objType, objNo)]
+                # If we're populating Filter Lists ...
+                if populateFilterList:
+                    # ... and iterate through that clip's keywords or the snapshot's whole snapshot keywords ...
+                    for (kwg, kw, ex) in minorList[(objType, objNo)]:
+                        # ... check to see if the entry is NOT already in the list ...
+                        if (kwg, kw, True) not in self.keywordFilterList:
+                            # ... and add the keyword entry to the Keyword Filter List if it's not already there.
+                            self.keywordFilterList.append((kwg, kw, True))
 
-        # Make the control read only, now that it's done
-        reportText.SetReadOnly(True)
+                    # If we have a Snapshot ...
+                    if objType == 'Snapshot':
+                        # ... get a list of the Snapshot's Detail Coding
+                        tmpList = DBInterface.list_of_snapshot_detail_keywords(Snapshot = objNo)
+                        # For each Keyword Group : Keyword pair ...
+                        for (kwg, kw) in tmpList:
+                            # ... check to see if the entry is NOT already in the list ...
+                            if (kwg, kw, True) not in self.keywordFilterList:
+                                # ... and add the keyword entry to the Keyword Filter List if it's not already there.
+                                self.keywordFilterList.append((kwg, kw, True))
+
+        # Keep the data, so changes to the Filter settings don't have to read it again
+        self.reportData = (self.showNested, (majorLabel, majorList, minorList))
+        return (majorLabel, majorList, minorList)
+
+    def GetCachedData(self, function, *args, **kwargs):
+        """ Get the result of function(*args, **kwargs), such as Clip.Clip(clipNum) or DBInterface.list_of_notes(Clip=clipNum).
+            Results are kept for the life of the report, so re-building the report for a change in the Filter settings
+            doesn't have to load the same objects again.  (Exceptions aren't kept, so they're raised every time.) """
+        # The function and its parameters identify the result
+        key = (function, args, tuple(sorted(kwargs.items())))
+        # If we don't have the result yet ...
+        if not self.dataCache.has_key(key):
+            # ... get it
+            self.dataCache[key] = function(*args, **kwargs)
+        return self.dataCache[key]
+
+    def GetKeywordLists(self, objects):
+        """ Get the keywords for a list of (object type, object number) tuples with as few queries as possible.
+            Returns a dictionary of lists like the ones DBInterface.list_of_keywords() returns, keyed by the tuples. """
+        # Group the object numbers by object type
+        objectNums = {}
+        for (objType, objNum) in objects:
+            objectNums.setdefault(objType, []).append(objNum)
+        # Every object gets an entry, even if it has no keywords
+        keywordLists = dict([(obj, []) for obj in objects])
+        # For each object type ...
+        for objType in objectNums.keys():
+            # ... get the keywords for all objects of that type
+            for (objNum, keywords) in DBInterface.dictionary_of_keywords(objType, objectNums[objType]).items():
+                keywordLists[(objType, objNum)] = keywords
+        return keywordLists
+
+    def GetReportXML(self, text):
+        """ Get transcript text as XML without Time Codes, ready to be added to the report.  The results are
+            cached, so running the report again doesn't have to convert the same transcripts again. """
+        # The conversion needs the report window's Rich Text Ctrl, as the report itself is built in a Report Model
+        reportText = self.report.reportText
+        # If we have a Rich Text Format document ...
+        if text[:5].lower() == u'{\\rtf':
+            # ... it has to be converted to XML first
+            return ParsedTextCache.GetOrCreate(text, 'ReportXML', self.ConvertRTFToReportXML, reportText)
+        # If we have an XML document ...
+        else:
+            # ... we just need to strip the time codes
+            return ParsedTextCache.GetOrCreate(text, 'ReportXML', reportText.StripTimeCodes)
+
+    def ConvertRTFToReportXML(self, text, reportText):
+        """ Convert Rich Text Format transcript text to XML without Time Codes """
+        # Create a temporary RTC control
+        tmpTxtCtrl = TranscriptEditor_RTC.TranscriptEditor(reportText.parent, pos=(-20, -20), suppressGDIWarning = True)
+        # ... import the RTF data into the report text
+        tmpTxtCtrl.LoadRTFData(text, clearDoc=True)
+        # Pull the data back out of the control as XML
+        tmpText = tmpTxtCtrl.GetFormattedSelection('XML')
+        # Destroy the temporary RTC control
+        tmpTxtCtrl.Destroy()
+        # Strip the time codes for the report
+        return reportText.StripTimeCodes(tmpText)
 
     def OnFilter(self, event):
         """ This method, required by TextReport, implements the call to the Filter Dialog.  It needs to be
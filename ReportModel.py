@@ -0,0 +1,343 @@
+# Copyright (C) 2002-2016 Spurgeon Woods LLC
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of version 2 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+#
+
+""" This module implements the Report Model, the intermediate form of a text report.
+
+    A report is built by calling the same methods on a ReportModel that would be called on the report's
+    Rich Text Ctrl (SetTxtStyle(), WriteText(), Newline(), WriteImage(), BeginURL() and so on).  The model
+    just records the calls, so building a report doesn't need a window.  The recorded report can then be:
+
+      rendered into a Rich Text Ctrl, by replaying the calls (Render())
+      written as HTML (WriteHTML())
+      written as Rich Text Format (WriteRTF())
+
+    Indents and paragraph spacing are in tenths of a millimeter, as in the Rich Text Ctrl.  Images are kept as
+    whatever object the report passes in.  The HTML and RTF writers need a function that converts an image to
+    PNG data to include images.  Without one, images are left out. """
+
+__author__ = 'David Woods <dwoods@transana.com>'
+
+DEBUG = False
+if DEBUG:
+    print "ReportModel DEBUG is ON!"
+
+# import Python's base64 module
+import base64
+# import Python's cgi module, for HTML escaping
+import cgi
+# import Python's struct module
+import struct
+
+# The Rich Text Ctrl's paragraph alignment values (wx.TEXT_ALIGNMENT_xxx) and their HTML and RTF equivalents
+ALIGNMENT_HTML = {2 : 'center', 3 : 'right', 4 : 'justify'}
+ALIGNMENT_RTF = {2 : '\\qc', 3 : '\\qr', 4 : '\\qj'}
+
+# The character formatting a report starts with
+DEFAULT_CHARACTER_STYLE = {'fontFace' : 'Courier New', 'fontSize' : 12, 'fontBold' : False, 'fontItalic' : False,
+                           'fontUnderline' : False, 'fontColor' : None, 'fontBgColor' : None}
+# The paragraph formatting a report starts with
+DEFAULT_PARAGRAPH_STYLE = {'parAlign' : 0, 'parLeftIndent' : 0, 'parRightIndent' : 0,
+                           'parSpacingBefore' : 0, 'parSpacingAfter' : 0}
+
+
+class ReportModel(object):
+    """ The intermediate form of a text report.  size is the size of the window the report is meant for,
+        which reports use to scale images. """
+
+    def __init__(self, size=(800, 600)):
+        # Remember the intended window size
+        self.size = size
+        # The recorded calls, as tuples of the method name and its arguments
+        self.items = []
+        # The number of characters (and images) in the report so far, and the last character
+        self.length = 0
+        self.lastChar = u''
+
+    # The methods that build the report.  They match the Rich Text Ctrl methods of the same names.
+
+    def SetTxtStyle(self, **kwargs):
+        """ Change the character and / or paragraph formatting.  Only formatting that is specified changes. """
+        # Keep only the formatting that's specified
+        style = dict([(key, value) for (key, value) in kwargs.items() if value is not None])
+        self.items.append(('SetTxtStyle', style))
+
+    def WriteText(self, text):
+        """ Add text to the report.  Line breaks start new paragraphs. """
+        if text != '':
+            # Keep the text as it was given, so it's rendered exactly as it would have been written
+            self.items.append(('WriteText', text))
+            text = GetUnicode(text)
+            self.length += len(text)
+            self.lastChar = text[-1]
+
+    def Newline(self):
+        """ Start a new paragraph """
+        self.items.append(('Newline', ))
+        self.length += 1
+        self.lastChar = u'\n'
+
+    def WriteImage(self, image):
+        """ Add an image to the report.  The report keeps its own copy, as callers often destroy the image as
+            soon as it has been written, but the model isn't rendered or exported until later. """
+        self.items.append(('WriteImage', image.Copy()))
+        self.length += 1
+        self.lastChar = u''
+
+    def BeginStyle(self, style):
+        """ Start using a Rich Text Ctrl style.  (The HTML and RTF writers ignore these styles.) """
+        self.items.append(('BeginStyle', style))
+
+    def EndStyle(self):
+        """ Stop using the style from the last BeginStyle() """
+        self.items.append(('EndStyle', ))
+
+    def BeginURL(self, url):
+        """ Start a hyperlink """
+        self.items.append(('BeginURL', url))
+
+    def EndURL(self):
+        """ End a hyperlink """
+        self.items.append(('EndURL', ))
+
+    def SetReadOnly(self, readOnly):
+        """ Make the Rich Text Ctrl the report is rendered into read-only, or not.  (This doesn't change the model.) """
+        self.items.append(('SetReadOnly', readOnly))
+
+    def GetSize(self):
+        """ Get the size of the window the report is meant for """
+        return self.size
+
+    def GetLastPosition(self):
+        """ Get the position of the end of the report """
+        return self.length
+
+    def GetCharAt(self, pos):
+        """ Get the character code at a position.  Only the last character of the report is known. """
+        if (pos == self.length - 1) and (self.lastChar != u''):
+            return ord(self.lastChar)
+        return 0
+
+    # The methods that use the finished report
+
+    def Render(self, txtCtrl):
+        """ Render the report into a Rich Text Ctrl (or anything else with the same methods) by replaying the calls
+            that built the report """
+        for item in self.items:
+            if item[0] == 'SetTxtStyle':
+                txtCtrl.SetTxtStyle(**item[1])
+            else:
+                getattr(txtCtrl, item[0])(*item[1:])
+
+    def GetText(self):
+        """ Get the report's text, without formatting or images """
+        text = []
+        for item in self.items:
+            if item[0] == 'WriteText':
+                text.append(GetUnicode(item[1]))
+            elif item[0] == 'Newline':
+                text.append(u'\n')
+        return u''.join(text)
+
+    def GetParagraphs(self):
+        """ Get the report as a list of (paragraph style, runs) paragraphs.  Each run is (character style, url, text, image),
+            with image None for text, or text None for an image. """
+        paragraphs = []
+        charStyle = dict(DEFAULT_CHARACTER_STYLE)
+        parStyle = dict(DEFAULT_PARAGRAPH_STYLE)
+        url = None
+        runs = []
+        for item in self.items:
+            if item[0] == 'SetTxtStyle':
+                for (key, value) in item[1].items():
+                    if charStyle.has_key(key):
+                        charStyle[key] = value
+                    elif parStyle.has_key(key):
+                        parStyle[key] = value
+            elif item[0] == 'BeginURL':
+                url = GetUnicode(item[1])
+            elif item[0] == 'EndURL':
+                url = None
+            elif item[0] == 'WriteImage':
+                runs.append((dict(charStyle), url, None, item[1]))
+            elif item[0] in ['WriteText', 'Newline']:
+                if item[0] == 'Newline':
+                    lines = [u'', u'']
+                else:
+                    lines = GetUnicode(item[1]).split(u'\n')
+                # Each line break ends a paragraph.  The paragraph formatting in effect at the end of a paragraph is
+                # the formatting the Rich Text Ctrl shows for the paragraph.
+                for (index, line) in enumerate(lines):
+                    if index > 0:
+                        paragraphs.append((dict(parStyle), runs))
+                        runs = []
+                    if line != u'':
+                        runs.append((dict(charStyle), url, line, None))
+        # Add the last paragraph, if it has anything in it
+        if len(runs) > 0:
+            paragraphs.append((dict(parStyle), runs))
+        return paragraphs
+
+    def WriteHTML(self, f, title=u'', imageToPNG=None):
+        """ Write the report to the file f as HTML, encoded as UTF-8.  imageToPNG, if given, converts an image
+            to PNG data so the image can be included. """
+        f.write('<!DOCTYPE html>\n<html>\n<head>\n<meta charset="UTF-8">\n')
+        f.write('<title>%s</title>\n' % cgi.escape(GetUnicode(title)).encode('utf8'))
+        # Keep runs of spaces and tabs, as the report uses them for layout
+        f.write('</head>\n<body style="white-space: pre-wrap">\n')
+        for (parStyle, runs) in self.GetParagraphs():
+            (leftIndent, subIndent) = GetIndents(parStyle['parLeftIndent'])
+            styles = ['margin-left: %.1fmm' % ((leftIndent + subIndent) / 10.0),
+                      'margin-right: %.1fmm' % (parStyle['parRightIndent'] / 10.0),
+                      'margin-top: %.1fmm' % (parStyle['parSpacingBefore'] / 10.0),
+                      'margin-bottom: %.1fmm' % (parStyle['parSpacingAfter'] / 10.0)]
+            if subIndent != 0:
+                styles.append('text-indent: %.1fmm' % (-subIndent / 10.0))
+            if ALIGNMENT_HTML.has_key(parStyle['parAlign']):
+                styles.append('text-align: %s' % ALIGNMENT_HTML[parStyle['parAlign']])
+            f.write('<p style="%s">' % '; '.join(styles))
+            for (charStyle, url, text, image) in runs:
+                if url != None:
+                    f.write('<a href="%s">' % cgi.escape(url, True).encode('utf8'))
+                if text != None:
+                    f.write('<span style="%s">%s</span>' % (GetHTMLCharacterStyle(charStyle), cgi.escape(text).encode('utf8')))
+                elif imageToPNG != None:
+                    f.write('<img src="data:image/png;base64,%s">' % base64.b64encode(imageToPNG(image)))
+                if url != None:
+                    f.write('</a>')
+            # An empty paragraph still takes up a line
+            if len(runs) == 0:
+                f.write('&nbsp;')
+            f.write('</p>\n')
+        f.write('</body>\n</html>\n')
+
+    def WriteRTF(self, f, imageToPNG=None):
+        """ Write the report to the file f as Rich Text Format.  imageToPNG, if given, converts an image to PNG data
+            so the image can be included. """
+        paragraphs = self.GetParagraphs()
+        # Build the font and color tables
+        fonts = []
+        colors = []
+        for (parStyle, runs) in paragraphs:
+            for (charStyle, url, text, image) in runs:
+                if not charStyle['fontFace'] in fonts:
+                    fonts.append(charStyle['fontFace'])
+                for color in (GetRGB(charStyle['fontColor']), GetRGB(charStyle['fontBgColor'])):
+                    if (color != None) and (not color in colors):
+                        colors.append(color)
+        f.write('{\\rtf1\\ansi\\deff0\n{\\fonttbl')
+        for (index, font) in enumerate(fonts):
+            f.write('{\\f%d %s;}' % (index, EscapeRTF(GetUnicode(font))))
+        # Color 0 is the default color
+        f.write('}\n{\\colortbl;')
+        for color in colors:
+            f.write('\\red%d\\green%d\\blue%d;' % color)
+        f.write('}\n')
+        for (parStyle, runs) in paragraphs:
+            (leftIndent, subIndent) = GetIndents(parStyle['parLeftIndent'])
+            f.write('\\pard\\li%d\\ri%d\\sb%d\\sa%d' % (GetTwips(leftIndent + subIndent), GetTwips(parStyle['parRightIndent']),
+                                                      GetTwips(parStyle['parSpacingBefore']), GetTwips(parStyle['parSpacingAfter'])))
+            if subIndent != 0:
+                f.write('\\fi%d' % GetTwips(-subIndent))
+            f.write(ALIGNMENT_RTF.get(parStyle['parAlign'], '\\ql'))
+            for (charStyle, url, text, image) in runs:
+                if text != None:
+                    content = EscapeRTF(text)
+                elif imageToPNG != None:
+                    png = imageToPNG(image)
+                    # The image size is in the PNG header.  Screen pixels are 15 twips.
+                    (width, height) = struct.unpack('>II', png[16:24])
+                    content = '{\\pict\\pngblip\\picw%d\\pich%d\\picwgoal%d\\pichgoal%d\n%s}' % \
+                              (width, height, width * 15, height * 15, png.encode('hex'))
+                else:
+                    continue
+                f.write('{\\f%d\\fs%d' % (fonts.index(charStyle['fontFace']), int(charStyle['fontSize'] * 2)))
+                if charStyle['fontBold']:
+                    f.write('\\b')
+                if charStyle['fontItalic']:
+                    f.write('\\i')
+                if charStyle['fontUnderline']:
+                    f.write('\\ul')
+                if GetRGB(charStyle['fontColor']) != None:
+                    f.write('\\cf%d' % (colors.index(GetRGB(charStyle['fontColor'])) + 1))
+                if GetRGB(charStyle['fontBgColor']) != None:
+                    f.write('\\highlight%d' % (colors.index(GetRGB(charStyle['fontBgColor'])) + 1))
+                if url != None:
+                    f.write(' {\\field{\\*\\fldinst HYPERLINK "%s"}{\\fldrslt %s}}}' % (EscapeRTF(url), content))
+                else:
+                    f.write(' %s}' % content)
+            f.write('\\par\n')
+        f.write('}\n')
+
+
+def GetUnicode(text):
+    """ Get text as unicode.  Reports write both unicode and UTF-8 encoded strings. """
+    if isinstance(text, str):
+        return text.decode('utf8', 'replace')
+    return text
+
+def GetIndents(leftIndent):
+    """ Get the (left indent, left subindent) from a SetTxtStyle() parLeftIndent value, which can be either """
+    if isinstance(leftIndent, tuple):
+        return (leftIndent[0], leftIndent[1])
+    return (leftIndent, 0)
+
+def GetTwips(tenthsOfMM):
+    """ Convert tenths of a millimeter to twips (1/1440 of an inch) """
+    return int(round(tenthsOfMM * 1440 / 254.0))
+
+def GetRGB(color):
+    """ Get the (red, green, blue) values of a color, which can be a wx.Colour or an HTML-style '#RRGGBB' string.
+        Returns None for no color. """
+    if color is None:
+        return None
+    if isinstance(color, (str, unicode)):
+        if (len(color) == 7) and (color[0] == '#'):
+            return (int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16))
+        return None
+    return (color.Red(), color.Green(), color.Blue())
+
+def GetHTMLCharacterStyle(charStyle):
+    """ Get the CSS for a character style """
+    styles = [u"font-family: '%s'" % GetUnicode(charStyle['fontFace']), 'font-size: %spt' % charStyle['fontSize']]
+    if charStyle['fontBold']:
+        styles.append('font-weight: bold')
+    if charStyle['fontItalic']:
+        styles.append('font-style: italic')
+    if charStyle['fontUnderline']:
+        styles.append('text-decoration: underline')
+    if GetRGB(charStyle['fontColor']) != None:
+        styles.append('color: #%02X%02X%02X' % GetRGB(charStyle['fontColor']))
+    if GetRGB(charStyle['fontBgColor']) != None:
+        styles.append('background-color: #%02X%02X%02X' % GetRGB(charStyle['fontBgColor']))
+    return cgi.escape('; '.join(styles), True).encode('utf8')
+
+def EscapeRTF(text):
+    """ Escape text for Rich Text Format.  Characters outside ASCII are written as Unicode escapes. """
+    result = []
+    for char in text:
+        if char in u'\\{}':
+            result.append('\\' + str(char))
+        elif char == u'\t':
+            result.append('\\tab ')
+        elif ord(char) > 127:
+            # RTF Unicode values are signed 16-bit numbers, followed by a "?" for readers that don't know Unicode
+            code = ord(char)
+            if code > 32767:
+                code -= 65536
+            result.append('\\u%d?' % code)
+        else:
+            result.append(str(char))
+    return ''.join(result)
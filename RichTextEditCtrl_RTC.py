@@ -80,6 +80,98 @@ import webbrowser
 # Define the Time Code Character
 TIMECODE_CHAR = unicode('\xc2\xa4', 'utf-8')
 
+# Define the XML representations of the formatting StripTimeCodes() removes.
+# TIME CODE FORMATTING
+XML_TIMECODE_FORMAT = '<text textcolor="#FF0000" bgcolor="#FFFFFF" fontsize="14" fontstyle="90" fontweight="90" fontunderlined="0" fontface="Courier New">'
+# TIME CODE FORMATTING FROM RTF, which has different formatting.  I've found two variations so far.
+XML_RTF_TIMECODE_FORMATS = ['<text textcolor="#FF0000" bgcolor="#FFFFFF" fontsize="11" fontstyle="90" fontweight="90" fontunderlined="0" fontface="Arial">',
+                            '<text textcolor="#FF0000" bgcolor="#FFFFFF" fontsize="11" fontstyle="90" fontweight="90" fontunderlined="0" fontface="Courier New">']
+# HIDDEN FORMATTING
+XML_HIDDEN_FORMAT = '<text textcolor="#FFFFFF" bgcolor="#FFFFFF" fontsize="1" fontstyle="90" fontweight="90" fontunderlined="0" fontface="Times New Roman">'
+# Compiled Regular Expressions that match a whole TIME CODE or HIDDEN text element, from its opening tag to the next </text>
+XML_TIMECODE_REGEXP = re.compile(re.escape(XML_TIMECODE_FORMAT) + '.*?</text>', re.DOTALL)
+XML_HIDDEN_REGEXP = re.compile(re.escape(XML_HIDDEN_FORMAT) + '.*?</text>', re.DOTALL)
+# Compiled Regular Expression that matches a Time Code character and its data that lack time code formatting
+XML_UNFORMATTED_TIMECODE_REGEXP = re.compile('&#164;.*?&gt;', re.DOTALL)
+
+def StripTimeCodesFromXML(XMLText):
+    """ Remove the Time Codes and Time Code Data from RTC XML text.  Each step makes a single pass over the text, so
+        the cost is linear in the size of the document. """
+    # This deletes based on FORMAT, deleting everything in TIME CODE FORMAT and HIDDEN FORMAT.
+
+    # Remove all elements with TIME CODE FORMATTING
+    XMLText = XML_TIMECODE_REGEXP.sub('', XMLText)
+
+    # For each variation of the TIME CODE FORMATTING FROM RTF ...
+    for st in XML_RTF_TIMECODE_FORMATS:
+        # ... remove the time codes and the time code data that follows them
+        XMLText = _StripRTFTimeCodes(XMLText, st)
+
+    # Remove all elements with HIDDEN FORMATTING
+    XMLText = XML_HIDDEN_REGEXP.sub('', XMLText)
+
+    # Some RTF transcripts won't have the formatting right on the time codes, so they won't be found by the code above.
+    # This will try to find and remove these additional time codes.
+    XMLText = XML_UNFORMATTED_TIMECODE_REGEXP.sub('', XMLText)
+
+    return XMLText
+
+def _StripRTFTimeCodes(XMLText, st):
+    """ Remove elements that start with the opening tag st, along with the first "&lt;" ... "&gt;" time code data
+        that follows each one, in a single pass over XMLText """
+    # The pieces of the result are collected in a list and joined once at the end
+    result = []
+    # Note the length of the opening tag
+    stLen = len(st)
+    # Start at the beginning of the text
+    pos = 0
+    # Everything before pos in XMLText has been copied to the result or removed.  Find the next TIME CODE FORMATTING.
+    startPos = XMLText.find(st, pos)
+    # While there is TIME CODE FORMATTING in the text ...
+    while startPos > -1:
+        # ... identify the ending position of the TIME CODE FORMATTING
+        endPos = XMLText.find('</text>', startPos)
+        # If the element isn't closed, the XML is damaged.  Leave the rest of it alone.
+        if endPos == -1:
+            break
+        # Keep the text before the time code
+        result.append(XMLText[pos : startPos])
+        # Skip the time code with all formatting
+        pos = endPos + 7
+        # ... identify the starting position of the TIME CODE DATA
+        dataStart = XMLText.find('&lt;', pos)
+        # If there is a "&lt;" ...
+        if dataStart > -1:
+            # ... identify the ending position of the TIME CODE DATA
+            dataEnd = XMLText.find('&gt;', dataStart)
+        # If there isn't ...
+        else:
+            # ... there can be no time code data
+            dataEnd = -1
+        # If time code data was found ...
+        if (dataStart > -1) and (dataEnd > -1):
+            # ... the text between the time code and its data is kept
+            between = XMLText[pos : dataStart]
+            # Skip the time code data with all formatting
+            pos = dataEnd + 4
+            # If that text, or the text joined to it when the time code data is removed, holds more TIME CODE FORMATTING ...
+            if st in between + XMLText[pos : pos + stLen - 1]:
+                # ... the next time code comes BEFORE the data we just removed, so continue with the joined text.
+                # This is rare, so rebuilding the remaining text here doesn't hurt.
+                XMLText = between + XMLText[pos : ]
+                pos = 0
+            # Otherwise ...
+            else:
+                # ... keep the text between the time code and its data
+                result.append(between)
+        # Find the next TIME CODE FORMATTING
+        startPos = XMLText.find(st, pos)
+    # Keep whatever is left
+    result.append(XMLText[pos : ])
+    # Return the joined result
+    return ''.join(result)
+
+
 
 ### On Windows, there is a problem with the wxWidgets' wxRichTextCtrl.  It uses up Windows GDI Resources and Transana will crash
 ### if the GDI Resource Usage exceeds 10,000.  This happens primarily during report generation and bulk formatting.  See wxWidgets
@@ -474,6 +566,10 @@ class RichTextEditCtrl(richtext.RichTextCtrl):
            (event.GetId() in [wx.ID_CUT, MenuSetup.MENU_TRANSCRIPT_EDIT_CUT]):
             # Reset the selection, which was mangled by the GetFormattedSelection call
             self.SetSelection(origSelection[0], origSelection[1])
+            # If we're in a Transcript Editor ...
+            if isinstance(self, TranscriptEditor_RTC.TranscriptEditor):
+                # ... remove any time codes in the selection from the Time Code Index
+                self.RemoveTimeCodeData(self.GetStringSelection())
             # ... delete the selection from the Rich Text Ctrl.
             self.DeleteSelection()
 
@@ -498,6 +594,10 @@ class RichTextEditCtrl(richtext.RichTextCtrl):
             self.BeginBatchUndo('Paste')
             # If there's a selection ...
             if self.GetSelection() != (-2, -2):
+                # If we're in a Transcript Editor ...
+                if isinstance(self, TranscriptEditor_RTC.TranscriptEditor):
+                    # ... remove any time codes in the selection from the Time Code Index
+                    self.RemoveTimeCodeData(self.GetStringSelection())
                 # ... delete it.
                 self.DeleteSelection()
 
@@ -740,81 +840,9 @@ class RichTextEditCtrl(richtext.RichTextCtrl):
     def StripTimeCodes(self, XMLText):
         """ This method will take the contents of an RTC buffer in XML format and remove the Time Codes and
             Time Code Data """
-
-        # This deletes based on FORMAT, deleting everything in TIME CODE FORMAT and HIDDEN FORMAT.
-
-        # First, let's create the XML represenation of TIME CODE FORMATTING
-        st = '<text textcolor="#FF0000" bgcolor="#FFFFFF" fontsize="14" fontstyle="90" fontweight="90" fontunderlined="0" fontface="Courier New">'
-
-        # While there is TIME CODE FORMATTING in the text ...
-        while st in XMLText:
-            # ... identify the starting position of the TIME CODE FORMATTING
-            startPos = XMLText.find(st)
-            # ... identify the ending position of the TIME CODE FORMATTING
-            endPos = XMLText.find('</text>', startPos)
-            # Remove the time code with all formatting
-            XMLText = XMLText[ : startPos] + XMLText[endPos + 7 : ]
-
-        # First, let's create the XML represenation of TIME CODE FORMATTING FROM RTF, which has different formatting.
-        # I've found two variations so far.
-        stList = ['<text textcolor="#FF0000" bgcolor="#FFFFFF" fontsize="11" fontstyle="90" fontweight="90" fontunderlined="0" fontface="Arial">',
-                  '<text textcolor="#FF0000" bgcolor="#FFFFFF" fontsize="11" fontstyle="90" fontweight="90" fontunderlined="0" fontface="Courier New">']
-
-        # For each XML variation ...
-        for st in stList:
-            # While there is TIME CODE FORMATTING in the text ...
-            while st in XMLText:
-
-                # ... identify the starting position of the TIME CODE FORMATTING
-                startPos = XMLText.find(st)
-                # ... identify the ending position of the TIME CODE FORMATTING
-                endPos = XMLText.find('</text>', startPos)
-                # Remove the time code with all formatting
-                XMLText = XMLText[ : startPos] + XMLText[endPos + 7 : ]
-
-                # ... identify the starting position of the TIME CODE FORMATTING
-                startPos = XMLText.find('&lt;', startPos)
-                # ... identify the ending position of the TIME CODE FORMATTING
-                endPos = XMLText.find('&gt;', startPos)
-
-                # If time code data was found ...
-                if (startPos > -1) and (endPos > -1):
-                    # ... remove the time code with all formatting
-                    XMLText = XMLText[ : startPos] + XMLText[endPos + 4 : ]
-            
-
-        # First, let's create the XML represenation of HIDDEN FORMATTING
-        st = '<text textcolor="#FFFFFF" bgcolor="#FFFFFF" fontsize="1" fontstyle="90" fontweight="90" fontunderlined="0" fontface="Times New Roman">'
-
-        # While there is HIDDEN FORMATTING in the text ...
-        while st in XMLText:
-            # ... identify the starting position of the HIDDEN FORMATTING
-            startPos = XMLText.find(st)
-            # ... identify the ending position of the HIDDEN FORMATTING
-            endPos = XMLText.find('</text>', startPos)
-            # Remove the hidden time code data with all formatting
-            XMLText = XMLText[ : startPos] + XMLText[endPos + 7 : ]
-
-        # Some RTF transcripts won't have the formatting right on the time codes, so they won't be found by the code above.
-        # This will try to find and remove these additional time codes.
-
-        # First, let's create the XML represenation of A TIME CODE
-        st = '&#164;'
-
-        # While there are TIME CODES in the text ...
-        while st in XMLText:
-            # ... identify the starting position of the TIME CODE
-            startPos = XMLText.find(st)
-            # ... identify the ending position of the TIME CODE DATA
-            endPos = XMLText.find('&gt;', startPos + 4)
-
-            try:
-                # Remove the hidden time code data
-                XMLText = XMLText[ : startPos] + XMLText[endPos + 4 : ]
-            except:
-                pass
-
-        return XMLText
+        # Large transcripts make repeated find-and-slice loops prohibitively slow, so this is done in
+        # single passes by a module-level function that doesn't need the control.
+        return StripTimeCodesFromXML(XMLText)
 
     def SetDefaultStyle(self, tmpStyle):
         """ Over-ride the RichTextEditCtrl's SetDefaultStyle() to fix problems with setting the style at the
@@ -1742,8 +1770,8 @@ class RichTextEditCtrl(richtext.RichTextCtrl):
                         ctrl.SetSelection(ipTemp,  ipTemp + 1)
 
                     try:
-                        # Remove the temporary time code value from the Time Codes List
-                        self.timecodes.remove(int(tcVal))
+                        # Remove the temporary time code value from the Time Code Index
+                        self.remove_timecode_from_index(int(tcVal))
                     except:
                         pass
 
@@ -1793,8 +1821,8 @@ class RichTextEditCtrl(richtext.RichTextCtrl):
                         ctrl.SetSelection(ipTemp - 1,  ipTemp)
 
                     try:
-                        # Remove the temporary time code value from the Time Codes List
-                        self.timecodes.remove(int(tcVal))
+                        # Remove the temporary time code value from the Time Code Index
+                        self.remove_timecode_from_index(int(tcVal))
                     except:
                         pass
 
@@ -1894,27 +1922,30 @@ class RichTextEditCtrl(richtext.RichTextCtrl):
             # ... then call event.Skip()!
             event.Skip()
 
-    def RemoveTimeCodeData(self, txt):
-        """  Remove any time code values contained in "txt" from the self.timecodes list """
+    def RemoveTimeCodeData(self, txt, start=None):
+        """  Remove any time code values contained in "txt", the text starting at position start (by default, the
+             selection), from the Time Code Index """
         # Get the position of the first "<" character in the string
         minPos = txt.find('<', 0)
-        # Determine the position of the selection within the RichTextCtrl as a whole
-        sel = self.GetSelection()
+        # If we weren't told where the text is ...
+        if start == None:
+            # ... determine the position of the selection within the RichTextCtrl as a whole
+            start = self.GetSelection()[0]
         # While there is a "<" character ...
         while (minPos > -1):
             # ... check to see if it is HIDDEN, i.e. part of a time code.  Use the position in the RichTextCtrl,
             #     not merely the position within the string being evaluated.
-            if self.IsStyleHiddenAt(minPos + sel[0]):
+            if self.IsStyleHiddenAt(minPos + start):
                 # Identify the start and end of the time code data
                 st = minPos
                 # Get the ">" character that follows the current "<" character
                 end = txt.find(">", minPos + 1)
                 # Capture the time code value
                 tcval = int(txt[st+1 : end])
-                # Remove this value from the self.timecodes list
-                self.timecodes.remove(tcval)
-                # Remove it (including the angle brackets) from the string to allow the next one to be found
-                txt = txt[:st] + txt[end + 1:]
+                # Remove this value from the Time Code Index
+                self.remove_timecode_from_index(tcval)
+                # Skip past the time code data.  (The string is left intact so positions in it still match the control.)
+                minPos = end
             # Determin the position of the next "<" character.
             # (This allows for "<" characters in the text that are not part of time codes!)
             minPos = txt.find('<', minPos + 1)
@@ -2003,8 +2034,8 @@ class RichTextEditCtrl(richtext.RichTextCtrl):
                 # Determine the Time Code Data value for the first time code
                 tcVal = st[st.find(TIMECODE_CHAR) + 2 : st.find('>', st.find(TIMECODE_CHAR))]
                 try:
-                    # Remove the temporary time code value from the Time Codes List
-                    self.timecodes.remove(int(tcVal))
+                    # Remove the temporary time code value from the Time Code Index
+                    self.remove_timecode_from_index(int(tcVal))
                 except:
                     pass
                 # Remove the first time code and its data from the selection string
@@ -2098,10 +2129,14 @@ class RichTextEditCtrl(richtext.RichTextCtrl):
                 if result == wx.DragMove:
                     # ... we need to delete the selection.
                     if originalStringSelection == event.GetEventObject().GetRange(originalSelection[0], originalSelection[1]):
-                        event.GetEventObject().Delete(originalSelection)
+                        deleteSelection = originalSelection
                     else:
                         deleteSelection = (originalSelection[0] + len(originalStringSelection), originalSelection[1] + len(originalStringSelection))
-                        event.GetEventObject().Delete(deleteSelection)
+                    # If we're in a Transcript Editor ...
+                    if isinstance(event.GetEventObject(), TranscriptEditor_RTC.TranscriptEditor):
+                        # ... remove any time codes being deleted from the Time Code Index
+                        event.GetEventObject().RemoveTimeCodeData(originalStringSelection, deleteSelection[0])
+                    event.GetEventObject().Delete(deleteSelection)
             # If the mouse is outside the selection ...
             else:
                 # Skip here allows new selection to be made
@@ -2720,3 +2755,75 @@ class RichTextEditCtrl(richtext.RichTextCtrl):
         if self.CompareFormatting(textAttr, self.txtTimeCodeHRFAttr, fullCompare=False):
             print "***  TIME CODE HRF STYLE  ***"
         print
+
+
+if __name__ == '__main__':
+    # Benchmark StripTimeCodesFromXML() against the original find-and-slice implementation, using
+    # synthetic multi-megabyte transcripts, and confirm that both produce identical output.
+    import time
+
+    def LegacyStripTimeCodes(XMLText):
+        """ The original StripTimeCodes() implementation, kept here for comparison """
+        st = XML_TIMECODE_FORMAT
+        while st in XMLText:
+            startPos = XMLText.find(st)
+            endPos = XMLText.find('</text>', startPos)
+            XMLText = XMLText[ : startPos] + XMLText[endPos + 7 : ]
+        for st in XML_RTF_TIMECODE_FORMATS:
+            while st in XMLText:
+                startPos = XMLText.find(st)
+                endPos = XMLText.find('</text>', startPos)
+                XMLText = XMLText[ : startPos] + XMLText[endPos + 7 : ]
+                startPos = XMLText.find('&lt;', startPos)
+                endPos = XMLText.find('&gt;', startPos)
+                if (startPos > -1) and (endPos > -1):
+                    XMLText = XMLText[ : startPos] + XMLText[endPos + 4 : ]
+        st = XML_HIDDEN_FORMAT
+        while st in XMLText:
+            startPos = XMLText.find(st)
+            endPos = XMLText.find('</text>', startPos)
+            XMLText = XMLText[ : startPos] + XMLText[endPos + 7 : ]
+        st = '&#164;'
+        while st in XMLText:
+            startPos = XMLText.find(st)
+            endPos = XMLText.find('&gt;', startPos + 4)
+            try:
+                XMLText = XMLText[ : startPos] + XMLText[endPos + 4 : ]
+            except:
+                pass
+        return XMLText
+
+    def BuildTestXML(paragraphs):
+        """ Build RTC XML for a transcript with the specified number of time-coded paragraphs """
+        # Plain text formatting
+        plain = '<text textcolor="#000000" bgcolor="#FFFFFF" fontsize="12" fontstyle="90" fontweight="90" fontunderlined="0" fontface="Courier New">'
+        # Collect the pieces of the document
+        parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<richtext version="1.0.0.0" xmlns="http://www.wxwidgets.org">\n<paragraphlayout>\n']
+        for para in range(paragraphs):
+            # Alternate between the different time code formats Transana has produced
+            tc = para * 1500
+            if para % 4 == 0:
+                parts.append('<paragraph>%s&#164;</text>%s&lt;%d&gt; </text>' % (XML_TIMECODE_FORMAT, XML_HIDDEN_FORMAT, tc))
+            elif para % 4 == 1:
+                parts.append('<paragraph>%s&#164;</text>%s&lt;%d&gt; </text>' % (XML_RTF_TIMECODE_FORMATS[0], plain, tc))
+            elif para % 4 == 2:
+                parts.append('<paragraph>%s&#164;</text>%s&lt;%d&gt; </text>' % (XML_RTF_TIMECODE_FORMATS[1], XML_HIDDEN_FORMAT, tc))
+            else:
+                parts.append('<paragraph>%s&#164;&lt;%d&gt; </text>' % (plain, tc))
+            parts.append('%sSPEAKER %d: Some transcribed speech for paragraph %d, with a few more words.</text></paragraph>\n' % (plain, para % 3, para))
+        parts.append('</paragraphlayout>\n</richtext>\n')
+        return ''.join(parts)
+
+    for paragraphs in (500, 2000, 8000, 20000):
+        XMLText = BuildTestXML(paragraphs)
+        t0 = time.time()
+        newResult = StripTimeCodesFromXML(XMLText)
+        t1 = time.time()
+        # The original implementation is quadratic.  Don't wait for it on the largest documents.
+        if paragraphs <= 8000:
+            oldResult = LegacyStripTimeCodes(XMLText)
+            t2 = time.time()
+            print "%6d paragraphs, %9d bytes:  new %8.3f sec, old %8.3f sec, identical: %s" % \
+                  (paragraphs, len(XMLText), t1 - t0, t2 - t1, newResult == oldResult)
+        else:
+            print "%6d paragraphs, %9d bytes:  new %8.3f sec" % (paragraphs, len(XMLText), t1 - t0)
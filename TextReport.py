@@ -39,6 +39,8 @@ DEBUG = False
 if DEBUG:
     print "TextReport DEBUG is ON!!"
 
+# import Python's cStringIO module
+import cStringIO
 # import Python's os and sys modules
 import os, sys
 # import Python's time module
@@ -302,6 +304,8 @@ class TextReport(wx.Frame):
         wx.EVT_RIGHT_UP(self.reportText, self.OnRightUp)
         # Initialize a variable to indicate whether a custom edit has occurred
         self.reportEdited = False
+        # Reports that are built as a Report Model keep it here, so the report can be saved from it
+        self.reportModel = None
         # Get the global print data
         self.printData = TransanaGlobal.printData
 
@@ -346,6 +350,8 @@ class TextReport(wx.Frame):
 
         # Clear the Report
         self.reportText.ClearDoc()
+        # Clear the Report Model too.  The Display Method provides a new one if it uses one.
+        self.reportModel = None
         # If a Display Method has been defined ...
         if self.displayMethod != None:
             # ... call it.
@@ -355,6 +361,14 @@ class TextReport(wx.Frame):
         # Bring the Report to the top so it will definitely be visible
         self.Raise()
 
+    def ShowModel(self, reportModel):
+        """ Show a report that has been built as a ReportModel.ReportModel.  The Report Model is kept so the report
+            can be saved from it. """
+        # Remember the Report Model
+        self.reportModel = reportModel
+        # Render the Report Model into the report text
+        reportModel.Render(self.reportText)
+
     def OnFilter(self, event):
         """ Call the parent method (passed in during initialization) that implements the Filter Dialog """
         # If a Filter Method has been defined ...
@@ -454,7 +468,7 @@ class TextReport(wx.Frame):
                     # If RTF ...
                     if dlg.GetFilterIndex() == 0:
                         # ... export teh data to the file
-                        self.reportText.export_transcript(fname)
+                        self.Export_to_RTF(fname)
                     else:
                         self.Export_to_HTML(fname)
                 # Destroy the error dialog
@@ -464,16 +478,39 @@ class TextReport(wx.Frame):
                 # If RTF ...
                 if dlg.GetFilterIndex() == 0:
                     # ... export teh data to the file
-                    self.reportText.export_transcript(fname)
+                    self.Export_to_RTF(fname)
                 else:
                     self.Export_to_HTML(fname)
         # Destroy the File Dialog
         dlg.Destroy()
 
+    def Export_to_RTF(self, fname):
+        """ Export the report to a Rich Text Format file """
+        # If the report has a Report Model and hasn't been edited ...
+        if (self.reportModel != None) and not self.reportEdited:
+            # ... write the file from the Report Model
+            tmpFile = open(fname, "wb")
+            try:
+                self.reportModel.WriteRTF(tmpFile, self.ImageToPNG)
+            finally:
+                tmpFile.close()
+        # Otherwise ...
+        else:
+            # ... export the report text
+            self.reportText.export_transcript(fname)
+
     def Export_to_HTML(self, fname):
         try:
+            # If an existing file is selected and the report has a Report Model and hasn't been edited ...
+            if (fname != "") and (self.reportModel != None) and not self.reportEdited:
+                # ... write the file from the Report Model
+                tmpFile = open(fname, "wb")
+                try:
+                    self.reportModel.WriteHTML(tmpFile, self.title, self.ImageToPNG)
+                finally:
+                    tmpFile.close()
             # If an existing file is selected ...
-            if (fname != ""):
+            elif (fname != ""):
                 # Get an HTML Handler
                 handler = richtext.RichTextHTMLHandler()
                 # Set the handler's encoding
@@ -506,6 +543,13 @@ class TextReport(wx.Frame):
             print sys.exc_info()[1]
             print
 
+    def ImageToPNG(self, image):
+        """ Convert a report image (a wx.Image) to PNG data, for saving the report from its Report Model """
+        # Save the image to a memory stream as a PNG
+        stream = cStringIO.StringIO()
+        image.SaveStream(stream, wx.BITMAP_TYPE_PNG)
+        return stream.getvalue()
+
     # Define the Method that implements Printer Setup
     def OnPrintSetup(self, event):
         # Let's use PAGE Setup here ('cause you can do Printer Setup from Page Setup.)  It's a better system
@@ -67,6 +67,7 @@ except ImportError, e:
     exit
 import os
 import gettext                      # localization module
+import multiprocessing              # import Python's multiprocessing module
 if __name__ == '__main__':
     # Define the "_" method, pointing it to wxPython's GetTranslation method
     __builtins__._ = wx.GetTranslation
@@ -170,6 +171,13 @@ class Transana(wx.App):
             if TransanaGlobal.programDir != '':
                 os.chdir(TransanaGlobal.programDir)
 
+        # If the Parsed Text Cache is kept between sessions ...
+        if TransanaConstants.parsedTextCachePersist:
+            # import Transana's Parsed Text Cache
+            import ParsedTextCache
+            # ... load the cache saved in the user's profile directory
+            ParsedTextCache.Load(TransanaGlobal.configData.GetDefaultProfilePath())
+
         import MenuWindow                      # import Menu Window Object
 
         sys.excepthook = transana_excepthook        # Define the system exception handler
@@ -709,6 +717,8 @@ def transana_excepthook(extype, value, trace):
 
 if __name__ == "__main__":
 
+    # Reports can use multiprocessing worker pools.  Frozen Windows builds need this before anything else runs.
+    multiprocessing.freeze_support()
     # Main Application definition and execution call (wxPython)
     app = Transana(0)  # redirect=False
     # Run the application main loop
@@ -105,6 +105,40 @@ USESRTC = True
 # Indicate if the Partial Transcript Editing fix should be applied
 partialTranscriptEdit = False
 
+# Indicate if very long transcripts should be loaded a window of paragraphs at a time while in Read Only mode
+windowedTranscriptLoad = True
+# The number of paragraphs a transcript must have before only a window of paragraphs is loaded
+windowedTranscriptMinParagraphs = 1000
+# The number of 100-paragraph blocks loaded on each side of the current block
+windowedTranscriptBlockRadius = 2
+
+# The number of items on each side of a loaded Clip or Quote to prefetch while stepping through a Collection
+prefetchRadius = 2
+# The maximum number of prefetched items held in memory
+prefetchCacheSize = 10
+
+# The approximate maximum size, in characters, of the parsed transcript text held in the Parsed Text Cache
+parsedTextCacheSize = 20000000
+# Indicate if the Parsed Text Cache should be saved in the user's profile directory between sessions
+parsedTextCachePersist = True
+
+# The number of records fetched from the database at a time during Transana XML Export
+exportFetchSize = 100
+# The size, in bytes, of the write buffer for Transana XML Export files
+exportBufferSize = 1048576
+# The number of background threads that export sections of a Transana XML file at the same time.  (0 exports the sections
+# one after another.)
+exportParallelWorkers = 4
+# Should Transana XML Export save a manifest of the exported records, so later exports can include only the changes?
+exportManifests = True
+# The number of rows Transana XML Import saves to a database table at a time
+importBatchSize = 500
+# Should Transana XML Import commit its work in batches, keeping a journal so an interrupted import can be resumed?
+# (If not, the whole import is a single transaction, and an interrupted import must be started over.)
+importCheckpoints = False
+# The number of records Transana XML Import saves between checkpoints when importing with checkpoints
+importCheckpointRecords = 1000
+
 # IDs for the Visualization Window
 VISUAL_BUTTON_ZOOMIN            =  wx.NewId()
 VISUAL_BUTTON_ZOOMOUT           =  wx.NewId()
@@ -594,6 +594,9 @@ class Transcript(DataObject.DataObject):
 
             # Execure the Save query
             c.execute(query, values)
+
+        # Update the Word Count index for the Word Frequency Report
+        DBInterface.UpdateWordCounts('Transcript', self.number, self.plaintext, c)
             
         c.close()
 
@@ -653,6 +656,10 @@ class Transcript(DataObject.DataObject):
             if result and (self.clip_num == 0):
                 DBInterface.ClearSourceTranscriptRecords(self.number)
 
+            # Remove the Transcript from the Word Count index
+            if result:
+                DBInterface.DeleteWordCounts('Transcript', self.number, c)
+
             # Delete the actual record.
             self._db_do_delete(use_transactions, c, result)
 
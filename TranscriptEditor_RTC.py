@@ -58,6 +58,8 @@ import TranscriptionUI_RTC
 import TextReport
 # Import Transana's Miscellaneous functions
 import Misc
+# Import Python's bisect module for searching the sorted Time Code Index
+import bisect
 # Import Python's Regular Expression handler
 import re
 # Import Python's cPickle module
@@ -84,6 +86,18 @@ TIMECODE_CHAR = TransanaConstants.TIMECODE_CHAR
 # rather than the desired "\xA4<1234>".
 # My REGEXP "\xA4<[\d]*>" appears to do that.
 TIMECODE_REGEXP = "%s<[\d]*>" % TIMECODE_CHAR            # "\xA4<[^<]*>"
+# Compiled expression used to build the Time Code Index in a single pass.  The group captures the Time Code Data
+# up to the next ">" character, which is what load_timecodes() has always parsed.
+TIMECODE_INDEX_REGEXP = re.compile("%s<([^>]*)>" % re.escape(TIMECODE_CHAR))
+# Compiled expression that finds Time Codes in RTC XML, where the Time Code character and the hidden Time Code Data
+# are held in separate text elements
+XML_TIMECODE_DATA_REGEXP = re.compile('(?:&#164;|%s)(?:"?\s*</text>\s*<text[^>]*>\s*"?)?&lt;(\d+)&gt;' % re.escape(TIMECODE_CHAR))
+# Compiled expression that finds the contents of RTC XML text elements
+XML_TEXT_ELEMENT_REGEXP = re.compile('<text[^>]*>(.*?)</text>', re.DOTALL)
+# Compiled expression that finds numeric XML character references
+XML_CHAR_REF_REGEXP = re.compile('&#(\d+);')
+# The number of paragraphs between Paragraph Pointers in Transcript objects
+PARAGRAPH_BLOCK_SIZE = 100
 
 class TranscriptEditor(RichTextEditCtrl):
     """This class is a word processor for transcribing and editing.  It
@@ -119,10 +133,25 @@ class TranscriptEditor(RichTextEditCtrl):
         self.TranscriptObj = None
         # For Partial Transcript Loading, we need to track the number of lines loaded in the Text Control
         self.LinesLoaded = 0
-        # Initialize the Time Codes array to empty
+        # Initialize the Time Codes array to empty.  This list is kept SORTED so it can be searched with bisect.
         self.timecodes = []
+        # Initialize the Time Code Position dictionary, which maps each time code value to the character position
+        # where it was last seen in the document.  Positions are hints used to narrow searches, as editing moves text.
+        self.timecodePositions = {}
         # Initialize the current time code to DOES NOT EXIST
         self.current_timecode = -1
+        # Very long transcripts are loaded a window of paragraphs at a time in Read Only mode.
+        # Indicate whether only a window of paragraphs is loaded
+        self.windowedLoad = False
+        # Initialize the first paragraph in the window and the paragraph after the window
+        self.windowStart = 0
+        self.windowEnd = 0
+        # Initialize the line in the transcript's XML that closes the paragraph layout
+        self.windowFooterLine = 0
+        # Initialize the dictionary that records which paragraph block holds each time code
+        self.timecodeBlocks = {}
+        # Indicate whether changes to the window of paragraphs are temporarily suspended
+        self.windowLocked = False
 
         # Create the AutoSave Timer
         self.autoSaveTimer = wx.Timer()
@@ -167,6 +196,10 @@ class TranscriptEditor(RichTextEditCtrl):
 
         self.Bind(wx.EVT_ACTIVATE, self.OnActivate)
 
+        # When only a window of paragraphs is loaded, we need to know when the user scrolls near its edges
+        self.Bind(wx.EVT_SCROLLWIN, self.OnWindowedScroll)
+        self.Bind(wx.EVT_MOUSEWHEEL, self.OnWindowedScroll)
+
 
     def OnActivate(self, event):
 
@@ -305,8 +338,18 @@ class TranscriptEditor(RichTextEditCtrl):
 
         # If we have an XML document, let's assume it's XML from Transana
         elif dataType == 'xml':
-            # Load the XML Data held in the transcript's text field
-            self.LoadXMLData(transcript.text)
+            # If the transcript is long enough that only a window of paragraphs should be loaded ...
+            if self.UseWindowedLoad(transcript):
+                # The transcript that was passed in is our Transcript Object.  The window is built from it.
+                self.TranscriptObj = transcript
+                # Signal that only a window of paragraphs is loaded
+                self.windowedLoad = True
+                # Load the paragraphs at the start of the transcript
+                self.LoadParagraphWindow(0)
+            # Otherwise ...
+            else:
+                # Load the XML Data held in the transcript's text field
+                self.LoadXMLData(transcript.text)
             # The transcript that was passed in is our Transcript Object
             self.TranscriptObj = transcript
             # Initialize that the transcript has not yet changed.
@@ -575,31 +618,372 @@ class TranscriptEditor(RichTextEditCtrl):
                 nextTC = self.FindText(endTC, endPos, TIMECODE_CHAR)
 
     def load_timecodes(self):
-        """Scan the document for timecodes and add to internal list."""
+        """Scan the document for timecodes and build the internal Time Code Index."""
         # Clear the existing time codes list
         self.timecodes = []
+        # Clear the existing time code positions
+        self.timecodePositions = {}
+        # If only a window of paragraphs is loaded ...
+        if self.windowedLoad:
+            # ... the Time Code Index has to cover the whole transcript, so build it from the transcript's XML
+            self.load_windowed_timecodes()
+            # ... and note the positions of the time codes that are in the control
+            self.index_timecode_positions()
+            # Transcripts are time-coded in sequence, but the Time Code Index must be sorted for bisect to work.
+            self.timecodes.sort()
+            return
         # Get the text to scan
         txt = self.GetText()
-        # Define the string to search for
-        findstr = TIMECODE_CHAR + "<"
-        # Locate the time code using string.find()
-        i = txt.find(findstr, 0)
-        # As long as there are more time codes to find ...
-        while i >= 0:
-            # ... find the END of the time code data, i.e. the next ">" character
-            endi = txt.find(">", i)
-            # Extract the Time Code Data
-            timestr = txt[i+2:endi]
+        # Find all time codes in a single pass using the compiled Regular Expression
+        for match in TIMECODE_INDEX_REGEXP.finditer(txt):
+            # Trap exceptions
+            try:
+                # Convert the time code data to an integer
+                timecode = int(match.group(1))
+            # If an exception arises (because of inability to convert the time code) ...
+            except:
+                # ... then just ignore that time code.  It's probably defective.
+                continue
+            # Add it to the TimeCodes list
+            self.timecodes.append(timecode)
+            # Remember where the FIRST occurrence of this time code is in the document
+            self.timecodePositions.setdefault(timecode, match.start())
+        # Transcripts are time-coded in sequence, but imported documents might not be.  The Time Code Index must be sorted
+        # for bisect to work.  (Python's sort is linear for data that is already in order.)
+        self.timecodes.sort()
+
+    def timecode_index(self, tc):
+        """ Return the index of time code tc in the Time Code Index, or -1 if tc is not a time code in the document """
+        # Locate the left-most place tc could go in the sorted list
+        i = bisect.bisect_left(self.timecodes, tc)
+        # If tc is actually there ...
+        if (i < len(self.timecodes)) and (self.timecodes[i] == tc):
+            # ... return its index
+            return i
+        # Otherwise, signal that tc is not in the list
+        return -1
+
+    def add_timecode_to_index(self, tc, pos=-1):
+        """ Add time code tc, found at character position pos, to the Time Code Index """
+        # Insert the time code in sorted order.  This replaces the linear search for the insertion point.
+        bisect.insort_right(self.timecodes, tc)
+        # If we know the time code's position ...
+        if pos > -1:
+            # ... remember it
+            self.timecodePositions[tc] = pos
+
+    def remove_timecode_from_index(self, tc):
+        """ Remove time code tc, which has been deleted from the document, from the Time Code Index """
+        # Find the time code in the Time Code Index
+        i = self.timecode_index(tc)
+        # If it's there ...
+        if i > -1:
+            # ... remove it
+            del self.timecodes[i]
+        # Forget its position.  (If the time code is in the document more than once, find_timecode_position() will find the other.)
+        if self.timecodePositions.has_key(tc):
+            del self.timecodePositions[tc]
+
+    def find_timecode_position(self, tc):
+        """ Return the character position of time code tc in the document, or -1 if it can't be found """
+        # Build the text that makes up the time code
+        findstr = "%s<%d>" % (TIMECODE_CHAR, tc)
+        # Get the document length
+        docLength = self.GetTextLength()
+        # Get the last known position of this time code
+        hint = self.timecodePositions.get(tc, -1)
+        # If we have a hint ...
+        if (hint > -1) and (hint < docLength):
+            # ... text is more often added than removed ahead of a time code, so start looking there.
+            pos = self.FindText(hint, docLength, findstr)
+        # If we don't have a hint ...
+        else:
+            # ... signal that we haven't found it yet
+            pos = -1
+        # If the time code wasn't found after the hint position ...
+        if pos == -1:
+            # ... search the whole document
+            pos = self.FindText(0, docLength, findstr)
+        # If we found the time code ...
+        if pos > -1:
+            # ... update the position hint for next time
+            self.timecodePositions[tc] = pos
+        # Return the position
+        return pos
+
+    def load_windowed_timecodes(self):
+        """ Build the Time Code Index for a transcript with only a window of paragraphs loaded from the transcript's XML,
+            noting the paragraph block that holds each time code """
+        # Clear the existing time code blocks
+        self.timecodeBlocks = {}
+        # For each block of paragraphs in the transcript ...
+        for block in range(0, self.TranscriptObj.paragraphs, PARAGRAPH_BLOCK_SIZE):
+            # ... find all the time codes in the block's XML
+            for match in XML_TIMECODE_DATA_REGEXP.finditer(self.GetParagraphBlockXML(block)):
+                # Convert the time code data to an integer.  (The expression only matches digits.)
+                timecode = int(match.group(1))
+                # Add it to the TimeCodes list
+                self.timecodes.append(timecode)
+                # Remember the FIRST block that holds this time code
+                self.timecodeBlocks.setdefault(timecode, block)
+
+    def index_timecode_positions(self):
+        """ Note the character positions of the time codes currently in the control """
+        # Clear the existing time code positions
+        self.timecodePositions = {}
+        # Find all time codes in the control in a single pass using the compiled Regular Expression
+        for match in TIMECODE_INDEX_REGEXP.finditer(self.GetText()):
             # Trap exceptions
             try:
-                # Conver the time code data to an integer and add it to the TimeCodes list
-                self.timecodes.append(int(timestr))
+                # Remember where the FIRST occurrence of this time code is in the control
+                self.timecodePositions.setdefault(int(match.group(1)), match.start())
             # If an exception arises (because of inability to convert the time code) ...
             except:
                 # ... then just ignore that time code.  It's probably defective.
                 pass
-            # Look for the next time code.  Result will be -1 if NOT FOUND
-            i = txt.find(findstr, i+1)
+
+    def UseWindowedLoad(self, transcript):
+        """ Determine whether only a window of paragraphs of the transcript should be loaded into the control """
+        # Only Transcripts in a Transcript Window are candidates.  Documents and Quotes depend on character positions
+        # in the full document, and other forms that display transcripts need the full text.
+        if not (TransanaConstants.windowedTranscriptLoad and \
+                isinstance(transcript, Transcript.Transcript) and \
+                isinstance(self.parent, TranscriptionUI_RTC._TranscriptPanel)):
+            return False
+        # If the transcript is too short to bother, or its paragraphs haven't been divided up ...
+        if (transcript.paragraphs < TransanaConstants.windowedTranscriptMinParagraphs) or \
+           (not transcript.paragraphPointers.has_key(0)):
+            # ... load the full transcript
+            return False
+        # Find the line that closes the paragraph layout, working back from the end of the transcript
+        self.windowFooterLine = len(transcript.lines) - 1
+        while (self.windowFooterLine > 0) and (transcript.lines[self.windowFooterLine].strip() != '</paragraphlayout>'):
+            self.windowFooterLine -= 1
+        # If the paragraph layout doesn't close after the last paragraph, we don't understand this XML well enough
+        # to divide it up
+        return (self.windowFooterLine > transcript.paragraphPointers[0])
+
+    def GetParagraphLineRange(self, startParagraph, endParagraph):
+        """ Get the range of lines in the transcript's XML that hold the specified paragraphs.  startParagraph must be
+            a multiple of PARAGRAPH_BLOCK_SIZE. """
+        # The Paragraph Pointers point to the line that starts every 100th paragraph
+        startLine = self.TranscriptObj.paragraphPointers[startParagraph]
+        # If the range ends before the end of the transcript ...
+        if endParagraph < self.TranscriptObj.paragraphs:
+            # ... it ends where the next paragraph starts
+            endLine = self.TranscriptObj.paragraphPointers[endParagraph]
+        # If the range includes the last paragraph ...
+        else:
+            # ... it ends where the paragraph layout closes
+            endLine = self.windowFooterLine
+        return (startLine, endLine)
+
+    def GetParagraphBlockXML(self, block):
+        """ Get the XML for the block of paragraphs that starts with paragraph number block """
+        # Get the lines that hold the block of paragraphs
+        (startLine, endLine) = self.GetParagraphLineRange(block, block + PARAGRAPH_BLOCK_SIZE)
+        # Return them as a string
+        return '\n'.join(self.TranscriptObj.lines[startLine : endLine])
+
+    def GetParagraphBlockText(self, block):
+        """ Get the plain text for the block of paragraphs that starts with paragraph number block """
+        # Initialize a list to hold the text pieces
+        pieces = []
+        # For each text element in the block of paragraphs ...
+        for match in XML_TEXT_ELEMENT_REGEXP.finditer(self.GetParagraphBlockXML(block)):
+            # ... get the element's contents
+            text = match.group(1)
+            # The RTC puts quotes around text that starts or ends with a space.  Remove them.
+            if (len(text) > 1) and (text[0] == '"') and (text[-1] == '"'):
+                text = text[1:-1]
+            # Add the text to the list of pieces
+            pieces.append(text)
+        # Put the pieces together
+        text = ''.join(pieces)
+        # Replace the XML character references with the characters they represent
+        text = XML_CHAR_REF_REGEXP.sub(lambda match: unichr(int(match.group(1))), text)
+        # Replace XML entities with the characters they represent.  &amp; must be last!
+        text = text.replace('&lt;', '<').replace('&gt;', '>').replace('&quot;', '"').replace('&amp;', '&')
+        return text
+
+    def GetParagraphWindowXML(self, startParagraph, endParagraph):
+        """ Build legal RTC XML for the specified paragraphs of the transcript """
+        # Get the lines that hold the paragraphs
+        (startLine, endLine) = self.GetParagraphLineRange(startParagraph, endParagraph)
+        # The transcript's lines before the first paragraph hold the XML header and the style sheet.  The lines
+        # from the end of the paragraph layout close the XML.  Put the requested paragraphs between them.
+        return '\n'.join(self.TranscriptObj.lines[ : self.TranscriptObj.paragraphPointers[0]] + \
+                         self.TranscriptObj.lines[startLine : endLine] + \
+                         self.TranscriptObj.lines[self.windowFooterLine : ])
+
+    def LoadParagraphWindow(self, paragraph):
+        """ Load the window of paragraphs around the specified paragraph into the control.
+            Return True if the window changed. """
+        # Find the start of the block that holds the paragraph
+        block = paragraph - (paragraph % PARAGRAPH_BLOCK_SIZE)
+        # Determine the number of paragraphs to load on each side of the block
+        radius = TransanaConstants.windowedTranscriptBlockRadius * PARAGRAPH_BLOCK_SIZE
+        # Determine the window of paragraphs to load
+        start = max(0, block - radius)
+        end = min(self.TranscriptObj.paragraphs, block + PARAGRAPH_BLOCK_SIZE + radius)
+        # If that's the window that's already loaded ...
+        if (start == self.windowStart) and (end == self.windowEnd) and (self.GetLastPosition() > 0):
+            # ... there's nothing to do
+            return False
+        # Suspend window changes while we load the new window
+        self.windowLocked = True
+        # Freeze the control to speed loading
+        self.Freeze()
+        # Clear the control without clearing the Transcript Object or the Time Code Index
+        RichTextEditCtrl.ClearDoc(self)
+        # Load the XML for the window of paragraphs
+        self.LoadXMLData(self.GetParagraphWindowXML(start, end), clearDoc=False)
+        # Remember the window that is loaded
+        self.windowStart = start
+        self.windowEnd = end
+        # Note where the time codes in the window are
+        self.index_timecode_positions()
+        # If time codes are hidden ...
+        if not self.codes_vis:
+            # ... hide the ones we just loaded
+            self.changeTimeCodeHiddenStatus(True)
+        # Thaw the control
+        self.Thaw()
+        # Changing the window is not an edit
+        self.DiscardEdits()
+        # Window changes are okay again
+        self.windowLocked = False
+        return True
+
+    def LoadParagraphWindowForTime(self, ms):
+        """ Make sure the paragraphs around time ms are loaded into the control.  Return True if the window changed. """
+        # If we don't have a window of paragraphs, or window changes are suspended ...
+        if (not self.windowedLoad) or self.windowLocked:
+            # ... there's nothing to do
+            return False
+        # Find the block that holds the time code before ms
+        block = self.GetParagraphBlockForTime(ms)
+        # If the block and its neighbours are already loaded ...
+        if (self.windowStart <= block) and (block < self.windowEnd) and \
+           ((self.windowStart == 0) or (self.windowStart < block)) and \
+           ((self.windowEnd == self.TranscriptObj.paragraphs) or (block + 2 * PARAGRAPH_BLOCK_SIZE <= self.windowEnd)):
+            # ... there's nothing to do
+            return False
+        # Load the window around that block
+        return self.LoadParagraphWindow(block)
+
+    def GetParagraphBlockForTime(self, ms):
+        """ Get the block of paragraphs that holds the time code before time ms """
+        # Find the time code before ms in the Time Code Index
+        i = bisect.bisect_left(self.timecodes, ms)
+        # If there is one ...
+        if i > 0:
+            # ... return the block it's in
+            return self.timecodeBlocks.get(self.timecodes[i - 1], 0)
+        # If there's not, it's at the start of the transcript
+        return 0
+
+    def LoadFullTranscript(self):
+        """ Replace the window of paragraphs with the full transcript, which editing, saving and exporting need """
+        # If we don't have a window of paragraphs ...
+        if not self.windowedLoad:
+            # ... the full transcript is already loaded
+            return
+        # Note the position of the insertion point relative to the whole transcript
+        (col, para) = self.PositionToXY(self.GetInsertionPoint())
+        para += self.windowStart
+        # Create a popup telling the user about the load (needed for large files)
+        loadDlg = Dialogs.PopupDialog(None, _("Loading..."), _("Loading your transcript.\nPlease wait...."))
+        # Signal that we no longer have a window of paragraphs
+        self.windowedLoad = False
+        # Freeze the control to speed loading
+        self.Freeze()
+        # Clear the control without clearing the Transcript Object
+        RichTextEditCtrl.ClearDoc(self)
+        # Load the XML Data held in the transcript's text field
+        self.LoadXMLData(self.TranscriptObj.text, clearDoc=False)
+        # The window is now the whole transcript
+        self.windowStart = 0
+        self.windowEnd = self.TranscriptObj.paragraphs
+        self.timecodeBlocks = {}
+        # Scan the full transcript for time codes
+        self.load_timecodes()
+        # If time codes are hidden ...
+        if not self.codes_vis:
+            # ... hide them in the rest of the transcript
+            self.changeTimeCodeHiddenStatus(True)
+        # Thaw the control
+        self.Thaw()
+        # Loading the rest of the transcript is not an edit
+        self.DiscardEdits()
+        # Restore the insertion point
+        self.SetInsertionPoint(self.XYToPosition(col, para))
+        self.ShowCurrentSelection()
+        # Destroy the Load Popup Dialog
+        loadDlg.Destroy()
+
+    def FindInParagraphWindows(self, txt, direction):
+        """ Find text that is not in the loaded paragraphs, loading the window of paragraphs that contains it.
+            Return True if the text was found. """
+        # If we're looking for the NEXT instance of the search text ...
+        if direction == 'next':
+            # ... look in the blocks after the window, in order
+            blocks = range(self.windowEnd, self.TranscriptObj.paragraphs, PARAGRAPH_BLOCK_SIZE)
+        # If we're looking for the PREVIOUS instance of the search text ...
+        else:
+            # ... look in the blocks before the window, in reverse order
+            blocks = range(self.windowStart - PARAGRAPH_BLOCK_SIZE, -1, -PARAGRAPH_BLOCK_SIZE)
+        # For each block to look in ...
+        for block in blocks:
+            # ... if the block's text contains the search text ...
+            if self.GetParagraphBlockText(block).lower().find(txt.lower()) > -1:
+                # ... load the window around it
+                self.LoadParagraphWindow(block)
+                # If we're looking for the NEXT instance ...
+                if direction == 'next':
+                    # ... search from the start of the block.  (Earlier blocks were already searched.)
+                    self.SetInsertionPoint(self.XYToPosition(0, block - self.windowStart))
+                # If we're looking for the PREVIOUS instance ...
+                else:
+                    # ... search from the end of the block
+                    if block + PARAGRAPH_BLOCK_SIZE < self.windowEnd:
+                        self.SetInsertionPoint(self.XYToPosition(0, block + PARAGRAPH_BLOCK_SIZE - self.windowStart))
+                    else:
+                        self.SetInsertionPoint(self.GetLastPosition())
+                return True
+        # The search text isn't in the rest of the transcript
+        return False
+
+    def OnWindowedScroll(self, event):
+        """ Page paragraphs in and out of the control as the user scrolls, if only a window of paragraphs is loaded """
+        # Allow the scroll to happen
+        event.Skip()
+        # If only a window of paragraphs is loaded ...
+        if self.windowedLoad:
+            # ... check the window once the scroll has finished
+            wx.CallAfter(self.CheckParagraphWindow)
+
+    def CheckParagraphWindow(self):
+        """ Move the window of paragraphs if the visible part of the control is near the window's edges """
+        # If we don't have a window of paragraphs, or window changes are suspended ...
+        if (not self.windowedLoad) or self.windowLocked:
+            # ... there's nothing to do
+            return
+        # Find the paragraphs at the top and bottom of the visible part of the control
+        topPara = self.PositionToXY(self.HitTestPos((3, 3))[1])[1]
+        bottomPara = self.PositionToXY(self.HitTestPos((3, self.GetRect()[3] - 10))[1])[1]
+        # Page in more paragraphs when we get within half a block of either edge of the window
+        margin = PARAGRAPH_BLOCK_SIZE / 2
+        if ((topPara < margin) and (self.windowStart > 0)) or \
+           ((bottomPara > self.windowEnd - self.windowStart - margin) and (self.windowEnd < self.TranscriptObj.paragraphs)):
+            # Note the visible paragraphs relative to the whole transcript
+            topPara += self.windowStart
+            bottomPara += self.windowStart
+            # Load the window around the visible paragraphs
+            if self.LoadParagraphWindow((topPara + bottomPara) / 2):
+                # Scroll so the same paragraphs are showing
+                self.ShowPosition(self.XYToPosition(0, bottomPara - self.windowStart))
+                self.ShowPosition(self.XYToPosition(0, topPara - self.windowStart))
 
     def save_transcript(self, continueEditing=True, use_transactions=True, showPopup=True):
         """ Save the transcript to the database.
@@ -675,6 +1059,8 @@ class TranscriptEditor(RichTextEditCtrl):
 
     def export_transcript(self, fname):
         """Export the transcript to an RTF file."""
+        # If only a window of paragraphs is loaded, we need the full transcript
+        self.LoadFullTranscript()
         # If Partial Transcript editing is enabled ...
         if TransanaConstants.partialTranscriptEdit:
             # If we have only part of the transcript in the editor, we need to restore the full transcript
@@ -858,8 +1244,19 @@ class TranscriptEditor(RichTextEditCtrl):
         # Move the cursor to the beginning of the document
         self.GotoPos(0)
 
+        # If only a window of paragraphs is loaded ...
+        if self.windowedLoad:
+            # ... only the time codes in the control can be changed.  Don't let scroll_to_time() move the window.
+            timecodes = self.timecodePositions.keys()
+            timecodes.sort()
+            windowLocked = self.windowLocked
+            self.windowLocked = True
+        # Otherwise ...
+        else:
+            # ... change all time codes
+            timecodes = self.timecodes
         # Let's find each time code mark and update it with the new style.  
-        for tc in self.timecodes:
+        for tc in timecodes:
             # Find the Timecode.  scroll_to_time() adjusts the time code by 2 ms, so we have to compensate for that here!
             if self.scroll_to_time(tc - 2):
                 # Note the Cursor's Current Position
@@ -879,6 +1276,10 @@ class TranscriptEditor(RichTextEditCtrl):
                 else:
                     # ... set its style to Time Code
                     self.SetStyle(r, self.txtTimeCodeAttr)
+        # If only a window of paragraphs is loaded ...
+        if self.windowedLoad:
+            # ... window changes are okay again, unless they were already suspended
+            self.windowLocked = windowLocked
 
         # Restore the Cursor Position when all is said and done.  (self.RestoreCursor() doesn't work!)
         # If there's no saved Selection ...
@@ -1057,6 +1458,11 @@ class TranscriptEditor(RichTextEditCtrl):
             ctrlText = self.GetValue()[ip:].lower()
             # Use Python's string.FIND to find the next instance of the search text
             newPos = ctrlText.find(txt.lower())
+            # If the text isn't in the loaded paragraphs but is in a later window of paragraphs ...
+            if (newPos == -1) and self.windowedLoad and self.FindInParagraphWindows(txt, direction):
+                # ... search again now that those paragraphs are loaded
+                self.find_text(txt, direction, flags)
+                return
             # If a next instance is found ...
             if (newPos > -1):
                 # Move the control's selection to the next instance
@@ -1078,6 +1484,11 @@ class TranscriptEditor(RichTextEditCtrl):
             ctrlText = self.GetValue()[:ip - 1].lower()
             # Use Python's string.RFIND to find the PREVIOUS instance of the search text
             newPos = ctrlText.rfind(txt.lower())
+            # If the text isn't in the loaded paragraphs but is in an earlier window of paragraphs ...
+            if (newPos == -1) and self.windowedLoad and self.FindInParagraphWindows(txt, direction):
+                # ... search again now that those paragraphs are loaded
+                self.find_text(txt, direction, flags)
+                return
             # Unfortunately, because of the RTC location problem caused by images, this rfind might not have worked.
             # It may just have returned the SAME instance of the search text.  (The more images above the current 
             # position and the shorter the search text, the more likely!)  So let's find the NEXT earlier instance
@@ -1166,6 +1577,8 @@ class TranscriptEditor(RichTextEditCtrl):
         if (len(self.timecodes) == 0) or (prevTimeCode < timepos) and ((timepos < nextTimeCode) or (nextTimeCode == -1)) \
            or ((timepos == 0) and (prevTimeCode == 0.0) and (self.timecodes[0] > 0)):
             
+            # Note where the Time Code is being inserted
+            timecodePos = self.GetInsertionPoint()
             # Insert the Time Code
             self.InsertTimeCode(timepos)
             # If time code data is visible ...
@@ -1192,16 +1605,8 @@ class TranscriptEditor(RichTextEditCtrl):
                     self.InsertStyledText(tcText, len(tcText))
             # Update the RTC
             self.Refresh()
-            # Update the 'timecodes' list, putting it in the right spot
-            i = 0
-            if len(self.timecodes) > 0:
-                # the index variable (i) must be less than the number of elements in
-                # self.timecodes to avoid an index error when inserting a selection timecode
-                # at the end of the Transcript.
-                while (i < len(self.timecodes) and (self.timecodes[i] < timepos)):
-                    i = i + 1
-            # Add the time code value to the TimeCodes array
-            self.timecodes.insert(i, timepos)
+            # Update the Time Code Index, putting the new time code in the right spot
+            self.add_timecode_to_index(timepos, timecodePos)
         # If the proposed time code is out of sequence ...
         else:
             # ... build an error message.
@@ -1315,28 +1720,31 @@ class TranscriptEditor(RichTextEditCtrl):
         if (len(self.timecodes) == 0):  # or not self.GetReadOnly():
             return False
 
+        # If only a window of paragraphs is loaded, make sure the paragraphs around this time are loaded
+        self.LoadParagraphWindowForTime(ms)
+
         # Temporarily halt screen updates
         self.Freeze()
         
-        # Find the timecodes that are on either side of what we want
-        # Initialize "Before" to the start of the file
-        tcBefore = -1
-        # Initializae "After" to the end of the file (-1)
-        tcAfter = -1
-
-        # Iterate through the time code list
-        for timecode in self.timecodes:
-
-            # If the entry in the time code list is less than the current media position ...
-            if timecode < ms:
-                # ... update the Before value
-                tcBefore = timecode
-            # If the entry in the time code list is greater than the current media position ...
-            else:
-                # ... then we can stop looking for our Before position and we should capture THIS as our After position
-                tcAfter = timecode
-                # We can stop iterating once we reach this point.
-                break
+        # Find the timecodes that are on either side of what we want.  The index of the first time code
+        # that is NOT less than the current media position divides the list.
+        i = bisect.bisect_left(self.timecodes, ms)
+        # If there is a time code before the current media position ...
+        if i > 0:
+            # ... that's our Before value
+            tcBefore = self.timecodes[i - 1]
+        # Otherwise ...
+        else:
+            # ... "Before" is the start of the file
+            tcBefore = -1
+        # If there is a time code at or after the current media position ...
+        if i < len(self.timecodes):
+            # ... that's our After value
+            tcAfter = self.timecodes[i]
+        # Otherwise ...
+        else:
+            # ... "After" is the end of the file (-1)
+            tcAfter = -1
 
         # If the current position is before the first time code ...
         if tcBefore == -1:
@@ -1345,7 +1753,11 @@ class TranscriptEditor(RichTextEditCtrl):
         # Otherwise ...
         else:
             # ... let's get the character position of the Before time code
-            start = self.FindText(0, self.GetTextLength(), "%s<%d>" % (TIMECODE_CHAR, tcBefore))
+            start = self.find_timecode_position(tcBefore)
+            # If the Before time code isn't in the loaded paragraphs ...
+            if start == -1:
+                # ... start at the first position in the RichTextCtrl
+                start = 0
 
         # If the current position is after the last time code ...
         if tcAfter == -1:
@@ -1354,7 +1766,11 @@ class TranscriptEditor(RichTextEditCtrl):
         # Otherwise ...
         else:
             # ... let's get the character position of the After time code
-            end = self.FindText(0, self.GetTextLength(), "%s<%d>" % (TIMECODE_CHAR, tcAfter))
+            end = self.find_timecode_position(tcAfter)
+            # If the After time code isn't in the loaded paragraphs ...
+            if end == -1:
+                # ... end at the last position in the RichTextCtrl
+                end = self.GetTextLength()
 
         # Let's get the current selection position
         pos = self.GetSelection()
@@ -1422,9 +1838,7 @@ class TranscriptEditor(RichTextEditCtrl):
         # If the text IS a time code, this code will locate the appropriate time code AFTER the number sent.  This is needed
         # when a selection is made in the Visualization Window which may not align with a know ending time code.
         try:
-            timecodePos = 0
-            while (timecodePos < len(self.timecodes)) and (int(self.timecodes[timecodePos]) < int(float(text))):
-                timecodePos += 1
+            timecodePos = bisect.bisect_left(self.timecodes, int(float(text)))
             if text != str(self.timecodes[timecodePos]):
                 text = str(self.timecodes[timecodePos])
         except:
@@ -1469,40 +1883,44 @@ class TranscriptEditor(RichTextEditCtrl):
     def GetTextBetweenTimeCodes(self, startTime, endTime):
         """ Get the text between the time codes indicated """
         # This method is used for Episode Transcript Change Propagation.
+        # If only a window of paragraphs is loaded and the text extends beyond it ...
+        if self.windowedLoad and \
+           not ((self.windowStart <= self.GetParagraphBlockForTime(startTime + 2) < self.windowEnd) and \
+                (self.windowStart <= self.GetParagraphBlockForTime(endTime) < self.windowEnd)):
+            # ... we need the full transcript
+            self.LoadFullTranscript()
+        # Don't let the window of paragraphs move while we select the text
+        self.windowLocked = True
         # Let's try to remember the cursor position
         self.SaveCursor()
 
-        # Initialize start time code to zero, in case the first clip has no leading time code
-        startTimeCode = 0
+        # Locate the Start Time in the Time Code Index
+        i = bisect.bisect_left(self.timecodes, startTime)
         # If the Start Time exactly matches an existing time code ...
-        if startTime in self.timecodes:
+        if (i < len(self.timecodes)) and (self.timecodes[i] == startTime):
             # ... then we can just use it.
             startTimeCode = startTime
-        # If the Start Time does NOT exactly match an existing time code ...
+        # If there is a time code BEFORE the Start Time ...
+        elif i > 0:
+            # ... use the time code immediately BEFORE the Start Time
+            startTimeCode = self.timecodes[i - 1]
+        # Otherwise ...
         else:
-            # ... iterate through the existing time codes ...
-            for time in self.timecodes:
-                # ... and find the time code immediately BEFORE the Start Time
-                if time < startTime:
-                    startTimeCode = time
-                else:
-                    break
-        # If the End Time exactly matches an existing time code ...
-        if endTime in self.timecodes:
-            # ... then we can just use it.
-            endTimeCode = endTime
-        # If the End Time does NOT exactly match an existing time code ...
+            # ... use zero, as the first clip has no leading time code
+            startTimeCode = 0
+        # Locate the End Time in the Time Code Index
+        i = bisect.bisect_left(self.timecodes, endTime)
+        # If there is a time code at or AFTER the End Time ...
+        if i < len(self.timecodes):
+            # ... use it.  (If the End Time exactly matches an existing time code, this is the End Time.)
+            endTimeCode = self.timecodes[i]
+        # If the end time is AFTER the last time code ...
         else:
-            # Default endTimeCode to 0 in order to avoid problems for transcripts that totally lack time codes
-            endTimeCode = 0
-            # ... iterate through the existing time codes ...
-            for time in self.timecodes:
-                # ... and find the time code immediately AFTER the End Time
-                if time < endTime:
-                    endTimeCode = time
-                else:
-                    endTimeCode = time
-                    break
+            # Default endTimeCode to the last time code, or 0 for transcripts that totally lack time codes
+            if len(self.timecodes) > 0:
+                endTimeCode = self.timecodes[-1]
+            else:
+                endTimeCode = 0
             # Check to see if the end time is AFTER the last time code.
             if endTime > endTimeCode:
                 # If so, use the end time
@@ -1520,6 +1938,8 @@ class TranscriptEditor(RichTextEditCtrl):
         plainText = self.GetPlainTextSelection(selectionOnly=True)
         # Let's try restoring the Cursor Position when all is said and done.
         self.RestoreCursor()
+        # Window changes are okay again
+        self.windowLocked = False
         # Return the start and end times that were found along with the text between them.
         return (startTimeCode, endTimeCode, xmlText, plainText)
 
@@ -1539,6 +1959,10 @@ class TranscriptEditor(RichTextEditCtrl):
     def set_read_only(self, state=True):
         """Enable or disable read-only mode, to prevent the transcript
         from being modified."""
+        # If we're switching to EDIT MODE with only a window of paragraphs loaded ...
+        if (not state) and self.windowedLoad:
+            # ... load the full transcript, as editing and saving work on the whole document
+            self.LoadFullTranscript()
         # Change the Read Only state in the RichTextEditCtrl
         self.SetReadOnly(state)
         # Reset the document length
@@ -1618,7 +2042,7 @@ class TranscriptEditor(RichTextEditCtrl):
             # ... just assume the time code value is 0.
             start_timecode = 0
         # If we are positioned AFTER the LAST time-code ...
-        if (start_timecode in self.timecodes) and (self.timecodes.index(start_timecode) == len(self.timecodes) - 1):
+        if self.timecode_index(start_timecode) == len(self.timecodes) - 1:
             # ... return the start time code and the end of the file
             return (start_timecode, -1)
 
@@ -1667,7 +2091,7 @@ class TranscriptEditor(RichTextEditCtrl):
             # ... if we're not at the FIRST time code in the document ...
             if (start_timecode > self.timecodes[0]):
                 # ... then select the next earliest time code as the correct start_timecode
-                start_timecode = self.timecodes[self.timecodes.index(start_timecode) - 1]
+                start_timecode = self.timecodes[self.timecode_index(start_timecode) - 1]
             # If you ARE at the first time code ...
             elif start_timecode == 0:
 
@@ -1682,6 +2106,11 @@ class TranscriptEditor(RichTextEditCtrl):
 
     def ClearDoc(self, skipUnlock = False):
         """ Clear the Transcript Window """
+        # Signal that we don't have a window of paragraphs loaded
+        self.windowedLoad = False
+        self.windowStart = 0
+        self.windowEnd = 0
+        self.timecodeBlocks = {}
         # If the current Transcript is locked ...
         if (self.TranscriptObj != None) and (self.TranscriptObj.isLocked) and not skipUnlock:
             # ... unlock it.  (Saving has already been taken care of.)
@@ -1696,6 +2125,8 @@ class TranscriptEditor(RichTextEditCtrl):
         self.TranscriptObj = None
         # Clear the time code list
         self.timecodes = []
+        # Clear the time code positions
+        self.timecodePositions = {}
         # Clear the current time code pointer
         self.current_timecode = -1
         # Make the control read-only
@@ -1721,26 +2152,15 @@ class TranscriptEditor(RichTextEditCtrl):
             # ... then return 0 to signal to start at the beginning of the file
             return 0
 
-        # Start Exception Handling
-        try:
-            # Try to get the Index in the time codes list of the item BEFORE the current time code value (hence -1)
-            i = self.timecodes.index(tc) - 1
-            # If our index is 0 or higher ...
-            while i >= 0:
-                # If the Time Code List value is less than our original time code ...
-                if self.timecodes[i] < tc:
-                    # ... then return the value
-                    return self.timecodes[i]
-                # Otherwise, move a value earlier in the list and try again
-                i = i - 1
-            # If we exit the while loop without RETURN, then return 0 to signal to start at the beginning of the file
-            return 0
-        # If an exception is raised ...  (probably an index out of range call.)
-        except:
-            if DEBUG:
-                print sys.exc_info()[0]
-                print sys.exc_info()[1]
-            # ... return 0 to signal to start at the beginning of the file
+        # Get the Index of the current time code value in the sorted time codes list.  Because the list is sorted,
+        # bisect_left() finds the first copy, so the item BEFORE it (hence -1) is less than our original time code.
+        i = self.timecode_index(tc) - 1
+        # If the current time code is in the list and is not the first time code ...
+        if i >= 0:
+            # ... then return the value
+            return self.timecodes[i]
+        # Otherwise, return 0 to signal to start at the beginning of the file
+        else:
             return 0
 
     def NextTimeCode(self, tc=None):
@@ -1756,32 +2176,20 @@ class TranscriptEditor(RichTextEditCtrl):
                 # ... then return the FIRST value in the list.
                 return self.timecodes[0]
 
-        # Start Exception Handling
-        try:
-            # Try to get the Index in the time codes list of the item AFTER the current time code value (hence +1)
-            i = self.timecodes.index(tc) + 1
+        # If there are no time codes in the time codes list ...
+        if len(self.timecodes) == 0:
+            # ... return -1 to signal failure
+            return -1
+        # If the current time code value is in the time codes list ...
+        if self.timecode_index(tc) > -1:
+            # ... get the Index of the first item in the sorted list that is greater than our original time code
+            i = bisect.bisect_right(self.timecodes, tc)
             # If our index is less than the highest value ...
-            while i < len(self.timecodes):
-                # If the Time Code List value is greater than our original time code ...
-                if self.timecodes[i] > tc:
-                    # ... then return the value
-                    return self.timecodes[i]
-                # Otherwise, move a value later in the list and try again
-                i = i + 1
-            # If we get here, we got to the end of the list.  Just return the list's highest value
-            return self.timecodes[-1]
-        # If an exception is rasied ...  (probably an index out of range call.)
-        except:
-            if DEBUG:
-                print sys.exc_info()[0]
-                print sys.exc_info()[1]
-            # If there are time codes in the time codes list ...
-            if len(self.timecodes) > 0:
-                # ... return the highest value in the list
-                return self.timecodes[-1]
-            else:
-                # ... return -1 to signal failure
-                return -1
+            if i < len(self.timecodes):
+                # ... then return the value
+                return self.timecodes[i]
+        # If we get here, we got to the end of the list or the time code wasn't found.  Just return the list's highest value
+        return self.timecodes[-1]
 
     def OnKeyDown(self, event):
         """ Called when a key is pressed down.  All characters are upper case.  """
@@ -2802,14 +3210,28 @@ class TranscriptEditor(RichTextEditCtrl):
         # Let's show all the hidden text of the time codes.  This doesn't work without it!
         self.show_all_hidden()
 
+        # Convert the adjustment to milliseconds
+        adjustmentMS = int(adjustmentAmount * 1000)
+        # Start a new Time Code Position dictionary.  Adding the same amount to every time code keeps the Time Code Index
+        # sorted, so we only need to update values in place rather than rescanning the document.
+        newPositions = {}
+
         # Let's find each time code mark and update it.  This will be easier if we use the
         # POSITION rather than the VALUE of the "timecodes" list, as we need to change that
         # list as we go too!
         for loop in range(0, len(self.timecodes)):
-            # Find the time code
-            self.cursor_find("%s<%d>" % (TIMECODE_CHAR, self.timecodes[loop]))
-            # Remember the starting position, adjusted for the width of the Time Code Character
-            start = self.GetCurrentPos() - len(TIMECODE_CHAR)
+            # Find the time code, starting from its last known position
+            pos = self.find_timecode_position(self.timecodes[loop])
+            # If the time code can't be found ...
+            if pos == -1:
+                # ... fall back to searching from the cursor
+                self.cursor_find("%s<%d>" % (TIMECODE_CHAR, self.timecodes[loop]))
+                # Remember the starting position, adjusted for the width of the Time Code Character
+                start = self.GetCurrentPos() - len(TIMECODE_CHAR)
+            # If the time code was found ...
+            else:
+                # ... the Time Code starts there
+                start = pos
             # We need to determine the end position the hard way.  select_find() was giving the wrong
             # answer because of the CheckTimeCodesAtSelectionBoundaries() call.
             # So start at the beginning of the time code ...
@@ -2825,10 +3247,13 @@ class TranscriptEditor(RichTextEditCtrl):
             # First delete the old data
             self.DeleteSelection()
             # Then insert the new data as hidden text (which is why we can't just plug it in above.)
-            self.InsertTimeCode(self.timecodes[loop] + int(adjustmentAmount* 1000))
+            self.InsertTimeCode(self.timecodes[loop] + adjustmentMS)
             # Adjust the local list of Transcript time codes too!
-            self.timecodes[loop] = self.timecodes[loop] + int(adjustmentAmount * 1000)
-       
+            self.timecodes[loop] = self.timecodes[loop] + adjustmentMS
+            # Remember the time code's position under its new value
+            newPositions[self.timecodes[loop]] = start
+        # Replace the Time Code Position dictionary
+        self.timecodePositions = newPositions
 
         # We better hide all the hidden text for the time codes again
         self.hide_all_hidden()
@@ -2864,10 +3289,13 @@ class TranscriptEditor(RichTextEditCtrl):
             if (len(self.timecodes) == 0) or (tcVal > self.timecodes[-1]):
                 # ... delete the current selection, which is the (H:MM:SS.hh) string 
                 self.DeleteSelection()
+                # ... note where the new Time Code goes
+                tcPos = self.GetInsertionPoint()
                 # ... insert the new Time Code in Transana Format
                 self.InsertTimeCode(tcVal)
-                # ... add the new Time Code to the Time Codes list
+                # ... add the new Time Code to the end of the Time Code Index
                 self.timecodes.append(tcVal)
+                self.timecodePositions[tcVal] = tcPos
         # Go to the beginning of the transcript
         self.GotoPos(0)
         # Destroy the popup
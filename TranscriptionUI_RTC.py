@@ -627,9 +627,12 @@ class TranscriptionUI(wx.Frame):
         """ Return the current Transcript Object, with the edited text even if it hasn't been saved. """
         # Make a copy of the Transcript Object, since we're going to be changing it.
         tempTranscriptObj = self.dlg.editor.TranscriptObj.duplicate()
-        # Update the Transcript Object's text to reflect the edited state
-        # STORE XML IN THE TEXT FIELD  (This shouldn't be necessary, but the time codes don't show up without it!)
-        tempTranscriptObj.text = self.dlg.editor.GetFormattedSelection('XML')
+        # If only a window of paragraphs is loaded, the control doesn't hold the whole transcript.  The transcript
+        # can't be edited in that state, so the Transcript Object's text is already current.
+        if not self.dlg.editor.windowedLoad:
+            # Update the Transcript Object's text to reflect the edited state
+            # STORE XML IN THE TEXT FIELD  (This shouldn't be necessary, but the time codes don't show up without it!)
+            tempTranscriptObj.text = self.dlg.editor.GetFormattedSelection('XML')
         # Now return the copy of the Transcript Object
         return tempTranscriptObj
 
@@ -20,6 +20,8 @@ __author__ = "David K. Woods <dwoods@transana.com>"
 
 # import Python's os and sys modules
 import os, sys
+# import Python's multiprocessing module
+import multiprocessing
 # import Python's Regular Expression module
 import re
 
@@ -42,6 +44,8 @@ import DBInterface
 import Dialogs
 # Import Transana's Document object
 import Document
+# Import Transana's Miscellaneous Functions
+import Misc
 # import Transana's Search module
 import ProcessSearch
 # Import Transana's Quote object
@@ -59,25 +63,224 @@ import TransanaImages
 # Import Transana's Transcript Object
 import Transcript
 
+# If there are at least this many items that are not in the Word Count index, count their words
+# in a pool of worker processes rather than one at a time.
+MIN_ITEMS_FOR_WORKER_POOL = 20
 
-class CheckListCtrl(wx.ListCtrl, ListCtrlMixins.CheckListCtrlMixin):
-    """ Create a wxListCtrl class with the CheckListCtrlMixin applied """
+
+class VirtualCheckListCtrl(wx.ListCtrl):
+    """ A virtual (wx.LC_VIRTUAL) ListCtrl with check boxes for the Word Frequency Results.  Rows are drawn on
+        demand from an itemDataMap dictionary (key = integer, value = (word, count, synonyms)) through a sorted,
+        filtered list of keys, and check state is kept in a bitset indexed by key.  Sorting, filtering, and
+        checking therefore never insert or delete control items, which matters with 100k+ distinct words. """
     def __init__(self, parent):
-        """ Create a wxListCtrl with the CheckListCtrlMixin """
+        """ Create a virtual wxListCtrl with check boxes """
         # Initialize a variable for the parent FORM.  (a Panel is passed in here, but that's not useful!)
         self.parentForm = None
-        # Initialize a ListCtrl
-        wx.ListCtrl.__init__(self, parent, -1, style=wx.LC_REPORT | wx.LC_SORT_ASCENDING)
-        # Add the CheckListCtrlMixin
-        ListCtrlMixins.CheckListCtrlMixin.__init__(self)
+        # Initialize a virtual ListCtrl
+        wx.ListCtrl.__init__(self, parent, -1, style=wx.LC_REPORT | wx.LC_VIRTUAL)
+        # Initialize the data dictionary that provides the rows
+        self.itemDataMap = {}
+        # The itemDataMap keys that are currently displayed, in display order
+        self.rows = []
+        # Cache of ALL itemDataMap keys in sorted order, by (column, ascending).  Filtering just walks these lists.
+        self.sortedKeys = {}
+        # The filter function that determines which itemDataMap values are displayed.  None shows everything.
+        self.filterFunc = None
+        # The check state bitset, indexed by itemDataMap key
+        self.checked = bytearray()
+        # The number of checked items, kept up to date as items are checked so it never needs to be counted
+        self.checkedCount = 0
+        # The current sort column and direction.  Start with a Descending sort of the Count
+        self.sortColumn = 1
+        self.sortAscending = False
+        # Image List indexes for check boxes and column header sort arrows
+        self.unCheckedImage = -1
+        self.checkedImage = -1
+        self.sortAscendingImage = -1
+        self.sortDescendingImage = -1
         # Set EVT_LIST_ITEM_ACTIVATED handler (Double-click checks/unchecks item)
         self.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.OnItemActivated)
-        # Set EVT_LIST_COL_CLICK handler to track what column and what direction of sort we have
+        # Set EVT_LIST_COL_CLICK handler to sort by the clicked column
         self.Bind(wx.EVT_LIST_COL_CLICK, self.OnColumnClick)
+        # Set EVT_LEFT_DOWN handler so clicking the check box checks/unchecks the item
+        self.Bind(wx.EVT_LEFT_DOWN, self.OnLeftDown)
         # Initialize the SynonymGroupCtrl (which this control may need to be able to change) to None
         self.synonymGroupCtrl = None
 
-    # This is called by the base class when an item is checked/unchecked
+    def SetImages(self, unCheckedImage, checkedImage, sortAscendingImage, sortDescendingImage):
+        """ Identify the Image List indexes for the check boxes and the column header sort images """
+        self.unCheckedImage = unCheckedImage
+        self.checkedImage = checkedImage
+        self.sortAscendingImage = sortAscendingImage
+        self.sortDescendingImage = sortDescendingImage
+
+    def SetData(self, itemDataMap):
+        """ Provide a new data dictionary for the control.  This clears all check marks. """
+        # Remember the data
+        self.itemDataMap = itemDataMap
+        # The sort caches are no longer valid
+        self.sortedKeys = {}
+        # Clear all check marks, allowing one bit per possible key
+        if len(itemDataMap) > 0:
+            self.checked = bytearray(max(itemDataMap.keys()) / 8 + 1)
+        else:
+            self.checked = bytearray()
+        self.checkedCount = 0
+        # Display the data
+        self.ApplyFilter(self.filterFunc)
+
+    def ApplyFilter(self, filterFunc=None):
+        """ Display the rows whose itemDataMap values pass filterFunc (or all rows if filterFunc is None) in the
+            current sort order.  Check marks are preserved. """
+        # Remember the filter function
+        self.filterFunc = filterFunc
+        # Get the sorted keys for the current sort
+        keys = self.GetSortedKeys(self.sortColumn, self.sortAscending)
+        # If there's a filter ...
+        if filterFunc != None:
+            # ... keep only the keys for data that pass the filter
+            self.rows = [key for key in keys if filterFunc(self.itemDataMap[key])]
+        # If there's no filter ...
+        else:
+            # ... show all the keys
+            self.rows = list(keys)
+        # Tell the virtual control how many rows there are ...
+        self.SetItemCount(len(self.rows))
+        # ... and redraw it
+        self.Refresh()
+
+    def GetSortedKeys(self, col, ascending):
+        """ Get all itemDataMap keys sorted by the given column and direction.  Ties are always broken by word in
+            ascending alphabetical order.  Results are cached until the data changes. """
+        # If we haven't sorted this way since the data changed ...
+        if not self.sortedKeys.has_key((col, ascending)):
+            # ... sort the keys alphabetically by word first.  This provides the secondary sort ...
+            keys = sorted(self.itemDataMap.keys(), key=lambda key: self.itemDataMap[key][0].lower())
+            # ... then do a stable sort on the requested column, which keeps the secondary sort for ties.
+            if col == 0:
+                keys.sort(key=lambda key: self.itemDataMap[key][0], reverse=not ascending)
+            elif col == 1:
+                keys.sort(key=lambda key: self.itemDataMap[key][1], reverse=not ascending)
+            else:
+                keys.sort(key=lambda key: self.GetSynonymString(self.itemDataMap[key]), reverse=not ascending)
+            # Cache the result
+            self.sortedKeys[(col, ascending)] = keys
+        # Return the sorted keys
+        return self.sortedKeys[(col, ascending)]
+
+    def SortBy(self, col, ascending):
+        """ Sort the displayed rows by the given column and direction """
+        # If we know of a previous sort column ...
+        if (self.sortColumn != col) and (self.sortColumn < self.GetColumnCount()):
+            # ... remove its sort image
+            self.ClearColumnImage(self.sortColumn)
+        # Remember the sort column and direction
+        self.sortColumn = col
+        self.sortAscending = ascending
+        # If the column exists ...
+        if col < self.GetColumnCount():
+            # ... show the sort direction image in the column header
+            if ascending:
+                self.SetColumnImage(col, self.sortAscendingImage)
+            else:
+                self.SetColumnImage(col, self.sortDescendingImage)
+        # If the parent Form has been defined ...
+        if self.parentForm != None:
+            # ... inform the parent form what column is sorted in which direction
+            self.parentForm.sortColumn = col
+            self.parentForm.sortAscending = ascending
+        # Re-display the rows in the new order, keeping the current filter
+        self.ApplyFilter(self.filterFunc)
+
+    def GetSynonymString(self, data):
+        """ Get the display string for the synonyms of an itemDataMap value """
+        # If there are synonyms ...
+        if data[2] != '':
+            # ... separate them with spaces
+            return ' '.join(data[2])
+        else:
+            return ''
+
+    def OnGetItemText(self, item, col):
+        """ Provide the text for a cell of the virtual list """
+        # Get the data for the row
+        data = self.itemDataMap[self.rows[item]]
+        # Return the requested column's text
+        if col == 0:
+            return data[0]
+        elif col == 1:
+            return str(data[1])
+        else:
+            return self.GetSynonymString(data)
+
+    def OnGetItemImage(self, item):
+        """ Provide the check box image for a row of the virtual list """
+        # If the item is checked ...
+        if self.IsChecked(item):
+            # ... show the checked image
+            return self.checkedImage
+        else:
+            # ... otherwise show the unchecked image
+            return self.unCheckedImage
+
+    def OnGetItemAttr(self, item):
+        """ The virtual list doesn't use item attributes """
+        return None
+
+    def GetItemText(self, item, col=0):
+        """ Get the text for a cell of the list """
+        return self.OnGetItemText(item, col)
+
+    def GetItemData(self, item):
+        """ Get the itemDataMap key for a row of the list """
+        return self.rows[item]
+
+    def IsChecked(self, item):
+        """ Is the row checked? """
+        # Get the itemDataMap key for the row
+        key = self.rows[item]
+        # Look up the key's bit in the bitset
+        return (key / 8 < len(self.checked)) and (self.checked[key / 8] & (1 << (key % 8)) != 0)
+
+    def CheckItem(self, item, check=True):
+        """ Check or uncheck a row """
+        # Get the itemDataMap key for the row
+        key = self.rows[item]
+        # If the bitset is too small for this key ...
+        if key / 8 >= len(self.checked):
+            # ... extend it
+            self.checked.extend(bytearray(key / 8 + 1 - len(self.checked)))
+        # Note whether the row is checked now
+        wasChecked = (self.checked[key / 8] & (1 << (key % 8)) != 0)
+        # If we're checking ...
+        if check:
+            # ... set the key's bit
+            self.checked[key / 8] |= (1 << (key % 8))
+            # Count the newly checked item
+            if not wasChecked:
+                self.checkedCount += 1
+        # If we're unchecking ...
+        else:
+            # ... clear the key's bit
+            self.checked[key / 8] &= ~(1 << (key % 8)) & 0xff
+            # Stop counting the unchecked item
+            if wasChecked:
+                self.checkedCount -= 1
+        # Redraw the row
+        self.RefreshItem(item)
+        # Let the control respond to the change
+        self.OnCheckItem(item, check)
+
+    def ToggleItem(self, item):
+        """ Toggle the check state of a row """
+        self.CheckItem(item, not self.IsChecked(item))
+
+    def HasCheckedItems(self):
+        """ Are there ANY checked items in the list? """
+        # Use the running count rather than scanning the bitset, which would make checking many items O(n^2)
+        return self.checkedCount > 0
+
     def OnCheckItem(self, index, flag):
         """ Handle check / uncheck of list items """
         # If a SynonymGroupCtrl is defined and blank ...
@@ -85,23 +288,24 @@ class CheckListCtrl(wx.ListCtrl, ListCtrlMixins.CheckListCtrlMixin):
             # ... and the item just clicked is becoming Checked ...
             if self.IsChecked(index):
                 # ... add the text of the checked item to the SynonymGroupCtrl
-                self.synonymGroupCtrl.SetValue(self.GetItem(itemId=index, col=0).GetText())
-
-        # We need to know if there are ANY checked items in the list
-        count = 0
-        # Iterate through the list
-        for itemId in range(self.GetItemCount()):
-            # If we find a checked item ...
-            if self.IsChecked(itemId):
-                # ... increment our counter
-                count += 1
-                # ... and stop looking
-                break
-        # if we found NO checked items ...
-        if count == 0:
+                self.synonymGroupCtrl.SetValue(self.GetItemText(index, 0))
+
+        # if there are NO checked items ...
+        if (self.synonymGroupCtrl != None) and not self.HasCheckedItems():
             # ... reset the SynonymGroupCtrl to blank
             self.synonymGroupCtrl.SetValue('')
 
+    def OnLeftDown(self, evt):
+        """ Handle mouse clicks, toggling the check box if it was clicked """
+        # Find out where the click was
+        (index, flags) = self.HitTest(evt.GetPosition())
+        # If the click was on an item's check box image ...
+        if (index > -1) and (flags == wx.LIST_HITTEST_ONITEMICON):
+            # ... toggle the item
+            self.ToggleItem(index)
+        # Allow normal selection processing
+        evt.Skip()
+
     def OnItemActivated(self, evt):
         """ Handle item double-click """
         # Toggle the checked state of the selected item
@@ -111,15 +315,16 @@ class CheckListCtrl(wx.ListCtrl, ListCtrlMixins.CheckListCtrlMixin):
         """ Handle setting the sort by clicking the column header """
         # Determine which column has been selected
         col = event.GetColumn()
-        # Column image is a proxy for sort direction!!  I don't seem to be able to get that information directly.
-        # NOTE that this information is set AFTER the sort has occurred, so the secondary sort need to take that
-        #      into account.
-        # If the parent Form has been defined ...
-        if self.parentForm != None:
-            # ... inform the parent form what column is sorted in which direction
-            self.parentForm.sortColumn = col
-            # GetImage() == 2 is ascending order, GetImage() == 3 is descending order (!)
-            self.parentForm.sortAscending = (self.GetColumn(col).GetImage() == 2)
+        # If the current sort column was clicked ...
+        if col == self.sortColumn:
+            # ... reverse the sort direction
+            ascending = not self.sortAscending
+        # If a different column was clicked ...
+        else:
+            # ... sort it in ascending order
+            ascending = True
+        # Sort the list
+        self.SortBy(col, ascending)
 
     def SetParentForm(self, form):
         """ Allow the control to know about the parent form, allowing us to track Column and Direction of sort """
@@ -142,7 +347,7 @@ class AutoWidthListCtrl(wx.ListCtrl, ListCtrlMixins.ListCtrlAutoWidthMixin):
         ListCtrlMixins.ListCtrlAutoWidthMixin.__init__(self)
 
 
-class WordFrequencyReport(wx.Frame, ListCtrlMixins.ColumnSorterMixin):
+class WordFrequencyReport(wx.Frame):
     """ This is the main Window for the Word Frequency Reports for Transana """
 
     def __init__(self, parent, tree, startNode):
@@ -154,13 +359,15 @@ class WordFrequencyReport(wx.Frame, ListCtrlMixins.ColumnSorterMixin):
         self.tree = tree
         # Remember the start node passed in
         self.startNode = startNode
-        # We need a specifically-named dictionary in a particular format for the ColumnSorterMixin.
+        # We need a dictionary of word data (key = integer, value = (word, count, synonyms)) for the Results List.
         # Initialize that here.  (This also tells us if we've gotten the data yet!)
         self.itemDataMap = {}
         # We need a flag that indicates the need to repoputate the itemDataMap because it is out of date.
         self.needsUpdate = True
         # We need a flag that indicates if the report's itemDataMap is CURRENTLY being updated
         self.isUpdating = False
+        # We need a flag that indicates if the user cancelled the word count while the report was being assembled
+        self.cancelled = False
         # We also need a synonyms list.  Initialize it here
         self.synonyms = {}
         # Let's keep track of what column and what direction our current sort is.  That way, we
@@ -271,8 +478,8 @@ class WordFrequencyReport(wx.Frame, ListCtrlMixins.ColumnSorterMixin):
         resultsPanel.SetBackgroundColour(wx.WHITE)
         # Create a Sizer for the Results Panel
         pnl1Sizer = wx.BoxSizer(wx.VERTICAL)
-        # Put a CheckListCtrl for the Word Frequency Results on the Results Panel
-        self.resultsList = CheckListCtrl(resultsPanel)
+        # Put a VirtualCheckListCtrl for the Word Frequency Results on the Results Panel
+        self.resultsList = VirtualCheckListCtrl(resultsPanel)
         # Let the resultsList Control know about the parent form so it can provide feedback about
         # sort column and direction
         self.resultsList.SetParentForm(self)
@@ -293,6 +500,14 @@ class WordFrequencyReport(wx.Frame, ListCtrlMixins.ColumnSorterMixin):
         self.sortUpImage3 = self.imageList.Add(TransanaImages.SmallUpArrow.GetBitmap())
         # Associate the ImageList with the Control
         self.resultsList.SetImageList(self.imageList, wx.IMAGE_LIST_SMALL)
+        # Let the Control know which images to use for check boxes and for ascending and descending sorts
+        self.resultsList.SetImages(self.unCheckedImage, self.checkedImage, self.sortDownImage, self.sortUpImage)
+        # Add Column Headings
+        self.resultsList.InsertColumn(0, _("Word"))
+        self.resultsList.InsertColumn(1, _("Frequency"), wx.LIST_FORMAT_RIGHT)
+        self.resultsList.InsertColumn(2, _("Word Group"))
+        # Set the initial sort
+        self.resultsList.SortBy(self.sortColumn, self.sortAscending)
         
         # Place the Results List on the Result Panel Sizer
         pnl1Sizer.Add(self.resultsList, 1, wx.EXPAND | wx.ALL, 5)
@@ -436,12 +651,15 @@ class WordFrequencyReport(wx.Frame, ListCtrlMixins.ColumnSorterMixin):
         # Add the Notebook control to the form's Main Sizer
         mainSizer.Add(self.notebook, 1, wx.EXPAND | wx.TOP | wx.LEFT | wx.RIGHT, 10)
 
-        # Add in the Column Sorter mixin to make the results panel sortable
-        ListCtrlMixins.ColumnSorterMixin.__init__(self, 3)
         self.notebook.Bind(wx.EVT_NOTEBOOK_PAGE_CHANGED, self.OnNotebookPageChanged)
 
         # Populate the Word Frequency Results
         self.PopulateWordFrequencies()
+        # If the user cancelled while the Word Frequency Results were being counted ...
+        if self.cancelled:
+            # ... close the report without displaying it
+            self.Destroy()
+            return
 
         # Set the form's Main Sizer and enable auto-layout
         self.SetSizer(mainSizer)
@@ -464,20 +682,6 @@ class WordFrequencyReport(wx.Frame, ListCtrlMixins.ColumnSorterMixin):
         # Display the form
         self.Show(True)
 
-    def GetSecondarySortValues(self, col, key1, key2):
-        """ Set the secondary sort for Column Sorting on the Results tab """
-        # Determine whether the sort is ascending or descending
-        ascending = self.GetSortState()[1]
-
-        # If the sort is Ascending ...
-        if ascending:
-            # ... we want key1, then key2 values so the Word sort is alphabetic and ascending
-            return(self.itemDataMap[key1][0].lower(), self.itemDataMap[key2][0].lower())
-        # If the sort is Descending ...
-        else:
-            # ... then we want key2, then key1 values so the Word sort is still alphabetic and ascending
-            return(self.itemDataMap[key2][0].lower(), self.itemDataMap[key1][0].lower())
-        
     def OnNotebookPageChanged(self, event):
         """ Handle Notebook Page Change Events """
         # Allow the underlying Control to process the Page Change
@@ -489,11 +693,15 @@ class WordFrequencyReport(wx.Frame, ListCtrlMixins.ColumnSorterMixin):
             self.uncheckAll.Enable(True)
             self.printReport.Enable(True)
         
-            # If we're moving to the Results page FROM the Options page ...
-            # (The Word Groups page updates the Results as needed)
-            if event.GetOldSelection() == 2:
+            # If the data needs to be refreshed ...  (This is checked whatever page we come from, as a cancelled
+            # refresh on the Word Groups page leaves the old Results in place.)
+            if self.needsUpdate:
                 # ... refresh the Results!
-                self.PopulateWordFrequencies()
+                self.RefreshWordFrequencies()
+            # If we're moving to the Results page FROM the Options page ...
+            elif event.GetOldSelection() == 2:
+                # ... just re-apply the Options settings.  The Results List doesn't need to be rebuilt.
+                self.ApplyResultsFilter()
                 
         else:
             # ... disable the check and print buttons
@@ -593,7 +801,7 @@ class WordFrequencyReport(wx.Frame, ListCtrlMixins.ColumnSorterMixin):
                 self.ControlObject.SignalWordFrequencyReports()
                 
                 # Populate the Word Frequencies table
-                self.PopulateWordFrequencies()
+                self.RefreshWordFrequencies()
                 
             # Destroy the Synonmy Editor dialog
             synonymEditor.Destroy()
@@ -670,7 +878,7 @@ class WordFrequencyReport(wx.Frame, ListCtrlMixins.ColumnSorterMixin):
         self.ControlObject.SignalWordFrequencyReports()
         # We need to update the Word Frequencies table before the next Synonym Lookup occurs, so call this
         # no matter what!
-        self.PopulateWordFrequencies()
+        self.RefreshWordFrequencies()
 
         # Clear the extension specification control
         self.synonymExtension.SetValue('')
@@ -759,7 +967,7 @@ class WordFrequencyReport(wx.Frame, ListCtrlMixins.ColumnSorterMixin):
         # This actually requires using the ControlObject to signal ALL Word Frequency Reports!
         self.ControlObject.SignalWordFrequencyReports()
         # Repopulate the Results table based on the new Synonyms data
-        self.PopulateWordFrequencies()
+        self.RefreshWordFrequencies()
 
     def PopulateSynonyms(self):
         """ Set up the Synonyms data structures and populate them initially """
@@ -786,21 +994,33 @@ class WordFrequencyReport(wx.Frame, ListCtrlMixins.ColumnSorterMixin):
                 # ... add an entry to the Synonym Lookup table
                 self.synonymLookups[synonym] = key
 
+    def RefreshWordFrequencies(self):
+        """ Repopulate the Word Frequency Results once the report is displayed.  Returns False if the user cancelled
+            the word count.  The previous Results are then left in place, and are refreshed the next time the
+            Results tab is shown. """
+        # Populate the Word Frequency Results
+        self.PopulateWordFrequencies()
+        # If the user cancelled ...
+        if self.cancelled:
+            # ... the report stays open, so the cancel has been handled.
+            self.cancelled = False
+            return False
+        return True
+
     def PopulateWordFrequencies(self):
-        """ Clear and Populate the Word Frequency Results """
+        """ Clear and Populate the Word Frequency Results.  If the user cancels the word count, self.cancelled is
+            set and the previous Results are kept. """
         # Signal that the control's itemDataMap IS being updated right now!
         self.isUpdating = True
-        # Clear the Control
-        self.resultsList.ClearAll()
-        # Add Column Heading
-        self.resultsList.InsertColumn(0, _("Word"))
-        self.resultsList.InsertColumn(1, _("Frequency"), wx.LIST_FORMAT_RIGHT)
-        self.resultsList.InsertColumn(2, _("Word Group"))
+        # The user hasn't cancelled this word count (yet)
+        self.cancelled = False
 
         # If we haven't read the data yet, or need to refresh it ...
         if self.needsUpdate:
             # We can reset the needsUpdate Flag
             self.needsUpdate = False
+            # Remember the current data, in case the user cancels
+            previousItemDataMap = self.itemDataMap
             # Re-initialize the itemDataMap
             self.itemDataMap = {}
             # We need to populate the Synonyms BEFORE we Populate the Word Frequencies!!
@@ -831,10 +1051,21 @@ I'm Ellen Feiss, and I'm a student!"""
                 # ... pass the tree and node information into the method that recursively extracts text from
                 #     tree nodes and counts words in it
                 data = self.ExtractDataFromTree(self.tree, self.startNode)
+                # If the user cancelled the word count ...
+                if data == None:
+                    # ... note that the report was cancelled
+                    self.cancelled = True
+                    # The data still needs to be refreshed, and the previous data is still what's displayed
+                    self.needsUpdate = True
+                    self.itemDataMap = previousItemDataMap
+                    # Signal that the control's itemDataMap is no longer being updated right now!
+                    self.isUpdating = False
+                    # There's nothing to display
+                    return
 
             # Initialize the item data dictionary
             itemData = {}
-            # Initialize a counter, which serves as the itemData Key required by the ColumnSorterMixin
+            # Initialize a counter, which serves as the itemData Key
             counter = 0
             # for all the words in the data dictionary ...
             for text in data.keys():
@@ -848,54 +1079,15 @@ I'm Ellen Feiss, and I'm a student!"""
                 # Increment the counter
                 counter += 1
 
-        # If the data is already defined ...
-        else:
-            # ... then we'll use that!
-            itemData = self.itemDataMap
+            # Remember the item data
+            self.itemDataMap = itemData
 
-        # Convert the extracted data to the form needed for the ColumnSorterMixin
-        for key, data in itemData.items():
-            # Start exception handling
-            try:
-                # Convert the Minimum Frequency from the Options tab
-                minFrequency = int(self.minFrequency.GetValue())
-            # If it's not an integer, ignore it!
-            except:
-                minFrequency = 1
-            # Start separate exception handling process
-            try:
-                # Try to convert the Minimum Word Length from the Options Tab
-                minLength = int(self.minLength.GetValue())
-            # If it's not an integer, ignore it!
-            except:
-                minLength = 1
-
-            # If the item is not part of the "Do Not Show" Group, and it meets the minimum frequency and length requirements ...
-            if (data[0] != "Do Not Show Group") and (data[1] >= minFrequency) and (len(data[0]) >= minLength):
-                # ... create a new row in the Results List, adding the word or Synonym Group text
-                index = self.resultsList.InsertStringItem(sys.maxint, data[0])
-                # Add the Count information
-                self.resultsList.SetStringItem(index, 1, str(data[1]))
-                # Initialize a string for the synonyms
-                synonymString = ''
-                # If THIS record has Synonyms ...
-                if data[0] in self.synonyms.keys():
-                    # ... for each synonym ...
-                    for word in self.synonyms[data[0]]:
-                        # ... if this word is NOT the first synonym ...
-                        if synonymString != '':
-                            # ... in sert a spacer in the synonym string
-                            synonymString += ' '
-                        # Add the synonym to the synonym string
-                        synonymString += word
-                # Add the list of synonyms to the Results List
-                self.resultsList.SetStringItem(index, 2, synonymString)
-                # Set the Results List item's itemData to the integer Key, needed for sorting in the ColumnSorterMixin
-                self.resultsList.SetItemData(index, key)
-
-        # The ColumnSorterMixin requires this data structure with this variable name to function
-        self.itemDataMap = itemData
-        # This code comes here, as width is calculated immediately, so must be AFTER data population.        
+        # Hand the data to the virtual Results List.  (This clears all check marks.)
+        self.resultsList.SetData(self.itemDataMap)
+        # Apply the Options tab settings, which also displays the data in the current sort order
+        self.ApplyResultsFilter()
+
+        # Set the column widths.  (LIST_AUTOSIZE only measures the rows that are visible in a virtual list.)
         self.resultsList.SetColumnWidth(0, wx.LIST_AUTOSIZE)
         self.resultsList.SetColumnWidth(1, 100)
         self.resultsList.SetColumnWidth(2, wx.LIST_AUTOSIZE)
@@ -909,39 +1101,157 @@ I'm Ellen Feiss, and I'm a student!"""
             # ... widen the column
             self.resultsList.SetColumnWidth(2, 200)
 
-        # Sort data by the correct column and direction
-        self.SortListItems(self.sortColumn, self.sortAscending)
         # Update the Control to try to fix the first column header's appearance
         self.resultsList.Update()
         # Signal that the control's itemDataMap is no longer being updated right now!
         self.isUpdating = False
 
-    def GetListCtrl(self):
-        """ Pointer to the Results List, required for the ColumnSorterMixin """
-        # Return a pointer to the ResultsList ListCtrl
-        return self.resultsList
-
-    def GetSortImages(self):
-        """ Provide the images needed for headers of sort columns, part of the ColumnSorterMixin implementation """
-        # Return the up and down arrow images to be displayed in the column headers
-        return (self.sortUpImage, self.sortDownImage)
+    def ApplyResultsFilter(self):
+        """ Apply the Options tab settings to the Results List without rebuilding it """
+        # Start exception handling
+        try:
+            # Convert the Minimum Frequency from the Options tab
+            minFrequency = int(self.minFrequency.GetValue())
+        # If it's not an integer, ignore it!
+        except:
+            minFrequency = 1
+        # Start separate exception handling process
+        try:
+            # Try to convert the Minimum Word Length from the Options Tab
+            minLength = int(self.minLength.GetValue())
+        # If it's not an integer, ignore it!
+        except:
+            minLength = 1
+        # Show items that are not part of the "Do Not Show" Group and meet the minimum frequency and length requirements
+        self.resultsList.ApplyFilter(lambda data: (data[0] != "Do Not Show Group") and (data[1] >= minFrequency) and (len(data[0]) >= minLength))
 
     def ExtractDataFromTree(self, tree, startNode):
         """ This routine takes the tree and startNode, figures out what Documents and Transcripts to load, and creates
             a data structure with all the individual words in the appropriate scope along with their counts. """
         # Ask the user to wait while the report is being assembled
         popupDlg = Dialogs.PopupDialog(self, _("Word Frequency Report"), _("Please wait ..."))
-        # Initialize the data dictionary
-        data = {}
-        # Extract the data from the tree using this recursive method
-        data = self.ExtractDataFromNode(tree, startNode, data)
+        # Initialize the list of (objectType, objectNum) items in the report scope
+        items = []
+        # Extract the list of items from the tree using this recursive method
+        items = self.ExtractDataFromNode(tree, startNode, items)
+        # Get the summed word counts for these items from the Word Count index, along with a list of any items
+        # that haven't been indexed yet
+        (counts, missing) = DBInterface.GetWordCounts(items)
         # Destroy the popup
         popupDlg.Destroy()
+        # If there are items that are not in the index yet ...
+        if len(missing) > 0:
+            # ... count their words.  This returns None if the user cancels.
+            counts = self.CountUnindexedItems(missing, counts)
+            # If the user cancelled ...
+            if counts == None:
+                # ... there is no data to return
+                return None
+        # Apply Synonyms to create the data dictionary
+        data = self.ApplySynonyms(counts, {})
         # Return the data dictionary to the calling routine
         return data
 
-    def ExtractDataFromNode(self, tree, startNode, data):
-        """ This extracts data from a node, calling subnodes recursively as needed """
+    def CountUnindexedItems(self, missing, counts):
+        """ Count the words for (objectType, objectNum) items that are not in the Word Count index yet, adding
+            them to the counts dictionary and to the index.  PlainText is read from the database here, on the
+            GUI thread, but for large sets of items the tokenizing is fanned out to a pool of worker processes.
+            Returns None if the user cancels. """
+        # Create a Progress Dialog that allows the user to cancel
+        progress = wx.ProgressDialog(_("Word Frequency Report"), _("Counting words"), maximum=len(missing), parent=self,
+                                     style=wx.PD_APP_MODAL | wx.PD_AUTO_HIDE | wx.PD_CAN_ABORT | wx.PD_ELAPSED_TIME | wx.PD_REMAINING_TIME)
+        # If there are enough items to justify the overhead of starting worker processes ...
+        if (len(missing) >= MIN_ITEMS_FOR_WORKER_POOL) and (multiprocessing.cpu_count() > 1):
+            # ... create a worker pool with one process per core
+            pool = multiprocessing.Pool(multiprocessing.cpu_count())
+            # Don't let more than a couple of texts per core wait in the pool, to limit memory use
+            maxPending = 2 * multiprocessing.cpu_count()
+        # If not ...
+        else:
+            # ... we'll count words right here
+            pool = None
+            maxPending = 0
+        # Initialize the list of pending worker results
+        pending = []
+        # Initialize the number of completed items
+        completed = 0
+        # Initialize the cancel flag
+        cancelled = False
+        # Start exception handling so the worker pool always gets cleaned up
+        try:
+            # Iterate through the items that need counting, and then keep going until all pending results are in
+            itemIndex = 0
+            while ((itemIndex < len(missing)) or (len(pending) > 0)) and not cancelled:
+                # If there are items left and room in the pool ...
+                if (itemIndex < len(missing)) and (len(pending) <= maxPending):
+                    # ... get the next item
+                    (objectType, objectNum) = missing[itemIndex]
+                    itemIndex += 1
+                    # Get the item's plain text
+                    plaintext = DBInterface.GetPlainText(objectType, objectNum)
+                    # If the item has no plain text, there's nothing to count
+                    if plaintext == None:
+                        completed += 1
+                    # If we're using a worker pool ...
+                    elif pool != None:
+                        # ... hand the item to a worker process, remembering the plain text for the index
+                        pending.append((pool.apply_async(Misc.CountPlainTextWords, ((objectType, objectNum, plaintext),)), plaintext))
+                    # If we're NOT using a worker pool ...
+                    else:
+                        # ... count the words here
+                        (objectType, objectNum, itemCounts) = Misc.CountPlainTextWords((objectType, objectNum, plaintext))
+                        # Add the item to the index so we don't have to do this again
+                        DBInterface.UpdateWordCounts(objectType, objectNum, plaintext, counts=itemCounts)
+                        # Merge the item's counts with the report counts
+                        for word in itemCounts.keys():
+                            counts[word] = counts.get(word, 0) + itemCounts[word]
+                        completed += 1
+                # If there are no items left to hand out, or the pool is full ...
+                else:
+                    # ... give the worker processes a moment
+                    wx.MilliSleep(20)
+                # Collect the finished worker results
+                for (result, plaintext) in pending[:]:
+                    if result.ready():
+                        # Get the item's word counts.  (This re-raises any exception from the worker.)
+                        (objectType, objectNum, itemCounts) = result.get()
+                        # Add the item to the index so we don't have to do this again.  The database is only used
+                        # here, on the GUI thread.
+                        DBInterface.UpdateWordCounts(objectType, objectNum, plaintext, counts=itemCounts)
+                        # Merge the item's counts with the report counts
+                        for word in itemCounts.keys():
+                            counts[word] = counts.get(word, 0) + itemCounts[word]
+                        # Remove the result from the pending list
+                        pending.remove((result, plaintext))
+                        completed += 1
+                # Update the Progress Dialog, which keeps the interface responsive and lets us know if the user cancelled
+                (keepGoing, skip) = progress.Update(completed)
+                # If the user pressed Cancel ...
+                if not keepGoing:
+                    # ... stop counting
+                    cancelled = True
+        finally:
+            # If we have a worker pool ...
+            if pool != None:
+                # If the user cancelled ...
+                if cancelled:
+                    # ... stop the worker processes immediately
+                    pool.terminate()
+                else:
+                    # ... otherwise let the worker processes finish normally
+                    pool.close()
+                pool.join()
+            # Destroy the Progress Dialog
+            progress.Destroy()
+        # If the user cancelled ...
+        if cancelled:
+            # ... signal that by returning None
+            return None
+        # Return the updated word counts
+        return counts
+
+    def ExtractDataFromNode(self, tree, startNode, items):
+        """ This extracts the (objectType, objectNum) items with text from a node, calling subnodes recursively as needed """
         # Get the Item Name and Item Data from the tree node passed in.
         itemName = tree.GetItemText(startNode)
         itemData = tree.GetPyData(startNode)
@@ -963,44 +1273,28 @@ I'm Ellen Feiss, and I'm a student!"""
                 # If the child node is soemthing we need to process ...
                 else:
                     # ... process the node by calling this method recursively
-                    data = self.ExtractDataFromNode(tree, childNode, data)
+                    items = self.ExtractDataFromNode(tree, childNode, items)
                 # Try to get the next Child Node
                 (childNode, cookieItem) = tree.GetNextChild(startNode, cookieItem)
 
         # If the node passed in is a Document Node ...
         elif itemData.nodetype in ['DocumentNode', 'SearchDocumentNode']:
-            # ... load the Document ...
-            record = Document.Document(num=itemData.recNum)
-            # ... prepare the object's plain text ...
-            text = self.PrepareText(record.plaintext)
-            # ... and count the words in the prepared text
-            data = self.CountWords(text, data)
+            # ... add the Document to the list
+            items.append(('Document', itemData.recNum))
         # If the node passed in is a Transcript Node ...
         elif itemData.nodetype in ['TranscriptNode', 'SearchTranscriptNode']:
-            # ... load the Transcript ...
-            record = Transcript.Transcript(itemData.recNum)
-            # ... prepare the object's plain text ...
-            text = self.PrepareText(record.plaintext)
-            # ... and count the words in the prepared text
-            data = self.CountWords(text, data)
+            # ... add the Transcript to the list
+            items.append(('Transcript', itemData.recNum))
         # If the node passed in is a Quote Node ...
         elif itemData.nodetype in ['QuoteNode', 'SearchQuoteNode']:
-            # ... load the Quote ...
-            record = Quote.Quote(num=itemData.recNum)
-            # ... prepare the object's plain text ...
-            text = self.PrepareText(record.plaintext)
-            # ... and count the words in the prepared text
-            data = self.CountWords(text, data)
+            # ... add the Quote to the list
+            items.append(('Quote', itemData.recNum))
         # If the node passed in is a Clip Node ...
         elif itemData.nodetype in ['ClipNode', 'SearchClipNode']:
-            # ... load the Clip ...
-            clipRecord = Clip.Clip(itemData.recNum)
-            # ... for each Transcript associated with the Clip ...
-            for record in clipRecord.transcripts:
-                # ... prepare the object's plain text ...
-                text = self.PrepareText(record.plaintext)
-                # ... and count the words in the prepared text
-                data = self.CountWords(text, data)
+            # ... for each Transcript associated with the Clip ...  (We don't need to load the Clip itself.)
+            for (transcriptNum, sourceTranscriptNum, sortOrder) in DBInterface.list_clip_transcripts(itemData.recNum):
+                # ... add the Clip Transcript to the list
+                items.append(('Transcript', transcriptNum))
         # If we have a Note node ... (Does this ever happen??)
         elif itemData.nodetype in ['LibraryNoteNode', 'DocumentNoteNode', 'EpisodeNoteNode', 'TranscriptNoteNode']:
             pass
@@ -1009,68 +1303,33 @@ I'm Ellen Feiss, and I'm a student!"""
             # ... we should NEVER see this, obviously!
             print "ERROR:  ", tree.GetItemText(startNode).encode('utf8'), " NOT PROCESSED.  Wrong Node Type.", itemData.nodetype
 
-        # Return the extracted Word Count data
-        return data
+        # Return the extracted item list
+        return items
 
     def PrepareText(self, text):
         """ This method cleans up the messy PlainText that comes in, removing time codes, punctuation, etc. """
-
-        # Strip Time Codes
-##        regex = "%s<[\d]*>" % TransanaConstants.TIMECODE_CHAR
-##        text = re.sub(regex, '', text
-## INSTEAD OF...
-##        reg = re.compile(regex)
-##        pos = 0
-##        for x in reg.findall(text):
-##            pos = text.find(x, pos, len(text))
-##            text = text[ : pos] + text[pos + len(x) : ]
-## IF THIS WORKS, ALSO UPDATE PlainTextUpdate.py!!
-
-        # strip multiple periods, questions marks, plus signs, exclamation points, hyphens
-        text = re.sub('[\.?:\*+!-][\.?:\*+!-]+', ' ', text)
-        # Strip parentheses, brackets, braces, quotation marks, slashes, ampersands, equal signs, asterisks, pound sign(hashtag),
-        # less than, greater than
-        text = re.sub('[()\[\]{}"/&=\*#<>]', ' ', text)
-        # Apostrophes PRECEDED by white space
-        text = re.sub("\s'", ' ', text)
-        # Remove certain unicode characters that seem to cause problems (smart quotes, double-angle quotes, etc.)
-        # Also, the 4 Jeffersonian special symbols
-        text = re.sub(u'\u00ab|\u00b0|\u00bb|\u2018|\u2019|\u2022|\u201c|\u201d|\u2039|\u203a|\u2191|\u2193', u'', text)
-        # Strip commas, periods, questions marks, exclamation points, colons, semicolons, and apostrophes
-        # followed by whitespace (but NOT those NOT followed by white space, leaving "2.2", "1,000" and
-        # "won't" intact.)
-        text = re.sub('[,\.?!:;\']\s', ' ', text)
-        # String final punctuation at tend of the string, not followed by whitespace
-        text = re.sub('[\.?!\']$', '', text)
-        # Strip multiple whitespace characters, replacing all whitespace with single spaces
-        text = re.sub('\s+', '\n', text)
-
-        # Return the prepared text
-        return text
+        # The text preparation is shared with the Word Count index, so it lives in the Misc module.
+        return Misc.PrepareWordFrequencyText(text)
 
     def CountWords(self, text, words = {}):
         """ This method takes prepared text (see above) and adds it to existing WordCount data. """
         # DO NOT initialize a dictionary to hold word counts (key = word, value = count) here.
         # Instead, this structure can be passed in to allow additional text to be added.
-        
-        # For each line of the prepared text ...
-        for line in text.split('\n'):
-            # ... remove whitespace and compensate for different cases
-            word = line.strip().lower()
+        return self.ApplySynonyms(Misc.CountWordsInText(text), words)
+
+    def ApplySynonyms(self, counts, words):
+        """ Add raw word counts (from Misc.CountWordsInText() or the Word Count index) to existing WordCount data,
+            substituting Synonym Groups for their synonyms. """
+        # For each word in the raw counts ...
+        for word in counts.keys():
             # If the word exists in the synonymLookup dictionary ...
-            if word in self.synonymLookups.keys():
+            if self.synonymLookups.has_key(word):
                 # ... substitute the synonym for the original word
-                word = self.synonymLookups[word]
-            # There are certain "words" that should not be included.  These can slip past PrepareText.
-            if not word in ['', '-', ':']:
-                # If the word is already in the dictionary ...
-                if words.has_key(word):
-                    # ... increment the count
-                    words[word] += 1
-                # If the word is not in the dictionary ...
-                else:
-                    # ... add it with a count of one.
-                    words[word] = 1
+                key = self.synonymLookups[word]
+            else:
+                key = word
+            # Add the count to the word's total
+            words[key] = words.get(key, 0) + counts[word]
         # Return the word dictionary
         return words
 
@@ -1227,8 +1486,6 @@ I'm Ellen Feiss, and I'm a student!"""
 
         # Initialize a List to hold Synonyms
         synonymData = []
-        # Initialize a String to hold the string representation of the Synonyms List
-        synonymString = ''
 
         # if the Synonym Group already exists ...
         if synonymGroup in self.synonyms.keys():
@@ -1283,32 +1540,10 @@ I'm Ellen Feiss, and I'm a student!"""
 
         # Sort the Synonym Data
         synonymData.sort()
-        # Create a String version of the synonym list for display
-        for synonym in synonymData:
-            if len(synonymString) > 0:
-                synonymString += ' '
-            synonymString += synonym
 
         # Update the permanent Synonyms data
         self.synonyms[synonymGroup] = synonymData
 
-        # Initialize a flag for the index of an item, assuming the item will not be found
-        index = -1
-        # Now iterate though the items in the Synonyms List (control)
-        for val in range(self.resultsList.GetItemCount()):
-            # If the Synonym Group is found, we can update it
-            if self.resultsList.GetItem(val, 0).GetText() == synonymGroup:
-                # Set the index to the Results List item number ...
-                index = val
-                # ... and stop looking
-                break
-        # If the Synonym Group was not found ...
-        if index == -1:
-            # ... add a new on to the Synonym List (control)
-            index = self.resultsList.InsertStringItem(sys.maxint, synonymGroup)
-        # Set the value to the string representation of the synonyms
-        self.resultsList.SetStringItem(index, 2, synonymString)
-
         # Now we need to look for the synonyms that were just defined in the data, consolidating them.
         itemIndex = -1
         itemValue = 0
@@ -1332,8 +1567,12 @@ I'm Ellen Feiss, and I'm a student!"""
                     del(self.itemDataMap[key])
         # If we did not match the Synonym Group name ...
         if itemIndex == -1:
-            # ... we add a NEW item to the Item Data Map
-            self.itemDataMap[len(self.itemDataMap)] = (synonymGroup, itemValue, synonymData)
+            # ... we add a NEW item to the Item Data Map.  (Items may have been deleted above, so use a key
+            #     past the largest existing key rather than the number of items.)
+            if len(self.itemDataMap) > 0:
+                self.itemDataMap[max(self.itemDataMap.keys()) + 1] = (synonymGroup, itemValue, synonymData)
+            else:
+                self.itemDataMap[0] = (synonymGroup, itemValue, synonymData)
         # If we DID match the Synonym Group Name ...
         else:
             # ... then update the existing item for that group
@@ -1346,16 +1585,16 @@ I'm Ellen Feiss, and I'm a student!"""
 
         # Remember the current scroll position of the Results List
         scrollPos = self.resultsList.GetScrollPos(wx.VERTICAL)
-        # Repopulate the Word Frequencies
-        self.PopulateWordFrequencies()
         # Reset the Synonym Group name to blank
         self.synonymGroup.SetValue('')
-        # Freeze the Results List
-        self.resultsList.Freeze()
-        # Scroll to the original position
-        self.resultsList.ScrollLines(scrollPos)
-        # Thaw the Control
-        self.resultsList.Thaw()
+        # Repopulate the Word Frequencies.  If the user cancels, the Results List isn't rebuilt and keeps its position.
+        if self.RefreshWordFrequencies():
+            # Freeze the Results List
+            self.resultsList.Freeze()
+            # Scroll to the original position
+            self.resultsList.ScrollLines(scrollPos)
+            # Thaw the Control
+            self.resultsList.Thaw()
 
     def OnClearAllWordGroupings(self, event):
         prompt = _("Are you SURE you want to delete all Word Groupings?")
@@ -1370,7 +1609,7 @@ I'm Ellen Feiss, and I'm a student!"""
             # This actually requires using the ControlObject to signal ALL Word Frequency Reports!
             self.ControlObject.SignalWordFrequencyReports()
             # Repopulate the Word Frequencies
-            self.PopulateWordFrequencies()
+            self.RefreshWordFrequencies()
         dlg.Destroy()
         
 
@@ -0,0 +1,245 @@
+# Copyright (C) 2002-2016 Spurgeon Woods LLC
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of version 2 of the GNU General Public License as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+#
+
+""" This module implements incremental (delta) Transana-XML exports.
+
+    Each export can save a manifest alongside the export file.  The manifest lists a hash of the exported text of
+    every record, by export file section.  A delta export, made against the manifest of an earlier export, only
+    contains the records whose text isn't in the earlier export, plus the hashes of the earlier export's records
+    that no longer exist.
+
+    Record numbers change when a Transana-XML file is imported, so a delta can't be applied to a database.  Instead,
+    the delta is merged with the export it was made against as the files are read, which gives exactly the export
+    file a full export would have given, and that is imported. """
+
+__author__ = 'David Woods <dwoods@transana.com>'
+
+DEBUG = False
+if DEBUG:
+    print "XMLDelta DEBUG is ON!"
+
+# import Python's cPickle module
+import cPickle
+# import Python's collections module
+import collections
+# import Python's hashlib module
+import hashlib
+# import Python's os module
+import os
+
+# The version of the manifest file format.  Manifests with a different version can't be used.
+MANIFEST_VERSION = 1
+
+# The sections of a Transana-XML file, in the order they appear in the file
+SECTION_TAGS = ['SeriesFile', 'DocumentFile', 'EpisodeFile', 'CoreDataFile', 'CollectionFile', 'QuoteFile',
+                'QuotePositionFile', 'ClipFile', 'AdditionalVidsFile', 'TranscriptFile', 'SnapshotFile', 'KeywordFile',
+                'ClipKeywordFile', 'SnapshotKeywordFile', 'SnapshotKeywordStyleFile', 'NoteFile', 'SynonymFile',
+                'FilterFile']
+
+# Sections whose records have a LastSaveTime, by (table, record number field).  Records in these sections whose
+# LastSaveTime hasn't changed since the earlier export don't need to be read from the database at all.
+TIMESTAMP_TABLES = { 'DocumentFile'   : ('Documents2', 'DocumentNum'),
+                     'QuoteFile'      : ('Quotes2', 'QuoteNum'),
+                     'TranscriptFile' : ('Transcripts2', 'TranscriptNum'),
+                     'SnapshotFile'   : ('Snapshots2', 'SnapshotNum') }
+
+# The element of a delta export that holds the hashes of deleted records
+DELETED_TAG = 'DeletedRecords'
+
+# The number of changed records read from the database with each query during a delta export
+QUERY_CHUNK_SIZE = 500
+
+
+def GetRecordHash(text):
+    """ Get the hash of the exported text of a record.  (Carriage returns are ignored, as text mode files on
+        Windows add them when the export file is written.) """
+    return hashlib.sha1(text.replace('\r', '')).hexdigest()
+
+def GetManifestFilename(exportFilename):
+    """ Get the name of the manifest file for an export file """
+    return exportFilename + '.manifest'
+
+def NewManifest(exportID, started):
+    """ Create an empty manifest for the export identified by exportID.  started is the database's time when the
+        export started. """
+    return { 'version'   : MANIFEST_VERSION,
+             'exportID'  : exportID,
+             'started'   : started,
+             # The number of records with each hash, by section
+             'hashes'    : {},
+             # The (LastSaveTime, hash) of each record, by record number, for sections in TIMESTAMP_TABLES
+             'saveTimes' : {} }
+
+def LoadManifest(filename):
+    """ Load a manifest.  Returns None if the manifest has a different format. """
+    f = open(filename, 'rb')
+    try:
+        manifest = cPickle.load(f)
+    finally:
+        f.close()
+    if manifest.get('version', None) != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def SaveManifest(filename, manifest):
+    """ Save a manifest """
+    # Write the manifest to a temporary file, then replace the old manifest, so a failed save can't leave a damaged manifest
+    f = open(filename + '.tmp', 'wb')
+    try:
+        cPickle.dump(manifest, f, cPickle.HIGHEST_PROTOCOL)
+    finally:
+        f.close()
+    if os.path.exists(filename):
+        os.remove(filename)
+    os.rename(filename + '.tmp', filename)
+
+def IsSectionStart(line):
+    """ If line starts a section of a Transana-XML file, return the section tag.  Otherwise return None. """
+    line = line.rstrip('\r\n')
+    if (line[:3] == '  <') and (line[-1:] == '>') and (line[3:-1] in SECTION_TAGS):
+        return line[3:-1]
+    return None
+
+def ReadExportHeader(lines):
+    """ Read the header of a Transana-XML file from lines.  Returns a dictionary of the values of the header
+        elements, such as 'ExportID' and 'DeltaOf'. """
+    header = {}
+    element = None
+    for line in lines:
+        line = line.strip()
+        # The header ends where the first section, or the end of the data, begins
+        if (IsSectionStart('  ' + line) != None) or (line == '</Transana>'):
+            break
+        if (line[:2] == '</') and (line[2:-1] == element):
+            element = None
+        elif (line[:1] == '<') and (line[-1:] == '>') and (line[1:2] not in ['/', '!', '?']):
+            element = line[1:-1]
+        elif (element != None) and (line != ''):
+            header[element] = line
+    return header
+
+def LoadDelta(lines):
+    """ Load a delta export from lines.  Returns (records, deleted), where records holds the lines of each of the
+        delta's records, by section, and deleted holds the number of deleted records with each hash, by section. """
+    records = {}
+    deleted = {}
+    section = None
+    record = None
+    for line in lines:
+        key = line.rstrip('\r\n')
+        # If we're reading a record ...
+        if record != None:
+            # ... add the line to it
+            record.append(line)
+            # If this is the end of the record, keep the record
+            if key == recordEnd:
+                records[section].append(record)
+                record = None
+        # If we're reading the deleted records ...
+        elif section == DELETED_TAG:
+            if key == '  </%s>' % DELETED_TAG:
+                section = None
+            elif key[:5] == '    <':
+                # Start or end a section of deleted record hashes
+                if key[5:6] == '/':
+                    deletedSection = None
+                else:
+                    deletedSection = key[5:-1]
+                    deleted.setdefault(deletedSection, collections.Counter())
+            elif (deletedSection != None) and (key.strip() != ''):
+                deleted[deletedSection][key.strip()] += 1
+        # If we're reading a section ...
+        elif section != None:
+            if key == '  </%s>' % section:
+                section = None
+            # A record starts with its opening tag, and ends with the matching closing tag
+            elif (key[:5] == '    <') and (key[5:6] != '/'):
+                recordEnd = '    </' + key[5:]
+                record = [line]
+        # Otherwise, look for the start of a section
+        elif key == '  <%s>' % DELETED_TAG:
+            section = DELETED_TAG
+            deletedSection = None
+        else:
+            section = IsSectionStart(key)
+            if section != None:
+                records.setdefault(section, [])
+    return (records, deleted)
+
+def MergeDelta(lines, delta):
+    """ Merge a delta export, as loaded by LoadDelta(), into the lines of the export it was made against.
+        This is a generator that produces the lines of the merged export. """
+    (records, deleted) = delta
+    # Copy the delta's data so it can be used up as the export is merged
+    records = dict(records)
+    deleted = dict([(section, collections.Counter(counts)) for (section, counts) in deleted.items()])
+
+    def NewSectionsBefore(tag):
+        """ Produce the sections of the delta that come before the section tag (or all of them if tag is None),
+            and that haven't been produced yet because the earlier export doesn't have them """
+        for section in SECTION_TAGS:
+            if section == tag:
+                break
+            if len(records.get(section, [])) > 0:
+                yield '  <%s>\n' % section
+                for record in records.pop(section):
+                    for line in record:
+                        yield line
+                yield '  </%s>\n' % section
+
+    section = None
+    record = None
+    for line in lines:
+        key = line.rstrip('\r\n')
+        # If we're reading a record ...
+        if record != None:
+            # ... add the line to it
+            record.append(line)
+            # If this is the end of the record ...
+            if key == recordEnd:
+                recordHash = GetRecordHash(''.join(record))
+                # ... drop the record if it has been deleted or changed, or produce it if not
+                if deleted.has_key(section) and (deleted[section][recordHash] > 0):
+                    deleted[section][recordHash] -= 1
+                else:
+                    for recordLine in record:
+                        yield recordLine
+                record = None
+        # If we're in a section ...
+        elif section != None:
+            # At the end of the section, add the delta's records for the section
+            if key == '  </%s>' % section:
+                for newRecord in records.pop(section, []):
+                    for recordLine in newRecord:
+                        yield recordLine
+                yield line
+                section = None
+            # A record starts with its opening tag, and ends with the matching closing tag
+            elif (key[:5] == '    <') and (key[5:6] != '/'):
+                recordEnd = '    </' + key[5:]
+                record = [line]
+            else:
+                yield line
+        else:
+            section = IsSectionStart(key)
+            # If a section starts, or the data ends, first add any earlier sections the earlier export doesn't have
+            if section != None:
+                for text in NewSectionsBefore(section):
+                    yield text
+            elif key == '</Transana>':
+                for text in NewSectionsBefore(None):
+                    yield text
+            yield line
@@ -28,24 +28,102 @@ import wx
 import Dialogs
 import DBInterface
 import TransanaConstants
+import TransanaExceptions
 import TransanaGlobal
+import XMLDelta
 if TransanaConstants.USESRTC:
     import RichTextEditCtrl_RTC
     import TranscriptEditor_STC  # for conversion
 import RichTextEditCtrl
 import cPickle
+# import Python's collections module
+import collections
 import datetime
+# import Python's gzip module
+import gzip
+# import Python's io module
+import io
 import pickle
 import os
+# import Python's Queue module
+import Queue
 # import Python's Regular Expresions
 import re
+# import Python's shutil module
+import shutil
 import sys
+# import Python's tempfile module
+import tempfile
+# import Python's threading module
+import threading
+# import Python's uuid module
+import uuid
 
 # Set the encoding for export.
 # Use UTF-8 regardless of the current encoding for consistency in the Transana XML files
 EXPORT_ENCODING = 'utf8'
 ENCODE_PROPERLY = True
 
+
+class CompressedExportFile(io.BufferedWriter):
+    """ A large buffered writer that compresses the Transana XML Export file with gzip as it is written """
+    def __init__(self, filename):
+        # Compressing many small writes is slow, so compress the output in large blocks
+        io.BufferedWriter.__init__(self, gzip.GzipFile(filename, 'wb'), TransanaConstants.exportBufferSize)
+
+    def write(self, data):
+        """ Write data to the compressed file """
+        # Like Python's file objects, accept unicode objects, which can only contain ASCII characters here
+        if isinstance(data, unicode):
+            data = str(data)
+        return io.BufferedWriter.write(self, data)
+
+
+class ExportRecordText(object):
+    """ A file-like object that collects the exported text of a record """
+    def __init__(self):
+        self.data = []
+
+    def write(self, data):
+        """ Add data to the record text """
+        # Like Python's file objects, accept unicode objects, which can only contain ASCII characters here
+        self.data.append(str(data))
+
+    def GetText(self):
+        """ Get the record text """
+        return ''.join(self.data)
+
+
+class ExportThreadProgress(object):
+    """ Passes Progress Bar updates from background export threads to the GUI thread's Progress Bar """
+    def __init__(self, progress):
+        self.progress = progress
+        # The Progress Bar percentage of the section the GUI thread is currently writing
+        self.percent = 0
+        # Can the Progress Bar still be updated?
+        self.active = True
+
+    def SetPercent(self, percent):
+        """ Set the Progress Bar percentage to show, as background threads work on several sections at once """
+        self.percent = percent
+
+    def Update(self, value, message=None):
+        """ Update the Progress Bar message in the GUI thread """
+        wx.CallAfter(self.OnUpdate, message)
+
+    def Refresh(self):
+        """ The Progress Bar is refreshed when it is updated """
+        pass
+
+    def OnUpdate(self, message):
+        """ Update the Progress Bar in the GUI thread """
+        if self.active and (message != None):
+            self.progress.Update(self.percent, message)
+
+    def Close(self):
+        """ Stop updating the Progress Bar, which is about to be destroyed """
+        self.active = False
+
 class XMLExport(Dialogs.GenForm):
     """ This window displays a variety of GUI Widgets. """
     def __init__(self,parent,id,title):
@@ -119,6 +197,39 @@ class XMLExport(Dialogs.GenForm):
         # Add a vertical spacer to the main sizer        
         mainSizer.Add((0, 10))
 
+        # Create a HORIZONTAL sizer for the next row
+        r3Sizer = wx.BoxSizer(wx.HORIZONTAL)
+
+        # Create a VERTICAL sizer for the next element
+        v2 = wx.BoxSizer(wx.VERTICAL)
+        # Add the Earlier Export File Name element.  If an earlier export is specified, only the changes since
+        # that export are exported.
+        self.BaseFile = self.new_edit_box(_("Only export changes since this earlier export (optional)"), v2, '')
+        # Make this text box a File Drop Target
+        self.BaseFile.SetDropTarget(EditBoxFileDropTarget(self.BaseFile))
+        # Add the element sizer to the row sizer
+        r3Sizer.Add(v2, 1, wx.EXPAND)
+
+        # Add a spacer to the row sizer        
+        r3Sizer.Add((10, 0))
+
+        # Browse button
+        browseBase = wx.Button(self.panel, wx.ID_FILE2, _("Browse"), wx.DefaultPosition)
+        # Add the Browse Method to the Browse Button
+        wx.EVT_BUTTON(self, wx.ID_FILE2, self.OnBrowseBase)
+        # Add the element to the row sizer
+        r3Sizer.Add(browseBase, 0, wx.ALIGN_BOTTOM)
+        # If Mac ...
+        if 'wxMac' in wx.PlatformInfo:
+            # ... add a spacer to avoid control clipping
+            r3Sizer.Add((2, 0))
+
+        # Add the row sizer to the main vertical sizer
+        mainSizer.Add(r3Sizer, 0, wx.EXPAND)
+
+        # Add a vertical spacer to the main sizer        
+        mainSizer.Add((0, 10))
+
         # Create a sizer for the buttons
         btnSizer = wx.BoxSizer(wx.HORIZONTAL)
         # Add the buttons
@@ -155,35 +266,33 @@ class XMLExport(Dialogs.GenForm):
     def Escape(self, inpStr):
         """ Replaces "&", "<", and ">" with the XML friendly "&amp;", &gt;", and "&lt;"
             >, <, and & all need to be replaced, but &amp;, &gt;, and &lt; needs to survive! """
-        # We can't just casually replace ampersands, as there are ampersands in the replacement!
-        # Find the first Ampersand in the document
-        chrPos = inpStr.find('&')
-        # While there are more Ampersands ...
-        while (chrPos > -1):
-            # ... replace the Ampersand with the escape string ...
-            inpStr = inpStr[:chrPos] + '&amp;' + inpStr[chrPos + 1:]
-            # ... and look for the NEXT Ampersand after the replacement
-            chrPos = inpStr.find('&', chrPos + 1)
-        # Find the first Greater Than in the document
-        chrPos = inpStr.find('>')
-        # While there are more Greater Thans ...
-        while (chrPos > -1):
-            # ... replace the Greater Than with the escape string ...
-            inpStr = inpStr[:chrPos] + '&gt;' + inpStr[chrPos + 1:]
-            # ... and look for the NEXT Greater Than after the replacement
-            chrPos = inpStr.find('>', chrPos + 1)
-        # Find the first Less Than in the document
-        chrPos = inpStr.find('<')
-        # While there are more Less Thans ...
-        while (chrPos > -1):
-            # ... replace the Less Than with the escape string ...
-            inpStr = inpStr[:chrPos] + '&lt;' + inpStr[chrPos + 1:]
-            # ... and look for the NEXT Less Than after the replacement
-            chrPos = inpStr.find('<', chrPos + 1)
-        # Return the modified string
-        return inpStr
+        # Replace Ampersands first, as there are ampersands in the other replacements!
+        return inpStr.replace('&', '&amp;').replace('>', '&gt;').replace('<', '&lt;')
 
     def Export(self):
+        # If an earlier export has been specified, we only export the changes since then, which requires the
+        # manifest that was saved with the earlier export.
+        self.baseManifest = None
+        baseFile = self.BaseFile.GetValue().strip()
+        if baseFile != '':
+            # Start exception handling
+            try:
+                # Load the manifest of the earlier export
+                self.baseManifest = XMLDelta.LoadManifest(XMLDelta.GetManifestFilename(baseFile))
+            except:
+                pass
+            # If we don't have a manifest for the earlier export, we can't continue
+            if self.baseManifest == None:
+                if 'unicode' in wx.PlatformInfo:
+                    # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+                    prompt = unicode(_('The manifest file "%s" for the earlier export could not be read.\nOnly exports that were saved with a manifest can be used for exporting changes.'), 'utf8')
+                else:
+                    prompt = _('The manifest file "%s" for the earlier export could not be read.\nOnly exports that were saved with a manifest can be used for exporting changes.')
+                errordlg = Dialogs.ErrorDialog(self, prompt % XMLDelta.GetManifestFilename(baseFile))
+                errordlg.ShowModal()
+                errordlg.Destroy()
+                return
+
         # use the LONGEST title here!  That determines the size of the Dialog Box.
         progress = wx.ProgressDialog(_('Transana XML Export'), _('Exporting Transcript records (This may be slow because of the size of Transcript records.)'), style = wx.PD_APP_MODAL | wx.PD_AUTO_HIDE)
         if progress.GetSize()[0] > 800:
@@ -199,8 +308,14 @@ class XMLExport(Dialogs.GenForm):
 
         try:
             fs = self.XMLFile.GetValue()
+            # If the file name ends with ".gz", the export file should be compressed as it is written
+            compress = (fs[-3:].lower() == '.gz')
+            if compress:
+                fs = fs[:-3]
             if (fs[-4:].lower() != '.xml') and (fs[-4:].lower() != '.tra'):
                 fs = fs + '.tra'
+            if compress:
+                fs = fs + '.gz'
             # On the Mac, if no path is specified, the data is exported to a file INSIDE the application bundle, 
             # where no one will be able to find it.  Let's put it in the user's HOME directory instead.
             # I'm okay with not handling this on Windows, where it will be placed in the Program's folder
@@ -211,7 +326,14 @@ class XMLExport(Dialogs.GenForm):
                 if fs.find(os.sep) == -1:
                     # ... then prepend the HOME folder
                     fs = os.getenv("HOME") + os.sep + fs
-            f = file(fs, 'w')
+            # If we're compressing the export file ...
+            if compress:
+                # ... open a compressed export file
+                f = CompressedExportFile(fs)
+            # If we're not compressing the export file ...
+            else:
+                # ... open the export file with a large write buffer
+                f = open(fs, 'w', TransanaConstants.exportBufferSize)
             progress.Update(0, _('Writing Headers'))
             self.WriteXMLDTD(f)
 
@@ -236,265 +358,63 @@ class XMLExport(Dialogs.GenForm):
                 f.write('    1.7\n')
             f.write('  </TransanaXMLVersion>\n')
 
-            progress.Update(self.CalcPercent(1), _('Writing Library Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT SeriesNum, SeriesID, SeriesComment, SeriesOwner, DefaultKeywordGroup FROM Series2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <SeriesFile>\n')
-                    for seriesRec in data:
-                        self.WriteSeriesRec(f, seriesRec)
-                    f.write('  </SeriesFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(2), _('Writing Document Records  (This will seem slow because of the size of the Document Records.)'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT DocumentNum, DocumentID, LibraryNum, Author, Comment, ImportedFile, ImportDate, DocumentLength, XMLText FROM Documents2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <DocumentFile>\n')
-                    for documentRec in data:
-                        self.WriteDocumentRec(f, progress, documentRec)
-                    f.write('  </DocumentFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(3), _('Writing Episode Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT EpisodeNum, EpisodeID, SeriesNum, TapingDate, MediaFile, EpLength, EpComment FROM Episodes2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <EpisodeFile>\n')
-                    for episodeRec in data:
-                        self.WriteEpisodeRec(f, episodeRec)
-                    f.write('  </EpisodeFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(4), _('Writing Core Data Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = """SELECT CoreDataNum, Identifier, Title, Creator, Subject, Description, Publisher,
-                                    Contributor, DCDate, DCType, Format, Source, Language, Relation, Coverage, Rights
-                                    FROM CoreData2"""
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <CoreDataFile>\n')
-                    for coreDataRec in data:
-                        self.WriteCoreDataRec(f, coreDataRec)
-                    f.write('  </CoreDataFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(5), _('Writing Collection Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT CollectNum, CollectID, ParentCollectNum, CollectComment, CollectOwner, DefaultKeywordGroup FROM Collections2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <CollectionFile>\n')
-                    for collectionRec in data:
-                        self.WriteCollectionRec(f, collectionRec)
-                    f.write('  </CollectionFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(6), _('Writing Quote Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT QuoteNum, QuoteID, CollectNum, SourceDocumentNum, SortOrder, Comment, XMLText FROM Quotes2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <QuoteFile>\n')
-                    for quoteRec in data:
-                        self.WriteQuoteRec(f, quoteRec)
-                    f.write('  </QuoteFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(7), _('Writing Quote Position Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT QuoteNum, DocumentNum, StartChar, EndChar FROM QuotePositions2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <QuotePositionFile>\n')
-                    for quotePosRec in data:
-                        self.WriteQuotePosRec(f, quotePosRec)
-                    f.write('  </QuotePositionFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(8), _('Writing Clip Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT ClipNum, ClipID, CollectNum, EpisodeNum, MediaFile, ClipStart, ClipStop, ClipOffset, Audio, '
-                SQLText += 'ClipComment, SortOrder FROM Clips2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <ClipFile>\n')
-                    for clipRec in data:
-                        self.WriteClipRec(f, clipRec)
-                    f.write('  </ClipFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(9), _('Writing Additional Media File Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT AddVidNum, EpisodeNum, ClipNum, MediaFile, VidLength, Offset, Audio FROM AdditionalVids2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <AdditionalVidsFile>\n')
-                    for additionalMediaFileRec in data:
-                        self.WriteAdditionalMediaFileRec(f, additionalMediaFileRec)
-                    f.write('  </AdditionalVidsFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(10), _('Writing Transcript Records  (This will seem slow because of the size of the Transcript Records.)'))
-            if db != None:
-                dbCursor = db.cursor()
-                dbCursor2 = db.cursor()
-                # Load Transcript Information WITHOUT RTFText content, which requires too much memory in some large database
-                # NOTE:  This will probably be a bit slower, but won't crash on databases with many, many images.
-                SQLText = 'SELECT TranscriptNum, TranscriptID, EpisodeNum, SourceTranscriptNum, ClipNum, SortOrder, Transcriber, '
-                SQLText += 'ClipStart, ClipStop, Comment, MinTranscriptWidth FROM Transcripts2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <TranscriptFile>\n')
-                    for transcriptRec in data:
-                        # Now load the RTFText on a Transcript by Transcript basis (to use less memory)
-                        SQLText2 = 'SELECT RTFText FROM Transcripts2 WHERE TranscriptNum = %s'
-                        SQLText2 = DBInterface.FixQuery(SQLText2)
-                        dbCursor2.execute(SQLText2, (transcriptRec[0],))
-                        rtfText = dbCursor2.fetchone()
-                        # Add the RTFText to the Transcript Record
-                        transcriptRec = transcriptRec + rtfText
-                        # Write the Transcript Record to the Export File
-                        self.WriteTranscriptRec(f, progress, transcriptRec)
-                    f.write('  </TranscriptFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(11), _('Writing Snapshot Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT SnapshotNum, SnapshotID, CollectNum, ImageFile, ImageScale, ImageCoordsX, ImageCoordsY, '
-                SQLText += 'ImageSizeW, ImageSizeH, EpisodeNum, TranscriptNum, SnapshotTimeCode, SnapshotDuration, '
-                SQLText += 'SnapshotComment, SortOrder FROM Snapshots2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <SnapshotFile>\n')
-                    for snapshotRec in data:
-                        self.WriteSnapshotRec(f, snapshotRec)
-                    f.write('  </SnapshotFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(12), _('Writing Keyword Records'))
-            if db != None:
+            # If we're saving a manifest of the export (which an export of changes always does, so that later
+            # exports can include only the changes since this one) ...
+            self.manifest = None
+            self.deletedRecords = {}
+            if (db != None) and (TransanaConstants.exportManifests or (self.baseManifest != None)):
+                # ... get the database's time, which is the time the LastSaveTime values are compared with
                 dbCursor = db.cursor()
-                SQLText = 'SELECT KeywordGroup, Keyword, Definition, LineColorName, LineColorDef, DrawMode, LineWidth, LineStyle FROM Keywords2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <KeywordFile>\n')
-                    for keywordRec in data:
-                        self.WriteKeywordRec(f, keywordRec)
-                    f.write('  </KeywordFile>\n')
+                dbCursor.execute('SELECT CURRENT_TIMESTAMP')
+                started = dbCursor.fetchone()[0]
                 dbCursor.close()
+                # Start the manifest
+                self.manifest = XMLDelta.NewManifest(uuid.uuid4().hex, started)
+                # Identify the export, so exports of later changes can say what they were made against
+                f.write('  <ExportID>\n')
+                f.write('    %s\n' % self.manifest['exportID'])
+                f.write('  </ExportID>\n')
+                # If we're only exporting the changes since an earlier export ...
+                if self.baseManifest != None:
+                    # ... identify the earlier export
+                    f.write('  <DeltaOf>\n')
+                    f.write('    %s\n' % self.baseManifest['exportID'])
+                    f.write('  </DeltaOf>\n')
 
-            progress.Update(self.CalcPercent(13), _('Writing Clip Keyword Records'))
             if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT EpisodeNum, DocumentNum, ClipNum, QuoteNum, SnapshotNum, KeywordGroup, Keyword, Example FROM ClipKeywords2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <ClipKeywordFile>\n')
-                    for clipKeywordRec in data:
-                        self.WriteClipKeywordRec(f, clipKeywordRec)
-                    f.write('  </ClipKeywordFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(14), _('Writing Snapshot Keywords Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT SnapshotNum, KeywordGroup, Keyword, x1, y1, x2, y2, visible FROM SnapshotKeywords2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <SnapshotKeywordFile>\n')
-                    for snapshotKeywordRec in data:
-                        self.WriteSnapshotKeywordRec(f, snapshotKeywordRec)
-                    f.write('  </SnapshotKeywordFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(15), _('Writing Snapshot Coding Style Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT SnapshotNum, KeywordGroup, Keyword, DrawMode, LineColorName, LineColorDef, LineWidth, LineStyle '
-                SQLText += 'FROM SnapshotKeywordStyles2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <SnapshotKeywordStyleFile>\n')
-                    for snapshotKeywordStyleRec in data:
-                        self.WriteSnapshotKeywordStyleRec(f, snapshotKeywordStyleRec)
-                    f.write('  </SnapshotKeywordStyleFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(16), _('Writing Note Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT NoteNum, NoteID, SeriesNum, EpisodeNum, CollectNum, ClipNum, SnapshotNum, DocumentNum, '
-                SQLText += 'QuoteNum, TranscriptNum, NoteTaker, NoteText FROM Notes2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <NoteFile>\n')
-                    for noteRec in data:
-                        self.WriteNoteRec(f, noteRec)
-                    f.write('  </NoteFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(17), _('Writing Synonym Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT SynonymGroup, Synonym FROM Synonyms2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <SynonymFile>\n')
-                    for filterRec in data:
-                        self.WriteSynonymRec(f, filterRec)
-                    f.write('  </SynonymFile>\n')
-                dbCursor.close()
-
-            progress.Update(self.CalcPercent(18), _('Writing Filter Records'))
-            if db != None:
-                dbCursor = db.cursor()
-                SQLText = 'SELECT ReportType, ReportScope, ConfigName, FilterDataType, FilterData FROM Filters2'
-                dbCursor.execute(SQLText)
-                data = dbCursor.fetchall()
-                if len(data) > 0:
-                    f.write('  <FilterFile>\n')
-                    for filterRec in data:
-                        self.WriteFilterRec(f, filterRec)
-                    f.write('  </FilterFile>\n')
-                dbCursor.close()
+                # Get the sections of the export file
+                sections = self.GetExportSections()
+                # If we should export the sections at the same time, and background threads can connect to the database server ...
+                # (Exporting sections at the same time speeds things up by overlapping the time spent waiting for the database
+                # server.  With sqlite, there's no waiting to overlap.)
+                if (TransanaConstants.exportParallelWorkers > 0) and \
+                   (TransanaConstants.DBInstalled in ['MySQLdb-server', 'PyMySQL']) and \
+                   DBInterface.worker_db_available():
+                    # ... export the sections in background threads
+                    self.ExportSectionsInParallel(f, sections, progress)
+                # Otherwise ...
+                else:
+                    # ... export the sections one after another
+                    for (num, prompt, SQLText, fileTag, writeFunc, useProgress) in sections:
+                        progress.Update(self.CalcPercent(num), prompt)
+                        if useProgress:
+                            self.ExportTable(f, db, SQLText, fileTag, writeFunc, progress)
+                        else:
+                            self.ExportTable(f, db, SQLText, fileTag, writeFunc)
+
+                # If we're only exporting the changes since an earlier export ...
+                if self.baseManifest != None:
+                    # ... list the earlier export's records that have been deleted or changed since then
+                    self.WriteDeletedRecords(f)
 
             f.write('</Transana>\n');
 
             f.flush()
 
-            dbCursor.close()
-            
+            # If we have a manifest of the export, save it
+            if self.manifest != None:
+                XMLDelta.SaveManifest(XMLDelta.GetManifestFilename(fs), self.manifest)
+
         except:
             if 'unicode' in wx.PlatformInfo:
                 # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
@@ -508,7 +428,6 @@ class XMLExport(Dialogs.GenForm):
             if DEBUG or DEBUG2:
                 import traceback
                 traceback.print_exc(file=sys.stdout)
-            dbCursor.close()
         finally:
             # If we're using sqlite ...
             if TransanaConstants.DBInstalled in ['sqlite3']:
@@ -519,6 +438,400 @@ class XMLExport(Dialogs.GenForm):
         progress.Update(100)
         progress.Destroy()
 
+    def GetExportSections(self):
+        """ Get the sections of the export file, in the order they appear in the file.  Each section is described
+            by (Progress Bar category, Progress Bar prompt, SQLText, fileTag, writeFunc, whether writeFunc takes the
+            Progress Bar). """
+        sections = []
+        SQLText = 'SELECT SeriesNum, SeriesID, SeriesComment, SeriesOwner, DefaultKeywordGroup FROM Series2'
+        sections.append((1, _('Writing Library Records'),
+                         SQLText, 'SeriesFile', self.WriteSeriesRec, False))
+
+        SQLText = 'SELECT DocumentNum, DocumentID, LibraryNum, Author, Comment, ImportedFile, ImportDate, DocumentLength, XMLText FROM Documents2'
+        sections.append((2, _('Writing Document Records  (This will seem slow because of the size of the Document Records.)'),
+                         SQLText, 'DocumentFile', self.WriteDocumentRec, True))
+
+        SQLText = 'SELECT EpisodeNum, EpisodeID, SeriesNum, TapingDate, MediaFile, EpLength, EpComment FROM Episodes2'
+        sections.append((3, _('Writing Episode Records'),
+                         SQLText, 'EpisodeFile', self.WriteEpisodeRec, False))
+
+        SQLText = """SELECT CoreDataNum, Identifier, Title, Creator, Subject, Description, Publisher,
+                            Contributor, DCDate, DCType, Format, Source, Language, Relation, Coverage, Rights
+                            FROM CoreData2"""
+        sections.append((4, _('Writing Core Data Records'),
+                         SQLText, 'CoreDataFile', self.WriteCoreDataRec, False))
+
+        SQLText = 'SELECT CollectNum, CollectID, ParentCollectNum, CollectComment, CollectOwner, DefaultKeywordGroup FROM Collections2'
+        sections.append((5, _('Writing Collection Records'),
+                         SQLText, 'CollectionFile', self.WriteCollectionRec, False))
+
+        SQLText = 'SELECT QuoteNum, QuoteID, CollectNum, SourceDocumentNum, SortOrder, Comment, XMLText FROM Quotes2'
+        sections.append((6, _('Writing Quote Records'),
+                         SQLText, 'QuoteFile', self.WriteQuoteRec, False))
+
+        SQLText = 'SELECT QuoteNum, DocumentNum, StartChar, EndChar FROM QuotePositions2'
+        sections.append((7, _('Writing Quote Position Records'),
+                         SQLText, 'QuotePositionFile', self.WriteQuotePosRec, False))
+
+        SQLText = 'SELECT ClipNum, ClipID, CollectNum, EpisodeNum, MediaFile, ClipStart, ClipStop, ClipOffset, Audio, '
+        SQLText += 'ClipComment, SortOrder FROM Clips2'
+        sections.append((8, _('Writing Clip Records'),
+                         SQLText, 'ClipFile', self.WriteClipRec, False))
+
+        SQLText = 'SELECT AddVidNum, EpisodeNum, ClipNum, MediaFile, VidLength, Offset, Audio FROM AdditionalVids2'
+        sections.append((9, _('Writing Additional Media File Records'),
+                         SQLText, 'AdditionalVidsFile', self.WriteAdditionalMediaFileRec, False))
+
+        # Transcript records are streamed from the database a few at a time, so we can load the RTFText
+        # with the rest of the Transcript Information without requiring too much memory in large databases.
+        SQLText = 'SELECT TranscriptNum, TranscriptID, EpisodeNum, SourceTranscriptNum, ClipNum, SortOrder, Transcriber, '
+        SQLText += 'ClipStart, ClipStop, Comment, MinTranscriptWidth, RTFText FROM Transcripts2'
+        sections.append((10, _('Writing Transcript Records  (This will seem slow because of the size of the Transcript Records.)'),
+                         SQLText, 'TranscriptFile', self.WriteTranscriptRec, True))
+
+        SQLText = 'SELECT SnapshotNum, SnapshotID, CollectNum, ImageFile, ImageScale, ImageCoordsX, ImageCoordsY, '
+        SQLText += 'ImageSizeW, ImageSizeH, EpisodeNum, TranscriptNum, SnapshotTimeCode, SnapshotDuration, '
+        SQLText += 'SnapshotComment, SortOrder FROM Snapshots2'
+        sections.append((11, _('Writing Snapshot Records'),
+                         SQLText, 'SnapshotFile', self.WriteSnapshotRec, False))
+
+        SQLText = 'SELECT KeywordGroup, Keyword, Definition, LineColorName, LineColorDef, DrawMode, LineWidth, LineStyle FROM Keywords2'
+        sections.append((12, _('Writing Keyword Records'),
+                         SQLText, 'KeywordFile', self.WriteKeywordRec, False))
+
+        SQLText = 'SELECT EpisodeNum, DocumentNum, ClipNum, QuoteNum, SnapshotNum, KeywordGroup, Keyword, Example FROM ClipKeywords2'
+        sections.append((13, _('Writing Clip Keyword Records'),
+                         SQLText, 'ClipKeywordFile', self.WriteClipKeywordRec, False))
+
+        SQLText = 'SELECT SnapshotNum, KeywordGroup, Keyword, x1, y1, x2, y2, visible FROM SnapshotKeywords2'
+        sections.append((14, _('Writing Snapshot Keywords Records'),
+                         SQLText, 'SnapshotKeywordFile', self.WriteSnapshotKeywordRec, False))
+
+        SQLText = 'SELECT SnapshotNum, KeywordGroup, Keyword, DrawMode, LineColorName, LineColorDef, LineWidth, LineStyle '
+        SQLText += 'FROM SnapshotKeywordStyles2'
+        sections.append((15, _('Writing Snapshot Coding Style Records'),
+                         SQLText, 'SnapshotKeywordStyleFile', self.WriteSnapshotKeywordStyleRec, False))
+
+        SQLText = 'SELECT NoteNum, NoteID, SeriesNum, EpisodeNum, CollectNum, ClipNum, SnapshotNum, DocumentNum, '
+        SQLText += 'QuoteNum, TranscriptNum, NoteTaker, NoteText FROM Notes2'
+        sections.append((16, _('Writing Note Records'),
+                         SQLText, 'NoteFile', self.WriteNoteRec, False))
+
+        SQLText = 'SELECT SynonymGroup, Synonym FROM Synonyms2'
+        sections.append((17, _('Writing Synonym Records'),
+                         SQLText, 'SynonymFile', self.WriteSynonymRec, False))
+
+        SQLText = 'SELECT ReportType, ReportScope, ConfigName, FilterDataType, FilterData FROM Filters2'
+        sections.append((18, _('Writing Filter Records'),
+                         SQLText, 'FilterFile', self.WriteFilterRec, False))
+        return sections
+
+    def ExportSectionsInParallel(self, f, sections, progress):
+        """ Export the sections of the export file at the same time.  Background threads, each with its own database
+            connection, write the sections to temporary files, which are then copied into the export file in order.
+            The result is the same as exporting the sections one after another. """
+        # Background threads can't use the Progress Bar directly
+        threadProgress = ExportThreadProgress(progress)
+        # The largest sections take longest, so start on them first
+        sectionQueue = Queue.Queue()
+        for index in sorted(range(len(sections)), key=lambda index: sections[index][3] not in ['TranscriptFile', 'DocumentFile']):
+            sectionQueue.put(index)
+        # The background threads report finished sections here, by section index
+        results = {}
+        # Signal the background threads to stop if the export fails
+        self.exportCancelled = False
+        # The background threads wake the GUI thread when they finish a section or need it to do something
+        self.exportWakeup = threading.Event()
+        # Start the background threads
+        threads = []
+        for x in range(min(TransanaConstants.exportParallelWorkers, len(sections))):
+            thread = threading.Thread(target=self.ExportSectionWorker, args=(sections, sectionQueue, results, threadProgress))
+            thread.setDaemon(True)
+            thread.start()
+            threads.append(thread)
+        try:
+            # Copy the sections into the export file in order, as they become available
+            for index in range(len(sections)):
+                (num, prompt, SQLText, fileTag, writeFunc, useProgress) = sections[index]
+                # Update the Progress Bar
+                threadProgress.SetPercent(self.CalcPercent(num))
+                progress.Update(self.CalcPercent(num), prompt)
+                # Wait for the section, letting the GUI thread do work the background threads need done
+                while not results.has_key(index):
+                    self.exportWakeup.clear()
+                    wx.YieldIfNeeded()
+                    if not results.has_key(index):
+                        self.exportWakeup.wait(0.1)
+                (tempFile, excInfo) = results.pop(index)
+                # If exporting the section failed ...
+                if excInfo != None:
+                    # ... the export fails
+                    raise excInfo[0], excInfo[1], excInfo[2]
+                # If the background thread couldn't connect to the database ...
+                elif tempFile == None:
+                    # ... export the section here instead
+                    if useProgress:
+                        self.ExportTable(f, DBInterface.get_db(), SQLText, fileTag, writeFunc, progress)
+                    else:
+                        self.ExportTable(f, DBInterface.get_db(), SQLText, fileTag, writeFunc)
+                # Otherwise ...
+                else:
+                    # ... copy the section into the export file
+                    tempFile.seek(0)
+                    shutil.copyfileobj(tempFile, f, TransanaConstants.exportBufferSize)
+                    tempFile.close()
+        finally:
+            # Stop any background threads that are still working ...
+            self.exportCancelled = True
+            # ... and wait for them to finish, letting the GUI thread do any work they're waiting on
+            for thread in threads:
+                while thread.isAlive():
+                    wx.YieldIfNeeded()
+                    thread.join(0.02)
+            # Close any temporary files that weren't used
+            for (tempFile, excInfo) in results.values():
+                if tempFile != None:
+                    tempFile.close()
+            # Background threads can no longer use the Progress Bar
+            threadProgress.Close()
+
+    def ExportSectionWorker(self, sections, sectionQueue, results, progress):
+        """ Background thread that exports sections from sectionQueue to temporary files, using its own database connection """
+        # Open this thread's own database connection
+        connected = DBInterface.open_worker_db()
+        try:
+            # If we're using sqlite ...
+            if connected and (TransanaConstants.DBInstalled in ['sqlite3']):
+                # ... get unicode objects from the database, as the GUI thread's connection does during export
+                DBInterface.get_db().text_factory = unicode
+            # While there are sections to export ...
+            while not self.exportCancelled:
+                try:
+                    index = sectionQueue.get_nowait()
+                except Queue.Empty:
+                    break
+                # If this thread couldn't connect to the database ...
+                if not connected:
+                    # ... leave the section for the GUI thread
+                    results[index] = (None, None)
+                    self.exportWakeup.set()
+                    continue
+                (num, prompt, SQLText, fileTag, writeFunc, useProgress) = sections[index]
+                # Create a temporary file for the section
+                tempFile = tempfile.TemporaryFile('w+b', TransanaConstants.exportBufferSize)
+                try:
+                    # Export the section, stopping if the export has failed elsewhere
+                    if useProgress:
+                        self.ExportTable(tempFile, DBInterface.get_db(), SQLText, fileTag, self.WriteRecUnlessCancelled, writeFunc, progress)
+                    else:
+                        self.ExportTable(tempFile, DBInterface.get_db(), SQLText, fileTag, self.WriteRecUnlessCancelled, writeFunc)
+                    results[index] = (tempFile, None)
+                except:
+                    tempFile.close()
+                    results[index] = (None, sys.exc_info())
+                # Let the GUI thread know the section is finished
+                self.exportWakeup.set()
+        finally:
+            # Close this thread's database connection
+            DBInterface.close_worker_db()
+
+    def WriteRecUnlessCancelled(self, f, writeFunc, *args):
+        """ Call writeFunc(f, *args) to write a record, unless the export has been cancelled """
+        if self.exportCancelled:
+            raise TransanaExceptions.GeneralError(_('Database Export cancelled.'))
+        writeFunc(f, *args)
+
+    def CallInMainThread(self, func, *args):
+        """ Call func(*args) in the GUI thread and return the result.  Background export threads use this for work
+            that needs wxPython. """
+        # If we're in the GUI thread ...
+        if wx.Thread_IsMain():
+            # ... just call the function
+            return func(*args)
+        # The result of the call, or the exception it raised
+        result = []
+        finished = threading.Event()
+        def RunInMainThread():
+            """ Call the function in the GUI thread """
+            try:
+                result.append((func(*args), None))
+            except:
+                result.append((None, sys.exc_info()))
+            finished.set()
+        wx.CallAfter(RunInMainThread)
+        # Wake the GUI thread if it's waiting for a section
+        self.exportWakeup.set()
+        # Wait for the GUI thread, unless the export is cancelled
+        while not finished.isSet():
+            if self.exportCancelled:
+                raise TransanaExceptions.GeneralError(_('Database Export cancelled.'))
+            finished.wait(0.1)
+        (value, excInfo) = result[0]
+        if excInfo != None:
+            raise excInfo[0], excInfo[1], excInfo[2]
+        return value
+
+    def GetStreamingCursor(self, db):
+        """ Get a cursor that streams query results for exporting a section.  Returns (cursor, connection), where
+            connection is a database connection opened for the cursor that must be closed afterwards, or None. """
+        # A MySQL streaming cursor blocks its connection until it is closed.  Background threads have connections of
+        # their own, and sqlite cursors don't block the connection, so they can stream from db ...
+        if (not wx.Thread_IsMain()) or (TransanaConstants.DBInstalled in ['sqlite3']):
+            return (DBInterface.get_streaming_cursor(db), None)
+        # ... but in the GUI thread, progress updates let timers and message handlers query db while the export
+        # runs.  Stream from a separate connection instead.
+        streamDB = DBInterface.open_separate_db()
+        if streamDB != None:
+            return (DBInterface.get_streaming_cursor(streamDB), streamDB)
+        # If we can't open another connection, use a cursor that reads all the results at once
+        return (db.cursor(), None)
+
+    def ExportTable(self, f, db, SQLText, fileTag, writeFunc, *args):
+        """ Export the records returned by SQLText inside a fileTag element, using writeFunc(f, *args, record)
+            to write each record.  Records are streamed from the database in batches rather than all being
+            loaded at once, so memory use doesn't grow with the size of the database.  Returns the number of
+            records exported. """
+        # If we're saving a manifest of the export, the records need to be examined as they are exported
+        if self.manifest != None:
+            return self.ExportTableWithManifest(f, db, SQLText, fileTag, writeFunc, *args)
+        # Get a database cursor that streams the query results
+        (dbCursor, streamDB) = self.GetStreamingCursor(db)
+        try:
+            dbCursor.execute(SQLText)
+            # Initialize the record count
+            recCount = 0
+            # Get the first batch of records
+            data = dbCursor.fetchmany(TransanaConstants.exportFetchSize)
+            # While there are records ...
+            while len(data) > 0:
+                # The fileTag element is only written if there are records
+                if recCount == 0:
+                    f.write('  <%s>\n' % fileTag)
+                # Write the records in the batch
+                for rec in data:
+                    writeFunc(f, *(args + (rec,)))
+                recCount += len(data)
+                # Get the next batch of records
+                data = dbCursor.fetchmany(TransanaConstants.exportFetchSize)
+            if recCount > 0:
+                f.write('  </%s>\n' % fileTag)
+        finally:
+            dbCursor.close()
+            # If we opened a connection for the cursor, close it
+            if streamDB != None:
+                streamDB.close()
+        return recCount
+
+    def ExportTableWithManifest(self, f, db, SQLText, fileTag, writeFunc, *args):
+        """ Export the records returned by SQLText inside a fileTag element, as ExportTable() does, adding them to
+            the export's manifest.  If we're only exporting the changes since an earlier export, records that are
+            in the earlier export are skipped, and records in sections with a LastSaveTime whose LastSaveTime hasn't
+            changed aren't even read.  Returns the number of records exported. """
+        # The number of records with each hash in this section
+        hashes = collections.Counter()
+        self.manifest['hashes'][fileTag] = hashes
+        # The number of records with each hash in the earlier export's section that haven't been found again yet
+        if self.baseManifest != None:
+            unmatched = collections.Counter(self.baseManifest['hashes'].get(fileTag, {}))
+        else:
+            unmatched = collections.Counter()
+        # The queries for the records to export.  Usually that's all the records.
+        queries = [SQLText]
+        # The (LastSaveTime, hash) of each record, by record number, for sections where records have a LastSaveTime
+        saveTimes = None
+        # If the records in this section have a LastSaveTime ...
+        if XMLDelta.TIMESTAMP_TABLES.has_key(fileTag):
+            (table, numField) = XMLDelta.TIMESTAMP_TABLES[fileTag]
+            saveTimes = {}
+            self.manifest['saveTimes'][fileTag] = saveTimes
+            # ... get the LastSaveTime of each record
+            dbCursor = db.cursor()
+            dbCursor.execute('SELECT %s, LastSaveTime FROM %s' % (numField, table))
+            currentSaveTimes = dict(dbCursor.fetchall())
+            dbCursor.close()
+            # If we're only exporting the changes since an earlier export ...
+            if self.baseManifest != None:
+                baseSaveTimes = self.baseManifest['saveTimes'].get(fileTag, {})
+                baseStarted = self.baseManifest['started']
+                # ... find the records that have been saved since the earlier export.  (A record saved while the earlier
+                # export was starting may have been saved again in the same second, so it counts as changed.)
+                changed = []
+                for (num, saveTime) in currentSaveTimes.items():
+                    (baseSaveTime, baseHash) = baseSaveTimes.get(num, (None, None))
+                    if (saveTime != None) and (baseStarted != None) and (saveTime == baseSaveTime) and \
+                       (saveTime < baseStarted) and (unmatched[baseHash] > 0):
+                        # An unchanged record keeps the hash it had in the earlier export
+                        saveTimes[num] = (saveTime, baseHash)
+                        hashes[baseHash] += 1
+                        unmatched[baseHash] -= 1
+                    else:
+                        changed.append(num)
+                changed.sort()
+                # Only the changed records need to be read, a group at a time.  (Record numbers are integers, so they
+                # can safely be included in the queries.)
+                queries = []
+                for start in range(0, len(changed), XMLDelta.QUERY_CHUNK_SIZE):
+                    numbers = ', '.join([str(int(num)) for num in changed[start:start + XMLDelta.QUERY_CHUNK_SIZE]])
+                    queries.append('%s WHERE %s IN (%s)' % (SQLText, numField, numbers))
+        # Get a database cursor that streams the query results
+        (dbCursor, streamDB) = self.GetStreamingCursor(db)
+        try:
+            # Initialize the record count
+            recCount = 0
+            for query in queries:
+                dbCursor.execute(query)
+                # Get the first batch of records
+                data = dbCursor.fetchmany(TransanaConstants.exportFetchSize)
+                # While there are records ...
+                while len(data) > 0:
+                    for rec in data:
+                        # Get the exported text of the record
+                        recordText = ExportRecordText()
+                        writeFunc(recordText, *(args + (rec,)))
+                        text = recordText.GetText()
+                        # Add the record to the manifest
+                        recordHash = XMLDelta.GetRecordHash(text)
+                        hashes[recordHash] += 1
+                        if saveTimes != None:
+                            saveTimes[rec[0]] = (currentSaveTimes.get(rec[0], None), recordHash)
+                        # If the record is in the earlier export, it doesn't need to be exported again
+                        if unmatched[recordHash] > 0:
+                            unmatched[recordHash] -= 1
+                        # Otherwise ...
+                        else:
+                            # ... export it.  (The fileTag element is only written if there are records.)
+                            if recCount == 0:
+                                f.write('  <%s>\n' % fileTag)
+                            f.write(text)
+                            recCount += 1
+                    # Get the next batch of records
+                    data = dbCursor.fetchmany(TransanaConstants.exportFetchSize)
+            if recCount > 0:
+                f.write('  </%s>\n' % fileTag)
+        finally:
+            dbCursor.close()
+            # If we opened a connection for the cursor, close it
+            if streamDB != None:
+                streamDB.close()
+        # If we're only exporting the changes since an earlier export, the earlier export's records that weren't
+        # found again have been deleted or changed
+        if self.baseManifest != None:
+            self.deletedRecords[fileTag] = dict([(recordHash, count) for (recordHash, count) in unmatched.items() if count > 0])
+        return recCount
+
+    def WriteDeletedRecords(self, f):
+        """ Write the hashes of the earlier export's records that have been deleted or changed since then """
+        f.write('  <%s>\n' % XMLDelta.DELETED_TAG)
+        for fileTag in XMLDelta.SECTION_TAGS:
+            counts = self.deletedRecords.get(fileTag, {})
+            if len(counts) > 0:
+                f.write('    <%s>\n' % fileTag)
+                for (recordHash, count) in sorted(counts.items()):
+                    for x in range(count):
+                        f.write('      %s\n' % recordHash)
+                f.write('    </%s>\n' % fileTag)
+        f.write('  </%s>\n' % XMLDelta.DELETED_TAG)
+
     def CalcPercent(self, num):
         """ Calculate the Percent value to be displayed in the Progress Bar """
         numCategories = 19.0
@@ -687,6 +1000,10 @@ class XMLExport(Dialogs.GenForm):
         f.write('\n')
         f.write('  <!ELEMENT Filter (#PCDATA|ReportType|ReportScope|ConfigName|FilterDataType|FilterData)*>\n')
         f.write('\n')
+        f.write('  <!ELEMENT ExportID (#PCDATA)>\n')
+        f.write('  <!ELEMENT DeltaOf (#PCDATA)>\n')
+        f.write('  <!ELEMENT DeletedRecords ANY>\n')
+        f.write('\n')
         f.write('  <!ELEMENT Transana (#PCDATA|SeriesFile|EpisodeFile|CoreDataFile|TranscriptFile|CollectionFile|ClipFile|KeywordFile|ClipKeywordFile|NoteFile|FilterFile)*>\n')
         f.write(']>\n')
         f.write('\n')
@@ -825,7 +1142,9 @@ class XMLExport(Dialogs.GenForm):
 
             # On exporting old, huge databases, you can end up with hundreds of "Importing" popups.
             # This hopefully will allow them to close properly rather than building up.
-            wx.YieldIfNeeded()
+            # (Background export threads leave this to the GUI thread.)
+            if wx.Thread_IsMain():
+                wx.YieldIfNeeded()
 
         f.write('    </Document>\n')
 
@@ -1079,7 +1398,9 @@ class XMLExport(Dialogs.GenForm):
 
             # On exporting old, huge databases, you can end up with hundreds of "Importing" popups.
             # This hopefully will allow them to close properly rather than building up.
-            wx.YieldIfNeeded()
+            # (Background export threads leave this to the GUI thread.)
+            if wx.Thread_IsMain():
+                wx.YieldIfNeeded()
 
         f.write('    </Quote>\n')
 
@@ -1371,31 +1692,8 @@ class XMLExport(Dialogs.GenForm):
 
                 progress.Update(56, prompt1 + prompt2 % TranscriptID)
 
-                # If RTF  ...
-                # If we're using the RichTextCtrl ...
-                if TransanaConstants.USESRTC:
-                    # Load the RTF into the invisible RichTextCtrl
-                    self.invisibleRTC.LoadRTFData(RTFText)
-                    # Hide Time Code data that might not be hidden properly
-                    self.invisibleRTC.HideTimeCodeData()
-                    # ... and extract the XML for it.  This makes export slower, import faster, and means
-                    # we ALWAYS have XML in the export file rather than a mix of XML and RTF.
-                    rtfData = self.invisibleRTC.GetFormattedSelection('XML')
-
-                    # If XML, we can just use it as is after we strip off the XML Header Line, which breaks XML.
-                    # Due to changes in the header across wxPython versions, we need to use a regular expression.
-                    # rtfData = rtfData[39:]
-
-                    # Match "<?xml" plus any number of characters that are not ">" plus ">" plus whitespace
-                    REGEX = "<\?xml[^>]*>[\s]*"
-                    regexCompiled = re.compile(REGEX)
-                    regexSearch = regexCompiled.search(rtfData)
-                    rtfData = rtfData[regexSearch.end():]
-
-                # If we're using the StyledTextCtrl ...
-                else:
-                    # ... then we just use the RTF as is.
-                    rtfData = RTFText
+                # If RTF, convert it in the GUI thread, which the invisible RichTextCtrl requires
+                rtfData = self.CallInMainThread(self.ConvertRTFTranscript, RTFText)
 
             # If we have STC formatted data ...
             else:
@@ -1409,47 +1707,8 @@ class XMLExport(Dialogs.GenForm):
 
                 progress.Update(56, prompt1 + prompt2 % TranscriptID)
 
-                # unpickle the text and style info
-                (bufferContents, specs, attrs) = pickle.loads(RTFText)
-                # Clear the invisible STC
-                self.invisibleSTC.ClearDoc()
-
-                # DKW  Although these all are called in ClearDoc(), it appears necessary to repeat them
-                #      here.  That's because ClearDoc() actually populates a few styles, and they interfere
-                #      with the ones being brought in from the pickled RTFText.  Otherwise, Transcripts are 
-                #      subtly changed on XML Export.  In particular, the Jeffersonian Symbols don't survive.
-                self.invisibleSTC.StyleClearAll()
-                self.invisibleSTC.style_specs = []
-                self.invisibleSTC.style_attrs = []
-                self.invisibleSTC.num_styles = 0
-
-                # you have to apply the styles of the document in order
-                # for the document to load properly.
-                for x in specs:
-                    self.invisibleSTC.GetStyleAccessor(x)
-
-                # feed the data info invisibleSTC.
-                self.invisibleSTC.AddStyledText(bufferContents)
-                # extract the data as RTF.
-                rtfData = self.invisibleSTC.GetRTFBuffer()
-
-                # If we're using the RichTextCtrl ...
-                if TransanaConstants.USESRTC:
-                    # Load the STC-converted-to-RTF data into the invisible RichTextCtrl
-                    self.invisibleRTC.LoadRTFData(rtfData)
-                    # ... and extract the XML for it.  This makes export slower, import faster, and means
-                    # we ALWAYS have XML in the export file rather than a mix of XML and RTF.
-                    rtfData = self.invisibleRTC.GetFormattedSelection('XML')
-
-                    # If XML, we can just use it as is after we strip off the XML Header Line, which breaks XML.
-                    # Due to changes in the header across wxPython versions, we need to use a regular expression.
-                    # rtfData = rtfData[39:]
-
-                    # Match "<?xml" plus any number of characters that are not ">" plus ">" plus whitespace
-                    REGEX = "<\?xml[^>]*>[\s]*"
-                    regexCompiled = re.compile(REGEX)
-                    regexSearch = regexCompiled.search(rtfData)
-                    rtfData = rtfData[regexSearch.end():]
+                # Convert the STC data in the GUI thread, which the invisible Controls require
+                rtfData = self.CallInMainThread(self.ConvertSTCTranscript, RTFText)
 
             # now simply write the RTF data to the file.  (This does NOT need to be encoded, as the RTF already is!)
             # (but check to make sure there's actually RTF data there!)
@@ -1461,10 +1720,85 @@ class XMLExport(Dialogs.GenForm):
 
             # On exporting old, huge databases, you can end up with hundreds of "Converting RTF" popups.
             # This hopefully will allow them to close properly rather than building up.
-            wx.YieldIfNeeded()
+            # (Background export threads leave this to the GUI thread.)
+            if wx.Thread_IsMain():
+                wx.YieldIfNeeded()
             
         f.write('    </Transcript>\n')
 
+    def ConvertRTFTranscript(self, RTFText):
+        """ Convert RTF transcript text for export.  This must be called in the GUI thread. """
+        # If we're using the RichTextCtrl ...
+        if TransanaConstants.USESRTC:
+            # Load the RTF into the invisible RichTextCtrl
+            self.invisibleRTC.LoadRTFData(RTFText)
+            # Hide Time Code data that might not be hidden properly
+            self.invisibleRTC.HideTimeCodeData()
+            # ... and extract the XML for it.  This makes export slower, import faster, and means
+            # we ALWAYS have XML in the export file rather than a mix of XML and RTF.
+            rtfData = self.invisibleRTC.GetFormattedSelection('XML')
+
+            # If XML, we can just use it as is after we strip off the XML Header Line, which breaks XML.
+            # Due to changes in the header across wxPython versions, we need to use a regular expression.
+            # rtfData = rtfData[39:]
+
+            # Match "<?xml" plus any number of characters that are not ">" plus ">" plus whitespace
+            REGEX = "<\?xml[^>]*>[\s]*"
+            regexCompiled = re.compile(REGEX)
+            regexSearch = regexCompiled.search(rtfData)
+            rtfData = rtfData[regexSearch.end():]
+
+        # If we're using the StyledTextCtrl ...
+        else:
+            # ... then we just use the RTF as is.
+            rtfData = RTFText
+        return rtfData
+
+    def ConvertSTCTranscript(self, RTFText):
+        """ Convert pickled wxSTC transcript data for export.  This must be called in the GUI thread. """
+        # unpickle the text and style info
+        (bufferContents, specs, attrs) = pickle.loads(RTFText)
+        # Clear the invisible STC
+        self.invisibleSTC.ClearDoc()
+
+        # DKW  Although these all are called in ClearDoc(), it appears necessary to repeat them
+        #      here.  That's because ClearDoc() actually populates a few styles, and they interfere
+        #      with the ones being brought in from the pickled RTFText.  Otherwise, Transcripts are 
+        #      subtly changed on XML Export.  In particular, the Jeffersonian Symbols don't survive.
+        self.invisibleSTC.StyleClearAll()
+        self.invisibleSTC.style_specs = []
+        self.invisibleSTC.style_attrs = []
+        self.invisibleSTC.num_styles = 0
+
+        # you have to apply the styles of the document in order
+        # for the document to load properly.
+        for x in specs:
+            self.invisibleSTC.GetStyleAccessor(x)
+
+        # feed the data info invisibleSTC.
+        self.invisibleSTC.AddStyledText(bufferContents)
+        # extract the data as RTF.
+        rtfData = self.invisibleSTC.GetRTFBuffer()
+
+        # If we're using the RichTextCtrl ...
+        if TransanaConstants.USESRTC:
+            # Load the STC-converted-to-RTF data into the invisible RichTextCtrl
+            self.invisibleRTC.LoadRTFData(rtfData)
+            # ... and extract the XML for it.  This makes export slower, import faster, and means
+            # we ALWAYS have XML in the export file rather than a mix of XML and RTF.
+            rtfData = self.invisibleRTC.GetFormattedSelection('XML')
+
+            # If XML, we can just use it as is after we strip off the XML Header Line, which breaks XML.
+            # Due to changes in the header across wxPython versions, we need to use a regular expression.
+            # rtfData = rtfData[39:]
+
+            # Match "<?xml" plus any number of characters that are not ">" plus ">" plus whitespace
+            REGEX = "<\?xml[^>]*>[\s]*"
+            regexCompiled = re.compile(REGEX)
+            regexSearch = regexCompiled.search(rtfData)
+            rtfData = rtfData[regexSearch.end():]
+        return rtfData
+
     def WriteKeywordRec(self, f, keywordRec):
         (KeywordGroup, Keyword, Definition, LineColorName, LineColorDef, DrawMode, LineWidth, LineStyle) = keywordRec
 
@@ -1929,9 +2263,7 @@ class XMLExport(Dialogs.GenForm):
                     # Gather the data to be put into the error message
                     errorMsgData = (ReportType, ReportScope, ConfigName, FilterDataType)
                     # Finally display the error message
-                    errorDlg = Dialogs.ErrorDialog(self, errorMsg % errorMsgData)
-                    errorDlg.ShowModal()
-                    errorDlg.Destroy()
+                    self.CallInMainThread(self.ShowExportError, errorMsg % errorMsgData)
 
             # For FilterDataType for Keyword Colors (4), we have DICTIONARY data that's already been encoded.
             # For FilterDataType for Notes (8), we have a LIST that's already been encoded.
@@ -1973,18 +2305,36 @@ class XMLExport(Dialogs.GenForm):
             f.write('      </FilterData>\n')
             f.write('    </Filter>\n')
 
+    def ShowExportError(self, errorMsg):
+        """ Display an error message about the export.  This must be called in the GUI thread. """
+        errorDlg = Dialogs.ErrorDialog(self, errorMsg)
+        errorDlg.ShowModal()
+        errorDlg.Destroy()
+
     def OnBrowse(self, evt):
         """Invoked when the user activates the Browse button."""
         fs = wx.FileSelector(_("Select an XML file for export"),
                         TransanaGlobal.configData.videoPath,
                         "",
                         "", 
-                        _("Transana-XML Files (*.tra)|*.tra|XML Files (*.xml)|*.xml|All files (*.*)|*.*"), 
+                        _("Transana-XML Files (*.tra)|*.tra|Compressed Transana-XML Files (*.tra.gz)|*.tra.gz|XML Files (*.xml)|*.xml|All files (*.*)|*.*"), 
                         wx.SAVE)
         # If user didn't cancel ..
         if fs != "":
             self.XMLFile.SetValue(fs)
 
+    def OnBrowseBase(self, evt):
+        """Invoked when the user activates the Browse button for the earlier export."""
+        fs = wx.FileSelector(_("Select the earlier export"),
+                        TransanaGlobal.configData.videoPath,
+                        "",
+                        "", 
+                        _("Transana-XML Files (*.tra)|*.tra|Compressed Transana-XML Files (*.tra.gz)|*.tra.gz|XML Files (*.xml)|*.xml|All files (*.*)|*.*"), 
+                        wx.OPEN | wx.FILE_MUST_EXIST)
+        # If user didn't cancel ..
+        if fs != "":
+            self.BaseFile.SetValue(fs)
+
 
 # This simple derrived class let's the user drop files onto an edit box
 class EditBoxFileDropTarget(wx.FileDropTarget):
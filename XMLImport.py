@@ -29,6 +29,10 @@ import wx
 # Import the mx DateTime module
 #import mx.DateTime
 import datetime
+# import Python's gzip module
+import gzip
+# import Python's io module
+import io
 import time
 
 # import necessary Transana modules
@@ -49,6 +53,7 @@ import Snapshot
 import TransanaConstants
 import TransanaGlobal
 import Transcript
+import XMLDelta
 
 # import Python's os and sys modules
 import os
@@ -57,6 +62,17 @@ import sys
 import re
 # import Python's cPickle module
 import cPickle
+# import Python's collections module
+import collections
+
+# The version of the import journal format.  Journals with a different version are ignored.
+JOURNAL_VERSION = 1
+
+# Regular expression for the escaped characters UnEscape() replaces, and the characters that replace them
+ESCAPE_RE = re.compile('&(gt|lt|amp);')
+UNESCAPED_CHARS = { 'gt' : '>', 'lt' : '<', 'amp' : '&' }
+# Regular expression that finds characters that aren't 7-bit ASCII
+NON_ASCII_RE = re.compile(u'[^\x00-\x7f]')
 
 MENU_FILE_EXIT = wx.NewId()
 
@@ -180,6 +196,16 @@ class XMLImport(Dialogs.GenForm):
         # Add a vertical spacer to the main sizer        
         mainSizer.Add((0, 10))
 
+        # Large imports can take hours.  Importing with checkpoints commits the import in batches and keeps a journal,
+        # so that an interrupted import can be resumed rather than started over.
+        self.checkpoints = wx.CheckBox(self.panel, -1, _('Save the import in batches so it can be resumed if it is interrupted'))
+        self.checkpoints.SetValue(TransanaConstants.importCheckpoints)
+        # Add the checkbox to the main sizer
+        mainSizer.Add(self.checkpoints, 0)
+
+        # Add a vertical spacer to the main sizer        
+        mainSizer.Add((0, 10))
+
         # Create a sizer for the buttons
         btnSizer = wx.BoxSizer(wx.HORIZONTAL)
         # Add the buttons
@@ -217,35 +243,22 @@ class XMLImport(Dialogs.GenForm):
     def UnEscape(self, inpStr):
         """ Replaces "&amp;", "&gt;", and "&lt;" with "&", ">", and "<" 
             >, <, and & all need to be replaced, but &amp;, &gt;, and &lt; needs to survive!"""
-        # Find the first Greater Than in the document
-        chrPos = inpStr.find('&gt;')
-        # While there are more Greater Thans ...
-        while (chrPos > -1):
-            # ... replace the Greater Than with the escape string ...
-            inpStr = inpStr[:chrPos] + '>' + inpStr[chrPos + 4:]
-            # ... and look for the NEXT Greater Than after the replacement
-            chrPos = inpStr.find('&gt;', chrPos + 1)
-        # Find the first Less Than in the document
-        chrPos = inpStr.find('&lt;')
-        # While there are more Less Thans ...
-        while (chrPos > -1):
-            # ... replace the Less Than with the escape string ...
-            inpStr = inpStr[:chrPos] + '<' + inpStr[chrPos + 4:]
-            # ... and look for the NEXT Less Than after the replacement
-            chrPos = inpStr.find('&lt;', chrPos + 1)
-        # Find the first Ampersand in the document
-        chrPos = inpStr.find('&amp;')
-        # While there are more Ampersands ...
-        while (chrPos > -1):
-            # ... replace the Ampersand with the escape string ...
-            inpStr = inpStr[:chrPos] + '&' + inpStr[chrPos + 5:]
-            # ... and look for the NEXT Ampersand after the replacement
-            chrPos = inpStr.find('&amp;', chrPos + 1)
-        # Return the modified string
-        return inpStr
+        # Most lines have nothing escaped
+        if not '&' in inpStr:
+            return inpStr
+        # Replace all the escaped characters in a single pass.  The text that replaces an escaped character is never
+        # examined again, so "&amp;gt;" becomes "&gt;", not ">".
+        return ESCAPE_RE.sub(lambda match: UNESCAPED_CHARS[match.group(1)], inpStr)
 
     def Import(self):
        """ Handle the Import request """
+       # Get the files to import.  (If the selected file only contains the changes since an earlier export, the
+       # earlier export is needed too.)
+       self.importFiles = self.GetImportFiles()
+       # If the user cancelled, there's nothing to import
+       if self.importFiles == None:
+           return
+
        if (self.importData == None) or not ('wxMac' in wx.PlatformInfo):
            # use the LONGEST title here to set the width of the dialog box!
            progress = wx.ProgressDialog(_('Transana XML Import'),
@@ -271,6 +284,47 @@ class XMLImport(Dialogs.GenForm):
        quotePosition = {}
        clipTranscripts = {}
        clipStartStop = {}
+       # Rows for tables that don't need new object numbers are saved in batches.  Initialize the queued rows.
+       self.queuedQueries = collections.OrderedDict()
+       # Initialize the import records the queued rows come from, and the record of a queued row that failed to save
+       self.queuedRecords = {}
+       self.failedQueuedRecord = None
+
+       # Find out if we're importing with checkpoints
+       self.useCheckpoints = self.checkpoints.GetValue()
+       # Line number of the last checkpoint.  (0 means no records have been committed yet.)
+       self.checkpointLine = 0
+       # Line number to resume the import after.  (0 means we're not resuming an interrupted import.)
+       resumeLine = 0
+       # Load the journal of an earlier, interrupted import of this file, if there is one
+       journal = self.LoadJournal()
+       if journal != None:
+           if 'unicode' in wx.PlatformInfo:
+               # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+               prompt = unicode(_('An earlier import of file "%s" into this database was interrupted at line %d.\nDo you want to resume that import?\n(If not, the import will start over from the beginning.)'), 'utf8')
+           else:
+               prompt = _('An earlier import of file "%s" into this database was interrupted at line %d.\nDo you want to resume that import?\n(If not, the import will start over from the beginning.)')
+           dlg = Dialogs.QuestionDialog(self, prompt % (self.XMLFile.GetValue(), journal['lineCount']))
+           result = dlg.LocalShowModal()
+           dlg.Destroy()
+           # If the user wants to resume the import ...
+           if result == wx.ID_YES:
+               # ... restore the state of the import at the last checkpoint
+               resumeLine = journal['lineCount']
+               self.checkpointLine = resumeLine
+               recNumbers = journal['recNumbers']
+               quotePosition = journal['quotePosition']
+               clipTranscripts = journal['clipTranscripts']
+               clipStartStop = journal['clipStartStop']
+               self.XMLVersionNumber = journal['XMLVersionNumber']
+               self.importEncoding = journal['importEncoding']
+               # A resumed import continues to use checkpoints
+               self.useCheckpoints = True
+           # If not ...
+           else:
+               # ... forget the interrupted import
+               self.DeleteJournal()
+               journal = None
 
        # Get the database connection
        db = DBInterface.get_db()
@@ -299,6 +353,10 @@ class XMLImport(Dialogs.GenForm):
        if transcriptCount == None:
            # Fix that.
            transcriptCount = 0
+       # If we're resuming an interrupted import, the database already contains some of the imported Transcripts.
+       # We need the number of Transcripts that were there before the interrupted import started.
+       if journal != None:
+           transcriptCount = journal['transcriptCount']
 
        # Define some dictionaries for processing XML tags
        MainHeads = {}
@@ -460,7 +518,11 @@ class XMLImport(Dialogs.GenForm):
            # Assume we're good to continue unless informed otherwise
            contin = True
            # Open the XML file
-           f = file(self.XMLFile.GetValue(), 'r')
+           f = self.OpenImportFile(self.importFiles[0])
+           lines = f
+           # If we're importing an export of changes, merge the changes into the earlier export as it is read
+           for deltaFile in self.importFiles[1:]:
+               lines = XMLDelta.MergeDelta(lines, self.LoadDelta(deltaFile))
 
            # Initialize objectType and dataType, which are used to parse the file
            objectType = None 
@@ -472,11 +534,23 @@ class XMLImport(Dialogs.GenForm):
            # Some collections may have become children of LATER collections not yet imported.
            # Let's keep a list of instances of when this occurs so we can fix it after all the collections are read.
            collectionsToUpdate = []
+           # Count the records saved since the last checkpoint
+           recordsSinceCheckpoint = 0
+
+           # If we're resuming an interrupted import ...
+           if journal != None:
+               # ... restore the rest of the state of the import at the last checkpoint
+               collectionsToUpdate = journal['collectionsToUpdate']
+               skipCheck = journal['skipCheck']
+               skipValue = journal['skipValue']
 
            # For each line in the file ...
-           for line in f:
+           for line in lines:
                # ... increment the line counter
                lineCount += 1
+               # If we're resuming an interrupted import, skip the lines that were imported before the last checkpoint
+               if lineCount <= resumeLine:
+                   continue
                # If we DON'T have RTF Text or Note Text ...
                if not (dataType in  ['XMLText', 'RTFText', 'NoteText']):
                    # ... we can't just use strip() here.  Strings ending with the a with a grave (Alt-133) get corrupted!
@@ -504,11 +578,19 @@ class XMLImport(Dialogs.GenForm):
 
                    # Code for updating the Progress Bar
                    if lineUpper in MainHeads.keys():
+                       # Save any rows queued from the previous section.  (skipValue is still the previous section's.)
+                       (contin, skipValue) = self.SaveQueuedRecords(dbCursor, skipCheck, skipValue)
+                       # If they couldn't be saved, stop processing!
+                       if not contin:
+                           break
                        if (self.importData == None) or not ('wxMac' in wx.PlatformInfo):
                            progress.Update(MainHeads[lineUpper]['progPct'], MainHeads[lineUpper]['progPrompt'])
                        # These records should NEVER skip error messages
                        skipCheck = MainHeads[lineUpper]['skipCheck']
                        skipValue = MainHeads[lineUpper]['skipValue']
+                       # The start of each section is a checkpoint
+                       if self.useCheckpoints and (db != None):
+                           recordsSinceCheckpoint = TransanaConstants.importCheckpointRecords
 
                    elif lineUpper.lstrip() in DataTypes.keys():
                        dataType = DataTypes[lineUpper.lstrip()]
@@ -539,6 +621,8 @@ class XMLImport(Dialogs.GenForm):
                        objectType = None
                        dataType = 'XMLVersionNumber'
                    elif lineUpper == '</TRANSANAXMLVERSION>':
+                       # The version number is complete, so following lines aren't part of it
+                       dataType = None
 
                        # Version 1.0 -- Original Transana XML for Transana 2.0 release
                        # Version 1.1 -- Unicode encoding added to Transana XML for Transana 2.1 release
@@ -575,6 +659,13 @@ class XMLImport(Dialogs.GenForm):
                            # This error means we can't continue processing the file.
                            contin = False
                            break
+
+                   # The Export ID and Delta Of elements only identify the export.  (ImportFilesInOrder() reads them to
+                   # match exports of changes with the export they were made against.)  There's nothing to import.
+                   elif lineUpper in ['<EXPORTID>', '</EXPORTID>', '<DELTAOF>', '</DELTAOF>']:
+                       objectType = None
+                       dataType = None
+
                    # Code for Creating and Saving Objects
                    elif lineUpper == '<SERIES>':
                        currentObj = Library.Library()
@@ -818,8 +909,8 @@ class XMLImport(Dialogs.GenForm):
                                query = DBInterface.FixQuery(query)
                                # Get the data for each insert query
                                data = (quotePosition['DocumentNum'], quotePosition['StartChar'], quotePosition['EndChar'], quotePosition['QuoteNum'])
-                               # Execute the query
-                               dbCursor.execute(query, data)
+                               # Queue the query
+                               self.QueueQuery(dbCursor, query, data, (objectType, lineCount))
 
                            elif objectType == 'AddVid':
                                # Additional Video records don't have a proper object type, so we have to do the saves the hard way.
@@ -844,8 +935,8 @@ class XMLImport(Dialogs.GenForm):
                                tmpFilename = tmpFilename.encode(TransanaGlobal.encoding)
                                # Get the data for each insert query
                                data = (currentObj['EpisodeNum'], currentObj['ClipNum'], tmpFilename, currentObj['VidLength'], currentObj['Offset'], currentObj['Audio'])
-                               # Execute the query
-                               dbCursor.execute(query, data)
+                               # Queue the query
+                               self.QueueQuery(dbCursor, query, data, (objectType, lineCount))
 
                            elif  objectType == 'CoreData':
                                currentObj.number = 0
@@ -875,7 +966,9 @@ class XMLImport(Dialogs.GenForm):
                                        print "XMLImport 5:  Saving ", type(currentObj), objCountNumber
                                        objCountNumber += 1;
 
-                                   currentObj.db_save()
+                                   # Queue the query that saves the Clip Keyword
+                                   (query, values) = currentObj.GetSaveQuery()
+                                   self.QueueQuery(dbCursor, query, values, (objectType, lineCount))
 
                            elif objectType == 'SnapshotKeyword':
                                if self.snapshotKeyword['SnapshotNum'] > 0:
@@ -894,9 +987,9 @@ class XMLImport(Dialogs.GenForm):
                                              self.snapshotKeyword['X2'],
                                              self.snapshotKeyword['Y2'],
                                              self.snapshotKeyword['Visible'])
-                                   # Save the Snapshot Keyword data
+                                   # Queue the Snapshot Keyword data to be saved
                                    if db != None:
-                                       dbCursor.execute(query, values)
+                                       self.QueueQuery(dbCursor, query, values, (objectType, lineCount))
                                    
                            elif objectType == 'SnapshotKeywordStyle':
                                if self.snapshotKeywordStyle['SnapshotNum'] > 0:
@@ -915,9 +1008,9 @@ class XMLImport(Dialogs.GenForm):
                                              self.snapshotKeywordStyle['ColorDef'],
                                              self.snapshotKeywordStyle['LineWidth'],
                                              self.snapshotKeywordStyle['LineStyle'])
-                                   # Save the Snapshot Keyword Style data
+                                   # Queue the Snapshot Keyword Style data to be saved
                                    if db != None:
-                                       dbCursor.execute(query, values)
+                                       self.QueueQuery(dbCursor, query, values, (objectType, lineCount))
 
                            elif objectType == 'Synonym':
                                if synonymGroup != '' and synonym != '':
@@ -1026,9 +1119,9 @@ class XMLImport(Dialogs.GenForm):
                                # Build the values to match the query, including the pickled Clip data
                                values = (self.FilterReportType, self.FilterScope, self.FilterConfigName, self.FilterFilterDataType,
                                          self.FilterFilterData)
-                               # Save the Filter data
+                               # Queue the Filter data to be saved
                                if db != None:
-                                   dbCursor.execute(query, values)
+                                   self.QueueQuery(dbCursor, query, values, (objectType, lineCount))
                        except:
 
                            if DEBUG or DEBUG_Exceptions:
@@ -1044,8 +1137,17 @@ class XMLImport(Dialogs.GenForm):
                                print
                                print
 
+                           # If a queued row failed to save, the problem is in the record that row came from, not this record
+                           if self.failedQueuedRecord != None:
+                               # If we haven't been told to skip error messages of this type ...
+                               if not skipValue:
+                                   # ... interrupt the import process and tell the user about that record
+                                   contin = False
+                                   skipValue = self.ReportFailedRecord(skipCheck)
+                               else:
+                                   self.failedQueuedRecord = None
                            # If we haven't been told to skip error messages of this type ...
-                           if not skipValue:
+                           elif not skipValue:
                                # If an error arises, for now, let's interrupt the import process.  It may be possible
                                # to eliminate this line later, allowing the import to continue even if there is a problem.
                                contin = False
@@ -1142,6 +1244,8 @@ class XMLImport(Dialogs.GenForm):
 
                        currentObj = None
                        objectType = None
+                       # Count the record towards the next checkpoint
+                       recordsSinceCheckpoint += 1
 
                else:
 
@@ -1845,33 +1949,40 @@ class XMLImport(Dialogs.GenForm):
                if not contin:
                    break
 
+               # If we're importing with checkpoints and it's time for a checkpoint ...
+               if self.useCheckpoints and (db != None) and (recordsSinceCheckpoint >= TransanaConstants.importCheckpointRecords):
+                   # Save any rows still queued
+                   (contin, skipValue) = self.SaveQueuedRecords(dbCursor, skipCheck, skipValue)
+                   # If they couldn't be saved, stop processing!
+                   if not contin:
+                       break
+                   # Commit the records imported so far and record where we are in the journal
+                   self.Checkpoint(dbCursor, lineCount,
+                                   { 'recNumbers' : recNumbers,
+                                     'quotePosition' : quotePosition,
+                                     'clipTranscripts' : clipTranscripts,
+                                     'clipStartStop' : clipStartStop,
+                                     'collectionsToUpdate' : collectionsToUpdate,
+                                     'transcriptCount' : transcriptCount,
+                                     'skipCheck' : skipCheck,
+                                     'skipValue' : skipValue })
+                   recordsSinceCheckpoint = 0
+
+           if contin:
+               # Save any rows still queued
+               (contin, skipValue) = self.SaveQueuedRecords(dbCursor, skipCheck, skipValue)
+
            if contin: 
                # Since Clips were imported before Transcripts, the Originating Transcript Numbers in the Clip Records
                # are incorrect.  We must update them now.
                if (self.importData == None) or not ('wxMac' in wx.PlatformInfo):
                    progress.Update(self.CalcPercent(18), _('Updating Source Transcript Numbers in Clip Transcript records'))
                if db != None:
-                   dbCursor2 = db.cursor()
-                   # Get all NEW transcript records.  We DON'T want to process transcript records that were in the database prior
-                   # to the import, as they won't be in recNumbers and thus we'd lose all SourceTranscript records!
-                   SQLText = 'SELECT TranscriptNum, SourceTranscriptNum, ClipNum FROM Transcripts2 WHERE ClipNum > 0 AND TranscriptNum > %s'
-                   SQLText = DBInterface.FixQuery(SQLText)
-                   dbCursor.execute(SQLText, (transcriptCount, ))
-                   # create the SQL for updating the SourceTranscriptNum of all new transcripts
-                   SQLText = """ UPDATE Transcripts2
-                                 SET SourceTranscriptNum = %s
-                                 WHERE TranscriptNum = %s """
-                   SQLText = DBInterface.FixQuery(SQLText)
-                   # For each new Transcript record ...
-                   for (TranscriptNum, SourceTranscriptNum, ClipNum) in dbCursor.fetchall():
-                       # It is possible that the originating Transcript has been deleted.  If so,
-                       # we need to set the TranscriptNum to 0.  We accomplish this by adding the
-                       # missing Transcript Number to our recNumbers list with a value of 0
-                       if not(SourceTranscriptNum in recNumbers['Transcript'].keys()):
-                           recNumbers['Transcript'][SourceTranscriptNum] = 0
-                       dbCursor2.execute(SQLText, (recNumbers['Transcript'][SourceTranscriptNum], TranscriptNum))
-
-                   dbCursor2.close()
+                   # Update all NEW clip transcript records in one query.  We DON'T want to process transcript records that were
+                   # in the database prior to the import, as they won't be in recNumbers and thus we'd lose all SourceTranscript records!
+                   # It is possible that the originating Transcript has been deleted.  If so, the SourceTranscriptNum becomes 0.
+                   self.RemapColumn(dbCursor, 'Transcripts2', 'SourceTranscriptNum', recNumbers['Transcript'],
+                                    'ClipNum > 0 AND TranscriptNum > %s', (transcriptCount, ))
 
                if db != None:
 
@@ -1883,9 +1994,10 @@ class XMLImport(Dialogs.GenForm):
                    if (self.importData == None) or not ('wxMac' in wx.PlatformInfo):
                        progress.Update(self.CalcPercent(19), _('Updating HyperLinks in Documents'))
                    # Get all Document records
-                   SQLText = 'SELECT DocumentNum, XMLText FROM Documents2'
+                   # (Only records with Transana hyperlinks need to be examined.)
+                   SQLText = 'SELECT DocumentNum, XMLText FROM Documents2 WHERE XMLText LIKE %s'
                    SQLText = DBInterface.FixQuery(SQLText)
-                   dbCursor.execute(SQLText)
+                   dbCursor.execute(SQLText, ('%url="transana:%', ))
                    # create the SQL for updating the XMLText of the Document
                    SQLText = """ UPDATE Documents2
                                  SET XMLText = %s
@@ -1893,14 +2005,20 @@ class XMLImport(Dialogs.GenForm):
                    SQLText = DBInterface.FixQuery(SQLText)
                    # For each Document record ...
                    for (DocumentNum, XMLText) in dbCursor.fetchall():
-                       dbCursor2.execute(SQLText, (self.UpdateHyperlinks(XMLText, recNumbers), DocumentNum))
+                       # Update the hyperlinks
+                       newXMLText = self.UpdateHyperlinks(XMLText, recNumbers)
+                       # Only records that have changed need to be saved
+                       if newXMLText != XMLText:
+                           self.QueueQuery(dbCursor2, SQLText, (newXMLText, DocumentNum))
+                   self.FlushQueries(dbCursor2)
 
                    if (self.importData == None) or not ('wxMac' in wx.PlatformInfo):
                        progress.Update(self.CalcPercent(20), _('Updating HyperLinks in Quotes'))
                    # Get all Quote records
-                   SQLText = 'SELECT QuoteNum, XMLText FROM Quotes2'
+                   # (Only records with Transana hyperlinks need to be examined.)
+                   SQLText = 'SELECT QuoteNum, XMLText FROM Quotes2 WHERE XMLText LIKE %s'
                    SQLText = DBInterface.FixQuery(SQLText)
-                   dbCursor.execute(SQLText)
+                   dbCursor.execute(SQLText, ('%url="transana:%', ))
                    # create the SQL for updating the XMLText of the Quote
                    SQLText = """ UPDATE Quotes2
                                  SET XMLText = %s
@@ -1908,14 +2026,20 @@ class XMLImport(Dialogs.GenForm):
                    SQLText = DBInterface.FixQuery(SQLText)
                    # For each Quote record ...
                    for (QuoteNum, XMLText) in dbCursor.fetchall():
-                       dbCursor2.execute(SQLText, (self.UpdateHyperlinks(XMLText, recNumbers), QuoteNum))
+                       # Update the hyperlinks
+                       newXMLText = self.UpdateHyperlinks(XMLText, recNumbers)
+                       # Only records that have changed need to be saved
+                       if newXMLText != XMLText:
+                           self.QueueQuery(dbCursor2, SQLText, (newXMLText, QuoteNum))
+                   self.FlushQueries(dbCursor2)
 
                    if (self.importData == None) or not ('wxMac' in wx.PlatformInfo):
                        progress.Update(self.CalcPercent(21), _('Updating HyperLinks in Transcripts'))
                    # Get all Transcript records
-                   SQLText = 'SELECT TranscriptNum, RTFText FROM Transcripts2'
+                   # (Only records with Transana hyperlinks need to be examined.)
+                   SQLText = 'SELECT TranscriptNum, RTFText FROM Transcripts2 WHERE RTFText LIKE %s'
                    SQLText = DBInterface.FixQuery(SQLText)
-                   dbCursor.execute(SQLText)
+                   dbCursor.execute(SQLText, ('%url="transana:%', ))
                    # create the SQL for updating the RTFText of the Transcript
                    SQLText = """ UPDATE Transcripts2
                                  SET RTFText = %s
@@ -1923,7 +2047,12 @@ class XMLImport(Dialogs.GenForm):
                    SQLText = DBInterface.FixQuery(SQLText)
                    # For each Transcript record ...
                    for (QuoteNum, XMLText) in dbCursor.fetchall():
-                       dbCursor2.execute(SQLText, (self.UpdateHyperlinks(XMLText, recNumbers), QuoteNum))
+                       # Update the hyperlinks
+                       newXMLText = self.UpdateHyperlinks(XMLText, recNumbers)
+                       # Only records that have changed need to be saved
+                       if newXMLText != XMLText:
+                           self.QueueQuery(dbCursor2, SQLText, (newXMLText, QuoteNum))
+                   self.FlushQueries(dbCursor2)
 
                    # Close the secondary database cursor
                    dbCursor2.close()
@@ -1981,6 +2110,22 @@ class XMLImport(Dialogs.GenForm):
        except:
            pass
 
+       # If the import was completed ...
+       if SQLText == 'COMMIT':
+           # ... we don't need its journal any more
+           self.DeleteJournal()
+       # If the import failed after some records were committed at a checkpoint ...
+       elif self.useCheckpoints and (self.checkpointLine > 0):
+           # ... tell the user the import can be resumed
+           if 'unicode' in wx.PlatformInfo:
+               # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+               prompt = unicode(_('The records before line %d of file "%s" have been imported.\nImport this file again to resume the import from that point.'), 'utf8')
+           else:
+               prompt = _('The records before line %d of file "%s" have been imported.\nImport this file again to resume the import from that point.')
+           infodlg = Dialogs.InfoDialog(self, prompt % (self.checkpointLine, self.XMLFile.GetValue()))
+           infodlg.ShowModal()
+           infodlg.Destroy()
+
        # If importData is NOT passed in ...
        if self.importData == None:
            # .. then we need to update Transana's Database Tree, which we don't need to do when importData IS passed in.
@@ -2000,6 +2145,305 @@ class XMLImport(Dialogs.GenForm):
        # DO NOT CLOSE THE DATABASE!!!!
        # db.close()
 
+    def Checkpoint(self, dbCursor, lineCount, state):
+        """ Commit the records imported through line lineCount of the import file, and save the state of the import
+            (the number translation dictionaries and so on) in the journal so an interrupted import can be resumed
+            from here.  The journal is saved after the COMMIT, so an interruption in between just means the last
+            batch gets imported again. """
+        # Save any rows still queued
+        self.FlushQueries(dbCursor)
+        # Commit the records imported so far
+        dbCursor.execute('COMMIT')
+        # Remember where we are in the import file
+        self.checkpointLine = lineCount
+        # Add the rest of the import state and save the journal
+        state['lineCount'] = lineCount
+        state['XMLVersionNumber'] = self.XMLVersionNumber
+        state['importEncoding'] = self.importEncoding
+        self.SaveJournal(state)
+        # Begin the next batch's Database Transaction
+        dbCursor.execute('BEGIN')
+
+    def GetJournalKey(self):
+        """ Identify the import files and the database they are being imported into, so a journal is only used to
+            resume the same import. """
+        files = []
+        for filename in self.importFiles:
+            filename = os.path.abspath(filename)
+            # If a file has been changed since the journal was saved, its size or modification time will be different
+            fileStat = os.stat(filename)
+            files.append((filename, fileStat.st_size, fileStat.st_mtime))
+        return (tuple(files), TransanaGlobal.configData.host, TransanaGlobal.configData.database)
+
+    def GetJournalFilename(self):
+        """ Get the name of the import journal file """
+        return os.path.join(TransanaGlobal.configData.GetDefaultProfilePath(), 'XMLImport.journal')
+
+    def LoadJournal(self):
+        """ Load the journal of an interrupted import of the selected file into the current database.
+            Returns the import state saved at the last checkpoint, or None if there is no such journal. """
+        filename = self.GetJournalFilename()
+        # If there's no journal, there's nothing to resume
+        if not os.path.exists(filename):
+            return None
+        # Start exception handling
+        try:
+            # Read the journal
+            f = open(filename, 'rb')
+            try:
+                (version, key, state) = cPickle.load(f)
+            finally:
+                f.close()
+            # If the journal is for this import file and this database ...
+            if (version == JOURNAL_VERSION) and (key == self.GetJournalKey()):
+                # ... return the import state
+                return state
+        # If there's a problem, such as a missing import file or a damaged journal ...
+        except:
+
+            if DEBUG or DEBUG_Exceptions:
+                print "XMLImport.LoadJournal():"
+                print sys.exc_info()[0]
+                print sys.exc_info()[1]
+
+        # ... there's no import to resume
+        return None
+
+    def SaveJournal(self, state):
+        """ Save the import state in the journal """
+        filename = self.GetJournalFilename()
+        # Write the journal to a temporary file, then replace the old journal, so a failed save can't leave a damaged journal
+        f = open(filename + '.tmp', 'wb')
+        try:
+            cPickle.dump((JOURNAL_VERSION, self.GetJournalKey(), state), f, cPickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rename(filename + '.tmp', filename)
+
+    def DeleteJournal(self):
+        """ Delete the import journal, if there is one """
+        filename = self.GetJournalFilename()
+        if os.path.exists(filename):
+            os.remove(filename)
+
+    def OpenImportFile(self, filename):
+        """ Open a Transana-XML file for reading """
+        # Check the start of the XML file to see if it was compressed during export
+        f = file(filename, 'rb')
+        compressed = (f.read(2) == '\x1f\x8b')
+        f.close()
+        # If the XML file is compressed ...
+        if compressed:
+            # ... open it so it is decompressed as it is read
+            return io.BufferedReader(gzip.GzipFile(filename, 'rb'), TransanaConstants.exportBufferSize)
+        # If the XML file is not compressed ...
+        else:
+            # ... open the XML file
+            return file(filename, 'r')
+
+    def ReadImportFileHeader(self, filename):
+        """ Read the header of a Transana-XML file.  Returns an empty header if the file can't be read, leaving
+            Import() to report the problem. """
+        try:
+            f = self.OpenImportFile(filename)
+        except IOError:
+            return {}
+        try:
+            return XMLDelta.ReadExportHeader(f)
+        finally:
+            f.close()
+
+    def LoadDelta(self, filename):
+        """ Load an export file that only contains the changes since an earlier export """
+        f = self.OpenImportFile(filename)
+        try:
+            return XMLDelta.LoadDelta(f)
+        finally:
+            f.close()
+
+    def GetImportFiles(self):
+        """ Get the list of files to import.  That's the selected file, unless it only contains the changes since an
+            earlier export.  Then the earlier export comes first, preceded by the export IT was made against if it
+            also only contains changes, and so on.  Returns None if the user cancels. """
+        importFiles = [self.XMLFile.GetValue()]
+        # Read the header of the first file
+        header = self.ReadImportFileHeader(importFiles[0])
+        # While the first file only contains changes ...
+        while header.has_key('DeltaOf'):
+            # ... ask the user for the earlier export
+            if 'unicode' in wx.PlatformInfo:
+                # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+                prompt = unicode(_('File "%s" only contains the changes since an earlier export.\nPlease select the earlier export.'), 'utf8')
+            else:
+                prompt = _('File "%s" only contains the changes since an earlier export.\nPlease select the earlier export.')
+            infodlg = Dialogs.InfoDialog(self, prompt % importFiles[0])
+            infodlg.ShowModal()
+            infodlg.Destroy()
+            fs = wx.FileSelector(_("Select the earlier export"),
+                            os.path.dirname(importFiles[0]),
+                            "",
+                            "", 
+                            _("Transana-XML Files (*.tra)|*.tra|Compressed Transana-XML Files (*.tra.gz)|*.tra.gz|XML Files (*.xml)|*.xml|All files (*.*)|*.*"), 
+                            wx.OPEN | wx.FILE_MUST_EXIST)
+            # If the user cancels, the import is cancelled
+            if fs == "":
+                return None
+            baseHeader = self.ReadImportFileHeader(fs)
+            # If the selected file is the export the changes were made against ...
+            if baseHeader.get('ExportID', None) == header['DeltaOf']:
+                # ... it comes first
+                importFiles.insert(0, fs)
+                header = baseHeader
+            # Otherwise, tell the user, and ask again
+            else:
+                if 'unicode' in wx.PlatformInfo:
+                    # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+                    prompt = unicode(_('File "%s" is not the export that the changes in file "%s" were made against.'), 'utf8')
+                else:
+                    prompt = _('File "%s" is not the export that the changes in file "%s" were made against.')
+                errordlg = Dialogs.ErrorDialog(self, prompt % (fs, importFiles[0]))
+                errordlg.ShowModal()
+                errordlg.Destroy()
+        return importFiles
+
+    def QueueQuery(self, dbCursor, query, values, record=None):
+        """ Queue the values for a query that doesn't return data, such as an INSERT.  Queued values are sent to the
+            database in batches with executemany(), which is much faster than executing the query for each record.
+            record is the (objectType, lineCount) of the import record the values come from, for error messages. """
+        # If this is the first time we've seen this query ...
+        if not self.queuedQueries.has_key(query):
+            # ... start lists of values and records for it
+            self.queuedQueries[query] = []
+            self.queuedRecords[query] = []
+        # Add the values and their record to the queue
+        self.queuedQueries[query].append(values)
+        self.queuedRecords[query].append(record)
+        # If we have a full batch ...
+        if len(self.queuedQueries[query]) >= TransanaConstants.importBatchSize:
+            # ... send the queued values to the database
+            self.FlushQueries(dbCursor)
+
+    def FlushQueries(self, dbCursor):
+        """ Send all queued query values to the database.  If a batch can't be saved, it is undone and its rows are
+            saved one at a time, so only the rows that fail are lost.  If a row fails, the import record it came
+            from is kept in self.failedQueuedRecord and the row's error is raised once the queue has been saved. """
+        # Initialize the first row that couldn't be saved, as (record, exception information)
+        failure = None
+        try:
+            # For each query with queued values, in the order they were first queued ...
+            for (query, valuesList) in self.queuedQueries.items():
+                if len(valuesList) == 0:
+                    continue
+                # Mark the start of the batch, so a failed batch can be undone
+                dbCursor.execute('SAVEPOINT ImportBatch')
+                try:
+                    # Execute the query for all its values at once
+                    dbCursor.executemany(query, valuesList)
+                # If that fails ...
+                except:
+                    # ... undo any part of the batch that was saved ...
+                    dbCursor.execute('ROLLBACK TO SAVEPOINT ImportBatch')
+                    # ... and save the rows one at a time
+                    for (values, record) in zip(valuesList, self.queuedRecords[query]):
+                        try:
+                            dbCursor.execute(query, values)
+                        except:
+                            # Remember the first row that fails
+                            if failure == None:
+                                failure = (record, sys.exc_info())
+                # The batch is finished
+                dbCursor.execute('RELEASE SAVEPOINT ImportBatch')
+        finally:
+            # Clear the queue, even if it couldn't all be saved, so failed rows aren't sent again
+            self.queuedQueries.clear()
+            self.queuedRecords.clear()
+        # If a row couldn't be saved ...
+        if failure != None:
+            # ... remember its record and raise its error
+            (self.failedQueuedRecord, excInfo) = failure
+            raise excInfo[0], excInfo[1], excInfo[2]
+
+    def SaveQueuedRecords(self, dbCursor, skipCheck, skipValue):
+        """ Send all queued query values to the database from outside the import's record error handling, telling
+            the user if they can't be saved.  Returns (contin, skipValue), for whether the import can continue and
+            the new Skip Error Messages setting. """
+        try:
+            self.FlushQueries(dbCursor)
+        except:
+            # If we don't know which record failed, leave the error to the import's own error handling
+            if self.failedQueuedRecord == None:
+                raise
+            if DEBUG or DEBUG_Exceptions:
+                import traceback
+                traceback.print_exc(file=sys.stdout)
+            # If we haven't been told to skip error messages of this type ...
+            if not skipValue:
+                # ... tell the user about the record and interrupt the import
+                return (False, self.ReportFailedRecord(skipCheck))
+            # Otherwise, the error is skipped
+            self.failedQueuedRecord = None
+        return (True, skipValue)
+
+    def ReportFailedRecord(self, skipCheck):
+        """ Tell the user that a queued row could not be saved, naming the import record it came from.
+            Call this while handling the exception.  Returns the value of the Skip Error Messages checkbox. """
+        # Get the record the failed row came from
+        (objectType, lineCount) = self.failedQueuedRecord
+        self.failedQueuedRecord = None
+        # Build the error message
+        if 'unicode' in wx.PlatformInfo:
+            # Encode with UTF-8 rather than TransanaGlobal.encoding because this is a prompt, not DB Data.
+            prompt = unicode(_('A problem has been detected importing a %s record'), 'utf8')
+            prompt2 = unicode(_('You need to correct this record in XML file %s.'), 'utf8')
+            prompt3 = unicode(_('The %s record ends at line %d.'), 'utf8')
+        else:
+            prompt = _('A problem has been detected importing a %s record')
+            prompt2 = _('You need to correct this record in XML file %s.')
+            prompt3 = _('The %s record ends at line %d.')
+        msg = prompt % objectType + '.\n' + prompt2 % self.XMLFile.GetValue() + '\n' + prompt3 % (objectType, lineCount)
+        msg += u"\n\n%s\n%s" % (sys.exc_info()[0], sys.exc_info()[1])
+        # Display the error message to the user
+        errordlg = Dialogs.ErrorDialog(None, msg, includeSkipCheck=skipCheck)
+        errordlg.ShowModal()
+        # if skipping error messages is an option ...
+        if skipCheck:
+            # ... see if the Skip Error Messages checkbox has been checked
+            skipValue = errordlg.GetSkipCheck()
+        else:
+            skipValue = False
+        errordlg.Destroy()
+        return skipValue
+
+    def RemapColumn(self, dbCursor, table, column, mapping, whereClause, whereValues):
+        """ Replace the old object numbers in a table column with the new numbers from mapping (a dictionary of
+            old number : new number), for the records selected by whereClause.  Old numbers that aren't in mapping
+            become 0.  This is done with a single UPDATE query that uses a temporary mapping table. """
+        # If we're using MySQL, we must use DROP TEMPORARY TABLE, as DROP TABLE would end our transaction
+        if TransanaConstants.DBInstalled in ['MySQLdb-embedded', 'MySQLdb-server', 'PyMySQL']:
+            dropQuery = 'DROP TEMPORARY TABLE IF EXISTS ImportNumberMap'
+        else:
+            dropQuery = 'DROP TABLE IF EXISTS ImportNumberMap'
+        # Create the temporary mapping table
+        dbCursor.execute(dropQuery)
+        dbCursor.execute('CREATE TEMPORARY TABLE ImportNumberMap (OldNum INTEGER NOT NULL PRIMARY KEY, NewNum INTEGER NOT NULL)')
+        try:
+            # Fill the mapping table in batches
+            query = DBInterface.FixQuery('INSERT INTO ImportNumberMap (OldNum, NewNum) VALUES (%s, %s)')
+            for (oldNum, newNum) in mapping.items():
+                self.QueueQuery(dbCursor, query, (oldNum, newNum))
+            self.FlushQueries(dbCursor)
+            # Update the column from the mapping table
+            query = """ UPDATE %s
+                          SET %s = COALESCE((SELECT NewNum FROM ImportNumberMap WHERE OldNum = %s.%s), 0)
+                          WHERE """ % (table, column, table, column)
+            query = DBInterface.FixQuery(query + whereClause)
+            dbCursor.execute(query, whereValues)
+        finally:
+            # Remove the temporary mapping table
+            dbCursor.execute(dropQuery)
+
     def CalcPercent(self, num):
         """ Calculate the Percent value to be displayed in the Progress Bar """
         numCategories = 22.0
@@ -2013,17 +2457,16 @@ class XMLImport(Dialogs.GenForm):
 
             # If we're not reading a file encoded with UTF-8 encoding, we need to ...
             if (self.importEncoding != 'utf8'):
-                # ... initialize a STRING variable.  (txt is UNICODE, but the WRONG ENCODING.  Damn.)
-                s = ''
+                # ... get the original bytes as a STRING.  (txt is UNICODE, but the WRONG ENCODING.  Damn.)
 
                 # NOTE:  We shouldn't have to do this.  I must've screwed up the encoding at some point in XMLExport.py.
                 #        In essence, we need txt.decode('utf8').decode(self.importEncoding), but that 
 
                 if self.importEncoding != 'latin1':
-                    # For each character in the unicode TXT string ...
-                    for x in txt.decode('utf8'):
-                        # ... add the appropriate character to the string S variable
-                        s += chr(ord(x))
+                    # Each character of the unicode TXT string holds one of the original bytes.  Latin-1 maps characters
+                    # 0 - 255 to the bytes with the same values, so encoding with it recovers all the bytes at once.
+                    # (Characters above 255 raise an exception, just as chr(ord(x)) would.)
+                    s = txt.decode('utf8').encode('latin1')
                 else:
                     s = txt
 
@@ -2043,8 +2486,9 @@ class XMLImport(Dialogs.GenForm):
                 txt = unicode(txt, self.importEncoding)
             # Process Escaped characters (& >, <)
             txt = self.UnEscape(txt)
-            # If we ARE using UTF-8 ....
-            if (self.importEncoding == 'utf8') and (self.XMLVersionNumber in ['1.1', '1.2', '1.3', '1.4', '1.5', '1.6', '1.7']):
+            # If we ARE using UTF-8 ....  (The database encoding leaves 7-bit ASCII text unchanged, so we can skip it for most lines.)
+            if (self.importEncoding == 'utf8') and (self.XMLVersionNumber in ['1.1', '1.2', '1.3', '1.4', '1.5', '1.6', '1.7']) and \
+               (NON_ASCII_RE.search(txt) != None):
                 # ... perform the UTF-8 encoding needed for the database.
                 txt = DBInterface.ProcessDBDataForUTF8Encoding(txt)
 
@@ -2123,7 +2567,7 @@ class XMLImport(Dialogs.GenForm):
                              TransanaGlobal.configData.videoPath,
                              "",
                              "", 
-                             _("Transana-XML Files (*.tra)|*.tra|XML Files (*.xml)|*.xml|All files (*.*)|*.*"), 
+                             _("Transana-XML Files (*.tra)|*.tra|Compressed Transana-XML Files (*.tra.gz)|*.tra.gz|XML Files (*.xml)|*.xml|All files (*.*)|*.*"), 
                              wx.OPEN | wx.FILE_MUST_EXIST)
         # If user didn't cancel ..
         if fs != "":